@@ -0,0 +1,198 @@
+"""Livraison en cache de l'interface ``/ui`` et des fichiers statiques.
+
+Les fichiers de ``app/static`` sont chargés une seule fois en mémoire,
+avec leurs variantes précompressées (gzip, et brotli si le paquet
+``brotli`` est installé).  Chaque fichier reçoit une URL « empreinte »
+contenant un hash de son contenu (``js/app.3f2a9c1b7d4e.js``) servie avec
+``Cache-Control: immutable`` et un ETag fort : une visite répétée ne
+retélécharge rien tant que le contenu ne change pas.
+
+Le template ``index.html`` est lui aussi gardé en mémoire ; ses
+références ``/static/...`` sont réécrites vers les URLs empreintes.  En
+développement (``UI_RELOAD=1``), les fichiers sont relus dès que leur date
+de modification change.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import pathlib
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response
+
+try:  # dépendance optionnelle
+    import brotli
+except ImportError:  # pragma: no cover - dépend de l'environnement
+    brotli = None
+
+
+BASE_DIR = pathlib.Path(__file__).resolve().parent
+STATIC_DIR = BASE_DIR / "static"
+TEMPLATE_PATH = BASE_DIR / "templates" / "index.html"
+STATIC_PREFIX = "/static/"
+
+UI_RELOAD = os.getenv("UI_RELOAD", "0") == "1"
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+# Fichiers trop petits pour que la compression vaille le coup
+MIN_COMPRESS_SIZE = 512
+
+
+@dataclass
+class Asset:
+    """Contenu d'un fichier et ses variantes encodées."""
+
+    body: bytes
+    media_type: str
+    digest: str
+    mtime: float = 0.0
+    variants: Dict[str, bytes] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, body: bytes, media_type: str, mtime: float = 0.0) -> "Asset":
+        asset = cls(body=body, media_type=media_type, digest=hashlib.sha256(body).hexdigest(), mtime=mtime)
+        if len(body) >= MIN_COMPRESS_SIZE:
+            # mtime=0 : sortie gzip déterministe
+            asset.variants["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+            if brotli is not None:
+                asset.variants["br"] = brotli.compress(body)
+        return asset
+
+    def etag(self, encoding: Optional[str] = None) -> str:
+        # ETag fort : une valeur distincte par encodage
+        suffix = f"-{encoding}" if encoding else ""
+        return f'"{self.digest[:32]}{suffix}"'
+
+    def response(self, request: Request, cache_control: str) -> Response:
+        encoding = _negotiate(request.headers.get("accept-encoding", ""), self.variants)
+        etag = self.etag(encoding)
+        headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+        if etag in _parse_if_none_match(request.headers.get("if-none-match", "")):
+            return Response(status_code=304, headers=headers)
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        body = self.variants[encoding] if encoding else self.body
+        if request.method == "HEAD":
+            headers["Content-Length"] = str(len(body))
+            body = b""
+        return Response(body, media_type=self.media_type, headers=headers)
+
+
+def _negotiate(accept_encoding: str, variants: Dict[str, bytes]) -> Optional[str]:
+    accepted = {part.split(";")[0].strip().lower() for part in accept_encoding.split(",")}
+    for encoding in ("br", "gzip"):
+        if encoding in variants and encoding in accepted:
+            return encoding
+    return None
+
+
+def _parse_if_none_match(value: str) -> set:
+    return {tag.strip().removeprefix("W/") for tag in value.split(",") if tag.strip()}
+
+
+def fingerprint(path: str, digest: str) -> str:
+    """``js/app.js`` -> ``js/app.<hash>.js``."""
+    stem, dot, ext = path.rpartition(".")
+    if not dot:
+        return f"{path}.{digest[:12]}"
+    return f"{stem}.{digest[:12]}.{ext}"
+
+
+class StaticAssets:
+    """Application ASGI servant ``app/static`` depuis la mémoire."""
+
+    def __init__(self, directory: pathlib.Path = STATIC_DIR, reload: bool = UI_RELOAD):
+        self.directory = directory
+        self.reload = reload
+        self.assets: Dict[str, Asset] = {}
+        self.fingerprinted: Dict[str, str] = {}
+        self.scan()
+
+    def scan(self) -> None:
+        assets = {}
+        for file in sorted(self.directory.rglob("*")):
+            if not file.is_file():
+                continue
+            rel = file.relative_to(self.directory).as_posix()
+            media_type = mimetypes.guess_type(rel)[0] or "application/octet-stream"
+            if media_type.startswith("text/") or media_type in ("application/javascript", "text/javascript"):
+                media_type += "; charset=utf-8"
+            assets[rel] = Asset.build(file.read_bytes(), media_type, file.stat().st_mtime)
+        self.assets = assets
+        self.fingerprinted = {fingerprint(rel, a.digest): rel for rel, a in assets.items()}
+
+    def _stale(self) -> bool:
+        for rel, asset in self.assets.items():
+            try:
+                if (self.directory / rel).stat().st_mtime != asset.mtime:
+                    return True
+            except FileNotFoundError:
+                return True
+        return False
+
+    def url_for(self, rel: str) -> str:
+        """URL publique (empreinte) d'un fichier, ou l'URL brute s'il est inconnu."""
+        asset = self.assets.get(rel)
+        if asset is None:
+            return STATIC_PREFIX + rel
+        return STATIC_PREFIX + fingerprint(rel, asset.digest)
+
+    async def __call__(self, scope, receive, send) -> None:
+        request = Request(scope, receive)
+        if request.method not in ("GET", "HEAD"):
+            response = PlainTextResponse("Method Not Allowed", status_code=405)
+            await response(scope, receive, send)
+            return
+
+        if self.reload and self._stale():
+            self.scan()
+
+        root_path = scope.get("root_path", "")
+        path = scope["path"][len(root_path):] if scope["path"].startswith(root_path) else scope["path"]
+        path = path.lstrip("/")
+
+        rel = self.fingerprinted.get(path)
+        if rel is not None:
+            response = self.assets[rel].response(request, IMMUTABLE)
+        elif path in self.assets:
+            # URL non empreinte : le navigateur doit revalider (ETag)
+            response = self.assets[path].response(request, REVALIDATE)
+        else:
+            response = PlainTextResponse("Not Found", status_code=404)
+        await response(scope, receive, send)
+
+
+_STATIC_REF = re.compile(r"""(?P<q>["'])/static/(?P<path>[^"'?#]+)(?:\?[^"'#]*)?(?P=q)""")
+
+
+class UITemplate:
+    """Page ``/ui`` gardée en mémoire, avec les URLs statiques réécrites."""
+
+    def __init__(self, static: StaticAssets, path: pathlib.Path = TEMPLATE_PATH, reload: bool = UI_RELOAD):
+        self.static = static
+        self.path = path
+        self.reload = reload
+        self.asset: Optional[Asset] = None
+        self.load()
+
+    def load(self) -> None:
+        html = self.path.read_text(encoding="utf-8")
+        html = _STATIC_REF.sub(lambda m: f"{m['q']}{self.static.url_for(m['path'])}{m['q']}", html)
+        self.asset = Asset.build(html.encode("utf-8"), "text/html; charset=utf-8", self.path.stat().st_mtime)
+
+    def response(self, request: Request) -> Response:
+        if self.reload:
+            if self.static._stale():
+                self.static.scan()
+                self.load()
+            elif self.path.stat().st_mtime != self.asset.mtime:
+                self.load()
+        # La page elle-même est revalidée à chaque visite (304 si inchangée)
+        return self.asset.response(request, REVALIDATE)
@@ -0,0 +1,193 @@
+"""Journal d'audit écrit en différé (write-behind).
+
+Les mutations (ajout / retrait d'un joueur dans une équipe, création,
+modification ou suppression d'un joueur par un admin) appellent ``log.record(...)`` : l'événement est
+ajouté à un tampon en mémoire, sans requête SQL ni attente.  Un thread
+d'écriture vide le tampon dans la table ``audit_events`` (ajout seul)
+par lots de ``AUDIT_BATCH_SIZE`` lignes, dès qu'un lot est plein ou au
+plus tard toutes les ``AUDIT_FLUSH_INTERVAL`` secondes, en un seul
+``INSERT`` multi-lignes.
+
+Le tampon est borné (``AUDIT_BUFFER_SIZE``) : s'il est plein (base lente
+ou indisponible), ``record`` attend qu'il se vide (contre-pression), au
+plus ``AUDIT_BLOCK_TIMEOUT`` secondes, puis abandonne l'événement en le
+comptant dans ``dropped``.  Les événements encore en mémoire sont écrits
+à l'arrêt du serveur ; un arrêt brutal peut perdre au plus le contenu du
+tampon.
+"""
+
+import logging
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import insert
+
+from . import models
+
+
+logger = logging.getLogger(__name__)
+
+AUDIT_ENABLED = os.getenv("AUDIT_ENABLED", "1") == "1"
+AUDIT_BUFFER_SIZE = int(os.getenv("AUDIT_BUFFER_SIZE", "10000"))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "1.0"))
+AUDIT_BLOCK_TIMEOUT = float(os.getenv("AUDIT_BLOCK_TIMEOUT", "5.0"))
+
+TEAM_ADD = "team.add_player"
+TEAM_REMOVE = "team.remove_player"
+PLAYER_CREATE = "player.create"
+PLAYER_UPDATE = "player.update"
+PLAYER_DELETE = "player.delete"
+
+
+class AuditLog:
+    """Tampon borné d'événements et thread d'écriture par lots."""
+
+    def __init__(
+        self,
+        session_factory=None,
+        capacity: int = AUDIT_BUFFER_SIZE,
+        batch_size: int = AUDIT_BATCH_SIZE,
+        flush_interval: float = AUDIT_FLUSH_INTERVAL,
+        block_timeout: float = AUDIT_BLOCK_TIMEOUT,
+        enabled: bool = AUDIT_ENABLED,
+    ):
+        self.session_factory = session_factory
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.block_timeout = block_timeout
+        self.enabled = enabled
+        self.written = 0
+        self.blocked = 0
+        self.dropped = 0
+        self._buffer: deque = deque()
+        self._cond = threading.Condition()
+        # Un seul écrivain à la fois (thread de fond ou ``flush``)
+        self._write_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def record(
+        self,
+        action: str,
+        user_id: Optional[int],
+        team_id: Optional[int] = None,
+        player_id: Optional[int] = None,
+        details: Optional[dict] = None,
+    ) -> bool:
+        """Ajoute un événement au tampon ; ``False`` s'il a dû être abandonné."""
+        if not self.enabled:
+            return True
+        event = {
+            "created_at": datetime.utcnow(),
+            "user_id": user_id,
+            "action": action,
+            "team_id": team_id,
+            "player_id": player_id,
+            "details": details,
+        }
+        with self._cond:
+            if self._thread is None:
+                self._start()
+            if len(self._buffer) >= self.capacity:
+                # Contre-pression : on attend que l'écrivain libère de la place
+                self.blocked += 1
+                self._cond.notify_all()
+                if not self._cond.wait_for(lambda: len(self._buffer) < self.capacity, self.block_timeout):
+                    self.dropped += 1
+                    logger.warning("audit buffer full, event dropped (%s)", action)
+                    return False
+            self._buffer.append(event)
+            if len(self._buffer) >= self.batch_size:
+                self._cond.notify_all()
+        return True
+
+    def flush(self) -> int:
+        """Écrit tout le tampon maintenant ; retourne le nombre de lignes écrites."""
+        written = 0
+        while True:
+            batch = self._take()
+            if not batch:
+                return written
+            if not self._write(batch):
+                return written
+            written += len(batch)
+
+    def stop(self) -> None:
+        """Arrête le thread d'écriture après avoir vidé le tampon."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout=self.block_timeout + self.flush_interval)
+        self.flush()
+        with self._cond:
+            self._thread = None
+            self._stopping = False
+
+    # -----------------------------------------------------------------
+
+    def _start(self) -> None:
+        # Appelé sous ``_cond``
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def _session(self):
+        if self.session_factory is None:
+            from .database import SessionLocal
+
+            return SessionLocal()
+        return self.session_factory()
+
+    def _take(self) -> List[dict]:
+        with self._cond:
+            n = min(len(self._buffer), self.batch_size)
+            batch = [self._buffer.popleft() for _ in range(n)]
+            if batch:
+                self._cond.notify_all()  # producteurs en attente de place
+            return batch
+
+    def _write(self, batch: List[dict]) -> bool:
+        with self._write_lock:
+            try:
+                with self._session() as db:
+                    db.execute(insert(models.AuditEvent), batch)
+                    db.commit()
+            except Exception:
+                logger.exception("audit flush failed, %d events kept", len(batch))
+                with self._cond:
+                    # Remis en tête : l'ordre est conservé pour la prochaine tentative
+                    self._buffer.extendleft(reversed(batch))
+                return False
+        self.written += len(batch)
+        return True
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: len(self._buffer) >= self.batch_size or self._stopping,
+                    self.flush_interval,
+                )
+                if self._stopping:
+                    return
+            batch = self._take()
+            if batch and not self._write(batch):
+                # Base indisponible : on réessaie au prochain intervalle
+                with self._cond:
+                    self._cond.wait(self.flush_interval)
+
+
+log = AuditLog()
+
+
+def record(action: str, user_id: Optional[int], **fields) -> bool:
+    return log.record(action, user_id, **fields)
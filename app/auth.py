@@ -9,10 +9,9 @@ import os
 from datetime import datetime, timedelta
 from typing import Optional
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from jose import JWTError
 from sqlalchemy.orm import Session
 
 from . import models, schemas
@@ -23,32 +22,73 @@ from .dependencies import get_db
 SECRET_KEY = os.getenv("SECRET_KEY", "changeme")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
+# Ticket d'ouverture du flux SSE (passé dans l'URL, donc très court et limité à /events)
+SSE_TICKET_EXPIRE_SECONDS = int(os.getenv("SSE_TICKET_EXPIRE_SECONDS", "30"))
+SSE_SCOPE = "sse"
 
-# Initialisation du contexte de hachage pour les mots de passe
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+# Hachage rapide (tests uniquement) : Argon2 au coût minimal.  Les hachés
+# produits restent des hachés Argon2 valides, vérifiables avec les
+# paramètres normaux (et inversement).
+PASSWORD_HASH_FAST = os.getenv("PASSWORD_HASH_FAST", "0") == "1"
+
+_pwd_context = None
+
+
+def get_pwd_context():
+    """Contexte de hachage des mots de passe, créé au premier usage.
+
+    passlib et le backend Argon2 ne sont importés qu'à ce moment
+    (démarrage plus rapide des workers, des commandes et des tests).
+    """
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+
+        if PASSWORD_HASH_FAST:
+            _pwd_context = CryptContext(
+                schemes=["argon2"],
+                deprecated="auto",
+                argon2__time_cost=1,
+                argon2__memory_cost=8,
+                argon2__parallelism=1,
+            )
+        else:
+            _pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+    return _pwd_context
 
 # Schéma OAuth2 pour récupérer le token dans l'en‑tête Authorization
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def verify_password(password: str, hashed: str) -> bool:
-    return pwd_context.verify(password, hashed)
+    return get_pwd_context().verify(password, hashed)
 
 
 def get_password_hash(password: str) -> str:
     """Génère un haché pour un mot de passe donné."""
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 
 def create_access_token(subject: str) -> str:
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode = {"sub": subject, "exp": expire}
+    # Import différé : jose.jwt charge les backends cryptographiques
+    from jose import jwt
+
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
+def create_sse_ticket(subject: str) -> str:
+    """JWT de ``SSE_TICKET_EXPIRE_SECONDS`` secondes, accepté seulement par ``GET /events``."""
+    expire = datetime.utcnow() + timedelta(seconds=SSE_TICKET_EXPIRE_SECONDS)
+    from jose import jwt
+
+    return jwt.encode({"sub": subject, "exp": expire, "scope": SSE_SCOPE}, SECRET_KEY, algorithm=ALGORITHM)
+
+
 def get_user_by_email(db: Session, email: str) -> Optional[models.User]:
     """Récupère un utilisateur par son email."""
     return db.query(models.User).filter(models.User.email == email).first()
@@ -73,27 +113,47 @@ def authenticate_user(db: Session, email: str, password: str) -> Optional[models
     return user
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
-) -> models.User:
-    """Dépendance FastAPI pour récupérer l'utilisateur courant à partir du token."""
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+def user_from_token(db: Session, token: str, scope: Optional[str] = None) -> Optional[models.User]:
+    """Décode un JWT et retourne l'utilisateur correspondant, ou ``None``.
+
+    ``scope`` doit correspondre à celui du jeton : un ticket SSE n'est pas
+    un jeton d'accès, et inversement.
+    """
+    from jose import jwt
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")  # subject of the token
-        if email is None:
-            raise credentials_exception
+        if email is None or payload.get("scope") != scope:
+            return None
         token_data = schemas.TokenData(email=email)
     except JWTError:
-        raise credentials_exception
-    user = get_user_by_email(db, token_data.email)
+        return None
+    return get_user_by_email(db, token_data.email)
+
+
+async def get_current_user(
+    request: Request,
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+) -> models.User:
+    """Dépendance FastAPI pour récupérer l'utilisateur courant à partir du token.
+
+    Lorsque plusieurs sous-requêtes partagent la même session (``POST /batch``),
+    l'utilisateur résolu est mémorisé dans ``request.state`` et n'est résolu
+    qu'une fois.
+    """
+    cached = getattr(request.state, "auth", None)
+    if cached is not None and cached[0] == token and cached[1] is db:
+        return cached[2]
+    user = user_from_token(db, token)
     if user is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    request.state.auth = (token, db, user)
     return user
 
 
@@ -0,0 +1,249 @@
+"""Synchronisation incrémentale du catalogue depuis un fichier source (CSV).
+
+``seed.seed()`` n'importe les joueurs que si la table est vide, et un
+rechargement complet réécrirait tout le catalogue pour quelques lignes
+modifiées.  Ici, le fichier est lu en flux, ligne par ligne (mêmes
+colonnes et même normalisation que le seed), et chaque ligne est
+rapprochée d'un joueur par sa clé naturelle ``(name, club)`` :
+
+- l'empreinte du contenu normalisé (poste, coût, âge…) est comparée à
+  ``players.source_hash`` (empreinte de la dernière synchronisation, ou
+  recalculée depuis les colonnes pour un joueur jamais synchronisé) ;
+- seules les différences sont écrites, par lots de ``SYNC_BATCH_SIZE`` :
+  insertions, mises à jour (réactivation comprise) et suppressions
+  logiques (``deleted_at``) des joueurs absents du fichier ;
+- le tout dans une seule transaction, suivie d'un événement catalogue par
+  type de changement (shards, instantané, index, cache des équipes) et
+  d'un événement d'audit par joueur créé, modifié (anciennes et nouvelles
+  valeurs), réactivé ou supprimé, au nom de l'admin (``None`` en ligne de
+  commande).
+
+Un joueur supprimé logiquement disparaît du catalogue (liste, fiche,
+joueurs similaires) et ne peut plus être recruté, mais reste dans les
+équipes et l'historique qui le référencent.  Un joueur qui change de club
+change de clé : l'ancienne fiche est supprimée, une nouvelle est créée.
+
+Usage ::
+
+    python -m app.catalog_sync players_v2.csv [--dry-run] [--keep-missing]
+
+ou ``POST /admin/catalog/sync`` (fichier envoyé en multipart).
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from . import audit, events, models
+
+
+SYNC_BATCH_SIZE = int(os.getenv("SYNC_BATCH_SIZE", "1000"))
+
+# Exemples (noms de joueurs) gardés par type de changement dans le bilan
+SAMPLE_SIZE = 20
+
+Row = Tuple[str, str, str, int, Optional[int]]
+# Joueur en base : id, empreinte, supprimé, (poste, coût, âge)
+Stored = Tuple[int, str, bool, Tuple[Optional[str], int, Optional[int]]]
+
+# Colonnes comparées pour le détail des événements d'audit
+AUDITED_FIELDS = ("position", "cost", "age")
+
+
+def row_hash(name: str, club: str, position: str, cost: int, age: Optional[int]) -> str:
+    """Empreinte du contenu normalisé d'une ligne (champs séparés par ``\\x1f``)."""
+    content = "\x1f".join((name, club, position, str(int(cost)), "" if age is None else str(age)))
+    return hashlib.blake2b(content.encode(), digest_size=16).hexdigest()
+
+
+def parse(lines: Iterable[str]) -> Iterator[Optional[Row]]:
+    """Lignes du CSV -> ``(name, club, position, cost, age)`` (``None`` si la ligne est invalide)."""
+    from . import seed
+
+    for raw in csv.DictReader(lines):
+        parsed = seed.parse_player_row(raw)
+        if parsed is None:
+            yield None
+            continue
+        name, club, position, cost, age = parsed
+        yield name, club, position, int(round(cost)), age
+
+
+def load_stored(db: Session) -> Dict[Tuple[str, str], Stored]:
+    """``(name, club) -> (id, empreinte, supprimé, colonnes)`` pour tout le catalogue, en une requête."""
+    P = models.Player
+    rows = db.execute(
+        select(P.id, P.name, P.club, P.position, P.cost, P.age, P.source_hash, P.deleted_at).order_by(P.id)
+    )
+    stored: Dict[Tuple[str, str], Stored] = {}
+    for pid, name, club, position, cost, age, digest, deleted_at in rows:
+        # Doublon de clé en base (création manuelle) : le plus ancien sert de référence
+        if (name, club) not in stored:
+            digest = digest or row_hash(name, club, position, cost, age)
+            stored[(name, club)] = (pid, digest, deleted_at is not None, (position, cost, age))
+    return stored
+
+
+class _Writer:
+    """Écritures par lots (aucune en simulation) et ids modifiés par type."""
+
+    def __init__(self, db: Session, batch_size: int, dry_run: bool):
+        self.db = db
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.inserts: List[dict] = []
+        self.updates: List[dict] = []
+        self.inserted: List[int] = []
+        self.updated: List[int] = []
+
+    def insert(self, values: dict) -> None:
+        self.inserts.append(values)
+        if len(self.inserts) >= self.batch_size:
+            self.flush()
+
+    def update(self, values: dict) -> None:
+        self.updates.append(values)
+        self.updated.append(values["id"])
+        if len(self.updates) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.inserts and not self.dry_run:
+            self.inserted.extend(self.db.scalars(insert(models.Player).returning(models.Player.id), self.inserts))
+        if self.updates and not self.dry_run:
+            self.db.execute(update(models.Player), self.updates)
+        self.inserts, self.updates = [], []
+
+    def soft_delete(self, ids: List[int], now: datetime) -> None:
+        if self.dry_run:
+            return
+        for start in range(0, len(ids), self.batch_size):
+            batch = ids[start:start + self.batch_size]
+            self.db.execute(update(models.Player).where(models.Player.id.in_(batch)).values(deleted_at=now))
+
+
+def sync(
+    db: Session,
+    lines: Iterable[str],
+    dry_run: bool = False,
+    delete_missing: bool = True,
+    batch_size: int = SYNC_BATCH_SIZE,
+    actor_id: Optional[int] = None,
+) -> dict:
+    """Applique le fichier ``lines`` au catalogue et retourne le bilan des différences.
+
+    Avec ``dry_run``, rien n'est écrit (le bilan est le même).  Sans
+    ``delete_missing``, les joueurs absents du fichier sont conservés.
+    ``actor_id`` : auteur des événements d'audit (admin de la requête).
+    """
+    stored = load_stored(db)
+    writer = _Writer(db, batch_size, dry_run)
+    summary = {
+        "rows": 0, "inserted": 0, "updated": 0, "restored": 0, "deleted": 0,
+        "unchanged": 0, "skipped": 0, "duplicates": 0, "dry_run": dry_run,
+    }
+    samples: Dict[str, List[str]] = {"inserted": [], "updated": [], "restored": [], "deleted": []}
+    # (id, anciennes et nouvelles valeurs) des joueurs modifiés ou réactivés
+    changes: List[Tuple[int, dict]] = []
+
+    def count(kind: str, name: str) -> None:
+        summary[kind] += 1
+        if len(samples[kind]) < SAMPLE_SIZE:
+            samples[kind].append(name)
+
+    seen = set()
+    for row in parse(lines):
+        summary["rows"] += 1
+        if row is None:
+            summary["skipped"] += 1
+            continue
+        name, club, position, cost, age = row
+        key = (name, club)
+        if key in seen:
+            summary["duplicates"] += 1
+            continue
+        seen.add(key)
+
+        digest = row_hash(*row)
+        values = {
+            "name": name, "club": club, "position": position, "cost": cost, "age": age,
+            "source_hash": digest, "deleted_at": None,
+        }
+        current = stored.get(key)
+        if current is None:
+            writer.insert(values)
+            count("inserted", name)
+            continue
+        player_id, stored_digest, deleted, columns = current
+        if deleted or stored_digest != digest:
+            writer.update({"id": player_id, **values})
+            count("restored" if deleted else "updated", name)
+            details = {
+                field: [old, values[field]] for field, old in zip(AUDITED_FIELDS, columns) if old != values[field]
+            }
+            if deleted:
+                details["restored"] = True
+            changes.append((player_id, details))
+        else:
+            summary["unchanged"] += 1
+    writer.flush()
+
+    removed: List[int] = []
+    if delete_missing:
+        for key, (player_id, _digest, deleted, _columns) in stored.items():
+            if not deleted and key not in seen:
+                removed.append(player_id)
+                count("deleted", key[0])
+        writer.soft_delete(removed, datetime.utcnow())
+
+    if dry_run:
+        db.rollback()
+    else:
+        db.commit()
+        for player_id in writer.inserted:
+            audit.record(audit.PLAYER_CREATE, actor_id, player_id=player_id, details={"source": "catalog_sync"})
+        for player_id, details in changes:
+            audit.record(audit.PLAYER_UPDATE, actor_id, player_id=player_id, details={**details, "source": "catalog_sync"})
+        for player_id in removed:
+            audit.record(audit.PLAYER_DELETE, actor_id, player_id=player_id, details={"source": "catalog_sync"})
+        if writer.inserted:
+            events.catalog_changed("created", writer.inserted)
+        if writer.updated:
+            events.catalog_changed("updated", writer.updated)
+        if removed:
+            events.catalog_changed("deleted", removed)
+    summary["samples"] = samples
+    return summary
+
+
+def sync_file(db: Session, path: str, **kwargs) -> dict:
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return sync(db, f, **kwargs)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Synchronise le catalogue des joueurs avec un fichier CSV.")
+    parser.add_argument("path", help="fichier CSV (mêmes colonnes que players_seed.csv)")
+    parser.add_argument("--dry-run", action="store_true", help="affiche le bilan sans rien écrire")
+    parser.add_argument("--keep-missing", action="store_true", help="ne supprime pas les joueurs absents du fichier")
+    parser.add_argument("--batch-size", type=int, default=SYNC_BATCH_SIZE)
+    args = parser.parse_args()
+
+    from .database import SessionLocal
+
+    with SessionLocal() as db:
+        summary = sync_file(
+            db, args.path, dry_run=args.dry_run, delete_missing=not args.keep_missing, batch_size=args.batch_size,
+        )
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -6,11 +6,13 @@ implémente les règles métier comme la vérification du budget lors de
 l'ajout de joueurs dans une équipe.
 """
 
-from typing import List, Optional
+from typing import Dict, List, Optional, Sequence
 from fastapi import HTTPException, status
+from sqlalchemy import Row, func, insert, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from . import models, schemas, auth
+from . import models, schemas, auth, audit, trending
 
 
 def create_user(db: Session, user_in: schemas.UserCreate, is_admin: bool = False) -> models.User:
@@ -45,7 +47,23 @@ def get_player(db: Session, player_id: int) -> Optional[models.Player]:
 
 
 def get_players(db: Session, skip: int = 0, limit: int = 100) -> List[models.Player]:
-    return db.query(models.Player).offset(skip).limit(limit).all()
+    # Joueurs supprimés logiquement (``deleted_at``) exclus du catalogue
+    return db.query(models.Player).filter(models.Player.deleted_at.is_(None)).offset(skip).limit(limit).all()
+
+
+def _player_columns(fields: Sequence[str]):
+    return [getattr(models.Player, f) for f in fields]
+
+
+def get_player_rows(db: Session, fields: Sequence[str], skip: int = 0, limit: int = 100) -> List[Row]:
+    """Comme ``get_players`` mais ne lit que les colonnes ``fields`` (sans ORM)."""
+    stmt = select(*_player_columns(fields)).where(models.Player.deleted_at.is_(None))
+    return db.execute(stmt.offset(skip).limit(limit)).all()
+
+
+def get_player_row(db: Session, player_id: int, fields: Sequence[str]) -> Optional[Row]:
+    stmt = select(*_player_columns(fields)).where(models.Player.id == player_id, models.Player.deleted_at.is_(None))
+    return db.execute(stmt).first()
 
 
 def create_player(db: Session, player_in: schemas.PlayerCreate) -> models.Player:
@@ -56,24 +74,103 @@ def create_player(db: Session, player_in: schemas.PlayerCreate) -> models.Player
     return db_player
 
 
-def update_player(db: Session, db_player: models.Player, update_in: schemas.PlayerUpdate) -> models.Player:
+def create_players(db: Session, players_in: List[schemas.PlayerCreate]) -> List[int]:
+    """Insère plusieurs joueurs en une transaction et retourne leurs ids."""
+    if not players_in:
+        return []
+    db_players = [models.Player(**p.model_dump()) for p in players_in]
+    db.add_all(db_players)
+    db.commit()
+    return [p.id for p in db_players]
+
+
+def update_player(
+    db: Session, db_player: models.Player, update_in: schemas.PlayerUpdate, actor_id: Optional[int] = None
+) -> models.Player:
+    changes = {}
     for field, value in update_in.dict(exclude_unset=True).items():
+        old = getattr(db_player, field)
+        if old != value:
+            changes[field] = [old, value]
         setattr(db_player, field, value)
     db.add(db_player)
     db.commit()
     db.refresh(db_player)
+    if changes:
+        # Journal d'audit (écrit en différé, voir app.audit)
+        audit.record(audit.PLAYER_UPDATE, actor_id, player_id=db_player.id, details=changes)
     return db_player
 
 
-def delete_player(db: Session, db_player: models.Player) -> None:
+def reprice_players(db: Session, player_ids: List[int], factor: float, actor_id: Optional[int] = None) -> int:
+    """Multiplie le coût des joueurs par ``factor`` et valide la transaction en cours.
+
+    Un événement d'audit ``player.update`` par coût modifié, comme une
+    modification par ``PUT /players/{id}``.
+    """
+    changes = {}
+    for player in get_players_by_ids(db, player_ids).values():
+        cost = int(round(player.cost * factor))
+        if cost != player.cost:
+            changes[player.id] = [player.cost, cost]
+        player.cost = cost
+    db.commit()
+    for player_id, change in changes.items():
+        audit.record(audit.PLAYER_UPDATE, actor_id, player_id=player_id, details={"cost": change})
+    return len(changes)
+
+
+def delete_player(db: Session, db_player: models.Player, actor_id: Optional[int] = None) -> None:
+    player_id = db_player.id
     db.delete(db_player)
     db.commit()
+    audit.record(audit.PLAYER_DELETE, actor_id, player_id=player_id)
 
 
 def get_team_by_owner(db: Session, owner_id: int) -> Optional[models.Team]:
     return db.query(models.Team).filter(models.Team.owner_id == owner_id).first()
 
 
+def get_team_row_by_owner(db: Session, owner_id: int) -> Optional[Row]:
+    """``(id, name, owner_id)`` de l'équipe, sans charger ses joueurs."""
+    team = models.Team
+    return db.execute(select(team.id, team.name, team.owner_id).where(team.owner_id == owner_id)).first()
+
+
+def get_team_row(db: Session, team_id: int) -> Optional[Row]:
+    """``(id, name, owner_id)`` de l'équipe ``team_id``, sans charger ses joueurs."""
+    team = models.Team
+    return db.execute(select(team.id, team.name, team.owner_id).where(team.id == team_id)).first()
+
+
+def get_team_player_ids(db: Session, team_id: int) -> List[int]:
+    link = models.team_players
+    return list(db.scalars(select(link.c.player_id).where(link.c.team_id == team_id).order_by(link.c.player_id)))
+
+
+def get_team_player_rows(db: Session, team_id: int, fields: Sequence[str]) -> List[Row]:
+    """Colonnes ``fields`` des joueurs de l'équipe, suivies de leur coût."""
+    stmt = (
+        select(*_player_columns(fields), models.Player.cost)
+        .join(models.team_players, models.team_players.c.player_id == models.Player.id)
+        .where(models.team_players.c.team_id == team_id)
+    )
+    return db.execute(stmt).all()
+
+
+def get_ownership_counts(db: Session, player_ids: Optional[Sequence[int]] = None) -> Dict[int, int]:
+    """Nombre d'équipes qui possèdent chaque joueur (sur la base de ``db``)."""
+    link = models.team_players
+    stmt = select(link.c.player_id, func.count()).group_by(link.c.player_id)
+    if player_ids is not None:
+        stmt = stmt.where(link.c.player_id.in_(player_ids))
+    return dict(db.execute(stmt).all())
+
+
+def count_teams(db: Session) -> int:
+    return db.scalar(select(func.count()).select_from(models.Team)) or 0
+
+
 def create_team(db: Session, owner: models.User, team_in: schemas.TeamCreate, budget: int) -> models.Team:
     """Crée une équipe pour l'utilisateur donné.
 
@@ -100,6 +197,14 @@ MAX_PLAYERS_PER_POSITION = {
     "FWD": 3
 }
 
+def get_players_by_ids(db: Session, player_ids: List[int]) -> Dict[int, models.Player]:
+    """Charge plusieurs joueurs en une seule requête (``IN``)."""
+    if not player_ids:
+        return {}
+    players = db.query(models.Player).filter(models.Player.id.in_(set(player_ids))).all()
+    return {p.id: p for p in players}
+
+
 def add_players_to_team(db: Session, team: models.Team, player_ids: List[int], budget: int) -> models.Team:
     """Ajoute des joueurs avec vérification du budget ET de la tactique (1-4-3-3)."""
     
@@ -110,14 +215,17 @@ def add_players_to_team(db: Session, team: models.Team, player_ids: List[int], b
         pos = p.position if p.position in current_counts else "MID"
         current_counts[pos] += 1
 
-    # 2. On essaie d'ajouter les nouveaux joueurs
+    # 2. On charge tous les joueurs demandés en une requête, puis on essaie de les ajouter
+    players_by_id = get_players_by_ids(db, player_ids)
+    in_team = {p.id for p in team.players}
+    added = []
     for pid in player_ids:
-        player = get_player(db, pid)
-        if not player:
+        player = players_by_id.get(pid)
+        if not player or player.deleted_at is not None:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Player {pid} not found")
         
         # Si le joueur est déjà dans l'équipe, on passe
-        if player in team.players:
+        if pid in in_team:
             continue
 
         # --- VÉRIFICATION TACTIQUE ---
@@ -134,7 +242,9 @@ def add_players_to_team(db: Session, team: models.Team, player_ids: List[int], b
         
         # Si c'est bon, on incrémente le compteur temporaire et on ajoute
         current_counts[pos] += 1
+        in_team.add(pid)
         team.players.append(player)
+        added.append(pid)
 
     # 3. Vérification du Budget
     total_cost = sum(p.cost for p in team.players)
@@ -143,18 +253,129 @@ def add_players_to_team(db: Session, team: models.Team, player_ids: List[int], b
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Budget dépassé !")
 
     db.add(team)
+    # Pas de refresh : la session ne fait pas expirer les objets au commit
+    # (voir ``database.SessionLocal``), l'équipe en mémoire est à jour.
+    db.commit()
+    for pid in added:
+        audit.record(audit.TEAM_ADD, team.owner_id, team_id=team.id, player_id=pid)
+    trending.record(added=added)
+    return team
+
+
+def reset_team(db: Session, team: models.Team, name: str) -> models.Team:
+    """Renomme l'équipe et libère tous ses joueurs (un retrait audité par joueur)."""
+    released = [p.id for p in team.players]
+    team.players.clear()
+    team.name = name
     db.commit()
     db.refresh(team)
+    for player_id in released:
+        audit.record(audit.TEAM_REMOVE, team.owner_id, team_id=team.id, player_id=player_id)
+    trending.record(removed=released)
     return team
 
 
 def remove_player_from_team(db: Session, team: models.Team, player_id: int) -> models.Team:
     """Retire un joueur de l'équipe s'il est présent."""
-    player = get_player(db, player_id)
-    if not player or player not in team.players:
+    player = next((p for p in team.players if p.id == player_id), None)
+    if player is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Player not in team")
     team.players.remove(player)
     db.add(team)
     db.commit()
-    db.refresh(team)
-    return team
\ No newline at end of file
+    audit.record(audit.TEAM_REMOVE, team.owner_id, team_id=team.id, player_id=player_id)
+    trending.record(removed=[player_id])
+    return team
+
+
+# ---------------------------------------------------------------------
+# Statistiques par match et agrégats (rollups)
+# ---------------------------------------------------------------------
+
+# Nombre de matchs conservés dans la fenêtre glissante "forme"
+FORM_WINDOW = 5
+
+# Colonnes cumulées, dans l'ordre utilisé par ``PlayerStatRollup.recent``
+STAT_FIELDS = (
+    "goals",
+    "assists",
+    "yellow_cards",
+    "red_cards",
+    "own_goals",
+    "substituted_in",
+    "substituted_out",
+)
+
+
+def _new_rollup(player_id: int) -> models.PlayerStatRollup:
+    rollup = models.PlayerStatRollup(player_id=player_id, matches=0, last_gameweek=0, recent=[])
+    for field in STAT_FIELDS:
+        setattr(rollup, field, 0)
+    return rollup
+
+
+def _apply_to_rollup(rollup: models.PlayerStatRollup, row: dict) -> None:
+    """Ajoute un événement aux agrégats sans relire les événements passés."""
+    rollup.matches += 1
+    for field in STAT_FIELDS:
+        setattr(rollup, field, getattr(rollup, field) + int(row[field]))
+    rollup.last_gameweek = max(rollup.last_gameweek, row["gameweek"])
+
+    # La fenêtre reste triée par journée, même si un match arrive en retard
+    window = list(rollup.recent or [])
+    window.append([row["gameweek"], *(int(row[field]) for field in STAT_FIELDS)])
+    window.sort(key=lambda entry: entry[0])
+    rollup.recent = window[-FORM_WINDOW:]
+
+
+def ingest_match_stats(db: Session, events: List[schemas.MatchStatIn]) -> int:
+    """Ingère un lot d'événements statistiques.
+
+    Les événements sont insérés en une seule requête (table en ajout seul),
+    puis les agrégats des joueurs concernés sont chargés en une fois et mis
+    à jour incrémentalement, le tout dans la même transaction.
+
+    Returns:
+        Le nombre d'événements ingérés.
+    """
+    if not events:
+        return 0
+
+    rows = [event.model_dump() for event in events]
+    player_ids = {row["player_id"] for row in rows}
+    known = {pid for (pid,) in db.query(models.Player.id).filter(models.Player.id.in_(player_ids))}
+    missing = sorted(player_ids - known)
+    if missing:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Player {missing[0]} not found")
+
+    rollups = {
+        r.player_id: r
+        for r in db.query(models.PlayerStatRollup).filter(models.PlayerStatRollup.player_id.in_(player_ids))
+    }
+    try:
+        db.execute(insert(models.PlayerMatchStat), rows)
+        for row in rows:
+            rollup = rollups.get(row["player_id"])
+            if rollup is None:
+                rollup = rollups[row["player_id"]] = _new_rollup(row["player_id"])
+                db.add(rollup)
+            _apply_to_rollup(rollup, row)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Stats already recorded for this gameweek")
+    return len(rows)
+
+
+def get_player_rollup(db: Session, player_id: int) -> Optional[models.PlayerStatRollup]:
+    return db.get(models.PlayerStatRollup, player_id)
+
+
+def player_form(rollup: Optional[models.PlayerStatRollup], last: int = FORM_WINDOW) -> List[dict]:
+    """Décode les ``last`` derniers matchs stockés dans l'agrégat."""
+    if rollup is None or not rollup.recent:
+        return []
+    return [
+        {"gameweek": entry[0], **dict(zip(STAT_FIELDS, entry[1:]))}
+        for entry in rollup.recent[-last:]
+    ]
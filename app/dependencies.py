@@ -7,15 +7,26 @@ dépendances (comme ``get_current_user``) sont exposées via
 """
 
 from typing import Generator
+
+from fastapi import Request
+
 from .database import SessionLocal
 
 
-def get_db() -> Generator:
+def get_db(request: Request) -> Generator:
     """Fournit une session de base de données et la ferme après usage.
 
+    Si une session partagée est posée dans ``request.state.db`` (sous-requêtes
+    de ``POST /batch``), elle est réutilisée telle quelle et fermée par son
+    propriétaire.
+
     Yields:
         Session: une session SQLAlchemy.
     """
+    shared = getattr(request.state, "db", None)
+    if shared is not None:
+        yield shared
+        return
     db = SessionLocal()
     try:
         yield db
@@ -0,0 +1,309 @@
+"""Diffusion en temps réel des changements (Server-Sent Events).
+
+Les routes d'écriture publient des événements sur des canaux :
+
+- ``catalog`` : un joueur a été créé, modifié ou supprimé (nouvelle
+  version du catalogue) ;
+- ``team:<owner_id>`` : l'équipe d'un utilisateur a changé (la vue
+  ``TeamOut`` complète est jointe).
+
+Le ``Hub`` répartit chaque événement, dans la boucle asyncio, vers les
+abonnés du canal.  Chaque abonné a une file bornée : un client trop lent
+dont la file déborde est évincé (son flux se termine, le navigateur se
+reconnecte et relit l'état complet) au lieu de faire grossir la mémoire.
+Un message est encodé une seule fois, quel que soit le nombre d'abonnés.
+
+Le transport entre processus est délégué à un ``Broker`` :
+``LocalBroker`` (un seul worker) ou ``PostgresBroker`` (``LISTEN`` /
+``NOTIFY``, plusieurs workers uvicorn), choisi par ``EVENTS_BROKER``.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+import orjson
+
+
+EVENTS_BROKER = os.getenv("EVENTS_BROKER", "local")
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "32"))
+EVENTS_HEARTBEAT = float(os.getenv("EVENTS_HEARTBEAT", "15"))
+
+CATALOG = "catalog"
+
+Deliver = Callable[[str, str, dict], None]
+
+
+def team_channel(owner_id: int) -> str:
+    return f"team:{owner_id}"
+
+
+def encode(event: str, data: dict) -> bytes:
+    """Message SSE prêt à être écrit sur la socket."""
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
+class Subscriber:
+    """Un client connecté : file bornée de messages déjà encodés."""
+
+    __slots__ = ("channels", "pending", "wakeup", "evicted", "maxsize")
+
+    def __init__(self, channels: Iterable[str], maxsize: int = EVENTS_QUEUE_SIZE):
+        self.channels = tuple(channels)
+        self.pending: deque = deque()
+        self.wakeup = asyncio.Event()
+        self.evicted = False
+        self.maxsize = maxsize
+
+    def push(self, message: bytes) -> bool:
+        """Ajoute un message ; ``False`` si la file déborde (abonné évincé)."""
+        if len(self.pending) >= self.maxsize:
+            self.evict()
+            return False
+        self.pending.append(message)
+        self.wakeup.set()
+        return True
+
+    def evict(self) -> None:
+        self.evicted = True
+        self.pending.clear()
+        self.wakeup.set()
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[bytes]:
+        """Prochain message, ou ``None`` après ``timeout`` secondes ou éviction."""
+        if not self.pending and not self.evicted:
+            self.wakeup.clear()
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        if self.evicted or not self.pending:
+            return None
+        return self.pending.popleft()
+
+
+# ---------------------------------------------------------------------
+# Brokers
+# ---------------------------------------------------------------------
+
+class Broker(ABC):
+    """Transport des événements vers le ``Hub`` de chaque worker.
+
+    ``publish`` peut être appelé depuis n'importe quel thread (les routes
+    synchrones tournent dans le threadpool) ; ``deliver`` doit être appelé
+    dans la boucle asyncio du hub.
+    """
+
+    @abstractmethod
+    async def start(self, deliver: Deliver) -> None:
+        """Commence à remettre les événements reçus à ``deliver``."""
+
+    @abstractmethod
+    def publish(self, channel: str, event: str, data: dict) -> None:
+        """Diffuse un événement à tous les workers (celui-ci compris)."""
+
+    async def stop(self) -> None:
+        pass
+
+
+class LocalBroker(Broker):
+    """Un seul processus : remise directe dans la boucle du hub."""
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._deliver: Optional[Deliver] = None
+
+    async def start(self, deliver: Deliver) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._deliver = deliver
+
+    def publish(self, channel: str, event: str, data: dict) -> None:
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return  # hub non démarré : personne n'écoute
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._deliver(channel, event, data)
+        else:
+            loop.call_soon_threadsafe(self._deliver, channel, event, data)
+
+    async def stop(self) -> None:
+        self._loop = None
+
+
+class PostgresBroker(Broker):
+    """Plusieurs workers : ``NOTIFY`` à la publication, ``LISTEN`` dans chaque worker.
+
+    La connexion d'écoute est surveillée par la boucle asyncio
+    (``add_reader``) : aucun thread dédié.  Le contenu d'une notification
+    est limité à 8000 octets par PostgreSQL, ce qui suffit pour une équipe.
+    """
+
+    PG_CHANNEL = "mfl_events"
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._conn = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self, deliver: Deliver) -> None:
+        raw = self.engine.raw_connection()
+        raw.detach()  # connexion dédiée, jamais rendue au pool
+        conn = raw.driver_connection
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute(f"LISTEN {self.PG_CHANNEL}")
+
+        def on_readable() -> None:
+            conn.poll()
+            while conn.notifies:
+                notify = conn.notifies.pop(0)
+                channel, event, data = orjson.loads(notify.payload)
+                deliver(channel, event, data)
+
+        self._conn = conn
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(conn.fileno(), on_readable)
+
+    def publish(self, channel: str, event: str, data: dict) -> None:
+        from sqlalchemy import text
+
+        payload = orjson.dumps([channel, event, data]).decode()
+        with self.engine.begin() as conn:
+            conn.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": self.PG_CHANNEL, "payload": payload})
+
+    async def stop(self) -> None:
+        if self._conn is not None:
+            self._loop.remove_reader(self._conn.fileno())
+            self._conn.close()
+            self._conn = None
+
+
+def make_broker(name: str = EVENTS_BROKER) -> Broker:
+    if name == "postgres":
+        from .database import engine
+
+        return PostgresBroker(engine)
+    if name == "local":
+        return LocalBroker()
+    raise ValueError(f"Unknown EVENTS_BROKER: {name}")
+
+
+# ---------------------------------------------------------------------
+# Hub
+# ---------------------------------------------------------------------
+
+class Hub:
+    """Répartition des événements vers les abonnés, dans la boucle asyncio."""
+
+    def __init__(self, broker: Optional[Broker] = None, queue_size: int = EVENTS_QUEUE_SIZE):
+        self.broker = broker or LocalBroker()
+        self.queue_size = queue_size
+        self.channels: Dict[str, Set[Subscriber]] = {}
+        # Rappels internes appelés pour chaque événement reçu (caches locaux)
+        self.listeners: List[Deliver] = []
+        self.catalog_version = 0
+        self._version_lock = threading.Lock()
+        self.evictions = 0
+
+    async def start(self) -> None:
+        await self.broker.start(self._deliver)
+
+    async def stop(self) -> None:
+        await self.broker.stop()
+        # Termine les flux en cours (sinon l'arrêt du serveur les attend)
+        for subscribers in list(self.channels.values()):
+            for subscriber in list(subscribers):
+                subscriber.evict()
+        self.channels.clear()
+
+    def subscribe(self, channels: Iterable[str]) -> Subscriber:
+        subscriber = Subscriber(channels, self.queue_size)
+        for channel in subscriber.channels:
+            self.channels.setdefault(channel, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        for channel in subscriber.channels:
+            subscribers = self.channels.get(channel)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self.channels[channel]
+
+    def publish(self, channel: str, event: str, data: dict) -> None:
+        self.broker.publish(channel, event, data)
+
+    def listen(self, callback: Deliver) -> Deliver:
+        """Appelle ``callback(channel, event, data)`` pour chaque événement reçu."""
+        self.listeners.append(callback)
+        return callback
+
+    def advance_catalog(self, version: int) -> None:
+        """Retient ``version`` si elle est plus récente que la version connue du catalogue."""
+        with self._version_lock:
+            if version > self.catalog_version:
+                self.catalog_version = version
+
+    def _deliver(self, channel: str, event: str, data: dict) -> None:
+        if channel == CATALOG:
+            self.advance_catalog(data.get("version", 0))
+        for callback in self.listeners:
+            callback(channel, event, data)
+        subscribers = self.channels.get(channel)
+        if not subscribers:
+            return
+        message = encode(event, data)
+        for subscriber in list(subscribers):
+            if not subscriber.push(message):
+                self.unsubscribe(subscriber)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len({s for subs in self.channels.values() for s in subs}),
+            "channels": len(self.channels),
+            "evictions": self.evictions,
+        }
+
+
+hub = Hub(make_broker())
+
+
+# ---------------------------------------------------------------------
+# Publication depuis les routes
+# ---------------------------------------------------------------------
+
+# Rappels appelés dans le processus qui a modifié le catalogue
+# (reconstruction de l'instantané, index dérivés…)
+_catalog_listeners: List[Callable[[str, List[int]], None]] = []
+
+
+def on_catalog_change(callback: Callable[[str, List[int]], None]) -> Callable[[str, List[int]], None]:
+    """Enregistre ``callback(action, player_ids)`` ; utilisable en décorateur."""
+    _catalog_listeners.append(callback)
+    return callback
+
+
+def catalog_changed(action: str, player_ids: Iterable[int]) -> int:
+    """Annonce une nouvelle version du catalogue et la retourne."""
+    # Horodatage en ns : croissant et cohérent entre workers
+    version = time.time_ns()
+    player_ids = list(player_ids)
+    # Connue tout de suite dans ce worker (lire ses propres écritures)
+    hub.advance_catalog(version)
+    for callback in _catalog_listeners:
+        callback(action, player_ids)
+    hub.publish(CATALOG, "catalog", {"version": version, "action": action, "player_ids": player_ids})
+    return version
+
+
+def team_changed(owner_id: int, team_view: dict) -> None:
+    hub.publish(team_channel(owner_id), "team", team_view)
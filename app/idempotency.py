@@ -0,0 +1,166 @@
+"""Clés d'idempotence pour les écritures d'équipe (en-tête ``Idempotency-Key``).
+
+Un client mobile qui renvoie ``POST /team`` ou ``POST /team/players``
+après une coupure réseau reçoit la réponse de la première exécution,
+sans que l'effectif soit relu ni modifié (et sans le 400 « already in
+team » qu'une seconde exécution produirait).
+
+- la clé est propre à l'utilisateur et à la route : ``(route, user_id, clé)`` ;
+- la réponse est gardée ``IDEMPOTENCY_TTL`` secondes sous forme compacte
+  (code de statut, corps JSON encodé, empreinte de 8 octets de la
+  requête) ; au-delà de ``IDEMPOTENCY_MAX_ENTRIES`` les plus anciennes
+  sont oubliées ;
+- les erreurs 4xx sont rejouées comme les succès ; les erreurs
+  inattendues ne sont pas gardées (le client peut réessayer) ;
+- deux requêtes simultanées avec la même clé sont regroupées : la
+  seconde attend la fin de la première et rejoue sa réponse ;
+- la même clé avec un contenu différent est refusée (422).
+
+Le stockage est local au processus : avec plusieurs workers, une
+répétition routée vers un autre worker est exécutée normalement (les
+contrôles de ``crud`` restent la dernière garde).
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+import orjson
+from fastapi import HTTPException, status
+from fastapi.responses import Response
+
+
+IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", "86400"))
+IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "10000"))
+
+HEADER = "Idempotency-Key"
+REPLAY_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+# Attente maximale d'une requête identique en cours (s)
+WAIT_TIMEOUT = 30.0
+
+Key = Tuple[Hashable, ...]
+
+
+def fingerprint(payload: Any) -> bytes:
+    """Empreinte courte du contenu de la requête."""
+    return hashlib.blake2b(orjson.dumps(payload, option=orjson.OPT_SORT_KEYS), digest_size=8).digest()
+
+
+class Entry:
+    """Réponse enregistrée, ou exécution en cours (``done`` non levé)."""
+
+    __slots__ = ("fingerprint", "status_code", "body", "expires", "done")
+
+    def __init__(self, fingerprint: bytes):
+        self.fingerprint = fingerprint
+        self.status_code = 0
+        self.body = b""
+        self.expires = 0.0
+        self.done = threading.Event()
+
+
+class IdempotencyStore:
+    """Réponses par clé, expirées après ``ttl`` secondes (ordre d'insertion = ordre d'expiration)."""
+
+    def __init__(self, ttl: float = IDEMPOTENCY_TTL, max_entries: int = IDEMPOTENCY_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Key, Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _purge(self, now: float) -> None:
+        # Appelé sous verrou : retire les entrées expirées en tête
+        entries = self._entries
+        while entries:
+            key, entry = next(iter(entries.items()))
+            if entry.done.is_set() and (entry.expires <= now or len(entries) > self.max_entries):
+                del entries[key]
+            else:
+                break
+
+    def run(self, key: Key, payload: Any, call: Callable[[], Response]) -> Response:
+        """Exécute ``call`` une seule fois pour ``key`` et rejoue sa réponse ensuite."""
+        fp = fingerprint(payload)
+        deadline = time.monotonic() + WAIT_TIMEOUT
+        while True:
+            now = time.monotonic()
+            with self._lock:
+                self._purge(now)
+                entry = self._entries.get(key)
+                if entry is not None and entry.done.is_set() and entry.expires <= now:
+                    del self._entries[key]
+                    entry = None
+                if entry is None:
+                    entry = self._entries[key] = Entry(fp)
+                    owner = True
+                else:
+                    owner = False
+
+            if owner:
+                return self._execute(key, entry, call)
+            if entry.fingerprint != fp:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="Idempotency-Key already used with a different request",
+                )
+            # Requête identique en cours : on attend sa réponse
+            if not entry.done.wait(max(0.0, deadline - time.monotonic())):
+                raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A request with this Idempotency-Key is in progress")
+            if entry.status_code:
+                return Response(
+                    entry.body,
+                    status_code=entry.status_code,
+                    media_type="application/json",
+                    headers={REPLAY_HEADER: "true"},
+                )
+            # L'exécution d'origine a échoué sans réponse gardée : on la retente
+
+    def _execute(self, key: Key, entry: Entry, call: Callable[[], Response]) -> Response:
+        try:
+            response = call()
+            entry.status_code, entry.body = response.status_code, bytes(response.body)
+            return response
+        except HTTPException as exc:
+            if exc.status_code < 500:
+                entry.status_code = exc.status_code
+                entry.body = orjson.dumps({"detail": exc.detail})
+            raise
+        finally:
+            with self._lock:
+                if entry.status_code:
+                    entry.expires = time.monotonic() + self.ttl
+                    self._entries.move_to_end(key)
+                else:
+                    self._entries.pop(key, None)
+            entry.done.set()
+
+
+store = IdempotencyStore()
+
+
+def check_key(key: Optional[str]) -> Optional[str]:
+    if key is not None and not 0 < len(key) <= MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters",
+        )
+    return key
+
+
+def run(key: Optional[str], scope: Tuple[Hashable, ...], payload: Any, call: Callable[[], Response]) -> Response:
+    """``call()`` directement sans clé, sinon via ``store`` sous ``scope + (key,)``."""
+    if check_key(key) is None:
+        return call()
+    return store.run(scope + (key,), payload, call)
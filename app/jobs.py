@@ -0,0 +1,438 @@
+"""Exécution en arrière-plan des tâches d'administration.
+
+Les opérations longues (imports, changement de prix, seed…) ne tournent
+plus dans la requête HTTP : ``POST /admin/jobs`` enregistre une ligne
+``jobs`` et répond immédiatement ; le ``JobRunner`` de chaque worker la
+réclame puis exécute le corps de la tâche dans un pool de threads dédié
+(``JOBS_CONCURRENCY`` tâches au plus, sans occuper le threadpool des
+requêtes).
+
+- progression : ``ctx.progress(done, total)`` est écrit en base (au plus
+  toutes les ``PROGRESS_INTERVAL`` secondes) et lu par ``GET /admin/jobs/{id}`` ;
+- annulation : ``POST /admin/jobs/{id}/cancel`` lève le drapeau
+  ``cancel_requested``, le corps s'arrête au prochain ``ctx.progress`` /
+  ``ctx.check()`` ;
+- reprise : la table est la source de vérité.  Un worker qui s'arrête
+  proprement remet ses tâches en file ; une tâche dont le worker a
+  disparu (battement ``heartbeat_at`` plus vieux que ``JOBS_STALE_AFTER``)
+  est remise en file par un autre worker ou au redémarrage.  Le corps
+  peut enregistrer un point de reprise (``ctx.save_checkpoint``) dans la
+  même transaction que ses écritures.
+
+Un corps de tâche est une fonction synchrone ``body(ctx, **params)``
+enregistrée avec ``@register(kind, ParamsModel)`` ; elle réutilise les
+fonctions de ``crud`` avec la session ``ctx.db``.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Set, Type
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel, ValidationError
+
+from . import crud, events, models, schemas
+
+
+logger = logging.getLogger(__name__)
+
+JOBS_ENABLED = os.getenv("JOBS_ENABLED", "1") == "1"
+JOBS_CONCURRENCY = int(os.getenv("JOBS_CONCURRENCY", "2"))
+JOBS_POLL_INTERVAL = float(os.getenv("JOBS_POLL_INTERVAL", "2"))
+JOBS_STALE_AFTER = float(os.getenv("JOBS_STALE_AFTER", "60"))
+JOBS_MAX_ATTEMPTS = int(os.getenv("JOBS_MAX_ATTEMPTS", "3"))
+
+# Écritures de progression espacées d'au moins 0,5 s
+PROGRESS_INTERVAL = 0.5
+BATCH_SIZE = 500
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Annulation demandée : la tâche s'arrête."""
+
+
+class JobInterrupted(Exception):
+    """Arrêt du worker : la tâche sera reprise plus tard."""
+
+
+def _now() -> datetime:
+    return datetime.utcnow()
+
+
+# ---------------------------------------------------------------------
+# Registre des tâches
+# ---------------------------------------------------------------------
+
+@dataclass
+class JobSpec:
+    body: Callable[..., Any]
+    params_model: Optional[Type[BaseModel]] = None
+
+
+registry: Dict[str, JobSpec] = {}
+
+
+def register(kind: str, params_model: Optional[Type[BaseModel]] = None):
+    """Décorateur : enregistre ``body(ctx, **params)`` sous le nom ``kind``."""
+    def decorator(body):
+        registry[kind] = JobSpec(body, params_model)
+        return body
+    return decorator
+
+
+def validate_params(kind: str, params: dict) -> dict:
+    """Vérifie ``kind`` et ``params`` au moment de la soumission (400 / 422)."""
+    spec = registry.get(kind)
+    if spec is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown job kind: {kind} (available: {', '.join(sorted(registry))})",
+        )
+    if spec.params_model is None:
+        return params
+    try:
+        return spec.params_model.model_validate(params).model_dump()
+    except ValidationError as exc:
+        raise HTTPException(status_code=422, detail=exc.errors(include_url=False, include_context=False))
+
+
+# ---------------------------------------------------------------------
+# Contexte d'exécution
+# ---------------------------------------------------------------------
+
+class JobContext:
+    """Passé au corps de la tâche : session, progression, annulation, reprise."""
+
+    def __init__(self, runner: "JobRunner", job_id: int, checkpoint: Any = None, user_id: Optional[int] = None):
+        self.runner = runner
+        self.job_id = job_id
+        self.checkpoint = checkpoint
+        # Admin qui a soumis la tâche (auteur des événements d'audit)
+        self.user_id = user_id
+        self.db = None
+        self._last_write = 0.0
+
+    def check(self) -> None:
+        """Lève ``JobCancelled`` / ``JobInterrupted`` si la tâche doit s'arrêter."""
+        if self.runner.stopping:
+            raise JobInterrupted()
+        if self.job_id in self.runner.cancelled:
+            raise JobCancelled()
+
+    def progress(self, done: float, total: Optional[float] = None, message: Optional[str] = None) -> None:
+        fraction = min(1.0, done / total) if total else float(done)
+        now = time.monotonic()
+        if now - self._last_write >= PROGRESS_INTERVAL or fraction >= 1.0:
+            self._last_write = now
+            with self.runner.session() as db:
+                job = db.get(models.Job, self.job_id)
+                job.progress = fraction
+                if message is not None:
+                    job.message = message
+                job.heartbeat_at = _now()
+                if job.cancel_requested:
+                    # Annulation demandée depuis un autre worker
+                    self.runner.cancelled.add(self.job_id)
+                db.commit()
+        self.check()
+
+    def save_checkpoint(self, value: Any) -> None:
+        """Point de reprise, écrit dans la transaction en cours de ``ctx.db``."""
+        self.checkpoint = value
+        self.db.query(models.Job).filter(models.Job.id == self.job_id).update(
+            {models.Job.checkpoint: value}, synchronize_session=False
+        )
+
+
+# ---------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------
+
+class JobRunner:
+    def __init__(
+        self,
+        session_factory=None,
+        concurrency: int = JOBS_CONCURRENCY,
+        poll_interval: float = JOBS_POLL_INTERVAL,
+        stale_after: float = JOBS_STALE_AFTER,
+        max_attempts: int = JOBS_MAX_ATTEMPTS,
+    ):
+        self.session_factory = session_factory
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.max_attempts = max_attempts
+        self.cancelled: Set[int] = set()
+        self.stopping = False
+        self._running: Dict[int, asyncio.Task] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def session(self):
+        if self.session_factory is None:
+            from .database import SessionLocal
+
+            return SessionLocal()
+        return self.session_factory()
+
+    async def start(self) -> None:
+        self.stopping = False
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="job")
+        self._task = asyncio.create_task(self._dispatch())
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Arrêt propre : les tâches en cours sont remises en file."""
+        if self._task is None:
+            return
+        self.stopping = True
+        self._task.cancel()
+        if self._running:
+            await asyncio.wait(list(self._running.values()), timeout=timeout)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._task = None
+
+    def wake(self) -> None:
+        """Signale une nouvelle tâche (appelable depuis n'importe quel thread)."""
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._wakeup.set)
+
+    def cancel(self, job_id: int) -> None:
+        self.cancelled.add(job_id)
+
+    async def _dispatch(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self._maintain)
+                while len(self._running) < self.concurrency:
+                    job_id = await asyncio.to_thread(self._claim)
+                    if job_id is None:
+                        break
+                    task = asyncio.create_task(self._run(job_id))
+                    self._running[job_id] = task
+                    task.add_done_callback(lambda _t, job_id=job_id: self._finished(job_id))
+            except asyncio.CancelledError:
+                raise
+            except Exception:  # pragma: no cover - base indisponible, on réessaie
+                logger.exception("job dispatch failed")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def _finished(self, job_id: int) -> None:
+        self._running.pop(job_id, None)
+        self._wakeup.set()
+
+    def _maintain(self) -> None:
+        """Battement des tâches locales et reprise des tâches orphelines."""
+        Job = models.Job
+        now = _now()
+        with self.session() as db:
+            if self._running:
+                db.query(Job).filter(Job.id.in_(list(self._running))).update(
+                    {Job.heartbeat_at: now}, synchronize_session=False
+                )
+            stale = (Job.status == RUNNING) & (Job.heartbeat_at < now - timedelta(seconds=self.stale_after))
+            db.query(Job).filter(stale, Job.attempts < self.max_attempts).update(
+                {Job.status: QUEUED, Job.message: "requeued after worker loss"}, synchronize_session=False
+            )
+            db.query(Job).filter(stale).update(
+                {Job.status: FAILED, Job.error: "worker lost too many times", Job.finished_at: now},
+                synchronize_session=False,
+            )
+            db.commit()
+
+    def _claim(self) -> Optional[int]:
+        """Réclame la plus ancienne tâche en file (sûr avec plusieurs workers)."""
+        Job = models.Job
+        with self.session() as db:
+            candidates = [row.id for row in db.query(Job.id).filter(Job.status == QUEUED).order_by(Job.id).limit(5)]
+            for job_id in candidates:
+                now = _now()
+                claimed = db.query(Job).filter(Job.id == job_id, Job.status == QUEUED).update(
+                    {Job.status: RUNNING, Job.started_at: now, Job.heartbeat_at: now, Job.attempts: Job.attempts + 1},
+                    synchronize_session=False,
+                )
+                db.commit()
+                if claimed:
+                    return job_id
+        return None
+
+    async def _run(self, job_id: int) -> None:
+        await self._loop.run_in_executor(self._executor, self._execute, job_id)
+
+    def _execute(self, job_id: int) -> None:
+        with self.session() as db:
+            job = db.get(models.Job, job_id)
+            kind, params, checkpoint, user_id = job.kind, dict(job.params or {}), job.checkpoint, job.created_by
+            if job.cancel_requested:
+                self.cancelled.add(job_id)
+
+        ctx = JobContext(self, job_id, checkpoint, user_id)
+        outcome, result, error = SUCCEEDED, None, None
+        try:
+            spec = registry.get(kind)
+            if spec is None:
+                raise ValueError(f"Unknown job kind: {kind}")
+            ctx.check()
+            with self.session() as db:
+                ctx.db = db
+                result = spec.body(ctx, **params)
+        except JobCancelled:
+            outcome = CANCELLED
+        except JobInterrupted:
+            outcome = QUEUED
+        except Exception as exc:
+            logger.exception("job %s (%s) failed", job_id, kind)
+            outcome, error = FAILED, f"{type(exc).__name__}: {exc}"
+        finally:
+            self.cancelled.discard(job_id)
+
+        with self.session() as db:
+            job = db.get(models.Job, job_id)
+            job.status = outcome
+            if outcome == QUEUED:
+                job.started_at = None
+                job.message = "interrupted, will resume"
+            else:
+                job.finished_at = _now()
+                job.error = error
+                if outcome == SUCCEEDED:
+                    job.progress = 1.0
+                    job.result = result
+            db.commit()
+
+
+runner = JobRunner()
+
+
+def submit(db, kind: str, params: dict, user_id: Optional[int] = None) -> models.Job:
+    """Enregistre une tâche et réveille le runner local."""
+    params = validate_params(kind, params)
+    job = models.Job(kind=kind, params=params, status=QUEUED, created_by=user_id, created_at=_now())
+    db.add(job)
+    db.commit()
+    runner.wake()
+    return job
+
+
+def request_cancel(db, job: models.Job) -> models.Job:
+    """Annule une tâche en file, ou demande l'arrêt d'une tâche en cours."""
+    if job.status == QUEUED:
+        job.status = CANCELLED
+        job.finished_at = _now()
+    elif job.status == RUNNING:
+        job.cancel_requested = True
+        runner.cancel(job.id)
+    db.commit()
+    return job
+
+
+# ---------------------------------------------------------------------
+# Corps des tâches
+# ---------------------------------------------------------------------
+
+@register("seed")
+def seed_job(ctx: JobContext) -> dict:
+    """``seed.seed()`` à la demande (utilisateurs par défaut, CSV, statistiques)."""
+    from . import seed
+
+    ctx.progress(0, message="seeding")
+    seed.seed()
+    events.catalog_changed("seeded", [])
+    return {"players": ctx.db.query(models.Player).count()}
+
+
+@register("import_players", schemas.ImportPlayersParams)
+def import_players_job(ctx: JobContext, players: list) -> dict:
+    """Import par lots ; les joueurs déjà présents (nom, club) sont ignorés."""
+    existing = {(name, club) for name, club in ctx.db.query(models.Player.name, models.Player.club)}
+    created, skipped = [], 0
+    for start in range(0, len(players), BATCH_SIZE):
+        batch = []
+        for item in players[start:start + BATCH_SIZE]:
+            if (item["name"], item["club"]) in existing:
+                skipped += 1
+                continue
+            existing.add((item["name"], item["club"]))
+            batch.append(schemas.PlayerCreate(**item))
+        batch_ids = crud.create_players(ctx.db, batch)
+        created.extend(batch_ids)
+        # Annoncé avant ``progress`` (qui lève à l'annulation) : lot déjà validé
+        if batch_ids:
+            events.catalog_changed("created", batch_ids)
+        ctx.progress(start + BATCH_SIZE, len(players), f"{len(created)} created")
+    return {"created": len(created), "skipped": skipped}
+
+
+@register("reprice", schemas.RepriceParams)
+def reprice_job(ctx: JobContext, factor: float, position: Optional[str] = None) -> dict:
+    """Multiplie les coûts par ``factor`` ; reprend après le dernier lot validé."""
+    query = ctx.db.query(models.Player.id).order_by(models.Player.id)
+    if position is not None:
+        query = query.filter(models.Player.position == position)
+    last_id = (ctx.checkpoint or {}).get("last_id", 0)
+    if last_id:
+        # Reprise : le worker précédent a pu s'arrêter entre un commit et son annonce
+        events.catalog_changed("updated", [pid for (pid,) in query.filter(models.Player.id <= last_id)])
+    ids = [pid for (pid,) in query.filter(models.Player.id > last_id)]
+    done = 0
+    for start in range(0, len(ids), BATCH_SIZE):
+        batch = ids[start:start + BATCH_SIZE]
+        # Point de reprise validé avec les nouveaux coûts
+        ctx.save_checkpoint({"last_id": batch[-1]})
+        crud.reprice_players(ctx.db, batch, factor, actor_id=ctx.user_id)
+        # Annoncé avant ``progress`` (qui lève à l'annulation ou à l'arrêt) :
+        # répliques, instantané et caches suivent chaque lot validé
+        events.catalog_changed("updated", batch)
+        done += len(batch)
+        ctx.progress(done, len(ids), f"{done} repriced")
+    return {"repriced": done}
+
+
+@register("ingest_stats", schemas.IngestStatsParams)
+def ingest_stats_job(ctx: JobContext, **params) -> dict:
+    """``crud.ingest_match_stats`` par lots, avec reprise au dernier lot validé.
+
+    Les lignes arrivent dans le paramètre ``events`` de l'API, lu depuis
+    ``params`` pour ne pas masquer le module ``events``.
+    """
+    stats = params["events"]
+    start = (ctx.checkpoint or {}).get("next", 0)
+    ingested = 0
+    for offset in range(start, len(stats), BATCH_SIZE):
+        batch = [schemas.MatchStatIn(**e) for e in stats[offset:offset + BATCH_SIZE]]
+        ctx.save_checkpoint({"next": offset + len(batch)})
+        ingested += crud.ingest_match_stats(ctx.db, batch)
+        ctx.progress(offset + len(batch), len(stats))
+    from . import similarity
+
+    similarity.refresh()
+    return {"ingested": ingested}
+
+
+@register("freeze_lineups", schemas.FreezeLineupsParams)
+def freeze_lineups_job(ctx: JobContext, gameweek: int) -> dict:
+    """Échéance d'une journée : ``lineups.freeze_all`` (base principale ou chaque shard)."""
+    from . import lineups
+
+    ctx.progress(0, message=f"freezing gameweek {gameweek}")
+    return lineups.freeze_all(gameweek)
@@ -0,0 +1,205 @@
+"""Compositions d'équipes gelées à chaque journée (pour le score et l'historique).
+
+Copier ``team_players`` pour chaque équipe à chaque échéance coûterait
+``équipes × 11 × 38`` lignes par saison.  Deux mécanismes l'évitent :
+
+- partage par contenu : une composition est rangée une seule fois dans
+  ``lineups``, sous l'empreinte de ses ids triés ; les équipes qui ont le
+  même onze (ou gardent le leur plusieurs journées) pointent vers la même
+  ligne ;
+- copie à l'écriture : ``lineup_snapshots`` ne reçoit une ligne
+  ``(team_id, gameweek, lineup_id)`` que pour les équipes dont la
+  composition a changé depuis le gel précédent.
+
+``freeze(db, gameweek)`` gèle une journée par lots ensemblistes (quelques
+requêtes par tranche de ``FREEZE_BATCH_SIZE`` équipes, jamais une requête
+par équipe) dans une seule transaction, une seule fois par journée ;
+``freeze_all`` l'exécute sur la base principale ou sur chaque shard
+(l'historique vit avec les équipes).
+La tâche d'administration ``freeze_lineups`` l'appelle à l'échéance.
+
+``lineup_at(db, team_id, gameweek)`` relit la composition d'une équipe à
+n'importe quelle journée gelée en une requête sur la clé primaire.
+"""
+
+import hashlib
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, func, insert, select
+from sqlalchemy.orm import Session
+
+from . import models
+
+
+FREEZE_BATCH_SIZE = int(os.getenv("FREEZE_BATCH_SIZE", "5000"))
+
+
+def lineup_digest(player_ids: Sequence[int]) -> str:
+    """Empreinte d'une composition (indépendante de l'ordre des joueurs)."""
+    canonical = ",".join(str(pid) for pid in sorted(player_ids))
+    return hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
+
+
+def last_frozen(db: Session) -> Optional[int]:
+    return db.scalar(select(func.max(models.GameweekFreeze.gameweek)))
+
+
+def frozen_gameweeks(db: Session) -> List[int]:
+    return list(db.scalars(select(models.GameweekFreeze.gameweek).order_by(models.GameweekFreeze.gameweek)))
+
+
+def is_frozen(db: Session, gameweek: int) -> bool:
+    return db.get(models.GameweekFreeze, gameweek) is not None
+
+
+def _current_lineups(db: Session, low: int, high: int, team_ids: Sequence[int]) -> Dict[int, List[int]]:
+    link = models.team_players
+    lineups: Dict[int, List[int]] = {team_id: [] for team_id in team_ids}
+    rows = db.execute(
+        select(link.c.team_id, link.c.player_id)
+        .where(link.c.team_id.between(low, high))
+        .order_by(link.c.team_id, link.c.player_id)
+    )
+    for team_id, player_id in rows:
+        lineup = lineups.get(team_id)
+        # Équipe créée pendant le gel, absente de la liste lue au départ
+        if lineup is not None:
+            lineup.append(player_id)
+    return lineups
+
+
+def _previous_digests(db: Session, low: int, high: int) -> Dict[int, str]:
+    """Empreinte de la dernière composition gelée de chaque équipe de la tranche."""
+    S, L = models.LineupSnapshot, models.Lineup
+    latest = (
+        select(S.team_id, func.max(S.gameweek).label("gameweek"))
+        .where(S.team_id.between(low, high))
+        .group_by(S.team_id)
+        .subquery()
+    )
+    rows = db.execute(
+        select(S.team_id, L.digest)
+        .join(latest, and_(S.team_id == latest.c.team_id, S.gameweek == latest.c.gameweek))
+        .join(L, L.id == S.lineup_id)
+    )
+    return dict(rows.all())
+
+
+def _lineup_ids(db: Session, lineups: Dict[str, List[int]]) -> Tuple[Dict[str, int], int]:
+    """Ids des compositions ``digest -> ids`` (créées si besoin) et nombre de créations."""
+    L = models.Lineup
+    digests = list(lineups)
+    ids = dict(db.execute(select(L.digest, L.id).where(L.digest.in_(digests))).all())
+    missing = [{"digest": d, "player_ids": lineups[d]} for d in digests if d not in ids]
+    if missing:
+        db.execute(insert(L), missing)
+        ids.update(db.execute(select(L.digest, L.id).where(L.digest.in_([m["digest"] for m in missing]))).all())
+    return ids, len(missing)
+
+
+def freeze(db: Session, gameweek: int, batch_size: int = FREEZE_BATCH_SIZE) -> dict:
+    """Gèle la composition de toutes les équipes de ``db`` pour ``gameweek``.
+
+    Une journée déjà gelée n'est pas regelée : son bilan enregistré est
+    retourné (nouvel essai de ``freeze_all`` après l'échec d'un autre
+    shard).  Les journées sont gelées dans l'ordre : une journée antérieure
+    à la dernière gelée est refusée (``ValueError``), sans quoi les
+    compositions non recopiées des journées suivantes changeraient.
+    """
+    last = last_frozen(db)
+    if last is not None and gameweek <= last:
+        done = db.get(models.GameweekFreeze, gameweek)
+        if done is not None:
+            return {"gameweek": gameweek, "teams": done.teams, "changed": done.changed, "lineups_created": done.lineups_created}
+        raise ValueError(f"Gameweek {gameweek} is not after the last frozen gameweek ({last})")
+
+    team_ids = list(db.scalars(select(models.Team.id).order_by(models.Team.id)))
+    changed = created = 0
+    for start in range(0, len(team_ids), batch_size):
+        chunk = team_ids[start:start + batch_size]
+        low, high = chunk[0], chunk[-1]
+        current = _current_lineups(db, low, high, chunk)
+        previous = _previous_digests(db, low, high)
+
+        updates: Dict[int, str] = {}
+        contents: Dict[str, List[int]] = {}
+        for team_id, player_ids in current.items():
+            digest = lineup_digest(player_ids)
+            if previous.get(team_id) != digest:
+                updates[team_id] = digest
+                contents[digest] = player_ids
+        if not updates:
+            continue
+        ids, new = _lineup_ids(db, contents)
+        created += new
+        db.execute(
+            insert(models.LineupSnapshot),
+            [{"team_id": t, "gameweek": gameweek, "lineup_id": ids[d]} for t, d in updates.items()],
+        )
+        changed += len(updates)
+
+    db.add(models.GameweekFreeze(
+        gameweek=gameweek, frozen_at=datetime.utcnow(), teams=len(team_ids), changed=changed, lineups_created=created,
+    ))
+    db.commit()
+    return {"gameweek": gameweek, "teams": len(team_ids), "changed": changed, "lineups_created": created}
+
+
+def freeze_all(gameweek: int) -> dict:
+    """``freeze`` sur la base principale, ou sur chaque shard ; bilans additionnés.
+
+    Relancée après l'échec d'un shard, elle ne gèle que les shards restants.
+    """
+    from . import shards
+
+    totals = {"gameweek": gameweek, "teams": 0, "changed": 0, "lineups_created": 0}
+    for result in shards.router.scatter(lambda db: freeze(db, gameweek)):
+        for key in ("teams", "changed", "lineups_created"):
+            totals[key] += result[key]
+    return totals
+
+
+def lineup_at(db: Session, team_id: int, gameweek: int) -> Optional[List[int]]:
+    """Composition gelée de l'équipe à ``gameweek`` (``None`` si l'équipe n'existait pas)."""
+    S, L = models.LineupSnapshot, models.Lineup
+    return db.scalar(
+        select(L.player_ids)
+        .join(S, S.lineup_id == L.id)
+        .where(S.team_id == team_id, S.gameweek <= gameweek)
+        .order_by(S.gameweek.desc())
+        .limit(1)
+    )
+
+
+def team_history(db: Session, team_id: int) -> List[tuple]:
+    """Historique d'une équipe ``[(gameweek, player_ids), ...]`` (rééquilibrage des shards)."""
+    S, L = models.LineupSnapshot, models.Lineup
+    rows = db.execute(
+        select(S.gameweek, L.player_ids).join(L, L.id == S.lineup_id).where(S.team_id == team_id).order_by(S.gameweek)
+    )
+    return [tuple(row) for row in rows]
+
+
+def restore_history(db: Session, team_id: int, history: Sequence[tuple], frozen: Sequence[int] = ()) -> None:
+    """Réécrit l'historique de ``team_history`` sur une autre base, sous ``team_id``.
+
+    Les ids de ``lineups`` sont propres à chaque base : les compositions
+    sont retrouvées (ou créées) par leur empreinte.  Les journées
+    ``frozen`` de la base d'origine sont aussi marquées gelées ici.
+    """
+    missing = set(frozen) - set(db.scalars(select(models.GameweekFreeze.gameweek)))
+    if missing:
+        db.execute(
+            insert(models.GameweekFreeze),
+            [{"gameweek": gw, "frozen_at": datetime.utcnow()} for gw in sorted(missing)],
+        )
+    if not history:
+        return
+    contents = {lineup_digest(player_ids): player_ids for _, player_ids in history}
+    ids, _ = _lineup_ids(db, contents)
+    db.execute(
+        insert(models.LineupSnapshot),
+        [{"team_id": team_id, "gameweek": gw, "lineup_id": ids[lineup_digest(pids)]} for gw, pids in history],
+    )
@@ -1,17 +1,23 @@
 # app/main.py
 """Point d'entrée FastAPI + UI statique."""
-from fastapi import FastAPI
+import os
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
-import pathlib
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import HTMLResponse, PlainTextResponse
 
+from . import audit, events, metrics, profiling, shards, snapshot
+from .assets import StaticAssets, UITemplate
 from .database import engine
 from . import models
 from .routers import auth as auth_router
 from .routers import players as players_router
 from .routers import team as team_router
-from . import seed
+from .routers import dashboard as dashboard_router
+from .routers import batch as batch_router
+from .routers import events as events_router
+from .routers import admin as admin_router
 
 app = FastAPI(
     title="MyFantasyLeague",
@@ -27,32 +33,97 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Fichiers statiques et UI
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+# Métriques : latence par route, codes de statut, requêtes SQL par requête
+if metrics.METRICS_ENABLED:
+    metrics.install_sql_hooks()
+    app.add_middleware(metrics.MetricsMiddleware)
 
-@app.get("/ui", response_class=HTMLResponse, tags=["ui"])
-def ui_root():
-    p = pathlib.Path("app/templates/index.html")
-    return p.read_text(encoding="utf-8")
+# Journal des requêtes SQL lentes (SLOW_QUERY_MS, voir app.profiling)
+if profiling.SLOW_QUERY_MS > 0:
+    profiling.install_slow_query_hooks()
+
+# Compression gzip optionnelle des réponses (ex: GZIP_MIN_SIZE=1000)
+GZIP_MIN_SIZE = os.getenv("GZIP_MIN_SIZE")
+if GZIP_MIN_SIZE:
+    app.add_middleware(GZipMiddleware, minimum_size=int(GZIP_MIN_SIZE))
 
-# DB : créer les tables
-models.Base.metadata.create_all(bind=engine)
+# Fichiers statiques et UI (chargés une fois en mémoire, voir app.assets)
+static_assets = StaticAssets()
+ui_template = UITemplate(static_assets)
+app.mount("/static", static_assets, name="static")
+
+@app.get("/ui", response_class=HTMLResponse, tags=["ui"])
+def ui_root(request: Request):
+    return ui_template.response(request)
 
 @app.on_event("startup")
 def startup_event():
     # Crée les tables
     models.Base.metadata.create_all(bind=engine)
-    # Lance le remplissage si la table Player est vide
+    # Lance le remplissage si la table Player est vide (import différé :
+    # le seed et python-dotenv ne servent qu'ici)
+    from . import seed
+
     seed.seed()
+    # Shards d'équipes (si SHARD_URLS est défini) : tables et copie du catalogue
+    if shards.router.enabled:
+        shards.router.create_schema()
+        shards.router.replicate_players()
+    # Instantané partagé du catalogue (si SNAPSHOT_PATH est défini)
+    if snapshot.refresher is not None:
+        snapshot.refresher.refresh_now()
+
+
+@app.on_event("startup")
+async def start_event_hub():
+    # Diffusion des événements SSE (voir app.events)
+    await events.hub.start()
+
+
+@app.on_event("shutdown")
+async def stop_event_hub():
+    await events.hub.stop()
+
+
+@app.on_event("startup")
+async def start_job_runner():
+    # Tâches d'administration en arrière-plan (voir app.jobs)
+    from . import jobs
+
+    if jobs.JOBS_ENABLED:
+        await jobs.runner.start()
+
+
+@app.on_event("shutdown")
+async def stop_job_runner():
+    from . import jobs
+
+    await jobs.runner.stop()
+
+
+@app.on_event("shutdown")
+def flush_audit_log():
+    # Écrit les événements d'audit encore en mémoire
+    audit.log.stop()
 
 # Routers
 app.include_router(auth_router.router)
 app.include_router(players_router.router)
 app.include_router(team_router.router)
+app.include_router(dashboard_router.router)
+app.include_router(batch_router.router)
+app.include_router(events_router.router)
+app.include_router(admin_router.router)
 
 @app.get("/", tags=["default"])
 def read_root():
     return {"message": "Bienvenue sur MyFantasyLeague API"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse, tags=["default"])
+def read_metrics():
+    """Expose les métriques au format texte Prometheus."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 
@@ -0,0 +1,256 @@
+"""Métriques de l'API au format texte Prometheus.
+
+Un middleware ASGI mesure chaque requête (latence, code de statut) et
+les hooks SQLAlchemy ``before_cursor_execute`` / ``after_cursor_execute``
+comptent les requêtes SQL et le temps passé en base.  Les hooks écrivent
+dans un objet propre à la requête (``ContextVar``, propagé aux threads du
+threadpool) et le middleware reporte le tout dans les compteurs du thread
+courant : aucun verrou sur le chemin chaud.  Les compteurs de tous les
+threads ne sont fusionnés qu'à la lecture de ``/metrics``.
+"""
+
+import bisect
+import os
+import re
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34)
+DB_TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+@dataclass
+class RequestStats:
+    """Compteurs SQL de la requête HTTP en cours."""
+
+    queries: int = 0
+    db_time: float = 0.0
+    # Scope ASGI (route et méthode, pour le journal des requêtes lentes)
+    scope: Optional[dict] = None
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+
+# ---------------------------------------------------------------------
+# Agrégation par thread
+# ---------------------------------------------------------------------
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # dernière case : +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def merge(self, other: "Histogram") -> None:
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.sum += other.sum
+
+
+class Shard:
+    """Compteurs d'un thread : seul ce thread y écrit."""
+
+    def __init__(self):
+        self.requests: Dict[Tuple[str, str, str], int] = {}
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.queries: Dict[Tuple[str, str], Histogram] = {}
+        self.db_time: Dict[Tuple[str, str], Histogram] = {}
+
+    def record(self, route: str, method: str, status: int, elapsed: float, stats: RequestStats) -> None:
+        key = (route, method)
+        status_key = (route, method, str(status))
+        self.requests[status_key] = self.requests.get(status_key, 0) + 1
+        if key not in self.latency:
+            self.latency[key] = Histogram(LATENCY_BUCKETS)
+            self.queries[key] = Histogram(QUERY_BUCKETS)
+            self.db_time[key] = Histogram(DB_TIME_BUCKETS)
+        self.latency[key].observe(elapsed)
+        self.queries[key].observe(stats.queries)
+        self.db_time[key].observe(stats.db_time)
+
+
+_local = threading.local()
+_shards: List[Shard] = []
+_shards_lock = threading.Lock()
+
+
+def _shard() -> Shard:
+    shard = getattr(_local, "shard", None)
+    if shard is None:
+        shard = _local.shard = Shard()
+        # Seule la création d'un shard (une fois par thread) prend le verrou
+        with _shards_lock:
+            _shards.append(shard)
+    return shard
+
+
+def record(route: str, method: str, status: int, elapsed: float, stats: RequestStats) -> None:
+    _shard().record(route, method, status, elapsed, stats)
+
+
+def reset() -> None:
+    """Remet les compteurs à zéro (utilisé par les tests)."""
+    with _shards_lock:
+        for shard in _shards:
+            shard.__init__()
+
+
+# ---------------------------------------------------------------------
+# Hooks SQLAlchemy
+# ---------------------------------------------------------------------
+
+_SQL_PLACEHOLDERS = (
+    (re.compile(r"'(?:[^']|'')*'"), "?"),  # chaînes littérales
+    (re.compile(r"%\(\w+\)s|:\w+|\$\d+|%s"), "?"),  # paramètres nommés / psycopg2
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),  # nombres
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)"), "(...)"),  # listes IN (?, ?, ...)
+    (re.compile(r"\s+"), " "),
+)
+
+
+def normalize_sql(statement: str) -> str:
+    """Forme canonique d'une requête : littéraux et paramètres remplacés par ``?``.
+
+    Permet de regrouper les exécutions d'une même requête (N+1, etc.).
+    """
+    for pattern, replacement in _SQL_PLACEHOLDERS:
+        statement = pattern.sub(replacement, statement)
+    return statement.strip()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_start"].pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - started
+
+
+def install_sql_hooks() -> None:
+    """Branche les hooks sur toutes les ``Engine`` (y compris celles des tests)."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# ---------------------------------------------------------------------
+# Middleware ASGI
+# ---------------------------------------------------------------------
+
+def route_label(scope) -> str:
+    """Gabarit de la route (``/players/{player_id}``) plutôt que l'URL brute."""
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    # Applications montées (``/static``) ou route inconnue
+    return scope.get("root_path") or "unmatched"
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope=scope)
+        token = _current.set(stats)
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _current.reset(token)
+            record(route_label(scope), scope["method"], status_code, elapsed, stats)
+
+
+# ---------------------------------------------------------------------
+# Export texte Prometheus
+# ---------------------------------------------------------------------
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+
+
+def _merge() -> Shard:
+    total = Shard()
+    with _shards_lock:
+        shards = list(_shards)
+    for shard in shards:
+        for key, count in list(shard.requests.items()):
+            total.requests[key] = total.requests.get(key, 0) + count
+        for name in ("latency", "queries", "db_time"):
+            merged = getattr(total, name)
+            for key, hist in list(getattr(shard, name).items()):
+                if key not in merged:
+                    merged[key] = Histogram(hist.bounds)
+                merged[key].merge(hist)
+    return total
+
+
+def _render_histogram(lines: List[str], name: str, help_text: str, hists: Dict[Tuple[str, str], Histogram]) -> None:
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for (route, method), hist in sorted(hists.items()):
+        labels = _labels(route=route, method=method)
+        cumulative = 0
+        for bound, count in zip(hist.bounds, hist.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+        cumulative += hist.counts[-1]
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {hist.sum:.6f}")
+        lines.append(f"{name}_count{{{labels}}} {cumulative}")
+
+
+def render() -> str:
+    total = _merge()
+    lines: List[str] = [
+        "# HELP http_requests_total Requêtes HTTP par route, méthode et code de statut.",
+        "# TYPE http_requests_total counter",
+    ]
+    for (route, method, status), count in sorted(total.requests.items()):
+        lines.append(f"http_requests_total{{{_labels(route=route, method=method, status=status)}}} {count}")
+    _render_histogram(lines, "http_request_duration_seconds", "Latence des requêtes HTTP.", total.latency)
+    _render_histogram(lines, "db_queries_per_request", "Requêtes SQL émises par requête HTTP.", total.queries)
+    _render_histogram(lines, "db_time_per_request_seconds", "Temps passé en base par requête HTTP.", total.db_time)
+    return "\n".join(lines) + "\n"
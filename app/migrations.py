@@ -0,0 +1,48 @@
+"""Mise à niveau du schéma d'une base existante.
+
+``create_all`` crée les tables manquantes mais ne modifie jamais une
+table existante : une colonne ajoutée à un modèle après la création de
+la base (volume ``db_data`` conservé par docker-compose) manquerait, et
+la première requête sur la table échouerait.
+
+``upgrade(engine)`` ajoute les colonnes de ``ADDED_COLUMNS`` absentes
+(``ALTER TABLE ... ADD COLUMN``, type repris du modèle).  Elle est
+idempotente : appelée à chaque démarrage avant le seed, et sur chaque
+shard par ``ShardRouter.create_schema``.  Les colonnes ajoutées sont
+facultatives (``NULL``), les lignes existantes restent valides.
+"""
+
+from typing import Optional, Sequence, Tuple
+
+from sqlalchemy import MetaData, inspect, text
+from sqlalchemy.engine import Engine
+
+from . import models
+
+
+# Colonnes ajoutées à des tables existantes : (table, colonne), dans l'ordre d'ajout
+ADDED_COLUMNS: Sequence[Tuple[str, str]] = (
+    ("players", "age"),
+    ("players", "source_hash"),
+    ("players", "deleted_at"),
+)
+
+
+def upgrade(engine: Engine, metadata: Optional[MetaData] = None) -> list:
+    """Ajoute les colonnes manquantes et retourne la liste ``table.colonne`` ajoutée."""
+    metadata = metadata if metadata is not None else models.Base.metadata
+    inspector = inspect(engine)
+    added = []
+    with engine.begin() as conn:
+        for table_name, column_name in ADDED_COLUMNS:
+            table = metadata.tables.get(table_name)
+            if table is None or not inspector.has_table(table_name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table_name)}
+            if column_name in existing:
+                continue
+            column = table.c[column_name]
+            column_type = column.type.compile(dialect=engine.dialect)
+            conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}"))
+            added.append(f"{table_name}.{column_name}")
+    return added
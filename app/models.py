@@ -3,9 +3,15 @@
 Ce module définit les modèles : ``User``, ``Player``, ``Team`` et la
 table d'association ``team_players``.  Un utilisateur peut posséder
 une unique équipe et chaque équipe est composée de plusieurs joueurs.
+Les statistiques par match (``PlayerMatchStat``) et leurs agrégats
+(``PlayerStatRollup``) complètent le catalogue.  ``Job`` persiste les
+tâches d'administration exécutées en arrière-plan et ``AuditEvent``
+l'historique des modifications d'équipes et du catalogue.
+``Lineup``, ``LineupSnapshot`` et ``GameweekFreeze`` gardent la
+composition de chaque équipe à chaque journée (voir ``app.lineups``).
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Table
+from sqlalchemy import JSON, Column, DateTime, Float, Index, Integer, String, Boolean, ForeignKey, Table, UniqueConstraint
 from sqlalchemy.orm import relationship
 
 from .database import Base
@@ -42,7 +48,11 @@ class Player(Base):
     """Modèle joueur de football.
 
     Chaque joueur a un nom, un coût (pour le calcul du budget), un poste
-    (attaquant, milieu, défenseur, gardien, etc.) et un club.
+    (attaquant, milieu, défenseur, gardien, etc.), un club et un âge
+    (facultatif, utilisé par les recommandations de joueurs similaires).
+    ``source_hash`` est l'empreinte de la ligne du fichier source lors de
+    la dernière synchronisation et ``deleted_at`` marque un joueur retiré
+    du fichier (suppression logique, voir ``app.catalog_sync``).
     """
 
     __tablename__ = "players"
@@ -52,6 +62,9 @@ class Player(Base):
     cost: int = Column(Integer, nullable=False)
     position: str = Column(String, nullable=False)
     club: str = Column(String, nullable=False)
+    age: int = Column(Integer, nullable=True)
+    source_hash: str = Column(String(32), nullable=True)
+    deleted_at = Column(DateTime, nullable=True)
 
     teams = relationship(
         "Team",
@@ -79,4 +92,146 @@ class Team(Base):
         "Player",
         secondary="team_players",   
         lazy="selectin"             
-    )
\ No newline at end of file
+    )
+
+
+class PlayerMatchStat(Base):
+    """Statistiques d'un joueur pour une journée (gameweek).
+
+    La table est en ajout seul : un événement n'est jamais modifié et la
+    contrainte d'unicité sur ``(player_id, gameweek)`` sert aussi d'index
+    pour les lectures par joueur et par journée.
+    """
+
+    __tablename__ = "player_match_stats"
+    __table_args__ = (
+        UniqueConstraint("player_id", "gameweek", name="uq_player_match_stats_player_gameweek"),
+    )
+
+    id: int = Column(Integer, primary_key=True)
+    player_id: int = Column(Integer, ForeignKey("players.id", ondelete="CASCADE"), nullable=False)
+    gameweek: int = Column(Integer, nullable=False)
+    goals: int = Column(Integer, nullable=False, default=0)
+    assists: int = Column(Integer, nullable=False, default=0)
+    yellow_cards: int = Column(Integer, nullable=False, default=0)
+    red_cards: int = Column(Integer, nullable=False, default=0)
+    own_goals: int = Column(Integer, nullable=False, default=0)
+    substituted_in: bool = Column(Boolean, nullable=False, default=False)
+    substituted_out: bool = Column(Boolean, nullable=False, default=False)
+
+
+class PlayerStatRollup(Base):
+    """Agrégats de saison d'un joueur, tenus à jour à chaque ingestion.
+
+    ``recent`` conserve les derniers matchs (fenêtre glissante) sous forme
+    de listes compactes ``[gameweek, goals, assists, ...]`` afin de
+    calculer la forme sans relire ``player_match_stats``.
+    """
+
+    __tablename__ = "player_stat_rollups"
+
+    player_id: int = Column(Integer, ForeignKey("players.id", ondelete="CASCADE"), primary_key=True)
+    matches: int = Column(Integer, nullable=False, default=0)
+    goals: int = Column(Integer, nullable=False, default=0)
+    assists: int = Column(Integer, nullable=False, default=0)
+    yellow_cards: int = Column(Integer, nullable=False, default=0)
+    red_cards: int = Column(Integer, nullable=False, default=0)
+    own_goals: int = Column(Integer, nullable=False, default=0)
+    substituted_in: int = Column(Integer, nullable=False, default=0)
+    substituted_out: int = Column(Integer, nullable=False, default=0)
+    last_gameweek: int = Column(Integer, nullable=False, default=0)
+    recent: list = Column(JSON, nullable=False, default=list)
+
+
+class Job(Base):
+    """Tâche d'administration exécutée en arrière-plan (voir ``app.jobs``).
+
+    La ligne est la source de vérité : une tâche ``queued`` ou dont le
+    worker a disparu (``heartbeat_at`` trop ancien) est reprise au
+    redémarrage.
+    """
+
+    __tablename__ = "jobs"
+
+    id: int = Column(Integer, primary_key=True, index=True)
+    kind: str = Column(String, nullable=False)
+    params: dict = Column(JSON, nullable=False, default=dict)
+    status: str = Column(String, nullable=False, default="queued", index=True)
+    progress: float = Column(Float, nullable=False, default=0.0)
+    message: str = Column(String, nullable=True)
+    result: dict = Column(JSON, nullable=True)
+    checkpoint: dict = Column(JSON, nullable=True)
+    error: str = Column(String, nullable=True)
+    cancel_requested: bool = Column(Boolean, nullable=False, default=False)
+    attempts: int = Column(Integer, nullable=False, default=0)
+    created_by: int = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+
+
+class AuditEvent(Base):
+    """Historique en ajout seul : qui a ajouté ou retiré quel joueur, qui a changé un prix.
+
+    Écrit par lots en arrière-plan (voir ``app.audit``).  Pas de clé
+    étrangère : l'historique survit à la suppression d'un joueur ou d'un
+    utilisateur.  L'index ``(user_id, created_at)`` sert les lectures par
+    utilisateur et par période.
+    """
+
+    __tablename__ = "audit_events"
+    __table_args__ = (
+        Index("ix_audit_events_user_created", "user_id", "created_at"),
+    )
+
+    id: int = Column(Integer, primary_key=True)
+    created_at = Column(DateTime, nullable=False, index=True)
+    user_id: int = Column(Integer, nullable=True)
+    action: str = Column(String, nullable=False)
+    team_id: int = Column(Integer, nullable=True)
+    player_id: int = Column(Integer, nullable=True)
+    details: dict = Column(JSON, nullable=True)
+
+
+class Lineup(Base):
+    """Composition d'équipe adressée par son contenu (``digest`` des ids triés).
+
+    Partagée par toutes les équipes et toutes les journées qui ont la même
+    composition : une ligne par composition distincte, pas par équipe.
+    """
+
+    __tablename__ = "lineups"
+
+    id: int = Column(Integer, primary_key=True)
+    digest: str = Column(String(32), nullable=False, unique=True)
+    player_ids: list = Column(JSON, nullable=False)
+
+
+class LineupSnapshot(Base):
+    """Composition d'une équipe à partir d'une journée (copie à l'écriture).
+
+    Une ligne n'est écrite que si la composition a changé depuis le
+    dernier gel : la composition à la journée ``g`` est celle de la ligne
+    de plus grande ``gameweek <= g``, trouvée par la clé primaire
+    ``(team_id, gameweek)``.  Pas de clé étrangère vers ``teams`` :
+    l'historique est déplacé avec l'équipe lors d'un rééquilibrage.
+    """
+
+    __tablename__ = "lineup_snapshots"
+
+    team_id: int = Column(Integer, primary_key=True)
+    gameweek: int = Column(Integer, primary_key=True)
+    lineup_id: int = Column(Integer, ForeignKey("lineups.id"), nullable=False)
+
+
+class GameweekFreeze(Base):
+    """Journée gelée (échéance passée) et bilan du gel."""
+
+    __tablename__ = "gameweek_freezes"
+
+    gameweek: int = Column(Integer, primary_key=True, autoincrement=False)
+    frozen_at = Column(DateTime, nullable=False)
+    teams: int = Column(Integer, nullable=False, default=0)
+    changed: int = Column(Integer, nullable=False, default=0)
+    lineups_created: int = Column(Integer, nullable=False, default=0)
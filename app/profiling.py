@@ -0,0 +1,236 @@
+"""Diagnostic des pics de latence : requêtes SQL lentes et profileur par échantillonnage.
+
+Journal des requêtes lentes (``SLOW_QUERY_MS``, 0 pour le désactiver) :
+des hooks SQLAlchemy chronomètrent chaque exécution ; au-delà du seuil,
+la requête est journalisée (logger ``app.profiling``) et gardée dans un
+tampon circulaire (``SLOW_QUERY_KEEP`` dernières, ``GET /admin/slow-queries``)
+avec :
+
+- le SQL normalisé (``metrics.normalize_sql``) ;
+- la forme des paramètres (types, jamais les valeurs : ``int×40`` pour
+  une liste ``IN``, nombre de lignes pour un ``executemany``) ;
+- la durée, la route HTTP (``GET /players/{player_id}``, connue grâce au
+  middleware de ``app.metrics``) et le thread (tâches, audit…) ;
+- pour une requête qui échoue (``handle_error``), le nom de l'exception
+  (``error``) : un verrou attendu jusqu'au timeout est aussi une requête lente.
+
+Profileur (``GET /admin/profile?seconds=N``) : pendant ``N`` secondes, un
+thread relève toutes les ``interval`` secondes la pile de chaque thread
+(``sys._current_frames``) et compte les piles identiques.  Le résultat
+est au format « collapsed » (``thread;f1;f2;f3 42`` par ligne), lisible
+par ``flamegraph.pl`` ou speedscope.  Aucun agent externe ni
+instrumentation : le coût est celui d'un relevé de piles par intervalle,
+et il ne s'exécute que pendant la mesure (un profil à la fois).
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from . import metrics
+
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_KEEP = int(os.getenv("SLOW_QUERY_KEEP", "100"))
+
+PROFILE_INTERVAL = 0.01
+PROFILE_MAX_SECONDS = 60.0
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+# ---------------------------------------------------------------------
+# Requêtes lentes
+# ---------------------------------------------------------------------
+
+def _type_name(value: Any) -> str:
+    return "null" if value is None else type(value).__name__
+
+
+def _run_lengths(names: List[str]) -> List[str]:
+    """``["int", "int", "str"]`` -> ``["int×2", "str"]``."""
+    out: List[str] = []
+    previous, count = None, 0
+    for name in names + [None]:
+        if name == previous:
+            count += 1
+            continue
+        if previous is not None:
+            out.append(previous if count == 1 else f"{previous}×{count}")
+        previous, count = name, 1
+    return out
+
+
+def param_shape(parameters: Any, executemany: bool = False) -> Any:
+    """Forme des paramètres liés : types seulement, sans les valeurs."""
+    if executemany and isinstance(parameters, (list, tuple)):
+        return {"rows": len(parameters), "row": param_shape(parameters[0]) if parameters else None}
+    if isinstance(parameters, dict):
+        return {key: _type_name(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return _run_lengths([_type_name(value) for value in parameters])
+    return _type_name(parameters)
+
+
+class SlowQueryLog:
+    """Requêtes au-delà de ``threshold_ms`` : journalisées et gardées (les plus récentes)."""
+
+    def __init__(self, threshold_ms: float = SLOW_QUERY_MS, keep: int = SLOW_QUERY_KEEP):
+        self.threshold = threshold_ms / 1000.0
+        self.entries: deque = deque(maxlen=keep)
+        self.count = 0
+
+    def record(self, statement: str, parameters: Any, executemany: bool, elapsed: float,
+               error: Optional[str] = None) -> dict:
+        stats = metrics.current_stats()
+        scope = stats.scope if stats is not None else None
+        entry = {
+            "at": datetime.utcnow(),
+            "duration_ms": round(elapsed * 1000.0, 3),
+            "sql": metrics.normalize_sql(statement),
+            "params": param_shape(parameters, executemany),
+            "route": f"{scope['method']} {metrics.route_label(scope)}" if scope is not None else None,
+            "thread": threading.current_thread().name,
+            "error": error,
+        }
+        # ``deque.append`` est atomique : pas de verrou sur ce chemin
+        self.entries.append(entry)
+        self.count += 1
+        logger.warning(
+            "slow query %.1f ms [%s] %s params=%s%s",
+            entry["duration_ms"], entry["route"] or entry["thread"], entry["sql"], entry["params"],
+            f" error={error}" if error else "",
+        )
+        return entry
+
+    def recent(self, limit: int = 50) -> List[dict]:
+        """Dernières requêtes lentes, de la plus récente à la plus ancienne."""
+        return list(reversed(self.entries))[:limit]
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.count = 0
+
+
+slow_queries = SlowQueryLog()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("slow_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["slow_query_start"].pop()
+    log = slow_queries
+    if elapsed >= log.threshold:
+        log.record(statement, parameters, executemany, elapsed)
+
+
+def _handle_error(exception_context):
+    # Échec pendant l'exécution : ``after_cursor_execute`` n'est pas appelé.
+    # Les erreurs de lecture du résultat (statement ``None``) ou d'avant
+    # l'exécution (pas de contexte) n'ont pas de départ empilé.
+    conn = exception_context.connection
+    context = exception_context.execution_context
+    if conn is None or context is None or exception_context.statement is None:
+        return
+    starts = conn.info.get("slow_query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    log = slow_queries
+    if elapsed >= log.threshold:
+        log.record(
+            exception_context.statement, exception_context.parameters, context.executemany, elapsed,
+            error=type(exception_context.original_exception).__name__,
+        )
+
+
+def install_slow_query_hooks() -> None:
+    """Branche le chronométrage sur toutes les ``Engine`` (shards et tests compris)."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+
+
+# ---------------------------------------------------------------------
+# Profileur par échantillonnage
+# ---------------------------------------------------------------------
+
+_profile_lock = threading.Lock()
+
+
+def _short_path(filename: str) -> str:
+    path = filename.replace("\\", "/")
+    root = str(ROOT).replace("\\", "/") + "/"
+    if path.startswith(root):
+        return path[len(root):]
+    marker = path.rfind("-packages/")
+    if marker != -1:
+        return path[marker + len("-packages/"):]
+    return path.rsplit("/", 1)[-1]
+
+
+def sample_stacks(seconds: float, interval: float = PROFILE_INTERVAL) -> Tuple[Counter, int]:
+    """Piles de tous les threads (sauf l'appelant) relevées pendant ``seconds``.
+
+    Retourne ``(Counter pile -> nombre de relevés, nombre de relevés)``.
+    Chaque pile est ``nom du thread;appelant;...;fonction courante``.
+    """
+    own = threading.get_ident()
+    labels: Dict[Any, str] = {}
+    names: Dict[int, str] = {}
+    stacks: Counter = Counter()
+    samples = 0
+    deadline = time.monotonic() + seconds
+    while True:
+        frames = sys._current_frames()
+        if any(ident not in names for ident in frames):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in frames.items():
+            if ident == own:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                label = labels.get(code)
+                if label is None:
+                    label = labels[code] = f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+                stack.append(label)
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}").replace(";", ","))
+            stacks[";".join(reversed(stack))] += 1
+        del frames
+        samples += 1
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return stacks, samples
+        time.sleep(min(interval, remaining))
+
+
+def collapse(stacks: Counter) -> str:
+    """Format « collapsed » de ``flamegraph.pl`` : ``pile nombre`` par ligne."""
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items()))
+
+
+def profile(seconds: float, interval: float = PROFILE_INTERVAL) -> Tuple[Counter, int]:
+    """``sample_stacks`` réservé à un seul profil à la fois (409 sinon)."""
+    if not _profile_lock.acquire(blocking=False):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A profile is already running")
+    try:
+        return sample_stacks(seconds, interval)
+    finally:
+        _profile_lock.release()
@@ -0,0 +1,152 @@
+"""Routes d'administration : tâches en arrière-plan et journal d'audit.
+
+Les opérations longues sont soumises avec ``POST /admin/jobs`` et
+suivies avec ``GET /admin/jobs/{id}`` (voir ``app.jobs``).  L'historique
+des modifications se lit avec ``GET /admin/audit`` (voir ``app.audit``).
+Les requêtes SQL lentes et le profileur par échantillonnage sont décrits
+dans ``app.profiling``, la synchronisation du catalogue depuis un fichier
+source dans ``app.catalog_sync``.
+
+``app.jobs`` (corps des tâches, modèles de paramètres) est importé à la
+première utilisation, pas au chargement de l'application.
+"""
+
+import csv
+import io
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.orm import Session
+
+from .. import models, schemas, auth, audit, catalog_sync, profiling
+from ..dependencies import get_db
+
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+def _get_job(db: Session, job_id: int) -> models.Job:
+    job = db.get(models.Job, job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+
+@router.post("/jobs", response_model=schemas.JobOut, status_code=status.HTTP_202_ACCEPTED)
+def create_job(
+    job_in: schemas.JobCreate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_admin_user),
+):
+    """Met une tâche en file et répond sans attendre son exécution."""
+    from .. import jobs
+
+    return jobs.submit(db, job_in.kind, job_in.params, user_id=current_user.id)
+
+
+@router.get("/jobs", response_model=List[schemas.JobOut])
+def list_jobs(
+    status_: Optional[str] = Query(None, alias="status"),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_admin_user),
+):
+    """Dernières tâches, éventuellement filtrées par statut."""
+    query = db.query(models.Job).order_by(models.Job.id.desc())
+    if status_ is not None:
+        query = query.filter(models.Job.status == status_)
+    return query.limit(limit).all()
+
+
+@router.get("/jobs/{job_id}", response_model=schemas.JobOut)
+def read_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_admin_user),
+):
+    """État, progression et résultat d'une tâche."""
+    return _get_job(db, job_id)
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=schemas.JobOut)
+def cancel_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_admin_user),
+):
+    """Annule une tâche en file ou demande l'arrêt d'une tâche en cours."""
+    from .. import jobs
+
+    job = _get_job(db, job_id)
+    if job.status in jobs.FINISHED:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Job already {job.status}")
+    return jobs.request_cancel(db, job)
+
+
+@router.get("/audit", response_model=List[schemas.AuditEventOut])
+def list_audit_events(
+    user_id: Optional[int] = Query(None, description="Auteur (propriétaire de l'équipe ou admin)"),
+    since: Optional[datetime] = Query(None, description="Date UTC incluse (ISO 8601)"),
+    until: Optional[datetime] = Query(None, description="Date UTC exclue (ISO 8601)"),
+    action: Optional[str] = Query(None, description="ex: `team.add_player`, `player.update`"),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_admin_user),
+):
+    """Historique des modifications, du plus récent au plus ancien."""
+    # Les événements encore en mémoire dans ce worker sont écrits d'abord
+    audit.log.flush()
+    Event = models.AuditEvent
+    query = db.query(Event)
+    if user_id is not None:
+        query = query.filter(Event.user_id == user_id)
+    if since is not None:
+        query = query.filter(Event.created_at >= since)
+    if until is not None:
+        query = query.filter(Event.created_at < until)
+    if action is not None:
+        query = query.filter(Event.action == action)
+    return query.order_by(Event.created_at.desc(), Event.id.desc()).limit(limit).all()
+
+
+@router.get("/slow-queries", response_model=List[schemas.SlowQueryOut])
+def list_slow_queries(
+    limit: int = Query(50, ge=1, le=1000),
+    current_user: models.User = Depends(auth.get_current_admin_user),
+):
+    """Dernières requêtes SQL au-delà de ``SLOW_QUERY_MS`` dans ce worker."""
+    return profiling.slow_queries.recent(limit)
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+def sample_profile(
+    seconds: float = Query(5.0, gt=0, le=profiling.PROFILE_MAX_SECONDS),
+    interval: float = Query(profiling.PROFILE_INTERVAL, ge=0.001, le=1.0, description="Secondes entre deux relevés"),
+    current_user: models.User = Depends(auth.get_current_admin_user),
+):
+    """Profil de tous les threads de ce worker pendant ``seconds`` secondes.
+
+    Piles au format « collapsed » (``thread;appelant;...;fonction nombre``),
+    à passer à ``flamegraph.pl`` ou à ouvrir dans speedscope.
+    """
+    stacks, samples = profiling.profile(seconds, interval)
+    return PlainTextResponse(profiling.collapse(stacks), headers={"X-Profile-Samples": str(samples)})
+
+
+@router.post("/catalog/sync", response_model=schemas.CatalogSyncOut)
+def sync_catalog(
+    file: UploadFile = File(..., description="CSV des joueurs (mêmes colonnes que players_seed.csv)"),
+    dry_run: bool = Query(False, description="Calcule le bilan sans rien écrire"),
+    delete_missing: bool = Query(True, description="Supprime (logiquement) les joueurs absents du fichier"),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_admin_user),
+):
+    """Applique au catalogue les seules différences avec le fichier envoyé, lu en flux."""
+    lines = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        return catalog_sync.sync(db, lines, dry_run=dry_run, delete_missing=delete_missing, actor_id=current_user.id)
+    except (UnicodeDecodeError, csv.Error) as exc:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid CSV file: {exc}")
@@ -0,0 +1,131 @@
+"""Exécution groupée de sous-requêtes : ``POST /batch``.
+
+Le client envoie une liste de requêtes ``{method, path, body}`` ; elles
+sont rejouées dans l'ordre, en interne, contre l'application elle-même
+(mêmes routes, mêmes validations, mêmes erreurs) et leurs réponses sont
+renvoyées dans une seule réponse HTTP.
+
+Les sous-requêtes partagent une même session SQLAlchemy et l'utilisateur
+authentifié n'est résolu qu'une fois : ``get_db`` et
+``auth.get_current_user`` réutilisent ce qui est posé dans
+``request.state`` (partagé via ``scope["state"]``).
+"""
+
+import os
+from typing import List, Tuple
+from urllib.parse import urlsplit
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.orm import Session
+
+from .. import schemas
+from ..dependencies import get_db
+
+
+BATCH_MAX_REQUESTS = int(os.getenv("BATCH_MAX_REQUESTS", "20"))
+
+ALLOWED_METHODS = {"GET", "POST", "PUT", "PATCH", "DELETE"}
+
+# En-têtes du client transmis aux sous-requêtes (pas d'Accept-Encoding :
+# les corps sont relus ici, ils ne doivent pas être compressés)
+FORWARDED_HEADERS = (b"authorization", b"user-agent")
+
+# Routes qui ne peuvent pas être groupées (récursion, flux sans fin)
+UNBATCHABLE = ("/batch", "/events")
+
+router = APIRouter(prefix="/batch", tags=["batch"])
+
+
+async def _dispatch(request: Request, item: schemas.BatchItem, state: dict) -> Tuple[int, object]:
+    """Rejoue une sous-requête contre l'application ASGI et lit sa réponse."""
+    url = urlsplit(item.path)
+    body = orjson.dumps(item.body) if item.body is not None else b""
+    headers = [(k, v) for k, v in request.scope["headers"] if k in FORWARDED_HEADERS]
+    if item.body is not None:
+        headers.append((b"content-type", b"application/json"))
+    headers.append((b"content-length", str(len(body)).encode()))
+
+    scope = {
+        "type": "http",
+        "asgi": request.scope.get("asgi", {"version": "3.0"}),
+        "http_version": "1.1",
+        "method": item.method.upper(),
+        "scheme": request.scope.get("scheme", "http"),
+        "server": request.scope.get("server"),
+        "client": request.scope.get("client"),
+        "root_path": "",
+        "path": url.path,
+        "raw_path": url.path.encode(),
+        "query_string": url.query.encode(),
+        "headers": headers,
+        "state": state,
+    }
+
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            return {"type": "http.disconnect"}
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    status_code = 500
+    chunks: List[bytes] = []
+    content_type = ""
+
+    async def send(message):
+        nonlocal status_code, content_type
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+            for key, value in message.get("headers", []):
+                if key.lower() == b"content-type":
+                    content_type = value.decode("latin-1")
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    try:
+        await request.app(scope, receive, send)
+    except Exception:
+        # L'erreur 500 a déjà été envoyée par ``ServerErrorMiddleware``
+        # (qui relance l'exception) : on garde la réponse, pas l'exception
+        status_code = 500
+
+    raw = b"".join(chunks)
+    if not raw:
+        return status_code, None
+    if content_type.startswith("application/json"):
+        return status_code, orjson.loads(raw)
+    return status_code, raw.decode("utf-8", errors="replace")
+
+
+@router.post("/", response_model=schemas.BatchOut)
+async def run_batch(payload: schemas.BatchIn, request: Request, db: Session = Depends(get_db)):
+    """Exécute les sous-requêtes dans l'ordre et renvoie leurs réponses.
+
+    Une sous-requête en erreur n'interrompt pas les suivantes : son code
+    de statut et son corps figurent simplement dans la réponse.
+    """
+    if len(payload.requests) > BATCH_MAX_REQUESTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many requests in batch (max {BATCH_MAX_REQUESTS})",
+        )
+
+    state = {"db": db}
+    responses = []
+    for item in payload.requests:
+        method = item.method.upper()
+        if method not in ALLOWED_METHODS or not item.path.startswith("/"):
+            responses.append({"status": 400, "body": {"detail": "Invalid sub-request"}})
+            continue
+        if urlsplit(item.path).path.rstrip("/") in UNBATCHABLE:
+            responses.append({"status": 400, "body": {"detail": "Route not allowed in batch"}})
+            continue
+        code, body = await _dispatch(request, item, state)
+        if code >= 400:
+            # Rien de ce qui a échoué ne doit fuiter dans la sous-requête suivante
+            db.rollback()
+        responses.append({"status": code, "body": body})
+    return {"responses": responses}
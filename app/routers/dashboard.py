@@ -0,0 +1,43 @@
+"""Vue composite ``/dashboard`` pour l'interface web.
+
+Au chargement et après chaque ajout / retrait, l'UI a besoin de son
+équipe, d'une page du catalogue et du budget restant.  Cette route
+renvoie les trois en une seule requête HTTP, avec une seule session de
+base de données et une seule résolution du token (l'équipe est lue sur
+son shard si ``SHARD_URLS`` est défini, voir ``app.shards``).
+"""
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from .. import models, schemas, crud, auth, serializers, shards
+from ..dependencies import get_db
+from . import team as team_router
+
+
+router = APIRouter(prefix="/dashboard", tags=["dashboard"])
+
+
+@router.get("/", response_model=schemas.DashboardOut)
+def read_dashboard(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+    team_db: Session = Depends(shards.get_team_db),
+    current_user: models.User = Depends(auth.get_current_active_user),
+):
+    budget = team_router.BUDGET
+    team = crud.get_team_by_owner(team_db, current_user.id)
+    if team:
+        team_view = serializers.team_to_dict(team, budget)
+    else:
+        team_view = serializers.empty_team_dict(current_user.id, budget)
+    players = crud.get_players(db, skip=skip, limit=limit)
+    return serializers.json_response({
+        "team": team_view,
+        "players": serializers.players_to_list(players),
+        "budget_left": team_view["budget_left"],
+        "total_budget": budget,
+        "skip": skip,
+        "limit": limit,
+    })
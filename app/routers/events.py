@@ -0,0 +1,92 @@
+"""Flux Server-Sent Events : ``GET /events``.
+
+Le flux envoie les changements de version du catalogue et les
+modifications de l'équipe de l'utilisateur connecté (faites depuis un
+autre onglet, par exemple), ce qui évite de sonder ``/players`` et
+``/team``.  ``EventSource`` ne permet pas d'envoyer d'en-tête
+``Authorization`` : le navigateur demande d'abord un ticket
+(``POST /events/ticket``, avec son token) et le passe en ``?ticket=``.
+Le token d'accès n'apparaît donc jamais dans une URL (journaux d'accès,
+proxys) ; le ticket expire après ``SSE_TICKET_EXPIRE_SECONDS`` et n'ouvre
+que ce flux.
+
+Aucune session de base de données n'est gardée pendant le flux : un
+client inactif ne coûte que son abonnement (quelques Ko).
+"""
+
+from typing import AsyncIterator, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from .. import auth, events, models, schemas
+from ..dependencies import get_db
+
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+# Délai de reconnexion conseillé au navigateur (ms)
+RETRY_MS = 3000
+
+
+async def event_stream(hub: events.Hub, channels: List[str], heartbeat: float) -> AsyncIterator[bytes]:
+    """Messages des ``channels``, avec un commentaire ``ping`` pendant les silences.
+
+    L'abonnement n'est pris qu'à la première itération, dans le ``try`` :
+    un client qui se déconnecte avant le premier envoi (le générateur
+    n'est alors jamais démarré) ne laisse pas d'abonné orphelin.
+    """
+    subscriber = hub.subscribe(channels)
+    try:
+        hello = events.encode("hello", {"catalog_version": hub.catalog_version})
+        yield f"retry: {RETRY_MS}\n".encode() + hello
+        while True:
+            message = await subscriber.get(heartbeat)
+            if subscriber.evicted:
+                # Client trop lent : il doit relire l'état complet
+                yield events.encode("reset", {})
+                break
+            yield message if message is not None else b": ping\n\n"
+    finally:
+        hub.unsubscribe(subscriber)
+
+
+@router.post("/ticket", response_model=schemas.SseTicket)
+def create_ticket(current_user: models.User = Depends(auth.get_current_active_user)):
+    """Ticket à passer à ``GET /events?ticket=...`` (``EventSource``)."""
+    return {"ticket": auth.create_sse_ticket(current_user.email), "expires_in": auth.SSE_TICKET_EXPIRE_SECONDS}
+
+
+@router.get("/")
+async def stream_events(
+    request: Request,
+    ticket: Optional[str] = Query(None, description="Ticket de `POST /events/ticket` (sinon en-tête `Authorization`)."),
+    db: Session = Depends(get_db),
+):
+    """Flux SSE des événements ``catalog`` et ``team`` de l'utilisateur."""
+    if ticket is not None:
+        user = auth.user_from_token(db, ticket, scope=auth.SSE_SCOPE)
+    else:
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        user = auth.user_from_token(db, token) if scheme.lower() == "bearer" and token else None
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    user_id = user.id
+    # Rend la connexion au pool avant d'ouvrir un flux potentiellement très long
+    db.close()
+
+    return StreamingResponse(
+        event_stream(events.hub, [events.CATALOG, events.team_channel(user_id)], events.EVENTS_HEARTBEAT),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Pas de mise en tampon par un proxy ni par GZipMiddleware
+            "X-Accel-Buffering": "no",
+            "Content-Encoding": "identity",
+        },
+    )
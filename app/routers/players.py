@@ -4,31 +4,149 @@ Les opérations de création, modification et suppression sont
 réservées aux administrateurs.  La consultation est ouverte à tous.
 """
 
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 
-from .. import models, schemas, crud, auth
+from .. import models, schemas, crud, auth, events, serializers, shards, similarity, snapshot, trending
 from ..dependencies import get_db
 
 
 router = APIRouter(prefix="/players", tags=["players"])
 
 
+FIELDS_DESCRIPTION = "Champs à renvoyer, séparés par des virgules (ex: `name,position,cost`) ; `id` est toujours inclus."
+
+
 @router.get("/", response_model=List[schemas.PlayerOut])
-def read_players(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Retourne la liste des joueurs avec pagination."""
+def read_players(
+    skip: int = 0,
+    limit: int = 100,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: Session = Depends(get_db),
+):
+    """Retourne la liste des joueurs avec pagination.
+
+    Avec ``fields``, seules les colonnes demandées sont lues en base.
+    """
+    projection = serializers.parse_fields(fields)
+    if projection is not None:
+        rows = crud.get_player_rows(db, projection, skip=skip, limit=limit)
+        return serializers.json_response(serializers.rows_to_list(rows, projection))
+    snap = snapshot.current()
+    if snap is not None:
+        # Page lue telle quelle dans l'instantané partagé (voir app.snapshot)
+        return Response(snap.page(skip, limit), media_type="application/json")
     players = crud.get_players(db, skip=skip, limit=limit)
-    return [schemas.PlayerOut.from_orm(p) for p in players]
+    return serializers.json_response(serializers.players_to_list(players))
+
+
+@router.get("/ownership", response_model=List[schemas.OwnershipOut])
+def read_ownership(limit: int = Query(20, ge=1, le=500)):
+    """Joueurs les plus possédés : nombre d'équipes et part des équipes.
+
+    Agrégé sur tous les shards d'équipes (voir ``app.shards``).
+    """
+    counts = shards.ownership_counts()
+    total = shards.team_count()
+    top = sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:limit]
+    return serializers.json_response([
+        {"player_id": player_id, "teams": teams, "share": teams / total if total else 0.0}
+        for player_id, teams in top
+    ])
+
+
+@router.get("/trending", response_model=List[schemas.TrendingOut])
+def read_trending(
+    window: str = Query("24h", pattern="^(1h|24h)$"),
+    direction: str = Query("in", pattern="^(in|out)$", description="`in` : recrutés, `out` : libérés"),
+    limit: int = Query(10, ge=1, le=trending.TRENDING_KEEP),
+):
+    """Joueurs les plus recrutés (ou libérés) sur la dernière heure ou les dernières 24 h.
+
+    Lu dans les compteurs en mémoire (voir ``app.trending``), sans requête SQL.
+    """
+    top = trending.tracker.top(window, direction, limit)
+    return serializers.json_response([{"player_id": pid, "transfers": n} for pid, n in top])
 
 
 @router.get("/{player_id}", response_model=schemas.PlayerOut)
-def read_player(player_id: int, db: Session = Depends(get_db)):
+def read_player(
+    player_id: int,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: Session = Depends(get_db),
+):
     """Retourne les détails d'un joueur."""
+    projection = serializers.parse_fields(fields)
+    if projection is not None:
+        row = crud.get_player_row(db, player_id, projection)
+        if row is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Player not found")
+        return serializers.json_response(serializers.row_to_dict(row, projection))
+    snap = snapshot.current()
+    if snap is not None:
+        body = snap.get(player_id)
+        if body is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Player not found")
+        return Response(body, media_type="application/json")
     player = crud.get_player(db, player_id)
-    if not player:
+    if not player or player.deleted_at is not None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Player not found")
-    return schemas.PlayerOut.from_orm(player)
+    return schemas.PlayerOut.model_validate(player)
+
+
+@router.get("/{player_id}/stats", response_model=schemas.PlayerSeasonStats)
+def read_player_stats(player_id: int, db: Session = Depends(get_db)):
+    """Retourne les totaux de la saison, lus dans la table d'agrégats."""
+    rollup = crud.get_player_rollup(db, player_id)
+    if rollup is None:
+        if not crud.get_player(db, player_id):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Player not found")
+        return schemas.PlayerSeasonStats(player_id=player_id)
+    return schemas.PlayerSeasonStats.model_validate(rollup)
+
+
+@router.get("/{player_id}/form", response_model=schemas.PlayerForm)
+def read_player_form(
+    player_id: int,
+    last: int = Query(crud.FORM_WINDOW, ge=1, le=crud.FORM_WINDOW),
+    db: Session = Depends(get_db),
+):
+    """Retourne la forme du joueur sur ses ``last`` derniers matchs."""
+    rollup = crud.get_player_rollup(db, player_id)
+    if rollup is None and not crud.get_player(db, player_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Player not found")
+    games = crud.player_form(rollup, last)
+    totals = {f: sum(g[f] for g in games) for f in ("goals", "assists", "yellow_cards", "red_cards")}
+    return schemas.PlayerForm(player_id=player_id, matches=len(games), games=games, **totals)
+
+
+@router.get("/{player_id}/similar", response_model=List[schemas.SimilarPlayerOut])
+def read_similar_players(
+    player_id: int,
+    max_cost: Optional[float] = Query(None, ge=0, description="Coût maximum des joueurs proposés"),
+    limit: int = Query(10, ge=1, le=50),
+):
+    """Joueurs au profil proche (poste, âge, valeur, statistiques), du plus proche au plus lointain.
+
+    Lus dans l'index précalculé (``app.similarity``), sans requête SQL.
+    """
+    result = similarity.builder.current().similar(player_id, max_cost=max_cost, limit=limit)
+    if result is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Player not found")
+    return serializers.json_response(result)
+
+
+@router.post("/stats", response_model=schemas.StatsIngestOut, status_code=status.HTTP_201_CREATED)
+def ingest_stats(
+    events: List[schemas.MatchStatIn],
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_admin_user),
+):
+    """Ingère un lot de statistiques de match (admin uniquement)."""
+    ingested = crud.ingest_match_stats(db, events)
+    similarity.refresh()
+    return {"ingested": ingested}
 
 
 @router.post("/", response_model=schemas.PlayerOut, status_code=status.HTTP_201_CREATED)
@@ -39,7 +157,8 @@ def create_player(
 ):
     """Crée un joueur (admin uniquement)."""
     player = crud.create_player(db, player_in)
-    return schemas.PlayerOut.from_orm(player)
+    events.catalog_changed("created", [player.id])
+    return schemas.PlayerOut.model_validate(player)
 
 
 @router.put("/{player_id}", response_model=schemas.PlayerOut)
@@ -53,8 +172,9 @@ def update_player(
     player = crud.get_player(db, player_id)
     if not player:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Player not found")
-    player = crud.update_player(db, player, update_in)
-    return schemas.PlayerOut.from_orm(player)
+    player = crud.update_player(db, player, update_in, actor_id=current_user.id)
+    events.catalog_changed("updated", [player.id])
+    return schemas.PlayerOut.model_validate(player)
 
 
 @router.delete("/{player_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -67,5 +187,6 @@ def delete_player(
     player = crud.get_player(db, player_id)
     if not player:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Player not found")
-    crud.delete_player(db, player)
+    crud.delete_player(db, player, actor_id=current_user.id)
+    events.catalog_changed("deleted", [player_id])
     return None
\ No newline at end of file
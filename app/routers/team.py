@@ -1,111 +1,205 @@
 # app/routers/team.py
 import os
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from pydantic import BaseModel
 
-from .. import models, schemas, crud, auth
-from ..dependencies import get_db 
+from .. import models, schemas, crud, auth, events, idempotency, lineups, serializers, shards, simulation, team_cache
+from ..dependencies import get_db
 
 # On récupère le budget (1 milliard si défini dans .env)
 BUDGET = int(os.getenv("BUDGET", "100000000"))
 
 router = APIRouter(prefix="/team", tags=["team"])
 
+IDEMPOTENCY_DESCRIPTION = "Clé choisie par le client : une répétition rejoue la première réponse sans modifier l'équipe."
+
 # --- Fonction utilitaire pour calculer le budget ---
-def format_team_response(team: models.Team) -> schemas.TeamOut:
-    """Calcule le budget restant et retourne l'objet TeamOut complet."""
+def format_team_response(
+    team: models.Team,
+    status_code: int = status.HTTP_200_OK,
+    notify: bool = False,
+    versions: Optional[team_cache.Versions] = None,
+):
+    """Calcule le budget restant et renvoie la vue ``TeamOut`` encodée.
+
+    Les lignes ORM ne sont pas revalidées par Pydantic : voir
+    ``app.serializers``.  Avec ``notify`` (après une écriture), la version
+    de l'équipe est incrémentée dans ``team_cache`` (la nouvelle vue y est
+    gardée si ``versions``, lues avant l'écriture, sont toujours à jour) et
+    la vue est poussée aux autres onglets du propriétaire (``GET /events``).
+    """
     if not team:
         return None
-    
-    # Calcul du coût total des joueurs
-    total_cost = sum(p.cost for p in team.players)
-    budget_left = BUDGET - total_cost
-
-    # On construit la réponse manuellement avec les champs calculés
-    return schemas.TeamOut(
-        id=team.id,
-        name=team.name,
-        owner_id=team.owner_id,
-        players=team.players,
-        budget_left=budget_left,
-        total_budget=BUDGET
-    )
+    view = serializers.team_to_dict(team, BUDGET)
+    body = team_cache.encode(view)
+    if notify:
+        team_cache.cache.team_changed(team.owner_id, versions, body)
+        events.team_changed(team.owner_id, view)
+    return Response(body, status_code=status_code, media_type="application/json")
 
 # --- Endpoints ---
 
 @router.get("/", response_model=schemas.TeamOut)
 def read_team(
-    db: Session = Depends(get_db),
+    fields: Optional[str] = Query(
+        None, description="Champs des joueurs à renvoyer (ex: `name,position,cost`) ; `id` est toujours inclus."
+    ),
+    db: Session = Depends(shards.get_team_db),
     current_user: models.User = Depends(auth.get_current_active_user),
 ):
+    projection = serializers.parse_fields(fields)
+    if projection is not None:
+        # Lecture projetée : colonnes demandées seulement, sans objets ORM
+        row = crud.get_team_row_by_owner(db, current_user.id)
+        if row is None:
+            return serializers.json_response(serializers.empty_team_dict(current_user.id, BUDGET))
+        rows = crud.get_team_player_rows(db, row.id, projection)
+        return serializers.json_response(serializers.team_rows_to_dict(row, rows, projection, BUDGET))
+
+    # Vue complète : servie depuis le cache tant que l'équipe et le catalogue n'ont pas changé
+    body, versions = team_cache.cache.lookup(current_user.id)
+    if body is not None:
+        return Response(body, media_type="application/json")
     team = crud.get_team_by_owner(db, current_user.id)
+    if team:
+        view = serializers.team_to_dict(team, BUDGET)
+    else:
+        # Équipe fictive (id=-1) avec tout le budget disponible
+        view = serializers.empty_team_dict(current_user.id, BUDGET)
+    body = team_cache.encode(view)
+    team_cache.cache.store(current_user.id, versions, body)
+    return Response(body, media_type="application/json")
+
+
+def _team_roster(db: Session, team_id: int):
+    """``(ligne de l'équipe, ids des joueurs)`` d'une équipe quelconque, sur son shard."""
+    if shards.router.enabled:
+        # Avec le sharding, id de l'équipe = owner_id
+        with shards.router.session(team_id) as shard_db:
+            return crud.get_team_row(shard_db, team_id), crud.get_team_player_ids(shard_db, team_id)
+    return crud.get_team_row(db, team_id), crud.get_team_player_ids(db, team_id)
+
+
+@router.get("/matchup", response_model=schemas.MatchupOut)
+def read_matchup(
+    opponent: Optional[int] = Query(None, description="Id de l'équipe adverse ; absent : équipe moyenne (1-4-3-3)."),
+    simulations: int = Query(simulation.SIMULATIONS, ge=1, le=simulation.MAX_SIMULATIONS),
+    seed: Optional[int] = Query(None, ge=0, description="Même seed, même résultat ; absent : tiré et renvoyé."),
+    db: Session = Depends(get_db),
+    team_db: Session = Depends(shards.get_team_db),
+    current_user: models.User = Depends(auth.get_current_active_user),
+):
+    """Probabilités de victoire, nul et défaite de l'équipe sur une journée (voir ``app.simulation``)."""
+    team = crud.get_team_row_by_owner(team_db, current_user.id)
     if not team:
-        
-        return schemas.TeamOut(
-            id=-1,              # ID fictif
-            name="",            # Nom vide
-            owner_id=current_user.id,
-            players=[],         # Pas de joueurs
-            budget_left=BUDGET, # On lui donne tout le budget !
-            total_budget=BUDGET
-        )
-    return format_team_response(team)
-
+        raise HTTPException(status_code=404, detail="Team not found")
+    home_ids = crud.get_team_player_ids(team_db, team.id)
+    if opponent is not None:
+        opponent_team, away_ids = _team_roster(team_db, opponent)
+        if opponent_team is None:
+            raise HTTPException(status_code=404, detail="Opponent team not found")
+
+    # Les statistiques vivent sur la base principale
+    priors, season = simulation.season_priors(db)
+    home = simulation.player_profiles(db, home_ids, priors, season)
+    if opponent is None:
+        away = simulation.average_team(priors)
+        away_side = {"team_id": None, "name": "Average team"}
+    else:
+        away = simulation.player_profiles(db, away_ids, priors, season)
+        away_side = {"team_id": opponent_team.id, "name": opponent_team.name}
+
+    result = simulation.simulate(home, away, simulations, seed)
+    result["home"].update(team_id=team.id, name=team.name, players=len(home))
+    result["away"].update(away_side, players=len(away))
+    return serializers.json_response(result)
+
+
+@router.get("/lineups/{gameweek}", response_model=schemas.LineupOut)
+def read_lineup(
+    gameweek: int,
+    db: Session = Depends(shards.get_team_db),
+    current_user: models.User = Depends(auth.get_current_active_user),
+):
+    """Composition de l'équipe gelée à l'échéance de ``gameweek`` (voir ``app.lineups``)."""
+    if not lineups.is_frozen(db, gameweek):
+        raise HTTPException(status_code=404, detail="Gameweek not frozen")
+    team = crud.get_team_row_by_owner(db, current_user.id)
+    player_ids = lineups.lineup_at(db, team.id, gameweek) if team else None
+    if player_ids is None:
+        raise HTTPException(status_code=404, detail="No lineup for this gameweek")
+    # Joueurs supprimés du catalogue depuis : seuls leurs ids restent
+    players = crud.get_players_by_ids(db, player_ids)
+    return {
+        "team_id": team.id,
+        "gameweek": gameweek,
+        "player_ids": player_ids,
+        "players": [players[pid] for pid in player_ids if pid in players],
+    }
 
 @router.post("/", response_model=schemas.TeamOut, status_code=status.HTTP_201_CREATED)
 def create_or_reset_team(
     payload: schemas.TeamCreate,
-    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias=idempotency.HEADER, description=IDEMPOTENCY_DESCRIPTION),
+    db: Session = Depends(shards.get_team_db),
     current_user: models.User = Depends(auth.get_current_active_user),
 ):
-    existing = db.query(models.Team).filter(models.Team.owner_id == current_user.id).first()
-    try:
-        if existing:
-            existing.players.clear()
-            existing.name = payload.name
-            db.commit()
-            db.refresh(existing)
-            team = existing
-        else:
-            team = models.Team(name=payload.name, owner_id=current_user.id)
-            db.add(team)
-            db.commit()
-            db.refresh(team)
-    except IntegrityError:
-        db.rollback()
-        raise HTTPException(status_code=409, detail="Team name already used")
-
-    return format_team_response(team)
+    def create():
+        versions = team_cache.cache.versions(current_user.id)
+        existing = db.query(models.Team).filter(models.Team.owner_id == current_user.id).first()
+        try:
+            if existing:
+                # Réinitialisation : tous les joueurs sont libérés
+                team = crud.reset_team(db, existing, payload.name)
+            else:
+                # Avec le sharding, id = owner_id (unique entre shards)
+                team = models.Team(id=shards.router.team_id(current_user.id), name=payload.name, owner_id=current_user.id)
+                db.add(team)
+                db.commit()
+                db.refresh(team)
+        except IntegrityError:
+            db.rollback()
+            raise HTTPException(status_code=409, detail="Team name already used")
+
+        return format_team_response(team, status_code=status.HTTP_201_CREATED, notify=True, versions=versions)
+
+    return idempotency.run(idempotency_key, ("create_team", current_user.id), payload.model_dump(), create)
 
 
 @router.post("/players", response_model=schemas.TeamOut)
 def add_players(
     players: List[int],
-    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias=idempotency.HEADER, description=IDEMPOTENCY_DESCRIPTION),
+    db: Session = Depends(shards.get_team_db),
     current_user: models.User = Depends(auth.get_current_active_user),
 ):
-    team = crud.get_team_by_owner(db, current_user.id)
-    if not team:
-        raise HTTPException(status_code=404, detail="Team not found")
+    def add():
+        versions = team_cache.cache.versions(current_user.id)
+        team = crud.get_team_by_owner(db, current_user.id)
+        if not team:
+            raise HTTPException(status_code=404, detail="Team not found")
 
-    # Note : crud.add_players_to_team vérifie déjà le BUDGET, 
-    # mais on utilise ici la variable globale de ce fichier.
-    team = crud.add_players_to_team(db, team, players, BUDGET)
-    return format_team_response(team)
+        # Note : crud.add_players_to_team vérifie déjà le BUDGET, 
+        # mais on utilise ici la variable globale de ce fichier.
+        team = crud.add_players_to_team(db, team, players, BUDGET)
+        return format_team_response(team, notify=True, versions=versions)
+
+    return idempotency.run(idempotency_key, ("add_players", current_user.id), players, add)
 
 
 @router.delete("/players/{player_id}", response_model=schemas.TeamOut)
 def remove_player(
     player_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(shards.get_team_db),
     current_user: models.User = Depends(auth.get_current_active_user),
 ):
+    versions = team_cache.cache.versions(current_user.id)
     team = crud.get_team_by_owner(db, current_user.id)
     if not team:
         raise HTTPException(status_code=404, detail="Team not found")
 
     team = crud.remove_player_from_team(db, team, player_id)
-    return format_team_response(team)
\ No newline at end of file
+    return format_team_response(team, notify=True, versions=versions)
\ No newline at end of file
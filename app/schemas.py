@@ -6,8 +6,9 @@ par l'API.  Les modèles d'entrée (``Create``, ``Update``) et de sortie
 (comme les mots de passe hachés).
 """
 
-from typing import List, Optional
-from pydantic import BaseModel, EmailStr, Field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
 
 
 class Token(BaseModel):
@@ -15,6 +16,13 @@ class Token(BaseModel):
     token_type: str
 
 
+class SseTicket(BaseModel):
+    """Ticket court d'ouverture du flux ``GET /events?ticket=...``."""
+
+    ticket: str
+    expires_in: int
+
+
 class TokenData(BaseModel):
     email: Optional[str] = None
 
@@ -31,8 +39,7 @@ class UserOut(UserBase):
     id: int
     is_admin: bool
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class PlayerBase(BaseModel):
@@ -40,6 +47,7 @@ class PlayerBase(BaseModel):
     cost: int
     position: str
     club: str
+    age: Optional[int] = Field(None, ge=0)
 
 
 class PlayerCreate(PlayerBase):
@@ -51,6 +59,7 @@ class PlayerUpdate(BaseModel):
     cost: Optional[int] = None
     position: Optional[str] = None
     club: Optional[str] = None
+    age: Optional[int] = Field(None, ge=0)
 
 
 class PlayerOut(BaseModel):
@@ -60,8 +69,7 @@ class PlayerOut(BaseModel):
     position: str
     cost: Optional[float] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class TeamBase(BaseModel):
@@ -79,5 +87,232 @@ class TeamOut(BaseModel):
     budget_left: Optional[int] = None
     total_budget: Optional[int] = None
 
-    class Config:
-        from_attributes = True
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class OwnershipOut(BaseModel):
+    """Nombre d'équipes qui possèdent un joueur et part du total des équipes."""
+
+    player_id: int
+    teams: int
+    share: float
+
+
+class TrendingOut(BaseModel):
+    """Nombre de transferts (recrutements ou libérations) d'un joueur sur la fenêtre demandée."""
+
+    player_id: int
+    transfers: int
+
+
+class SimilarPlayerOut(BaseModel):
+    """Joueur proche (distance entre profils normalisés, plus petite = plus proche)."""
+
+    id: int
+    name: str
+    club: str
+    position: str
+    cost: float
+    age: Optional[int] = None
+    distance: float
+
+
+class MatchStatIn(BaseModel):
+    """Événement statistique d'un joueur pour une journée."""
+
+    player_id: int
+    gameweek: int = Field(ge=1)
+    goals: int = Field(0, ge=0)
+    assists: int = Field(0, ge=0)
+    yellow_cards: int = Field(0, ge=0)
+    red_cards: int = Field(0, ge=0)
+    own_goals: int = Field(0, ge=0)
+    substituted_in: bool = False
+    substituted_out: bool = False
+
+
+class MatchStatOut(BaseModel):
+    gameweek: int
+    goals: int = 0
+    assists: int = 0
+    yellow_cards: int = 0
+    red_cards: int = 0
+    own_goals: int = 0
+    substituted_in: bool = False
+    substituted_out: bool = False
+
+
+class StatsIngestOut(BaseModel):
+    ingested: int
+
+
+class PlayerSeasonStats(BaseModel):
+    player_id: int
+    matches: int = 0
+    goals: int = 0
+    assists: int = 0
+    yellow_cards: int = 0
+    red_cards: int = 0
+    own_goals: int = 0
+    substituted_in: int = 0
+    substituted_out: int = 0
+    last_gameweek: int = 0
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class PlayerForm(BaseModel):
+    """Forme récente : totaux sur les ``matches`` derniers matchs joués."""
+
+    player_id: int
+    matches: int = 0
+    goals: int = 0
+    assists: int = 0
+    yellow_cards: int = 0
+    red_cards: int = 0
+    games: List[MatchStatOut] = []
+
+
+class DashboardOut(BaseModel):
+    """Vue initiale de l'UI : équipe, une page du catalogue et budget."""
+
+    team: TeamOut
+    players: List[PlayerOut] = []
+    budget_left: int
+    total_budget: int
+    skip: int = 0
+    limit: int = 50
+
+
+class BatchItem(BaseModel):
+    """Sous-requête d'un ``POST /batch``."""
+
+    method: str = "GET"
+    path: str
+    body: Optional[Any] = None
+
+
+class BatchIn(BaseModel):
+    requests: List[BatchItem] = Field(min_length=1)
+
+
+class BatchItemOut(BaseModel):
+    status: int
+    body: Optional[Any] = None
+
+
+class BatchOut(BaseModel):
+    responses: List[BatchItemOut] = []
+
+
+class JobCreate(BaseModel):
+    """Tâche à lancer : ``kind`` parmi ``app.jobs.registry``."""
+
+    kind: str
+    params: Dict[str, Any] = {}
+
+
+class JobOut(BaseModel):
+    id: int
+    kind: str
+    params: Dict[str, Any] = {}
+    status: str
+    progress: float = 0.0
+    message: Optional[str] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    cancel_requested: bool = False
+    attempts: int = 0
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ImportPlayersParams(BaseModel):
+    players: List[PlayerCreate] = Field(min_length=1)
+
+
+class RepriceParams(BaseModel):
+    """Multiplie le coût des joueurs (d'un poste, ou de tous)."""
+
+    factor: float = Field(gt=0)
+    position: Optional[str] = None
+
+
+class IngestStatsParams(BaseModel):
+    events: List[MatchStatIn] = Field(min_length=1)
+
+
+class FreezeLineupsParams(BaseModel):
+    """Gèle les compositions de toutes les équipes à l'échéance d'une journée."""
+
+    gameweek: int = Field(ge=1)
+
+
+class LineupOut(BaseModel):
+    team_id: int
+    gameweek: int
+    player_ids: List[int]
+    players: List[PlayerOut] = []
+
+
+class MatchupSide(BaseModel):
+    """Une équipe du face-à-face (``team_id`` absent : équipe moyenne) et ses points simulés."""
+
+    team_id: Optional[int] = None
+    name: str
+    players: int
+    expected_points: float
+    p10: float
+    p50: float
+    p90: float
+
+
+class MatchupOut(BaseModel):
+    """Probabilités de victoire, nul et défaite de ``home`` sur ``simulations`` journées simulées."""
+
+    simulations: int
+    seed: int
+    win: float
+    draw: float
+    loss: float
+    home: MatchupSide
+    away: MatchupSide
+
+
+class CatalogSyncOut(BaseModel):
+    """Bilan d'une synchronisation du catalogue (voir ``app.catalog_sync``)."""
+
+    rows: int
+    inserted: int
+    updated: int
+    restored: int
+    deleted: int
+    unchanged: int
+    skipped: int
+    duplicates: int
+    dry_run: bool
+    samples: Dict[str, List[str]] = {}
+
+
+class SlowQueryOut(BaseModel):
+    at: datetime
+    duration_ms: float
+    sql: str
+    params: Any = None
+    route: Optional[str] = None
+    thread: str
+    error: Optional[str] = None
+
+
+class AuditEventOut(BaseModel):
+    id: int
+    created_at: datetime
+    user_id: Optional[int] = None
+    action: str
+    team_id: Optional[int] = None
+    player_id: Optional[int] = None
+    details: Optional[Dict[str, Any]] = None
+
+    model_config = ConfigDict(from_attributes=True)
@@ -9,31 +9,34 @@ Script de seed pour l'application :
     - user@example.com  / user123  (is_admin=False)
 - Charge des joueurs depuis un CSV brut (app/data/players_seed.csv)
   et les insère dans la table Player avec un prix et un poste normalisés.
+- Répartit les totaux de la saison (matchs, buts, passes, cartons…) en
+  événements par journée et les ingère par lots dans les statistiques.
 """
 
 import os
 import time
 import csv
-from typing import Any, Iterable, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from dotenv import load_dotenv
-from passlib.context import CryptContext
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 
 from app.database import Base, engine, SessionLocal
-from app.models import User, Player
+from app import auth, crud, migrations, schemas
+from app.models import User, Player, PlayerMatchStat
 
 load_dotenv()
 
 
 CSV_PATH = os.getenv("PLAYERS_CSV", "app/data/players_seed.csv")
 
-# Hash de mot de passe (Argon2)
-_pwd = CryptContext(schemes=["argon2"], deprecated="auto")
-
+# Taille des lots d'événements statistiques ingérés pendant le seed
+STATS_BATCH_SIZE = int(os.getenv("STATS_BATCH_SIZE", "1000"))
 
 def hash_password(p: str) -> str:
-    return _pwd.hash(p)
+    # Même contexte Argon2 que l'application (y compris PASSWORD_HASH_FAST)
+    return auth.hash_password(p)
 
 
 def wait_for_db() -> None:
@@ -115,7 +118,86 @@ def _parse_float(raw: str | None, default: float = 10.0) -> float:
         return default
 
 
-def iter_players_from_csv() -> Iterable[Tuple[str, str, str, float]]:
+def _parse_int(raw: str | None, default: int = 0) -> int:
+    try:
+        return int(float(raw))
+    except (TypeError, ValueError):
+        return default
+
+
+# Colonnes du CSV -> champs des statistiques de saison
+STAT_COLUMNS = {
+    "matches": "Matches Played",
+    "goals": "Goals",
+    "assists": "Assists",
+    "yellow_cards": "Yellow Cards",
+    "red_cards": "Red Cards",
+    "second_yellow_cards": "Second Yellow Cards",
+    "own_goals": "Own Goals",
+    "substituted_in": "Substituted In",
+    "substituted_out": "Substituted Out",
+}
+
+
+def _season_totals(row: Dict[str, str]) -> Dict[str, int]:
+    totals = {field: max(0, _parse_int(row.get(column))) for field, column in STAT_COLUMNS.items()}
+    # Un second jaune vaut une expulsion
+    totals["red_cards"] += totals.pop("second_yellow_cards")
+    return totals
+
+
+def parse_player_row(row: Dict[str, str]) -> Optional[Tuple[str, str, str, float, Optional[int]]]:
+    """Ligne brute du CSV -> ``(nom, club, poste, coût, âge)`` ; ``None`` sans nom."""
+    # --- Name ---
+    name = (
+        row.get("Name")             
+        or row.get("name")
+        or row.get("player_name")
+        or row.get("short_name")
+        or row.get("full_name")
+    )
+    if not name:
+        return None
+
+    # --- Club ---
+    club = (
+        row.get("Club")             
+        or row.get("club")
+        or row.get("club_name")
+        or row.get("team")
+        or row.get("club_team")
+    )
+    if not club:
+        club = "Unknown"
+
+    # --- Position ---
+    raw_pos = (
+        row.get("Position")         
+        or row.get("position")
+        or row.get("pos")
+        or row.get("primary_position")
+        or row.get("role")
+    )
+    norm_pos = normalize_position(raw_pos)
+
+    # --- Cost ---
+    cost_raw = (
+        row.get("Market Value")     
+        or row.get("cost")
+        or row.get("price")
+        or row.get("market_value")
+        or row.get("market_value_million_eur")
+        or row.get("value_in_million_euros")
+    )
+    cost = _parse_float(cost_raw, default=10.0)
+
+    # --- Age (facultatif) ---
+    age = _parse_int(row.get("Age") or row.get("age"), default=-1)
+
+    return name, club, norm_pos, cost, age if age >= 0 else None
+
+
+def iter_players_from_csv() -> Iterable[Tuple[str, str, str, float, Optional[int], Dict[str, int]]]:
     if not os.path.exists(CSV_PATH):
         print(f"[seed] CSV not found: {CSV_PATH}, aucun joueur importé.")
         return []
@@ -127,57 +209,75 @@ def iter_players_from_csv() -> Iterable[Tuple[str, str, str, float]]:
     print(f"[seed] CSV chargé: {CSV_PATH} ({len(rows)} lignes)")
 
     for row in rows:
-        # --- Name ---
-        name = (
-            row.get("Name")             
-            or row.get("name")
-            or row.get("player_name")
-            or row.get("short_name")
-            or row.get("full_name")
-        )
-        if not name:
-            continue
+        parsed = parse_player_row(row)
+        if parsed is not None:
+            yield (*parsed, _season_totals(row))
+
+
+def split_season_totals(player_id: int, totals: Dict[str, int]) -> List[schemas.MatchStatIn]:
+    """Répartit les totaux de la saison sur les journées 1..matches.
+
+    La répartition est déterministe et régulière : le match ``i`` reçoit
+    ``floor((i+1)*n/m) - floor(i*n/m)`` unités d'un total ``n`` sur ``m``
+    matchs.
+    """
+    matches = totals["matches"]
+    events = []
+    for i in range(matches):
+        values = {
+            field: (totals[field] * (i + 1)) // matches - (totals[field] * i) // matches
+            for field in crud.STAT_FIELDS
+        }
+        values["substituted_in"] = values["substituted_in"] > 0
+        values["substituted_out"] = values["substituted_out"] > 0
+        events.append(schemas.MatchStatIn(player_id=player_id, gameweek=i + 1, **values))
+    return events
+
+
+def seed_player_ages(db: Session) -> None:
+    """Complète l'âge des joueurs importés avant l'ajout de la colonne."""
+    if db.query(Player.id).filter(Player.age.is_(None)).first() is None:
+        return
+    ids = {(name, club): pid for pid, name, club in db.query(Player.id, Player.name, Player.club).filter(Player.age.is_(None))}
+    updates = [
+        {"id": ids[(name, club)], "age": age}
+        for name, club, _pos, _price, age, _totals in iter_players_from_csv()
+        if age is not None and (name, club) in ids
+    ]
+    if updates:
+        db.execute(update(Player), updates)
+        db.commit()
+    print(f"[seed] Âge complété pour {len(updates)} joueurs")
 
-        # --- Club ---
-        club = (
-            row.get("Club")             
-            or row.get("club")
-            or row.get("club_name")
-            or row.get("team")
-            or row.get("club_team")
-        )
-        if not club:
-            club = "Unknown"
-
-        # --- Position ---
-        raw_pos = (
-            row.get("Position")         
-            or row.get("position")
-            or row.get("pos")
-            or row.get("primary_position")
-            or row.get("role")
-        )
-        norm_pos = normalize_position(raw_pos)
-
-        # --- Cost ---
-        cost_raw = (
-            row.get("Market Value")     
-            or row.get("cost")
-            or row.get("price")
-            or row.get("market_value")
-            or row.get("market_value_million_eur")
-            or row.get("value_in_million_euros")
-        )
-        cost = _parse_float(cost_raw, default=10.0)
-
-        yield name, club, norm_pos, cost
+
+def seed_match_stats(db: Session) -> None:
+    """Ingère par lots les statistiques de saison si la table est vide."""
+    if db.query(PlayerMatchStat.id).first() is not None:
+        print("[seed] Statistiques déjà présentes, pas d'import.")
+        return
+
+    ids = {(name, club): pid for pid, name, club in db.query(Player.id, Player.name, Player.club)}
+    batch: List[schemas.MatchStatIn] = []
+    count = 0
+    for name, club, _pos, _price, _age, totals in iter_players_from_csv():
+        player_id = ids.get((name, club))
+        if player_id is None:
+            continue
+        batch.extend(split_season_totals(player_id, totals))
+        if len(batch) >= STATS_BATCH_SIZE:
+            count += crud.ingest_match_stats(db, batch)
+            batch = []
+    count += crud.ingest_match_stats(db, batch)
+    print(f"[seed] Statistiques importées : {count} événements ✅")
 
 
 def seed():
     """Point d'entrée du seed."""
     wait_for_db()
-    # On s'assure que les tables existent
+    # On s'assure que les tables existent, avec les colonnes ajoutées depuis
     Base.metadata.create_all(bind=engine)
+    for column in migrations.upgrade(engine):
+        print(f"[seed] Colonne ajoutée : {column}")
 
     db: Session = SessionLocal()
     try:
@@ -193,11 +293,12 @@ def seed():
         if db.query(Player).count() == 0:
             print("[seed] La table Player est vide, import depuis CSV…")
             count = 0
-            for name, club, pos, price in iter_players_from_csv():
+            for name, club, pos, price, age, _totals in iter_players_from_csv():
                 p = Player(
                     name=name,
                     club=club,
                     position=_coerce_position(pos),
+                    age=age,
                 )
                 _set_price_field(p, price)
                 db.add(p)
@@ -206,6 +307,9 @@ def seed():
             print(f"[seed] Import terminé : {count} joueurs ajoutés ✅")
         else:
             print("[seed] Joueurs déjà présents, pas d'import.")
+            seed_player_ages(db)
+
+        seed_match_stats(db)
 
     except Exception as e:
         print(f"[seed] ERREUR : {e}")
@@ -0,0 +1,124 @@
+"""Sérialisation rapide des réponses volumineuses.
+
+Les lignes ORM lues en base sont des données de confiance : au lieu de
+les valider une première fois avec ``PlayerOut.from_orm`` puis une
+seconde fois via le ``response_model`` de la route, on construit
+directement des dictionnaires et on les encode avec orjson.  Le
+``response_model`` reste déclaré sur les routes pour la documentation
+OpenAPI ; FastAPI ne l'applique pas lorsqu'une ``Response`` est renvoyée.
+"""
+
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from fastapi.responses import ORJSONResponse
+
+from . import models
+
+
+def player_to_dict(player: models.Player) -> dict:
+    """Équivalent de ``PlayerOut`` sans passer par Pydantic."""
+    cost = player.cost
+    return {
+        "id": player.id,
+        "name": player.name,
+        "club": player.club,
+        "position": player.position,
+        # ``PlayerOut.cost`` est un float : on garde le même format JSON
+        "cost": float(cost) if cost is not None else None,
+    }
+
+
+def players_to_list(players: Iterable[models.Player]) -> List[dict]:
+    return [player_to_dict(p) for p in players]
+
+
+def team_to_dict(team: models.Team, budget: int) -> dict:
+    """Équivalent de ``TeamOut`` : équipe, joueurs et budget restant."""
+    players = team.players
+    total_cost = sum(p.cost for p in players)
+    return {
+        "id": team.id,
+        "name": team.name,
+        "owner_id": team.owner_id,
+        "players": players_to_list(players),
+        "budget_left": budget - total_cost,
+        "total_budget": budget,
+    }
+
+
+def empty_team_dict(owner_id: int, budget: int) -> dict:
+    """Vue d'une équipe pas encore créée (tout le budget est disponible)."""
+    return {
+        "id": -1,
+        "name": "",
+        "owner_id": owner_id,
+        "players": [],
+        "budget_left": budget,
+        "total_budget": budget,
+    }
+
+
+# ---------------------------------------------------------------------
+# Projections (paramètre ``fields=``)
+# ---------------------------------------------------------------------
+
+PLAYER_FIELDS = ("id", "name", "club", "position", "cost")
+
+
+def parse_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """``"name,cost"`` -> ``("id", "name", "cost")``.
+
+    ``id`` est toujours inclus ; l'ordre est celui de ``PlayerOut``.
+    ``None`` si le paramètre est absent (vue complète).
+    """
+    if fields is None:
+        return None
+    requested = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = requested - set(PLAYER_FIELDS)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown field(s): {', '.join(sorted(unknown))}",
+        )
+    requested.add("id")
+    return tuple(f for f in PLAYER_FIELDS if f in requested)
+
+
+def row_to_dict(row: Sequence, fields: Tuple[str, ...]) -> dict:
+    """Ligne ``select`` des colonnes ``fields`` -> dictionnaire ``PlayerOut`` partiel."""
+    item = dict(zip(fields, row))
+    if "cost" in item and item["cost"] is not None:
+        item["cost"] = float(item["cost"])
+    return item
+
+
+def rows_to_list(rows: Iterable[Sequence], fields: Tuple[str, ...]) -> List[dict]:
+    if "cost" not in fields:
+        return [dict(zip(fields, row)) for row in rows]
+    return [row_to_dict(row, fields) for row in rows]
+
+
+def team_rows_to_dict(team: Sequence, rows: Iterable[Sequence], fields: Tuple[str, ...], budget: int) -> dict:
+    """Vue ``TeamOut`` à partir de lignes projetées.
+
+    ``rows`` contient les colonnes ``fields`` suivies du coût (toujours lu,
+    il sert au calcul du budget restant).
+    """
+    players, total_cost = [], 0
+    for row in rows:
+        total_cost += row[-1]
+        players.append(row_to_dict(row[:len(fields)], fields))
+    team_id, name, owner_id = team
+    return {
+        "id": team_id,
+        "name": name,
+        "owner_id": owner_id,
+        "players": players,
+        "budget_left": budget - total_cost,
+        "total_budget": budget,
+    }
+
+
+def json_response(content, status_code: int = 200, headers: Optional[dict] = None) -> ORJSONResponse:
+    return ORJSONResponse(content, status_code=status_code, headers=headers)
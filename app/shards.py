@@ -0,0 +1,325 @@
+"""Répartition des équipes sur plusieurs bases (sharding par ``owner_id``).
+
+Les tables ``teams`` et ``team_players`` grossissent avec le nombre
+d'utilisateurs, alors que le catalogue reste petit.  Avec
+``SHARD_URLS=url1,url2,...`` :
+
+- la base principale (``DATABASE_URL``) garde les utilisateurs, le
+  catalogue, les statistiques, les tâches et l'audit ;
+- l'équipe d'un utilisateur vit sur le shard ``shard_for(owner_id)``
+  (hachage cohérent « jump » : ajouter un shard ne déplace qu'environ
+  ``1/n`` des équipes) ;
+- chaque shard a une copie de la table ``players`` (jointures et budget
+  sans aller-retour vers la base principale), mise à jour à chaque
+  changement du catalogue (``events.on_catalog_change``) ;
+- l'id d'une équipe est l'id de son propriétaire (une équipe par
+  utilisateur) : il est unique entre shards et ne change pas quand
+  l'équipe est déplacée.
+
+Les routes d'équipe reçoivent la bonne session par la dépendance
+``get_team_db``.  Les agrégats entre shards (nombre d'équipes par joueur)
+sont calculés en parallèle sur chaque shard puis fusionnés
+(``ShardRouter.scatter``).  Après un changement de ``SHARD_URLS``,
+``python -m app.shards rebalance`` déplace les équipes vers leur nouveau
+shard.
+
+Sans ``SHARD_URLS`` (par défaut), tout reste dans la base principale et
+``get_team_db`` renvoie simplement la session de ``get_db``.
+"""
+
+import argparse
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Generator, Iterable, List, Optional, Sequence, TypeVar
+
+from fastapi import Depends
+from sqlalchemy import MetaData, create_engine, delete, func, insert, select, update
+from sqlalchemy.orm import Session, sessionmaker
+
+from . import auth, crud, events, lineups, models, team_cache
+from .dependencies import get_db
+
+
+logger = logging.getLogger(__name__)
+
+SHARD_URLS = [url.strip() for url in os.getenv("SHARD_URLS", "").split(",") if url.strip()]
+
+# Lignes du catalogue copiées par lot vers les shards
+REPLICATION_BATCH_SIZE = 1000
+
+T = TypeVar("T")
+
+
+def jump_hash(key: int, buckets: int) -> int:
+    """Hachage cohérent de Lamping et Veach : ``key`` -> ``[0, buckets)``."""
+    key &= 0xFFFFFFFFFFFFFFFF
+    b, j = -1, 0
+    while j < buckets:
+        b = j
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        j = int((b + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return b
+
+
+def _shard_metadata() -> MetaData:
+    """Tables d'un shard : catalogue répliqué, équipes et leur historique, sans clé vers ``users``."""
+    metadata = MetaData()
+    tables = (
+        models.Player.__table__, models.Team.__table__, models.team_players,
+        models.Lineup.__table__, models.LineupSnapshot.__table__, models.GameweekFreeze.__table__,
+    )
+    for table in tables:
+        copy = table.to_metadata(metadata)
+        for constraint in list(copy.foreign_key_constraints):
+            if constraint.elements[0].target_fullname.startswith("users."):
+                copy.constraints.discard(constraint)
+                copy.foreign_keys.difference_update(constraint.elements)
+                for column in constraint.columns:
+                    column.foreign_keys.difference_update(constraint.elements)
+    return metadata
+
+
+def _engine(url: str):
+    connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+    return create_engine(url, connect_args=connect_args)
+
+
+class ShardRouter:
+    """Sessions par shard, réplication du catalogue, scatter-gather et rééquilibrage."""
+
+    def __init__(self, urls: Sequence[str], primary_factory=None):
+        self.urls = list(urls)
+        self.engines = [_engine(url) for url in self.urls]
+        self.factories = [
+            sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+            for engine in self.engines
+        ]
+        self.primary_factory = primary_factory
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.urls)
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    def shard_for(self, owner_id: int) -> int:
+        return jump_hash(owner_id, len(self.urls))
+
+    def session(self, owner_id: int) -> Session:
+        """Session du shard qui contient l'équipe de ``owner_id``."""
+        return self.factories[self.shard_for(owner_id)]()
+
+    def primary(self) -> Session:
+        if self.primary_factory is None:
+            from .database import SessionLocal
+
+            return SessionLocal()
+        return self.primary_factory()
+
+    def team_id(self, owner_id: int) -> Optional[int]:
+        """Id à donner à une nouvelle équipe (``None`` : auto-incrément, sans sharding)."""
+        return owner_id if self.enabled else None
+
+    def scatter(self, fn: Callable[[Session], T]) -> List[T]:
+        """Exécute ``fn(session)`` sur chaque shard en parallèle (base principale sans sharding)."""
+        if not self.enabled:
+            with self.primary() as db:
+                return [fn(db)]
+
+        def run(factory) -> T:
+            with factory() as db:
+                return fn(db)
+
+        with ThreadPoolExecutor(max_workers=len(self.factories), thread_name_prefix="shard") as pool:
+            return list(pool.map(run, self.factories))
+
+    def create_schema(self) -> None:
+        from . import migrations
+
+        metadata = _shard_metadata()
+        for engine in self.engines:
+            metadata.create_all(bind=engine)
+            migrations.upgrade(engine, metadata)
+
+    # -----------------------------------------------------------------
+    # Réplication du catalogue
+    # -----------------------------------------------------------------
+
+    def replicate_players(self, player_ids: Optional[Iterable[int]] = None) -> None:
+        """Copie ``players`` de la base principale vers chaque shard.
+
+        Sans ``player_ids`` : resynchronisation complète (joueurs supprimés
+        de la base principale compris).
+        """
+        if not self.enabled:
+            return
+        Player = models.Player
+        columns = [c for c in Player.__table__.columns]
+        ids = None if player_ids is None else set(player_ids)
+        with self.primary() as db:
+            stmt = select(*columns)
+            if ids is not None:
+                stmt = stmt.where(Player.id.in_(ids))
+            rows = [dict(row._mapping) for row in db.execute(stmt)]
+        present = {row["id"] for row in rows}
+
+        for factory in self.factories:
+            with factory() as shard:
+                if ids is None:
+                    existing = set(shard.scalars(select(Player.id)))
+                    removed = existing - present
+                else:
+                    existing = set(shard.scalars(select(Player.id).where(Player.id.in_(ids))))
+                    removed = ids - present
+                for start in range(0, len(rows), REPLICATION_BATCH_SIZE):
+                    batch = rows[start:start + REPLICATION_BATCH_SIZE]
+                    updates = [row for row in batch if row["id"] in existing]
+                    inserts = [row for row in batch if row["id"] not in existing]
+                    if updates:
+                        shard.execute(update(Player), updates)
+                    if inserts:
+                        shard.execute(insert(Player), inserts)
+                if removed:
+                    shard.execute(delete(models.team_players).where(models.team_players.c.player_id.in_(removed)))
+                    shard.execute(delete(Player).where(Player.id.in_(removed)))
+                shard.commit()
+
+    # -----------------------------------------------------------------
+    # Rééquilibrage
+    # -----------------------------------------------------------------
+
+    def rebalance(self, from_primary: bool = False, dry_run: bool = False) -> Dict[str, int]:
+        """Déplace chaque équipe vers ``shard_for(owner_id)``.
+
+        Avec ``from_primary``, les équipes encore dans la base principale
+        (installation sans sharding) sont aussi migrées.  Chaque équipe est
+        écrite sur sa cible puis supprimée de sa source : une interruption
+        laisse au pire une copie, effacée par l'exécution suivante.
+        """
+        if not self.enabled:
+            raise RuntimeError("SHARD_URLS is not set")
+        self.create_schema()
+        if not dry_run:
+            self.replicate_players()
+        sources = [(index, factory) for index, factory in enumerate(self.factories)]
+        if from_primary:
+            sources.append((None, self.primary))
+
+        # Inventaire avant tout déplacement : une équipe déplacée n'est pas relue
+        inventory = []
+        for index, factory in sources:
+            with factory() as source:
+                teams = source.execute(select(models.Team.id, models.Team.name, models.Team.owner_id)).all()
+            inventory.append((index, factory, teams))
+
+        summary = {"scanned": 0, "moved": 0}
+        for index, factory, teams in inventory:
+            with factory() as source:
+                for team_id, name, owner_id in teams:
+                    summary["scanned"] += 1
+                    target = self.shard_for(owner_id)
+                    if target == index:
+                        continue
+                    summary["moved"] += 1
+                    if not dry_run:
+                        self._move_team(source, team_id, name, owner_id, target)
+        if summary["moved"] and not dry_run:
+            # Les ids migrés depuis la base principale changent (id = owner_id)
+            team_cache.cache.clear()
+        return summary
+
+    def _move_team(self, source: Session, team_id: int, name: Optional[str], owner_id: int, target: int) -> None:
+        link, snapshots = models.team_players, models.LineupSnapshot
+        player_ids = list(source.scalars(select(link.c.player_id).where(link.c.team_id == team_id)))
+        history, frozen = lineups.team_history(source, team_id), lineups.frozen_gameweeks(source)
+        with self.factories[target]() as shard:
+            # Reste éventuel d'un déplacement interrompu
+            shard.execute(delete(link).where(link.c.team_id == owner_id))
+            shard.execute(delete(snapshots).where(snapshots.team_id == owner_id))
+            shard.execute(delete(models.Team).where(models.Team.owner_id == owner_id))
+            shard.execute(insert(models.Team).values(id=owner_id, name=name, owner_id=owner_id))
+            if player_ids:
+                shard.execute(insert(link), [{"team_id": owner_id, "player_id": pid} for pid in player_ids])
+            lineups.restore_history(shard, owner_id, history, frozen)
+            shard.commit()
+        source.execute(delete(link).where(link.c.team_id == team_id))
+        source.execute(delete(snapshots).where(snapshots.team_id == team_id))
+        source.execute(delete(models.Team).where(models.Team.id == team_id))
+        source.commit()
+
+    def stats(self) -> List[dict]:
+        def count(db: Session) -> dict:
+            return {"teams": db.scalar(select(func.count()).select_from(models.Team)) or 0}
+
+        return [{"shard": i, "url": url, **row} for i, (url, row) in enumerate(zip(self.urls, self.scatter(count)))]
+
+
+router = ShardRouter(SHARD_URLS)
+
+
+def get_team_db(
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_active_user),
+) -> Generator:
+    """Session de la base qui contient l'équipe de l'utilisateur courant.
+
+    Sans sharding, c'est la session de ``get_db`` (partagée avec
+    l'authentification et le catalogue).
+    """
+    if not router.enabled:
+        yield db
+        return
+    session = router.session(current_user.id)
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def ownership_counts(player_ids: Optional[Sequence[int]] = None) -> Dict[int, int]:
+    """Nombre d'équipes par joueur, additionné sur tous les shards."""
+    totals: Dict[int, int] = {}
+    for counts in router.scatter(lambda db: crud.get_ownership_counts(db, player_ids)):
+        for player_id, teams in counts.items():
+            totals[player_id] = totals.get(player_id, 0) + teams
+    return totals
+
+
+def team_count() -> int:
+    return sum(router.scatter(crud.count_teams))
+
+
+@events.on_catalog_change
+def _on_catalog_change(action, player_ids) -> None:
+    if router.enabled:
+        router.replicate_players(player_ids or None)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Outils de sharding des équipes (SHARD_URLS).")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("init", help="crée les tables des shards et copie le catalogue")
+    sub.add_parser("stats", help="nombre d'équipes par shard")
+    rebalance = sub.add_parser("rebalance", help="déplace les équipes vers leur shard")
+    rebalance.add_argument("--from-primary", action="store_true", help="migre aussi les équipes de la base principale")
+    rebalance.add_argument("--dry-run", action="store_true", help="compte les déplacements sans rien écrire")
+    args = parser.parse_args()
+
+    if not router.enabled:
+        raise SystemExit("SHARD_URLS is not set")
+    if args.command == "init":
+        router.create_schema()
+        router.replicate_players()
+        print(f"{len(router)} shards ready")
+    elif args.command == "stats":
+        for row in router.stats():
+            print(f"shard {row['shard']}: {row['teams']} teams ({row['url']})")
+    else:
+        summary = router.rebalance(from_primary=args.from_primary, dry_run=args.dry_run)
+        print(f"{summary['scanned']} teams scanned, {summary['moved']} {'to move' if args.dry_run else 'moved'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""Recommandations « joueurs similaires » : index des plus proches voisins.
+
+Chaque joueur est décrit par un vecteur de caractéristiques tirées du
+catalogue et des statistiques de saison (``player_stat_rollups``) :
+
+- poste (encodage one-hot, pondéré par ``POSITION_WEIGHT`` pour que les
+  voisins jouent presque toujours au même poste) ;
+- âge, valeur marchande (``log`` du coût), matchs joués ;
+- buts, passes décisives et cartons par match.
+
+Les colonnes numériques sont centrées-réduites avec NumPy (un âge
+inconnu vaut la moyenne).  L'index garde, pour chaque joueur, ses
+``SIMILAR_K`` plus proches voisins (distance euclidienne) triés, calculés
+par blocs de produits matriciels (``|a - b|² = |a|² + |b|² - 2 a·b``) :
+une requête ne fait qu'un filtre sur le coût parmi ces voisins, sans
+parcourir le catalogue.
+
+Avec ``max_cost``, les voisins précalculés d'un joueur cher peuvent être
+tous hors budget.  S'il en reste moins que demandé alors que d'autres
+joueurs sont abordables, la requête calcule les distances aux seuls
+joueurs de coût ``<= max_cost`` (préfixe de l'index trié par coût) :
+résultat exact, en O(n) pour ces seules requêtes.
+
+L'index est reconstruit en arrière-plan après un changement du catalogue
+ou une ingestion de statistiques ; les requêtes continuent d'utiliser
+l'ancien index jusqu'au remplacement.  NumPy n'est importé qu'à la
+première construction (il n'alourdit pas le démarrage).
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from . import events, models
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+SIMILAR_K = int(os.getenv("SIMILAR_K", "100"))
+SIMILAR_DEBOUNCE = float(os.getenv("SIMILAR_DEBOUNCE", "0.5"))
+
+POSITIONS = ("GK", "DEF", "MID", "FWD")
+POSITION_WEIGHT = 3.0
+# Lignes traitées par produit matriciel (mémoire ~ BLOCK_SIZE × n flottants)
+BLOCK_SIZE = 1024
+
+
+def _features(rows) -> "np.ndarray":
+    """Matrice des caractéristiques normalisées (une ligne par joueur)."""
+    import numpy as np
+
+    n = len(rows)
+    data = np.zeros((n, 6), dtype=np.float64)
+    age = np.full(n, np.nan)
+    position = np.zeros((n, len(POSITIONS)), dtype=np.float64)
+    for i, (_id, _name, _club, pos, cost, player_age, matches, goals, assists, yellow, red) in enumerate(rows):
+        matches = matches or 0
+        per_match = 1.0 / matches if matches else 0.0
+        cards = (yellow or 0) + 2 * (red or 0)
+        data[i] = (0.0, np.log1p(max(cost or 0, 0)), matches, (goals or 0) * per_match, (assists or 0) * per_match, cards * per_match)
+        if player_age is not None:
+            age[i] = player_age
+        if pos in POSITIONS:
+            position[i, POSITIONS.index(pos)] = POSITION_WEIGHT
+    known = ~np.isnan(age)
+    data[:, 0] = np.where(known, age, age[known].mean() if known.any() else 0.0)
+
+    std = data.std(axis=0)
+    std[std == 0] = 1.0
+    data = (data - data.mean(axis=0)) / std
+    return np.hstack([data, position])
+
+
+def nearest_neighbours(features: "np.ndarray", k: int, block_size: int = BLOCK_SIZE):
+    """``(indices, distances)`` des ``k`` plus proches voisins de chaque ligne (soi exclu)."""
+    import numpy as np
+
+    n = len(features)
+    k = min(k, n - 1)
+    indices = np.zeros((n, max(k, 0)), dtype=np.int32)
+    distances = np.zeros((n, max(k, 0)), dtype=np.float32)
+    if k <= 0:
+        return indices, distances
+    norms = np.einsum("ij,ij->i", features, features)
+    for start in range(0, n, block_size):
+        block = features[start:start + block_size]
+        d2 = norms[start:start + len(block), None] + norms[None, :] - 2.0 * block @ features.T
+        rows = np.arange(len(block))
+        d2[rows, start + rows] = np.inf  # pas soi-même
+        part = np.argpartition(d2, k - 1, axis=1)[:, :k]
+        part_d2 = np.take_along_axis(d2, part, axis=1)
+        order = np.argsort(part_d2, axis=1, kind="stable")
+        indices[start:start + len(block)] = np.take_along_axis(part, order, axis=1)
+        distances[start:start + len(block)] = np.sqrt(np.maximum(np.take_along_axis(part_d2, order, axis=1), 0.0))
+    return indices, distances
+
+
+class SimilarityIndex:
+    """Voisins précalculés et fiches des joueurs, en lecture seule."""
+
+    def __init__(self, rows, k: int = SIMILAR_K):
+        import numpy as np
+
+        self.ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self.costs = np.array([row[4] for row in rows], dtype=np.float64)
+        self.players = [
+            {"id": r[0], "name": r[1], "club": r[2], "position": r[3], "cost": float(r[4]), "age": r[5]}
+            for r in rows
+        ]
+        self._rank = {int(pid): i for i, pid in enumerate(self.ids)}
+        if rows:
+            self.features = _features(rows)
+            self.neighbours, self.distances = nearest_neighbours(self.features, k)
+        else:
+            self.features = np.zeros((0, 0), dtype=np.float64)
+            self.neighbours = np.zeros((0, 0), dtype=np.int32)
+            self.distances = np.zeros((0, 0), dtype=np.float32)
+        # Joueurs par coût croissant : ceux de coût <= max_cost forment un préfixe
+        self._by_cost = np.argsort(self.costs, kind="stable")
+        self._sorted_costs = self.costs[self._by_cost]
+        self.version = time.time_ns()
+
+    def __contains__(self, player_id: int) -> bool:
+        return player_id in self._rank
+
+    def _nearest_within(self, i: int, count: int, limit: int):
+        """``limit`` plus proches voisins de ``i`` parmi les ``count`` joueurs les moins chers."""
+        import numpy as np
+
+        candidates = self._by_cost[:count]
+        candidates = candidates[candidates != i]
+        d2 = ((self.features[candidates] - self.features[i]) ** 2).sum(axis=1)
+        if len(candidates) > limit:
+            best = np.argpartition(d2, limit - 1)[:limit]
+            candidates, d2 = candidates[best], d2[best]
+        order = np.argsort(d2, kind="stable")
+        return candidates[order], np.sqrt(d2[order])
+
+    def similar(self, player_id: int, max_cost: Optional[float] = None, limit: int = 10) -> Optional[List[dict]]:
+        """Voisins de ``player_id`` (du plus proche au plus lointain), ``None`` si inconnu."""
+        import numpy as np
+
+        i = self._rank.get(player_id)
+        if i is None:
+            return None
+        neighbours = self.neighbours[i]
+        distances = self.distances[i]
+        if max_cost is not None:
+            keep = self.costs[neighbours] <= max_cost
+            neighbours, distances = neighbours[keep], distances[keep]
+            if len(neighbours) < limit:
+                count = int(np.searchsorted(self._sorted_costs, max_cost, side="right"))
+                affordable = count - 1 if self.costs[i] <= max_cost else count  # soi exclu
+                if len(neighbours) < affordable:
+                    neighbours, distances = self._nearest_within(i, count, limit)
+        return [
+            {**self.players[j], "distance": round(float(d), 4)}
+            for j, d in zip(neighbours[:limit].tolist(), distances[:limit].tolist())
+        ]
+
+
+def load_rows(db: Session):
+    Player, Rollup = models.Player, models.PlayerStatRollup
+    stmt = (
+        select(
+            Player.id, Player.name, Player.club, Player.position, Player.cost, Player.age,
+            Rollup.matches, Rollup.goals, Rollup.assists, Rollup.yellow_cards, Rollup.red_cards,
+        )
+        .outerjoin(Rollup, Rollup.player_id == Player.id)
+        .where(Player.deleted_at.is_(None))
+        .order_by(Player.id)
+    )
+    return db.execute(stmt).all()
+
+
+def build_index(db: Session, k: int = SIMILAR_K) -> SimilarityIndex:
+    return SimilarityIndex(load_rows(db), k)
+
+
+class Builder:
+    """Index courant et reconstruction en arrière-plan (demandes regroupées)."""
+
+    def __init__(self, k: int = SIMILAR_K, debounce: float = SIMILAR_DEBOUNCE, session_factory=None):
+        self.k = k
+        self.debounce = debounce
+        self.session_factory = session_factory
+        self.index: Optional[SimilarityIndex] = None
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def current(self) -> SimilarityIndex:
+        """Index à utiliser ; construit à la première demande s'il n'existe pas encore."""
+        index = self.index
+        if index is None:
+            with self._lock:
+                if self.index is None:
+                    self.rebuild_now()
+                index = self.index
+        return index
+
+    def rebuild_now(self) -> None:
+        session_factory = self.session_factory
+        if session_factory is None:
+            from .database import SessionLocal as session_factory
+
+        with session_factory() as db:
+            self.index = build_index(db, self.k)
+
+    def request(self) -> None:
+        self._wake.set()
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="similarity-builder", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait()
+            while self._wake.is_set():
+                self._wake.clear()
+                time.sleep(self.debounce)
+            try:
+                self.rebuild_now()
+            except Exception:  # pragma: no cover - journalisé, retenté au prochain changement
+                logger.exception("similarity index rebuild failed")
+
+
+builder = Builder()
+
+
+def refresh() -> None:
+    """Demande une reconstruction (statistiques ou catalogue modifiés)."""
+    if builder.index is not None:
+        builder.request()
+
+
+@events.on_catalog_change
+def _on_catalog_change(action, player_ids) -> None:
+    refresh()
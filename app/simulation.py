@@ -0,0 +1,246 @@
+"""Simulation Monte-Carlo d'un face-à-face entre deux équipes sur une journée.
+
+Chaque joueur reçoit une loi de points par journée, ajustée sur ses
+statistiques de saison (``player_stat_rollups``) :
+
+- il joue avec la probabilité ``matches / journées`` ;
+- s'il joue : buts, passes décisives et buts contre son camp suivent des
+  lois de Poisson de paramètre « par match », un carton jaune ou rouge
+  une loi de Bernoulli ;
+- les taux sont rapprochés de la moyenne de son poste tant qu'il a peu
+  de matchs (``PRIOR_MATCHES`` matchs fictifs à la moyenne du poste).
+
+Le barème est celui de ``*_POINTS`` (apparition, buts selon le poste,
+passes, cartons, buts contre son camp).
+
+Tirer buts, passes et cartons joueur par joueur (100 000 × 22 tirages de
+Poisson) coûte plusieurs centaines de millisecondes.  Les lois des joueurs
+étant indépendantes, la loi exacte des points de chaque équipe est
+d'abord obtenue par convolution de celles de ses joueurs (quelques
+centaines de valeurs possibles) ; les ``SIMULATIONS`` journées sont
+ensuite tirées d'un bloc, par inversion de la fonction de répartition
+(``searchsorted``) : moins de 30 ms pour 100 000 journées.
+
+NumPy n'est importé qu'au premier appel (il n'alourdit pas le démarrage).
+"""
+
+import math
+import os
+import secrets
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from . import crud, models
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+SIMULATIONS = int(os.getenv("SIMULATIONS", "100000"))
+MAX_SIMULATIONS = 1_000_000
+
+# Barème (points par événement)
+APPEARANCE_POINTS = 2
+GOAL_POINTS = {"GK": 6, "DEF": 6, "MID": 5, "FWD": 4}
+ASSIST_POINTS = 3
+YELLOW_CARD_POINTS = -1
+RED_CARD_POINTS = -3
+OWN_GOAL_POINTS = -2
+
+POSITIONS = ("GK", "DEF", "MID", "FWD")
+# Matchs fictifs à la moyenne du poste ajoutés aux statistiques d'un joueur
+PRIOR_MATCHES = 5.0
+# Au-delà, les buts (passes…) d'un même match sont comptés à cette valeur
+MAX_EVENTS = 6
+
+
+class Profile(NamedTuple):
+    """Probabilité de jouer et taux par match d'un joueur."""
+
+    position: str
+    play: float
+    goals: float
+    assists: float
+    yellow_cards: float
+    red_cards: float
+    own_goals: float
+
+
+# Moyennes indicatives, utilisées tant qu'aucune statistique n'est ingérée
+DEFAULT_PROFILES = {
+    "GK": Profile("GK", 0.9, 0.0, 0.02, 0.05, 0.005, 0.005),
+    "DEF": Profile("DEF", 0.75, 0.05, 0.07, 0.15, 0.01, 0.01),
+    "MID": Profile("MID", 0.75, 0.12, 0.15, 0.15, 0.005, 0.003),
+    "FWD": Profile("FWD", 0.75, 0.35, 0.12, 0.1, 0.005, 0.002),
+}
+
+_RATES = ("goals", "assists", "yellow_cards", "red_cards", "own_goals")
+
+
+def _position(position: Optional[str]) -> str:
+    # Poste non standard : milieu, comme la validation tactique
+    return position if position in GOAL_POINTS else "MID"
+
+
+def _shrink(prior: Profile, position: str, matches: float, available: float, counts: Sequence[float]) -> Profile:
+    play = (matches + PRIOR_MATCHES * prior.play) / (available + PRIOR_MATCHES)
+    rates = [(count + PRIOR_MATCHES * rate) / (matches + PRIOR_MATCHES) for count, rate in zip(counts, prior[2:])]
+    return Profile(position, min(play, 1.0), *rates)
+
+
+def season_priors(db: Session) -> Tuple[Dict[str, Profile], int]:
+    """Profil moyen de chaque poste et nombre de journées jouées, en une requête."""
+    P, R = models.Player, models.PlayerStatRollup
+    rows = db.execute(
+        select(
+            P.position, func.count(), func.sum(R.matches), func.max(R.last_gameweek),
+            *(func.sum(getattr(R, field)) for field in _RATES),
+        )
+        .join(R, R.player_id == P.id)
+        .group_by(P.position)
+    ).all()
+    season = max((row[3] or 0 for row in rows), default=0)
+    totals: Dict[str, List[float]] = {}
+    for position, players, matches, _last, *counts in rows:
+        total = totals.setdefault(_position(position), [0.0] * (2 + len(_RATES)))
+        for i, value in enumerate((players, matches or 0, *counts)):
+            total[i] += value or 0
+    priors = dict(DEFAULT_PROFILES)
+    for position, (players, matches, *counts) in totals.items():
+        priors[position] = _shrink(DEFAULT_PROFILES[position], position, matches, players * season, counts)
+    return priors, season
+
+
+def player_profiles(db: Session, player_ids: Sequence[int], priors: Dict[str, Profile], season: int) -> List[Profile]:
+    """Profils des joueurs ``player_ids`` (statistiques lues en une requête)."""
+    if not player_ids:
+        return []
+    P, R = models.Player, models.PlayerStatRollup
+    rows = db.execute(
+        select(P.id, P.position, R.matches, *(getattr(R, field) for field in _RATES))
+        .outerjoin(R, R.player_id == P.id)
+        .where(P.id.in_(set(player_ids)))
+    ).all()
+    profiles = []
+    for _pid, position, matches, *counts in rows:
+        position = _position(position)
+        counts = [count or 0 for count in counts]
+        profiles.append(_shrink(priors[position], position, matches or 0, season, counts))
+    return profiles
+
+
+def average_team(priors: Dict[str, Profile]) -> List[Profile]:
+    """Équipe moyenne : formation 1-4-3-3 de joueurs au profil moyen de leur poste."""
+    return [priors[position] for position in POSITIONS for _ in range(crud.MAX_PLAYERS_PER_POSITION[position])]
+
+
+# ---------------------------------------------------------------------
+# Lois de points
+# ---------------------------------------------------------------------
+
+def _poisson(rate: float) -> List[float]:
+    probs = [math.exp(-rate) * rate ** k / math.factorial(k) for k in range(MAX_EVENTS)]
+    return probs + [max(1.0 - sum(probs), 0.0)]
+
+
+def _scaled(probs: Sequence[float], points: int) -> Tuple[int, "np.ndarray"]:
+    """Loi de ``points × X`` pour ``X`` de loi ``probs`` sur 0, 1, 2… : ``(minimum, probabilités)``."""
+    import numpy as np
+
+    out = np.zeros(abs(points) * (len(probs) - 1) + 1)
+    if points >= 0:
+        out[::points] = probs
+        return 0, out
+    out[::-points] = probs[::-1]
+    return points * (len(probs) - 1), out
+
+
+def _convolve(a: Tuple[int, "np.ndarray"], b: Tuple[int, "np.ndarray"]) -> Tuple[int, "np.ndarray"]:
+    import numpy as np
+
+    return a[0] + b[0], np.convolve(a[1], b[1])
+
+
+def points_distribution(profile: Profile) -> Tuple[int, "np.ndarray"]:
+    """Loi des points d'un joueur sur une journée : ``(minimum, probabilités)``."""
+    import numpy as np
+
+    played = (APPEARANCE_POINTS, np.ones(1))
+    played = _convolve(played, _scaled(_poisson(profile.goals), GOAL_POINTS[profile.position]))
+    played = _convolve(played, _scaled(_poisson(profile.assists), ASSIST_POINTS))
+    played = _convolve(played, _scaled(_poisson(profile.own_goals), OWN_GOAL_POINTS))
+    # Un carton par match au plus : le rouge, sinon le jaune
+    red = min(profile.red_cards, 1.0)
+    yellow = min(profile.yellow_cards, 1.0 - red)
+    cards = np.zeros(-RED_CARD_POINTS + 1)
+    cards[0], cards[YELLOW_CARD_POINTS - RED_CARD_POINTS], cards[-1] = red, yellow, 1.0 - red - yellow
+    played_low, played_probs = _convolve(played, (RED_CARD_POINTS, cards))
+
+    # Sans jouer : 0 point
+    low = min(played_low, 0)
+    out = np.zeros(max(played_low + len(played_probs) - 1, 0) - low + 1)
+    out[played_low - low:played_low - low + len(played_probs)] = profile.play * played_probs
+    out[-low] += 1.0 - profile.play
+    return low, out
+
+
+def team_distribution(profiles: Sequence[Profile]) -> Tuple[int, "np.ndarray"]:
+    """Loi exacte des points d'une équipe : convolution des lois de ses joueurs."""
+    import numpy as np
+
+    total = (0, np.ones(1))
+    for profile in profiles:
+        total = _convolve(total, points_distribution(profile))
+    return total
+
+
+# ---------------------------------------------------------------------
+# Simulation
+# ---------------------------------------------------------------------
+
+def _draw(distribution: Tuple[int, "np.ndarray"], uniforms: "np.ndarray") -> "np.ndarray":
+    import numpy as np
+
+    low, probs = distribution
+    cdf = np.cumsum(probs)
+    index = np.searchsorted(cdf, uniforms * cdf[-1], side="right")
+    return low + np.minimum(index, len(probs) - 1)
+
+
+def _summary(points: "np.ndarray") -> dict:
+    import numpy as np
+
+    p10, p50, p90 = np.percentile(points, [10, 50, 90])
+    return {"expected_points": float(points.mean()), "p10": float(p10), "p50": float(p50), "p90": float(p90)}
+
+
+def simulate(
+    home: Sequence[Profile],
+    away: Sequence[Profile],
+    simulations: int = SIMULATIONS,
+    seed: Optional[int] = None,
+) -> dict:
+    """Simule ``simulations`` journées de ``home`` contre ``away``.
+
+    Avec le même ``seed``, le résultat est identique ; sans ``seed``, un
+    seed est tiré et renvoyé pour pouvoir rejouer la simulation.
+    """
+    import numpy as np
+
+    if seed is None:
+        seed = secrets.randbits(32)
+    rng = np.random.default_rng(seed)
+    uniforms = rng.random((2, simulations))
+    home_points = _draw(team_distribution(home), uniforms[0])
+    away_points = _draw(team_distribution(away), uniforms[1])
+    return {
+        "simulations": simulations,
+        "seed": seed,
+        "win": float(np.count_nonzero(home_points > away_points)) / simulations,
+        "draw": float(np.count_nonzero(home_points == away_points)) / simulations,
+        "loss": float(np.count_nonzero(home_points < away_points)) / simulations,
+        "home": _summary(home_points),
+        "away": _summary(away_points),
+    }
@@ -0,0 +1,347 @@
+"""Instantané binaire du catalogue, partagé entre workers par ``mmap``.
+
+``GET /players`` et ``GET /players/{id}`` sont les lectures les plus
+fréquentes et le catalogue change rarement (écritures admin).  Un
+instantané de la table ``players`` est écrit dans un fichier que chaque
+worker projette en mémoire : les pages du système sont partagées entre
+processus et une réponse n'est qu'une tranche du fichier, sans requête
+SQL ni objet Python par joueur.
+
+Format (ordre natif des octets, fichier local à la machine) ::
+
+    en-tête   MAGIC, FORMAT, version (ns), nombre de joueurs n
+    ids       n × int32, triés (index id -> rang par dichotomie)
+    offsets   (n + 1) × uint32, début du JSON de chaque joueur
+    blob      JSON ``PlayerOut`` des joueurs, séparés par des virgules
+
+Les joueurs étant contigus et séparés par des virgules, une page
+``[skip, skip + limit)`` est directement ``[`` + une tranche du blob + ``]``.
+
+Un seul processus reconstruit le fichier à la fois (verrou ``flock``) ;
+le nouveau fichier est écrit à côté puis substitué par ``os.replace``
+(échange atomique : un lecteur voit l'ancienne ou la nouvelle version,
+jamais un fichier partiel).
+
+La version d'un instantané est l'horodatage pris avant la lecture de la
+table : il contient toute modification de version inférieure.  La
+dernière version du catalogue est partagée entre les processus de la
+machine par un mot de 8 octets projeté en mémoire (``SNAPSHOT_PATH``
+``.version``), avancé par ``events.catalog_changed`` quel que soit le
+broker d'événements.  À chaque lecture, un worker compare ce mot à la
+version de son instantané, sans appel système :
+
+- à jour : la réponse vient de l'instantané ;
+- en retard (écriture en cours de reconstruction, dans ce worker ou un
+  autre) : la lecture repasse par SQL, le fichier est rouvert dès qu'il
+  a été remplacé (``os.stat``) ; un client relit immédiatement ce qu'il
+  vient d'écrire et un joueur supprimé n'est plus servi.  Si le worker
+  qui a écrit ne reconstruit pas le fichier (arrêt), ce worker le fait.
+
+Désactivé tant que ``SNAPSHOT_PATH`` n'est pas défini.
+"""
+
+import bisect
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+from typing import Optional
+
+import orjson
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from . import events, models, serializers
+
+try:  # verrou inter-processus (POSIX)
+    import fcntl
+except ImportError:  # pragma: no cover - dépend de la plateforme
+    fcntl = None
+
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH", "")
+SNAPSHOT_DEBOUNCE = float(os.getenv("SNAPSHOT_DEBOUNCE", "0.2"))
+
+MAGIC = b"MFLS"
+FORMAT = 1
+HEADER = struct.Struct("=4sIQI4x")
+
+# Dernière version du catalogue (ns), partagée entre processus
+VERSION = struct.Struct("=Q")
+
+
+# ---------------------------------------------------------------------
+# Écriture
+# ---------------------------------------------------------------------
+
+def build_snapshot(db: Session, version: Optional[int] = None) -> bytes:
+    """Lit la table ``players`` et retourne le contenu du fichier."""
+    # Pris avant la lecture : l'instantané contient les écritures plus anciennes
+    version = version or time.time_ns()
+    fields = serializers.PLAYER_FIELDS
+    columns = [getattr(models.Player, f) for f in fields]
+    rows = db.execute(select(*columns).where(models.Player.deleted_at.is_(None)).order_by(models.Player.id)).all()
+
+    ids = array("i")
+    offsets = array("I")
+    chunks = []
+    position = 0
+    for row in rows:
+        encoded = orjson.dumps(serializers.row_to_dict(row, fields))
+        ids.append(row[0])
+        offsets.append(position)
+        chunks.append(encoded)
+        position += len(encoded) + 1  # virgule de séparation
+    offsets.append(position)
+
+    header = HEADER.pack(MAGIC, FORMAT, version, len(rows))
+    return header + ids.tobytes() + offsets.tobytes() + b",".join(chunks)
+
+
+@contextmanager
+def _file_lock(path: str):
+    """Verrou exclusif entre processus (un seul écrivain à la fois)."""
+    if fcntl is None:
+        yield
+        return
+    with open(path + ".lock", "w") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def write_snapshot(path: str, data: bytes) -> None:
+    """Écrit le fichier à côté puis le substitue atomiquement."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def file_version(path: str) -> int:
+    """Version de l'instantané écrit dans ``path`` (0 s'il n'existe pas)."""
+    try:
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+    except FileNotFoundError:
+        return 0
+    if len(header) < HEADER.size:
+        return 0
+    magic, fmt, version, _count = HEADER.unpack(header)
+    return version if magic == MAGIC and fmt == FORMAT else 0
+
+
+def refresh(path: str, db: Session, min_version: int = 0) -> int:
+    """Reconstruit l'instantané s'il est antérieur à ``min_version`` et retourne sa version."""
+    with _file_lock(path):
+        # Un autre worker a peut-être déjà reconstruit le fichier
+        current = file_version(path)
+        if min_version and current >= min_version:
+            return current
+        # Versions déjà annoncées : validées, même si l'horloge locale retarde
+        version = max(time.time_ns(), events.hub.catalog_version)
+        write_snapshot(path, build_snapshot(db, version))
+        return version
+
+
+class Refresher:
+    """Reconstruit l'instantané en arrière-plan après un changement du catalogue.
+
+    Les demandes rapprochées (import par lot) sont regroupées : une seule
+    reconstruction après ``debounce`` secondes de calme.
+    """
+
+    def __init__(self, path: str, debounce: float = SNAPSHOT_DEBOUNCE, session_factory=None):
+        self.path = path
+        self.debounce = debounce
+        self.session_factory = session_factory
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._target = 0
+
+    def request(self, version: int = 0) -> None:
+        """Demande un instantané contenant au moins la version ``version`` du catalogue."""
+        self._target = max(self._target, version)
+        self._wake.set()
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="snapshot-refresher", daemon=True)
+                self._thread.start()
+
+    def ensure(self, version: int) -> None:
+        """``request(version)``, une seule fois par version (lectures en retard)."""
+        if version > self._target:
+            self.request(version)
+
+    def refresh_now(self, min_version: int = 0) -> None:
+        session_factory = self.session_factory
+        if session_factory is None:
+            from .database import SessionLocal as session_factory
+
+        with session_factory() as db:
+            refresh(self.path, db, min_version)
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait()
+            # Attend que les écritures rapprochées soient terminées
+            while self._wake.is_set():
+                self._wake.clear()
+                time.sleep(self.debounce)
+            try:
+                self.refresh_now(self._target)
+            except Exception:  # pragma: no cover - journalisé, retenté au prochain changement
+                logger.exception("snapshot refresh failed")
+
+
+# ---------------------------------------------------------------------
+# Lecture
+# ---------------------------------------------------------------------
+
+class Snapshot:
+    """Vue en lecture seule d'un fichier d'instantané projeté en mémoire."""
+
+    def __init__(self, buffer):
+        view = memoryview(buffer)
+        magic, fmt, self.version, self.count = HEADER.unpack_from(view)
+        if magic != MAGIC or fmt != FORMAT:
+            raise ValueError("not a catalog snapshot")
+        start = HEADER.size
+        self.ids = view[start:start + 4 * self.count].cast("i")
+        start += 4 * self.count
+        self.offsets = view[start:start + 4 * (self.count + 1)].cast("I")
+        self.blob = view[start + 4 * (self.count + 1):]
+        self._buffer = buffer
+
+    @classmethod
+    def open(cls, path: str) -> "Snapshot":
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def page(self, skip: int, limit: int) -> bytes:
+        """JSON de la liste ``[skip, skip + limit)`` (ordre des ids)."""
+        start = min(max(skip, 0), self.count)
+        end = min(start + max(limit, 0), self.count)
+        if start >= end:
+            return b"[]"
+        return b"[" + self.blob[self.offsets[start]:self.offsets[end] - 1] + b"]"
+
+    def get(self, player_id: int) -> Optional[bytes]:
+        """JSON d'un joueur, ou ``None`` s'il n'existe pas."""
+        i = bisect.bisect_left(self.ids, player_id)
+        if i == self.count or self.ids[i] != player_id:
+            return None
+        return self.blob[self.offsets[i]:self.offsets[i + 1] - 1].tobytes()
+
+
+class SharedVersion:
+    """Dernière version du catalogue, dans un fichier de 8 octets projeté par chaque processus."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._map: Optional[mmap.mmap] = None
+
+    def _mapped(self) -> mmap.mmap:
+        if self._map is None:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if os.fstat(fd).st_size < VERSION.size:
+                    os.ftruncate(fd, VERSION.size)
+                self._map = mmap.mmap(fd, VERSION.size)
+            finally:
+                os.close(fd)
+        return self._map
+
+    def get(self) -> int:
+        return VERSION.unpack_from(self._mapped())[0]
+
+    def advance(self, version: int) -> None:
+        """Retient ``version`` si elle est plus récente que la version partagée."""
+        with _file_lock(self.path):
+            mapped = self._mapped()
+            if version > VERSION.unpack_from(mapped)[0]:
+                VERSION.pack_into(mapped, 0, version)
+
+
+class Reader:
+    """Donne l'instantané courant, rouvert quand le fichier a été remplacé."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.versions = SharedVersion(path + ".version")
+        self._snapshot: Optional[Snapshot] = None
+        self._key = None
+
+    def latest(self) -> int:
+        """Dernière version du catalogue connue de ce worker ou annoncée par un autre."""
+        return max(events.hub.catalog_version, self.versions.get())
+
+    def current(self, latest: int = 0) -> Optional[Snapshot]:
+        """Instantané ouvert, rouvert d'abord s'il est antérieur à ``latest``."""
+        snap = self._snapshot
+        if snap is None or snap.version < latest:
+            snap = self._reopen()
+        return snap
+
+    def _reopen(self) -> Optional[Snapshot]:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return self._snapshot
+        key = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if key != self._key:
+            # L'ancienne projection est libérée quand plus rien ne la référence
+            self._snapshot = Snapshot.open(self.path)
+            self._key = key
+        return self._snapshot
+
+
+reader: Optional[Reader] = Reader(SNAPSHOT_PATH) if SNAPSHOT_PATH else None
+refresher: Optional[Refresher] = Refresher(SNAPSHOT_PATH) if SNAPSHOT_PATH else None
+
+
+def current() -> Optional[Snapshot]:
+    """Instantané à utiliser pour servir une lecture, ou ``None`` (lecture SQL).
+
+    ``None`` aussi tant que l'instantané ne contient pas la dernière version
+    du catalogue.
+    """
+    if reader is None:
+        return None
+    latest = reader.latest()
+    snap = reader.current(latest)
+    if snap is None or snap.version < latest:
+        if refresher is not None:
+            # Sans effet si déjà demandé ou si l'écrivain reconstruit le fichier
+            refresher.ensure(latest)
+        return None
+    return snap
+
+
+@events.on_catalog_change
+def _on_catalog_change(action, player_ids) -> None:
+    if reader is not None:
+        reader.versions.advance(events.hub.catalog_version)
+    if refresher is not None:
+        refresher.request(events.hub.catalog_version)
+
+
+def _on_event(channel: str, event: str, data: dict) -> None:
+    if channel == events.CATALOG and refresher is not None:
+        # Écriture d'un autre worker, reçue par le broker postgres (les
+        # nôtres sont déjà demandées) : sans effet si l'instantané la contient
+        refresher.request(data.get("version", 0))
+
+
+events.hub.listen(_on_event)
@@ -0,0 +1,130 @@
+"""Profil du démarrage de l'application.
+
+    python -m app.startup_profile [--top 20] [--runs 3] [--path /]
+
+Deux mesures, chacune dans un interpréteur neuf (imports à froid) :
+
+- temps d'import par module (``python -X importtime -c "import app.main"``) :
+  les modules ``app.*`` et les paquets tiers les plus coûteux, en temps
+  cumulé (module et tout ce qu'il importe) ;
+- démarrage à froid jusqu'à la première requête servie : import de
+  ``app.main``, événements ``startup`` (tables, seed, shards, instantané),
+  puis ``GET --path`` via le ``TestClient``.
+
+Le seed, passlib/Argon2, ``jose.jwt`` (backends cryptographiques), NumPy
+et ``app.jobs`` ne sont importés qu'à leur première utilisation ;
+``app/tests/test_startup.py`` vérifie qu'ils le restent et que l'import
+de ``app.main`` tient dans son budget.
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List
+
+
+ROOT = Path(__file__).resolve().parents[1]
+
+_IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+# Exécuté dans un interpréteur neuf : import, startup, première requête
+_COLD_START = """
+import json, sys, time
+t0 = time.perf_counter()
+from app.main import app
+t1 = time.perf_counter()
+from fastapi.testclient import TestClient
+t2 = time.perf_counter()
+with TestClient(app) as client:
+    t3 = time.perf_counter()
+    status = client.get(sys.argv[1]).status_code
+    t4 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "startup": t3 - t2, "first_request": t4 - t3, "status": status}))
+"""
+
+
+@dataclass
+class ImportRecord:
+    """Une ligne de ``-X importtime`` (durées en secondes)."""
+
+    module: str
+    self_time: float
+    cumulative: float
+    depth: int
+
+
+def _run(args: List[str]) -> subprocess.CompletedProcess:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(ROOT), os.getenv("PYTHONPATH")])))
+    return subprocess.run([sys.executable, *args], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+
+
+def import_times(module: str = "app.main", runs: int = 1) -> List[ImportRecord]:
+    """Temps d'import de ``module`` et de ses dépendances (meilleur de ``runs`` essais)."""
+    best: List[ImportRecord] = []
+    for _ in range(max(runs, 1)):
+        stderr = _run(["-X", "importtime", "-c", f"import {module}"]).stderr
+        records = []
+        for line in stderr.splitlines():
+            match = _IMPORT_LINE.match(line)
+            if match:
+                self_us, cumulative_us, indent, name = match.groups()
+                records.append(ImportRecord(name, int(self_us) / 1e6, int(cumulative_us) / 1e6, len(indent) // 2))
+        if not best or total_time(records, module) < total_time(best, module):
+            best = records
+    return best
+
+
+def total_time(records: List[ImportRecord], module: str = "app.main") -> float:
+    return next((r.cumulative for r in records if r.module == module), 0.0)
+
+
+def by_package(records: List[ImportRecord]) -> Dict[str, float]:
+    """Temps propre additionné par paquet (``app.*`` détaillé par module)."""
+    totals: Dict[str, float] = {}
+    for record in records:
+        key = record.module if record.module.startswith("app.") else record.module.split(".")[0]
+        totals[key] = totals.get(key, 0.0) + record.self_time
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+def cold_start(path: str = "/") -> Dict[str, float]:
+    """Import, startup et première requête dans un interpréteur neuf (secondes)."""
+    started = time.perf_counter()
+    result = json.loads(_run(["-c", _COLD_START, path]).stdout.strip().splitlines()[-1])
+    result["total"] = time.perf_counter() - started
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Temps d'import par module et démarrage à froid.")
+    parser.add_argument("--module", default="app.main", help="module importé (défaut : app.main)")
+    parser.add_argument("--top", type=int, default=20, help="nombre de lignes par tableau")
+    parser.add_argument("--runs", type=int, default=3, help="essais d'import (le plus rapide est gardé)")
+    parser.add_argument("--path", default="/", help="route de la première requête")
+    args = parser.parse_args()
+
+    records = import_times(args.module, args.runs)
+    print(f"import {args.module}: {total_time(records, args.module) * 1000:.1f} ms")
+    print(f"\n{'cumulé (ms)':>12} {'propre (ms)':>12}  module")
+    for record in sorted(records, key=lambda r: r.cumulative, reverse=True)[:args.top]:
+        print(f"{record.cumulative * 1000:12.1f} {record.self_time * 1000:12.1f}  {'  ' * record.depth}{record.module}")
+    print(f"\n{'propre (ms)':>12}  paquet")
+    for package, seconds in list(by_package(records).items())[:args.top]:
+        print(f"{seconds * 1000:12.1f}  {package}")
+
+    start = cold_start(args.path)
+    print(f"\ndémarrage à froid jusqu'à GET {args.path} ({start['status']}) : {start['total'] * 1000:.0f} ms")
+    print(f"  import app.main   {start['import'] * 1000:8.1f} ms")
+    print(f"  startup           {start['startup'] * 1000:8.1f} ms")
+    print(f"  première requête  {start['first_request'] * 1000:8.1f} ms")
+    print(f"  interpréteur, TestClient  {(start['total'] - start['import'] - start['startup'] - start['first_request']) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -67,6 +67,18 @@ const PAGE_SIZE = 50;
 
 // ========= Players (Marché) =========
 async function loadPlayers() {
+  const msg = $("#playersMsg");
+  toast(msg, "Chargement…", true);
+
+  try {
+    const url = `/players?skip=${currentOffset}&limit=${PAGE_SIZE}`;
+    renderPlayers(await apiFetch(url));
+  } catch (e) {
+    toast(msg, e.message, false);
+  }
+}
+
+function renderPlayers(data) {
   const list = $("#playersList");
   const msg = $("#playersMsg");
   const btnPrev = $("#btnPrev");
@@ -74,49 +86,39 @@ async function loadPlayers() {
   const pageInd = $("#pageIndicator");
 
   if (list) list.innerHTML = "";
-  toast(msg, "Chargement…", true);
+  if (!Array.isArray(data)) return toast(msg, "format inattendu", false);
 
-  try {
-    const url = `/players?skip=${currentOffset}&limit=${PAGE_SIZE}`;
-    const data = await apiFetch(url);
-
-    if (!Array.isArray(data)) throw new Error("format inattendu");
-
-    if (!data.length) {
-      list.innerHTML = `<div class="muted">Aucun joueur trouvé.</div>`;
-      if (btnNext) btnNext.disabled = true;
-    } else {
-      if (btnNext) btnNext.disabled = (data.length < PAGE_SIZE);
-
-      for (const p of data) {
-        const row = document.createElement("div");
-        row.className = "player";
-        row.innerHTML = `
-          <div><strong>${p.name}</strong><div class="muted">${p.club || "-"}</div></div>
-          <div class="pill nowrap">${p.position || "-"}</div>
-          <div class="pill right">${(p.cost ?? p.price ?? 0).toLocaleString()} €</div>
-          <div class="right">
-            <button class="add">Ajouter</button>
-          </div>
-        `;
-        // Clic pour Ajouter
-        const addBtn = row.querySelector(".add");
-        addBtn.onclick = () => addPlayerToTeam(p.id);
-        
-        list.appendChild(row);
-      }
-    }
-    
-    if (btnPrev) btnPrev.disabled = (currentOffset === 0);
-    if (pageInd) {
-        const pageNum = Math.floor(currentOffset / PAGE_SIZE) + 1;
-        pageInd.textContent = `Page ${pageNum}`;
+  if (!data.length) {
+    list.innerHTML = `<div class="muted">Aucun joueur trouvé.</div>`;
+    if (btnNext) btnNext.disabled = true;
+  } else {
+    if (btnNext) btnNext.disabled = (data.length < PAGE_SIZE);
+
+    for (const p of data) {
+      const row = document.createElement("div");
+      row.className = "player";
+      row.innerHTML = `
+        <div><strong>${p.name}</strong><div class="muted">${p.club || "-"}</div></div>
+        <div class="pill nowrap">${p.position || "-"}</div>
+        <div class="pill right">${(p.cost ?? p.price ?? 0).toLocaleString()} €</div>
+        <div class="right">
+          <button class="add">Ajouter</button>
+        </div>
+      `;
+      // Clic pour Ajouter
+      const addBtn = row.querySelector(".add");
+      addBtn.onclick = () => addPlayerToTeam(p.id);
+      
+      list.appendChild(row);
     }
-    toast(msg, `OK (${data.length} joueurs)`);
-
-  } catch (e) {
-    toast(msg, e.message, false);
   }
+  
+  if (btnPrev) btnPrev.disabled = (currentOffset === 0);
+  if (pageInd) {
+      const pageNum = Math.floor(currentOffset / PAGE_SIZE) + 1;
+      pageInd.textContent = `Page ${pageNum}`;
+  }
+  toast(msg, `OK (${data.length} joueurs)`);
 }
 
 function prevPage() {
@@ -132,86 +134,130 @@ function nextPage() {
 
 // ========= Team (Le Terrain) =========
 async function loadTeam() {
+  try {
+    renderTeam(await apiFetch("/team", { auth: true }));
+  } catch (e) {
+    toast($("#teamMsg"), e.message, false);
+  }
+}
+
+function renderTeam(t) {
   const nameEl = $("#teamTitle");
   const budgetEl = $("#teamBudget");
   const pitchEl = $("#soccerPitch"); // <--- Cible le terrain
-  const msg = $("#teamMsg");
 
   if (pitchEl) pitchEl.innerHTML = "";
   if (nameEl) nameEl.textContent = "–";
   if (budgetEl) budgetEl.textContent = "–";
 
-  try {
-    const t = await apiFetch("/team", { auth: true });
-
-    // Infos
-    if (nameEl) nameEl.textContent = t?.name ?? "–";
-    if (budgetEl)
-      budgetEl.textContent = t?.budget_left != null 
-        ? `${t.budget_left.toLocaleString()} €` 
-        : "–";
-
-    // Barre Budget
-    const bar = $("#budgetBar");
-    if (bar && t?.total_budget) {
-        const pct = Math.max(0, (t.budget_left / t.total_budget) * 100);
-        bar.style.width = `${pct}%`;
-        bar.style.backgroundColor = (pct < 10) ? "#ff5c5c" : "#7fffb0";
-    }
+  // Infos
+  if (nameEl) nameEl.textContent = t?.name ?? "–";
+  if (budgetEl)
+    budgetEl.textContent = t?.budget_left != null 
+      ? `${t.budget_left.toLocaleString()} €` 
+      : "–";
+
+  // Barre Budget
+  const bar = $("#budgetBar");
+  if (bar && t?.total_budget) {
+      const pct = Math.max(0, (t.budget_left / t.total_budget) * 100);
+      bar.style.width = `${pct}%`;
+      bar.style.backgroundColor = (pct < 10) ? "#ff5c5c" : "#7fffb0";
+  }
 
-    const players = Array.isArray(t?.players) ? t.players : [];
-    if (!pitchEl) return;
+  const players = Array.isArray(t?.players) ? t.players : [];
+  if (!pitchEl) return;
 
-    // --- LOGIQUE TERRAIN ---
-    // Trier par poste
-    const formation = { "FWD": [], "MID": [], "DEF": [], "GK": [] };
-    players.forEach(p => {
-        const pos = (p.position && formation[p.position]) ? p.position : "MID";
-        formation[pos].push(p);
-    });
+  // --- LOGIQUE TERRAIN ---
+  // Trier par poste
+  const formation = { "FWD": [], "MID": [], "DEF": [], "GK": [] };
+  players.forEach(p => {
+      const pos = (p.position && formation[p.position]) ? p.position : "MID";
+      formation[pos].push(p);
+  });
 
-    // Afficher ligne par ligne (Haut vers Bas)
-    const rowsOrder = ["FWD", "MID", "DEF", "GK"];
-    const limits = { "FWD": 3, "MID": 3, "DEF": 4, "GK": 1 };
-    rowsOrder.forEach(posKey => {
-        const rowDiv = document.createElement("div");
-        rowDiv.className = "pitch-row";
-        const rowPlayers = formation[posKey];
-
-        const max = limits[posKey];
-
-
-        // Espace vide si personne
-        if (rowPlayers.length === 0) rowDiv.style.minHeight = "80px";
-
-        rowPlayers.forEach(p => {
-            const token = document.createElement("div");
-            token.className = "player-token";
-            token.innerHTML = `
-                <div class="player-pos">${p.position}</div>
-                <div class="player-name" title="${p.name}">${p.name}</div>
-                <div class="player-cost">${(p.cost || 0).toLocaleString()}</div>
-            `;
-
-            // Bouton X (Supprimer)
-            const btnX = document.createElement("div");
-            btnX.className = "btn-remove-x";
-            btnX.textContent = "✕";
-            
-            // On attache la fonction directement à l'élément DOM created
-            btnX.onclick = function() {
-                removePlayerFromTeam(p.id);
-            };
-
-            token.appendChild(btnX);
-            rowDiv.appendChild(token);
-        });
-        pitchEl.appendChild(rowDiv);
-    });
+  // Afficher ligne par ligne (Haut vers Bas)
+  const rowsOrder = ["FWD", "MID", "DEF", "GK"];
+  const limits = { "FWD": 3, "MID": 3, "DEF": 4, "GK": 1 };
+  rowsOrder.forEach(posKey => {
+      const rowDiv = document.createElement("div");
+      rowDiv.className = "pitch-row";
+      const rowPlayers = formation[posKey];
+
+      const max = limits[posKey];
+
+
+      // Espace vide si personne
+      if (rowPlayers.length === 0) rowDiv.style.minHeight = "80px";
+
+      rowPlayers.forEach(p => {
+          const token = document.createElement("div");
+          token.className = "player-token";
+          token.innerHTML = `
+              <div class="player-pos">${p.position}</div>
+              <div class="player-name" title="${p.name}">${p.name}</div>
+              <div class="player-cost">${(p.cost || 0).toLocaleString()}</div>
+          `;
+
+          // Bouton X (Supprimer)
+          const btnX = document.createElement("div");
+          btnX.className = "btn-remove-x";
+          btnX.textContent = "✕";
+          
+          // On attache la fonction directement à l'élément DOM created
+          btnX.onclick = function() {
+              removePlayerFromTeam(p.id);
+          };
+
+          token.appendChild(btnX);
+          rowDiv.appendChild(token);
+      });
+      pitchEl.appendChild(rowDiv);
+  });
+}
 
+// ========= Dashboard (équipe + marché en une requête) =========
+async function loadDashboard() {
+  try {
+    const d = await apiFetch(`/dashboard/?skip=${currentOffset}&limit=${PAGE_SIZE}`, { auth: true });
+    renderTeam(d.team);
+    renderPlayers(d.players);
   } catch (e) {
-    toast(msg, e.message, false);
+    toast($("#teamMsg"), e.message, false);
+  }
+}
+
+// ========= Temps réel (SSE) =========
+// Changements faits depuis un autre onglet / par un admin, sans sondage
+let eventSource = null;
+
+async function connectEvents() {
+  disconnectEvents();
+  if (!getToken() || !window.EventSource) return;
+  // Ticket court dans l'URL : le token d'accès n'y apparaît jamais
+  let ticket;
+  try {
+    ({ ticket } = await apiFetch("/events/ticket", { method: "POST", auth: true }));
+  } catch {
+    return;
   }
+  if (!getToken()) return;  // déconnecté entre-temps
+  disconnectEvents();  // un autre appel a pu ouvrir un flux pendant l'attente
+  const source = new EventSource(`/events/?ticket=${encodeURIComponent(ticket)}`);
+  eventSource = source;
+  // Reconnexion refusée (ticket expiré) : on redemande un ticket
+  source.onerror = () => {
+    if (source.readyState === EventSource.CLOSED && eventSource === source) setTimeout(connectEvents, 3000);
+  };
+  eventSource.addEventListener("team", (ev) => renderTeam(JSON.parse(ev.data)));
+  eventSource.addEventListener("catalog", () => loadPlayers());
+  // Flux interrompu côté serveur (client trop lent) : on relit tout
+  eventSource.addEventListener("reset", () => loadDashboard());
+}
+
+function disconnectEvents() {
+  if (eventSource) eventSource.close();
+  eventSource = null;
 }
 
 // ========= Actions =========
@@ -226,7 +272,7 @@ async function createTeam(ev) {
     await apiFetch("/team", { method: "POST", body: { name }, auth: true });
     toast(msg, "Équipe créée", true);
     nameInput.value = "";
-    await loadTeam();
+    await loadDashboard();
   } catch (e) {
     toast(msg, e.message, false);
   }
@@ -236,7 +282,7 @@ async function addPlayerToTeam(playerId) {
   const msg = $("#teamMsg");
   try {
     await apiFetch("/team/players", { method: "POST", body: [playerId], auth: true });
-    await loadTeam();
+    await loadDashboard();
     toast(msg, "Joueur ajouté", true);
   } catch (e) {
     toast(msg, e.message, false);
@@ -248,7 +294,7 @@ async function removePlayerFromTeam(playerId) {
   try {
     // console.log("Suppression joueur", playerId);
     await apiFetch(`/team/players/${playerId}`, { method: "DELETE", auth: true });
-    await loadTeam();
+    await loadDashboard();
     toast(msg, "Joueur retiré", true);
    } catch (e) {
     toast(msg, e.message, false);
@@ -285,7 +331,8 @@ async function login() {
     setToken(data?.access_token || "");
     toast(msg, "Connecté ✅", true);
     switchTab('game'); // Bascule auto
-    await loadTeam();
+    connectEvents();
+    await loadDashboard();
   } catch (e) {
     setToken("");
     toast(msg, e.message, false);
@@ -321,6 +368,7 @@ function boot() {
   });
   $("#btnLogout")?.addEventListener("click", () => {
       setToken("");
+      disconnectEvents();
       switchTab('auth');
   });
 
@@ -336,12 +384,13 @@ function boot() {
     createBtn.disabled = !nameInput.value.trim();
   }
 
-  // Premier chargement
-  loadPlayers();
+  // Premier chargement : une seule requête si connecté
   if (getToken()) {
       switchTab('game');
-      loadTeam();
+      connectEvents();
+      loadDashboard();
   } else {
+      loadPlayers();
       switchTab('auth');
   }
 }
@@ -0,0 +1,189 @@
+"""Cache des vues ``TeamOut`` encodées, par propriétaire.
+
+``GET /team`` est relu par l'UI après chaque action.  La vue complète
+encodée en JSON est gardée par propriétaire dans un LRU borné
+(``TEAM_CACHE_SIZE`` équipes) ; une relecture est une recherche dans un
+dictionnaire et l'écriture des octets, sans requête SQL.
+
+Une entrée est valable pour une version de l'équipe et une version du
+catalogue :
+
+- une écriture d'équipe (``routers/team.py``) incrémente la version de
+  l'équipe après son commit, et enregistre directement la nouvelle vue si
+  aucune autre écriture de la même équipe n'a eu lieu entre-temps ;
+- un changement du catalogue (prix, suppression… ``events.on_catalog_change``)
+  incrémente la version du catalogue, ce qui périme toutes les entrées ;
+- une lecture note les versions *avant* d'interroger la base et n'est
+  gardée que si elles n'ont pas changé : une écriture concurrente ne peut
+  pas être masquée par une vue plus ancienne.
+
+Avec plusieurs workers (``EVENTS_BROKER=postgres``), les événements
+``team:<owner_id>`` et ``catalog`` reçus par le hub périment aussi les
+entrées des autres workers.  Avec le broker ``local``, ces événements ne
+quittent pas le worker qui écrit : un autre worker servirait une vue
+antérieure à l'écriture.  Le cache y est donc désactivé par défaut
+(``TEAM_CACHE_SIZE`` vide), et ne doit être activé qu'avec un seul
+worker.  Les propriétaires évincés du LRU ne gardent
+pas de version : ``_floor`` (la plus grande version oubliée) en tient
+lieu, si bien qu'une vue gardée avant une écriture ne redevient jamais
+valable.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import orjson
+
+from . import events
+
+
+# Par défaut : actif seulement si les autres workers reçoivent les invalidations
+TEAM_CACHE_SIZE = int(os.getenv("TEAM_CACHE_SIZE") or ("10000" if events.EVENTS_BROKER == "postgres" else "0"))
+
+# (version de l'équipe, version du catalogue)
+Versions = Tuple[int, int]
+
+
+class _Slot:
+    """Version courante d'une équipe et, si connue, sa vue encodée."""
+
+    __slots__ = ("version", "catalog_version", "body")
+
+    def __init__(self, version: int):
+        self.version = version
+        self.catalog_version = -1
+        self.body: Optional[bytes] = None
+
+
+class TeamViewCache:
+    """LRU borné ``owner_id -> vue encodée``, invalidé par versions."""
+
+    def __init__(self, max_entries: int = TEAM_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.catalog_version = 0
+        self.hits = 0
+        self.misses = 0
+        self._clock = 0
+        self._floor = 0
+        self._slots: "OrderedDict[int, _Slot]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def clear(self) -> None:
+        """Oublie toutes les vues (et périme les lectures en cours)."""
+        with self._lock:
+            self._slots.clear()
+            self._clock += 1
+            self._floor = self._clock
+
+    def lookup(self, owner_id: int) -> Tuple[Optional[bytes], Versions]:
+        """Vue encodée (``None`` si absente ou périmée) et versions courantes."""
+        with self._lock:
+            slot = self._slots.get(owner_id)
+            if slot is None:
+                self.misses += 1
+                return None, (self._floor, self.catalog_version)
+            if slot.body is not None and slot.catalog_version == self.catalog_version:
+                self._slots.move_to_end(owner_id)
+                self.hits += 1
+                return slot.body, (slot.version, self.catalog_version)
+            self.misses += 1
+            return None, (slot.version, self.catalog_version)
+
+    def versions(self, owner_id: int) -> Versions:
+        """Versions courantes, à lire avant une écriture de l'équipe."""
+        with self._lock:
+            slot = self._slots.get(owner_id)
+            return (slot.version if slot is not None else self._floor, self.catalog_version)
+
+    def store(self, owner_id: int, versions: Versions, body: bytes) -> bool:
+        """Garde ``body`` s'il a été lu aux versions encore courantes."""
+        if not self.enabled:
+            return False
+        team_version, catalog_version = versions
+        with self._lock:
+            slot = self._slots.get(owner_id)
+            current = slot.version if slot is not None else self._floor
+            if team_version != current or catalog_version != self.catalog_version:
+                return False
+            if slot is None:
+                slot = self._slots[owner_id] = _Slot(current)
+            slot.catalog_version, slot.body = catalog_version, body
+            self._slots.move_to_end(owner_id)
+            self._evict()
+            return True
+
+    def team_changed(self, owner_id: int, versions: Optional[Versions] = None, body: Optional[bytes] = None) -> None:
+        """Nouvelle version de l'équipe (après commit).
+
+        ``versions`` (lues avant l'écriture) et ``body`` (vue après
+        l'écriture) : la vue est gardée si aucune autre écriture de cette
+        équipe ni du catalogue ne s'est intercalée.
+        """
+        with self._lock:
+            slot = self._slots.get(owner_id)
+            previous = slot.version if slot is not None else self._floor
+            self._clock += 1
+            if slot is None:
+                slot = self._slots[owner_id] = _Slot(self._clock)
+            slot.version, slot.body = self._clock, None
+            if body is not None and versions == (previous, self.catalog_version):
+                slot.catalog_version, slot.body = self.catalog_version, body
+            self._slots.move_to_end(owner_id)
+            self._evict()
+
+    def team_published(self, owner_id: int, body: bytes) -> None:
+        """Vue publiée sur ``team:<owner_id>`` : périme l'entrée si elle diffère.
+
+        L'écho d'une écriture de ce worker (vue déjà gardée) est ignoré.
+        """
+        with self._lock:
+            slot = self._slots.get(owner_id)
+            if slot is not None and slot.body == body and slot.catalog_version == self.catalog_version:
+                return
+        self.team_changed(owner_id)
+
+    def catalog_changed(self) -> None:
+        with self._lock:
+            self.catalog_version += 1
+
+    def _evict(self) -> None:
+        # Appelé sous verrou
+        while len(self._slots) > self.max_entries:
+            _, slot = self._slots.popitem(last=False)
+            self._floor = max(self._floor, slot.version)
+
+    def stats(self) -> dict:
+        return {"entries": len(self._slots), "hits": self.hits, "misses": self.misses}
+
+
+cache = TeamViewCache()
+
+
+def encode(view: dict) -> bytes:
+    """Même encodage que ``serializers.json_response`` (``ORJSONResponse``)."""
+    return orjson.dumps(view, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+@events.on_catalog_change
+def _on_catalog_change(action, player_ids) -> None:
+    cache.catalog_changed()
+
+
+def _on_event(channel: str, event: str, data: dict) -> None:
+    """Événements reçus par le hub (écritures de ce worker ou des autres)."""
+    if channel == events.CATALOG:
+        cache.catalog_changed()
+    elif event == "team" and data.get("owner_id") is not None:
+        cache.team_published(data["owner_id"], encode(data))
+
+
+events.hub.listen(_on_event)
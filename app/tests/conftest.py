@@ -0,0 +1,85 @@
+# app/tests/conftest.py
+"""Fixtures partagées par les tests.
+
+Base de test : le schéma complet est créé une seule fois par session dans
+un fichier SQLite « modèle » ; chaque test reçoit une copie de ce fichier
+(copie d'octets, bien plus rapide que ``create_all``).  Chaque test garde
+donc sa propre base : les threads de fond (journal d'audit, tâches) et
+les sessions multiples voient les mêmes données, ce qu'un ``SAVEPOINT``
+annulé en fin de test ne permettrait pas.
+
+Les mots de passe des utilisateurs de test sont hachés avec Argon2 au
+coût minimal (``PASSWORD_HASH_FAST``), fixé avant l'import de l'application.
+"""
+
+import os
+import shutil
+
+os.environ.setdefault("PASSWORD_HASH_FAST", "1")
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.tests.query_budget import QueryCounter
+
+
+def sqlite_engine(path):
+    return create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+
+
+@pytest.fixture(scope="session")
+def db_template(tmp_path_factory):
+    """Fichier SQLite avec le schéma complet, construit une fois par session."""
+    path = tmp_path_factory.mktemp("template") / "template.db"
+    engine = sqlite_engine(path)
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+    return path
+
+
+@pytest.fixture
+def db_sessionmaker(db_template, tmp_path):
+    """Fabrique de sessions sur une copie du modèle propre au test.
+
+    Mêmes options de session que ``app.database.SessionLocal``.
+    """
+    path = tmp_path / "test.db"
+    shutil.copyfile(db_template, path)
+    engine = sqlite_engine(path)
+    yield sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def override_db(db_sessionmaker, monkeypatch):
+    """Branche ``get_db`` sur la base du test ; retourne sa fabrique de sessions."""
+    from app.dependencies import get_db
+    from app.main import app
+
+    def override_get_db():
+        db = db_sessionmaker()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    monkeypatch.setitem(app.dependency_overrides, get_db, override_get_db)
+    return db_sessionmaker
+
+
+@pytest.fixture(autouse=True)
+def clear_team_cache(monkeypatch):
+    """Cache actif (un seul worker) et vide : les ids des propriétaires se répètent d'une base à l'autre."""
+    from app import team_cache
+
+    monkeypatch.setattr(team_cache, "cache", team_cache.TeamViewCache(max_entries=10_000))
+
+
+@pytest.fixture
+def query_counter():
+    """Compte les requêtes SQL émises pendant le test (``.count``, ``.report()``)."""
+    counter = QueryCounter().start()
+    yield counter
+    counter.stop()
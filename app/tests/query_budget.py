@@ -0,0 +1,72 @@
+"""Budgets de requêtes SQL pour les tests.
+
+``query_budget(n)`` compte les requêtes émises par toutes les ``Engine``
+SQLAlchemy pendant un bloc ``with`` (ou pendant un test décoré) et fait
+échouer le test au-delà de ``n``.  Le rapport regroupe les requêtes par
+texte SQL normalisé, ce qui rend les boucles N+1 évidentes.
+"""
+
+from collections import Counter
+from contextlib import ContextDecorator
+from typing import List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.metrics import normalize_sql
+
+
+class QueryCounter:
+    """Enregistre les requêtes SQL exécutées tant qu'il est actif."""
+
+    def __init__(self):
+        self.statements: List[str] = []
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def start(self) -> "QueryCounter":
+        self.statements = []
+        event.listen(Engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def stop(self) -> None:
+        event.remove(Engine, "before_cursor_execute", self._on_execute)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def report(self) -> str:
+        grouped = Counter(normalize_sql(s) for s in self.statements)
+        return "\n".join(f"  {n} × {sql}" for sql, n in grouped.most_common())
+
+
+class query_budget(ContextDecorator):
+    """Échoue si plus de ``max_queries`` requêtes SQL sont émises.
+
+    S'utilise comme context manager autour d'un appel du ``TestClient`` ::
+
+        with query_budget(3, "GET /team"):
+            client.get("/team/")
+
+    ou comme décorateur d'un test entier (``@query_budget(3)``).
+    """
+
+    def __init__(self, max_queries: int, label: Optional[str] = None):
+        self.max_queries = max_queries
+        self.label = label
+        self.counter = QueryCounter()
+
+    def __enter__(self) -> QueryCounter:
+        return self.counter.start()
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.counter.stop()
+        if exc_type is None and self.counter.count > self.max_queries:
+            where = f" ({self.label})" if self.label else ""
+            raise AssertionError(
+                f"Query budget exceeded{where}: {self.counter.count} > {self.max_queries}\n"
+                f"{self.counter.report()}"
+            )
+        return False
@@ -0,0 +1,121 @@
+# app/tests/test_audit.py
+
+#Ce fichier permet de tester :
+# - l'enregistrement des ajouts / retraits de joueurs et des changements de prix
+# - la réinitialisation d'une équipe (un retrait par joueur) et la tâche reprice (auteur : l'admin)
+# - la lecture de l'historique par utilisateur et par période (/admin/audit)
+# - l'écriture par lots et la contre-pression quand le tampon est plein
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app import audit, crud, jobs, models, schemas
+from app.routers import team as team_router
+
+
+@pytest.fixture(scope="function")
+def setup(monkeypatch, override_db):
+    TestingSessionLocal = override_db
+    monkeypatch.setattr(team_router, "BUDGET", 100_000_000)
+    monkeypatch.setattr(audit, "log", audit.AuditLog(session_factory=TestingSessionLocal, flush_interval=60))
+    monkeypatch.setattr(jobs, "runner", jobs.JobRunner(session_factory=TestingSessionLocal, poll_interval=0.05))
+
+    with TestingSessionLocal() as db:
+        crud.create_user(db, schemas.UserCreate(email="admin@example.com", password="admin123"), is_admin=True)
+        crud.create_user(db, schemas.UserCreate(email="user@example.com", password="user123"))
+        for name, pos in [("P1", "FWD"), ("P2", "MID")]:
+            crud.create_player(db, schemas.PlayerCreate(name=name, cost=1_000_000, position=pos, club="Club"))
+
+    with TestClient(app) as c:
+        yield c, TestingSessionLocal
+
+
+def login(client, email, password):
+    token = client.post("/auth/login", data={"username": email, "password": password}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_team_and_price_changes_are_audited(setup):
+    client, SessionLocal = setup
+    admin = login(client, "admin@example.com", "admin123")
+    user = login(client, "user@example.com", "user123")
+
+    client.post("/team/", json={"name": "Audit FC"}, headers=user)
+    assert client.post("/team/players", json=[1, 2], headers=user).status_code == 200
+    assert client.delete("/team/players/1", headers=user).status_code == 200
+    assert client.put("/players/2", json={"cost": 2_000_000}, headers=admin).status_code == 200
+
+    # Rien n'est écrit pendant la requête : les événements attendent dans le tampon
+    with SessionLocal() as db:
+        assert db.query(models.AuditEvent).count() == 0
+    assert len(audit.log) == 4
+
+    events = client.get("/admin/audit?user_id=2", headers=admin).json()
+    assert [(e["action"], e["player_id"]) for e in events] == [
+        ("team.remove_player", 1), ("team.add_player", 2), ("team.add_player", 1),
+    ]
+    price = client.get("/admin/audit?action=player.update", headers=admin).json()
+    assert price[0]["user_id"] == 1
+    assert price[0]["details"] == {"cost": [1_000_000, 2_000_000]}
+
+    assert client.delete("/players/1", headers=admin).status_code == 204
+    deleted = client.get("/admin/audit?action=player.delete", headers=admin).json()
+    assert [(e["user_id"], e["player_id"]) for e in deleted] == [(1, 1)]
+
+    future = (datetime.utcnow() + timedelta(hours=1)).isoformat()
+    assert client.get(f"/admin/audit?since={future}", headers=admin).json() == []
+    assert client.get("/admin/audit", headers=user).status_code == 403
+
+
+def test_team_reset_and_reprice_job_are_audited(setup):
+    client, _ = setup
+    admin = login(client, "admin@example.com", "admin123")
+    user = login(client, "user@example.com", "user123")
+
+    client.post("/team/", json={"name": "Audit FC"}, headers=user)
+    assert client.post("/team/players", json=[1, 2], headers=user).status_code == 200
+    # Réinitialisation : les deux joueurs sont libérés
+    assert client.post("/team/", json={"name": "Audit United"}, headers=user).status_code == 201
+    removed = client.get("/admin/audit?user_id=2&action=team.remove_player", headers=admin).json()
+    assert sorted(e["player_id"] for e in removed) == [1, 2]
+
+    job_id = client.post("/admin/jobs", json={"kind": "reprice", "params": {"factor": 1.5}}, headers=admin).json()["id"]
+    deadline = time.monotonic() + 5
+    while client.get(f"/admin/jobs/{job_id}", headers=admin).json()["status"] != "succeeded":
+        assert time.monotonic() < deadline, "reprice job not finished"
+        time.sleep(0.05)
+    repriced = client.get("/admin/audit?action=player.update", headers=admin).json()
+    assert sorted((e["player_id"], e["user_id"]) for e in repriced) == [(1, 1), (2, 1)]
+    assert repriced[0]["details"] == {"cost": [1_000_000, 1_500_000]}
+
+
+def test_buffer_backpressure_and_batches(setup):
+    _, SessionLocal = setup
+    log = audit.AuditLog(session_factory=SessionLocal, capacity=3, batch_size=2, flush_interval=0.05, block_timeout=5)
+
+    threads = [threading.Thread(target=log.record, args=("team.add_player", 1), kwargs={"player_id": i}) for i in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(10)
+    log.stop()
+
+    assert log.dropped == 0
+    assert log.written == 20
+    with SessionLocal() as db:
+        assert db.query(models.AuditEvent).count() == 20
+
+
+def test_full_buffer_drops_after_timeout(setup):
+    _, SessionLocal = setup
+    log = audit.AuditLog(session_factory=SessionLocal, capacity=1, batch_size=10, flush_interval=60, block_timeout=0.01)
+    # Pas de thread d'écriture : la place ne se libère pas
+    log._thread = threading.current_thread()
+    assert log.record("team.add_player", 1) is True
+    assert log.record("team.add_player", 1) is False
+    assert (log.blocked, log.dropped) == (1, 1)
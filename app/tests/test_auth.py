@@ -4,52 +4,21 @@
 # - la gestion d’utilisateurs
 # - la génération de token
 # - la gestion d’erreur HTTP côté auth
-
-import os
-import tempfile
+# - le hachage rapide des tests (Argon2 au coût minimal)
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 
 from app.main import app
-from app.database import Base
-from app.dependencies import get_db
 from app import crud, schemas, models
 
 
 @pytest.fixture(scope="function")
-def client():
+def client(override_db):
     """Configure un client TestClient avec une base SQLite temporaire."""
-    # Créer une base de données temporaire
-    db_fd, db_path = tempfile.mkstemp()
-    SQLALCHEMY_DATABASE_URL = f"sqlite:///{db_path}"
-    engine = create_engine(
-        SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-    )
-    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-    # Créer les tables
-    Base.metadata.create_all(bind=engine)
-
-    # Override de la dépendance get_db
-    def override_get_db():
-        db = TestingSessionLocal()
-        try:
-            yield db
-        finally:
-            db.close()
-
-    app.dependency_overrides[get_db] = override_get_db
-
     with TestClient(app) as c:
         yield c
 
-    # Nettoyage
-    os.close(db_fd)
-    os.unlink(db_path)
-
 
 def test_register_and_login(client):
     # Enregistrer un nouvel utilisateur
@@ -79,4 +48,15 @@ def test_register_and_login(client):
     )
     assert response.status_code == 400
     data = response.json()
-    assert "detail" in data
\ No newline at end of file
+    assert "detail" in data
+
+def test_fast_hashes_are_regular_argon2():
+    # Les hachés rapides des tests restent vérifiables avec les paramètres normaux
+    from passlib.context import CryptContext
+
+    from app import auth
+
+    assert auth.PASSWORD_HASH_FAST
+    production = CryptContext(schemes=["argon2"], deprecated="auto")
+    assert production.verify("user123", auth.hash_password("user123"))
+    assert auth.verify_password("user123", production.hash("user123"))
@@ -0,0 +1,56 @@
+# app/tests/test_bench_datagen.py
+
+#Ce fichier permet de tester :
+# - la reproductibilité du générateur de données de benchmark
+# - la validité des équipes générées (1-4-3-3, budget)
+# - un scénario de bench dont le statut n'est pas celui attendu est signalé en échec
+
+import asyncio
+import random
+from collections import Counter
+
+from sqlalchemy import create_engine, select
+
+from app import models
+from bench import suite
+from bench.datagen import BENCH_BUDGET, LINEUP, Spec, checksum, generate
+
+
+def test_generator_is_reproducible_and_rosters_are_valid(tmp_path):
+    spec = Spec(players=300, users=40, teams=30, seed=7)
+    engines = [create_engine(f"sqlite:///{tmp_path / f'bench{i}.db'}") for i in (1, 2)]
+    for engine in engines:
+        assert generate(engine, spec, verbose=False)
+    assert checksum(engines[0]) == checksum(engines[1])
+
+    # Relancer avec la même spec ne régénère rien
+    assert not generate(engines[0], spec, verbose=False)
+
+    with engines[0].connect() as conn:
+        players = {p.id: p for p in conn.execute(select(models.Player.__table__))}
+        rosters = {}
+        for team_id, player_id in conn.execute(select(models.team_players)):
+            rosters.setdefault(team_id, []).append(players[player_id])
+    assert len(rosters) == 30
+    for roster in rosters.values():
+        assert Counter(p.position for p in roster) == Counter(LINEUP)
+        assert sum(p.cost for p in roster) <= BENCH_BUDGET
+
+
+def test_unexpected_status_fails_the_scenario():
+    class FakeResponse:
+        def __init__(self, status_code):
+            self.status_code = status_code
+            self.text = '{"detail": "invalid"}'
+
+    async def request(c, ctx, w, i):
+        return FakeResponse(422 if i % 2 else 201)
+
+    ctx = suite.Context(spec=None, rng=random.Random(0), user_tokens={}, admin_token="", rosters={})
+    scenario = suite.Scenario("register", request, expect=201)
+    result = asyncio.run(suite.run_scenario(None, ctx, scenario, requests=10, concurrency=2))
+    assert result["errors"] == 5
+    assert result["first_error"].startswith("expected 201, got 422")
+    assert suite.failures({"register": result}) == [
+        f"register: 5/10 unexpected status ({result['first_error']})"
+    ]
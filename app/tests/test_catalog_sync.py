@@ -0,0 +1,164 @@
+# app/tests/test_catalog_sync.py
+
+#Ce fichier permet de tester :
+# - la synchronisation incrémentale : insertions, mises à jour, suppressions logiques, bilan
+# - une nouvelle synchronisation du même fichier n'écrit rien
+# - les joueurs supprimés logiquement : absents du catalogue, non recrutables, gardés dans les équipes
+# - POST /admin/catalog/sync (multipart, simulation, admin uniquement)
+# - un événement d'audit par joueur créé, modifié, réactivé ou supprimé, au nom de l'admin
+
+import io
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.main import app
+from app import audit, catalog_sync, crud, models, schemas
+from app.routers import team as team_router
+from app.tests.query_budget import QueryCounter
+
+HEADER = "Name,Position,Club,Market Value,Age\n"
+
+
+def csv_lines(rows):
+    return io.StringIO(HEADER + "".join(f"{name},{pos},{club},{value},{age}\n" for name, pos, club, value, age in rows))
+
+
+BASE = [
+    ("Keeper", "Goalkeeper", "Club A", 1_000_000, 30),
+    ("Back", "Centre-Back", "Club A", 2_000_000, 25),
+    ("Mid", "Central Midfield", "Club B", 3_000_000, 22),
+    ("Striker", "Centre-Forward", "Club B", 4_000_000, 27),
+]
+
+
+@pytest.fixture(scope="function")
+def setup(monkeypatch, override_db):
+    TestingSessionLocal = override_db
+    monkeypatch.setattr(team_router, "BUDGET", 100_000_000)
+    monkeypatch.setattr(audit, "log", audit.AuditLog(session_factory=TestingSessionLocal, flush_interval=60))
+
+    with TestingSessionLocal() as db:
+        crud.create_user(db, schemas.UserCreate(email="admin@example.com", password="admin123"), is_admin=True)
+        crud.create_user(db, schemas.UserCreate(email="user@example.com", password="user123"))
+
+    with TestClient(app) as c:
+        def login(email, password):
+            token = c.post("/auth/login", data={"username": email, "password": password}).json()["access_token"]
+            return {"Authorization": f"Bearer {token}"}
+
+        yield c, TestingSessionLocal, login("admin@example.com", "admin123"), login("user@example.com", "user123")
+
+
+def player_ids(db):
+    return {name: pid for pid, name in db.execute(select(models.Player.id, models.Player.name))}
+
+
+def test_sync_applies_only_the_differences(setup):
+    client, SessionLocal, _, user = setup
+    with SessionLocal() as db:
+        first = catalog_sync.sync(db, csv_lines(BASE))
+        assert (first["inserted"], first["rows"], first["deleted"]) == (4, 4, 0)
+        ids = player_ids(db)
+
+    # Le même fichier : aucune écriture
+    counter = QueryCounter().start()
+    try:
+        with SessionLocal() as db:
+            again = catalog_sync.sync(db, csv_lines(BASE))
+    finally:
+        counter.stop()
+    assert again["unchanged"] == 4 and again["inserted"] == again["updated"] == again["deleted"] == 0
+    assert not any(s.lstrip().upper().startswith(("INSERT", "UPDATE")) for s in counter.statements), counter.report()
+
+    # Recrutement avant la suppression du milieu
+    assert client.post("/team/", json={"name": "Sync FC"}, headers=user).status_code == 201
+    assert client.post("/team/players", json=[ids["Mid"]], headers=user).status_code == 200
+
+    changed = [
+        ("Keeper", "Goalkeeper", "Club A", 1_500_000, 30),     # prix modifié
+        ("Back", "Centre-Back", "Club A", 2_000_000, 25),
+        ("Striker", "Centre-Forward", "Club B", 4_000_000, 27),
+        ("Striker", "Centre-Forward", "Club B", 9_000_000, 27),  # doublon ignoré
+        ("Rookie", "Left Winger", "Club C", 500_000, 18),       # nouveau
+        ("", "Goalkeeper", "Club C", 1, 1),                     # sans nom
+    ]
+    with SessionLocal() as db:
+        summary = catalog_sync.sync(db, csv_lines(changed))
+    assert {k: summary[k] for k in ("rows", "inserted", "updated", "deleted", "unchanged", "skipped", "duplicates")} == {
+        "rows": 6, "inserted": 1, "updated": 1, "deleted": 1, "unchanged": 2, "skipped": 1, "duplicates": 1,
+    }
+    assert summary["samples"]["deleted"] == ["Mid"]
+
+    with SessionLocal() as db:
+        assert db.get(models.Player, ids["Keeper"]).cost == 1_500_000
+        assert db.get(models.Player, ids["Mid"]).deleted_at is not None
+
+    listed = {p["name"] for p in client.get("/players/").json()}
+    assert listed == {"Keeper", "Back", "Striker", "Rookie"}
+    assert client.get(f"/players/{ids['Mid']}").status_code == 404
+    assert client.get(f"/players/{ids['Mid']}?fields=name").status_code == 404
+    # Reste dans l'équipe, mais ne peut plus être recruté
+    assert [p["name"] for p in client.get("/team/", headers=user).json()["players"]] == ["Mid"]
+    assert client.delete(f"/team/players/{ids['Mid']}", headers=user).status_code == 200
+    assert client.post("/team/players", json=[ids["Mid"]], headers=user).status_code == 404
+
+    # Le joueur revient dans le fichier : réactivé, même id
+    with SessionLocal() as db:
+        summary = catalog_sync.sync(db, csv_lines(changed + [BASE[2]]), delete_missing=False)
+    assert summary["restored"] == 1 and summary["inserted"] == 0
+    assert client.get(f"/players/{ids['Mid']}").json()["name"] == "Mid"
+
+
+def test_players_created_before_sync_are_matched(setup):
+    _, SessionLocal, _, _ = setup
+    with SessionLocal() as db:
+        # Créés par le seed ou l'API, sans empreinte : comparés à leurs colonnes
+        crud.create_player(db, schemas.PlayerCreate(name="Keeper", cost=1_000_000, position="GK", club="Club A", age=30))
+        crud.create_player(db, schemas.PlayerCreate(name="Back", cost=1_000_000, position="DEF", club="Club A", age=25))
+        summary = catalog_sync.sync(db, csv_lines(BASE[:2]), batch_size=1)
+    assert (summary["unchanged"], summary["updated"]) == (1, 1)
+
+
+def test_sync_endpoint(setup):
+    client, SessionLocal, admin, user = setup
+    files = {"file": ("players.csv", csv_lines(BASE).getvalue().encode(), "text/csv")}
+
+    preview = client.post("/admin/catalog/sync?dry_run=true", files=files, headers=admin)
+    assert preview.status_code == 200
+    assert preview.json()["inserted"] == 4 and preview.json()["dry_run"] is True
+    assert client.get("/players/").json() == []
+
+    res = client.post("/admin/catalog/sync", files=files, headers=admin)
+    assert res.status_code == 200 and res.json()["inserted"] == 4
+    assert len(client.get("/players/").json()) == 4
+
+    assert client.post("/admin/catalog/sync", files=files, headers=user).status_code == 403
+    bad = {"file": ("players.csv", b"\xff\xfe\x00bad", "text/csv")}
+    assert client.post("/admin/catalog/sync", files=bad, headers=admin).status_code == 400
+
+
+def test_sync_changes_are_audited(setup):
+    client, _, admin, _ = setup
+    files = {"file": ("players.csv", csv_lines(BASE).getvalue().encode(), "text/csv")}
+    assert client.post("/admin/catalog/sync?dry_run=true", files=files, headers=admin).status_code == 200
+    assert client.get("/admin/audit", headers=admin).json() == []
+
+    assert client.post("/admin/catalog/sync", files=files, headers=admin).status_code == 200
+    created = client.get("/admin/audit?action=player.create", headers=admin).json()
+    assert len(created) == 4 and {e["user_id"] for e in created} == {1}
+
+    changed = [("Keeper", "Goalkeeper", "Club A", 1_500_000, 31)] + BASE[1:3]
+    files = {"file": ("players.csv", csv_lines(changed).getvalue().encode(), "text/csv")}
+    assert client.post("/admin/catalog/sync", files=files, headers=admin).status_code == 200
+    updated = client.get("/admin/audit?action=player.update", headers=admin).json()
+    assert [e["details"] for e in updated] == [{"cost": [1_000_000, 1_500_000], "age": [30, 31], "source": "catalog_sync"}]
+    deleted = client.get("/admin/audit?action=player.delete", headers=admin).json()
+    assert [(e["user_id"], e["details"]) for e in deleted] == [(1, {"source": "catalog_sync"})]
+
+    # En ligne de commande : pas d'auteur ; la réactivation est une modification
+    with setup[1]() as db:
+        catalog_sync.sync(db, csv_lines(BASE), delete_missing=False)
+    restored = client.get("/admin/audit?action=player.update", headers=admin).json()[0]
+    assert restored["user_id"] is None and restored["details"]["restored"] is True
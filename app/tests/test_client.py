@@ -0,0 +1,194 @@
+# app/tests/test_client.py
+
+#Ce fichier permet de tester :
+# - le client synchrone contre l'application en mémoire (équipe, ajout par lots)
+# - la lecture du catalogue page par page avec préchargement parallèle
+# - le cache de tokens : partagé entre clients, renouvelé après un 401 ou avant expiration
+# - les nouvelles tentatives avec gigue (seulement pour les requêtes répétables)
+# - le client asynchrone sur httpx.ASGITransport
+
+import asyncio
+import base64
+import json
+import time
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app import crud, schemas
+from app.routers import team as team_router
+from mfl_client import ApiError, AsyncClient, Client, RetryPolicy, TokenCache
+from mfl_client.client import token_expiry
+
+N_PLAYERS = 25
+
+
+@pytest.fixture(scope="function")
+def setup(monkeypatch, override_db):
+    TestingSessionLocal = override_db
+    monkeypatch.setattr(team_router, "BUDGET", 100_000_000)
+
+    with TestingSessionLocal() as db:
+        crud.create_user(db, schemas.UserCreate(email="admin@example.com", password="admin123"), is_admin=True)
+        crud.create_user(db, schemas.UserCreate(email="user@example.com", password="user123"))
+        positions = ["GK", "DEF", "MID", "FWD"]
+        for i in range(1, N_PLAYERS + 1):
+            crud.create_player(db, schemas.PlayerCreate(
+                name=f"P{i}", cost=1_000_000 + i, position=positions[i % 4], club=f"Club{i % 5}",
+            ))
+
+    with TestClient(app) as c:
+        yield c
+
+
+def make_client(http, email="user@example.com", password="user123", **kwargs):
+    return Client("http://testserver", email, password, http=http, token_cache=TokenCache(), **kwargs)
+
+
+def test_sync_client_team_workflow(setup):
+    api = make_client(setup, batch_size=3)
+    api.create_team("SDK FC")
+    team = api.add_players([1, 2, 3, 4, 5, 6, 7], batch_size=3)
+    assert sorted(p["id"] for p in team["players"]) == [1, 2, 3, 4, 5, 6, 7]
+    assert api.get_team(fields=["name"])["players"][0] == {"id": 1, "name": "P1"}
+
+    team = api.remove_player(4)
+    assert 4 not in [p["id"] for p in team["players"]]
+
+    with pytest.raises(ApiError) as excinfo:
+        api.remove_player(4)
+    assert excinfo.value.status_code == 404
+
+    assert api.get_player(1)["name"] == "P1"
+    with pytest.raises(ApiError) as excinfo:
+        api.create_player({"name": "X", "cost": 1, "position": "GK", "club": "C"})
+    assert excinfo.value.status_code == 403
+
+
+def test_iter_players_prefetches_pages_in_order(setup):
+    api = make_client(setup, page_size=4, prefetch=3)
+    players = list(api.iter_players(fields=["id", "name"]))
+    assert players == api.list_players(limit=100, fields=["id", "name"])
+    assert len(players) == N_PLAYERS
+    assert set(players[0]) == {"id", "name"}
+
+    # Arrêt anticipé : les pages préchargées restantes sont abandonnées
+    first = []
+    for player in api.iter_players(page_size=2, prefetch=4):
+        first.append(player)
+        if len(first) == 3:
+            break
+    assert first == api.list_players(limit=3)
+
+
+def test_tokens_are_shared_and_refreshed(setup):
+    cache = TokenCache()
+    logins = []
+    setup.event_hooks["request"].append(
+        lambda request: logins.append(1) if request.url.path == "/auth/login" else None
+    )
+    try:
+        a = Client("http://testserver", "user@example.com", "user123", http=setup, token_cache=cache)
+        b = Client("http://testserver", "user@example.com", "user123", http=setup, token_cache=cache)
+        a.create_team("A")
+        b.get_team()
+        assert len(logins) == 1
+
+        # Même email, mauvais mot de passe : pas de token emprunté à ``a``
+        wrong = Client("http://testserver", "user@example.com", "wrong", http=setup, token_cache=cache)
+        with pytest.raises(ApiError) as excinfo:
+            wrong.get_team()
+        assert excinfo.value.detail == "Incorrect email or password"
+        assert len(logins) == 2
+
+        # Token refusé par le serveur : nouvelle connexion et requête rejouée
+        cache.put(a._token_key, "not-a-jwt")
+        assert a.get_team()["name"] == "A"
+        assert len(logins) == 3
+
+        # Token sur le point d'expirer : renouvelé avant l'envoi
+        payload = base64.urlsafe_b64encode(json.dumps({"exp": time.time() + 5}).encode()).decode().rstrip("=")
+        cache.put(a._token_key, f"x.{payload}.y")
+        assert token_expiry(f"x.{payload}.y") is not None
+        assert a.get_team()["name"] == "A"
+        assert len(logins) == 4
+    finally:
+        setup.event_hooks["request"].clear()
+
+    bad = make_client(setup, password="wrong")
+    with pytest.raises(ApiError) as excinfo:
+        bad.get_team()
+    assert excinfo.value.status_code == 400
+
+
+def scripted_transport(responses, seen):
+    """Transport qui rejoue ``responses`` (codes HTTP ou exceptions) dans l'ordre."""
+    def handler(request):
+        seen.append((request.method, request.headers.get("Idempotency-Key")))
+        outcome = responses.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return httpx.Response(outcome, json={"detail": "busy"} if outcome >= 400 else [])
+    return httpx.MockTransport(handler)
+
+
+def test_retries_with_jitter_only_when_repeatable():
+    delays = []
+    policy = RetryPolicy(attempts=4, backoff=0.1, max_backoff=1.0)
+
+    seen = []
+    http = httpx.Client(base_url="http://api", transport=scripted_transport(
+        [httpx.ConnectError("refused"), 503, 502, 200], seen))
+    api = Client("http://api", retry=policy, http=http)
+    api._sleep = delays.append
+    assert api.list_players() == []
+    assert len(seen) == 4
+    assert [d <= min(1.0, 0.1 * 2 ** n) for n, d in enumerate(delays)] == [True] * 3
+
+    # Budget épuisé : la dernière erreur est remontée
+    seen.clear()
+    http = httpx.Client(base_url="http://api", transport=scripted_transport([503] * 4, seen))
+    api = Client("http://api", retry=policy, http=http)
+    api._sleep = delays.append
+    with pytest.raises(ApiError) as excinfo:
+        api.list_players()
+    assert excinfo.value.status_code == 503 and len(seen) == 4
+
+    # POST sans Idempotency-Key : jamais rejoué une fois envoyé
+    seen.clear()
+    http = httpx.Client(base_url="http://api", transport=scripted_transport([503, 200], seen))
+    api = Client("http://api", retry=policy, http=http)
+    api._sleep = delays.append
+    with pytest.raises(ApiError):
+        api.register("new@example.com", "pw")
+    assert len(seen) == 1
+
+    # POST avec Idempotency-Key : rejoué avec la même clé
+    seen.clear()
+    http = httpx.Client(base_url="http://api", transport=scripted_transport(
+        [200, httpx.ReadTimeout("slow"), 200], seen))
+    api = Client("http://api", "user@example.com", "pw", retry=policy, http=http, token_cache=TokenCache())
+    api.tokens.put(api._token_key, "token")
+    api._sleep = delays.append
+    api.add_players([1, 2, 3, 4], batch_size=2)
+    assert [method for method, _ in seen] == ["POST"] * 3
+    assert seen[1][1] == seen[2][1] and seen[0][1] != seen[1][1]
+
+
+def test_async_client_against_asgi_app(setup):
+    async def scenario():
+        http = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver")
+        async with http:
+            api = AsyncClient("http://testserver", "user@example.com", "user123",
+                              http=http, token_cache=TokenCache(), page_size=5, prefetch=3)
+            ids = [player["id"] async for player in api.iter_players()]
+            assert sorted(ids) == list(range(1, N_PLAYERS + 1))
+
+            await api.create_team("Async FC")
+            team, player = await asyncio.gather(api.add_players([1, 2, 3, 4, 5, 6], batch_size=4), api.get_player(3))
+            assert len(team["players"]) == 6 and player["id"] == 3
+            assert (await api.get_team())["name"] == "Async FC"
+
+    asyncio.run(scenario())
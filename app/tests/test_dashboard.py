@@ -0,0 +1,97 @@
+# app/tests/test_dashboard.py
+
+#Ce fichier permet de tester :
+# - la vue composite /dashboard (équipe + page du catalogue + budget)
+# - l'exécution groupée POST /batch (ordre, erreurs, session partagée)
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app import crud, dependencies, schemas
+from app.routers import team as team_router
+from app.tests.query_budget import query_budget
+
+
+@pytest.fixture(scope="function")
+def client(monkeypatch, db_sessionmaker):
+    TestingSessionLocal = db_sessionmaker
+
+    # On remplace la fabrique de sessions plutôt que ``get_db`` : la logique
+    # de session partagée de ``get_db`` est ainsi testée telle quelle
+    monkeypatch.setattr(dependencies, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(app, "dependency_overrides", {})
+    monkeypatch.setattr(team_router, "BUDGET", 100_000_000)
+
+    with TestingSessionLocal() as db:
+        crud.create_user(db, schemas.UserCreate(email="user@example.com", password="user123"))
+        for i, pos in enumerate(["GK", "DEF", "MID", "FWD"], start=1):
+            crud.create_player(db, schemas.PlayerCreate(name=f"P{i}", cost=1_000_000 * i, position=pos, club="Club"))
+
+    with TestClient(app) as c:
+        res = c.post("/auth/login", data={"username": "user@example.com", "password": "user123"})
+        c.headers.update({"Authorization": f"Bearer {res.json()['access_token']}"})
+        yield c
+
+
+def test_dashboard_without_team(client):
+    res = client.get("/dashboard/?limit=2")
+    assert res.status_code == 200
+    data = res.json()
+    assert data["team"]["id"] == -1
+    assert [p["name"] for p in data["players"]] == ["P1", "P2"]
+    assert data["budget_left"] == data["total_budget"] == 100_000_000
+
+
+def test_dashboard_matches_separate_calls(client):
+    assert client.post("/team/", json={"name": "Dash FC"}).status_code == 201
+    assert client.post("/team/players", json=[2, 3]).status_code == 200
+
+    with query_budget(4, "GET /dashboard"):
+        data = client.get("/dashboard/?skip=1&limit=2").json()
+
+    assert data["team"] == client.get("/team/").json()
+    assert data["players"] == client.get("/players/?skip=1&limit=2").json()
+    assert data["budget_left"] == 100_000_000 - 5_000_000
+
+
+def test_dashboard_requires_auth(client):
+    client.headers.pop("Authorization")
+    assert client.get("/dashboard/").status_code == 401
+
+
+def test_batch_runs_in_order_and_reports_errors(client):
+    res = client.post("/batch/", json={"requests": [
+        {"method": "POST", "path": "/team/", "body": {"name": "Batch FC"}},
+        {"method": "POST", "path": "/team/players", "body": [1]},
+        {"method": "POST", "path": "/team/players", "body": [999]},
+        {"method": "GET", "path": "/players/?limit=1"},
+        {"method": "GET", "path": "/team/"},
+        {"method": "POST", "path": "/batch/", "body": {"requests": []}},
+    ]})
+    assert res.status_code == 200
+    out = res.json()["responses"]
+    assert [r["status"] for r in out] == [201, 200, 404, 200, 200, 400]
+    assert out[2]["body"]["detail"] == "Player 999 not found"
+    assert [p["id"] for p in out[3]["body"]] == [1]
+    assert [p["id"] for p in out[4]["body"]["players"]] == [1]
+
+
+def test_batch_shares_session_and_auth(client):
+    assert client.post("/team/", json={"name": "Shared FC"}).status_code == 201
+    # Utilisateur résolu une seule fois (1) + équipe et joueurs lus par
+    # chacune des deux sous-requêtes (2 × 2) + page du catalogue (1)
+    with query_budget(6, "POST /batch"):
+        res = client.post("/batch/", json={"requests": [
+            {"path": "/team/"},
+            {"path": "/dashboard/?limit=2"},
+        ]})
+    first, second = res.json()["responses"]
+    assert first["status"] == second["status"] == 200
+    assert second["body"]["team"] == first["body"]
+
+
+def test_batch_limits(client):
+    assert client.post("/batch/", json={"requests": []}).status_code == 422
+    too_many = [{"path": "/players/"}] * 21
+    assert client.post("/batch/", json={"requests": too_many}).status_code == 400
@@ -0,0 +1,148 @@
+# app/tests/test_events.py
+
+#Ce fichier permet de tester :
+# - la répartition des événements par le hub (canaux, files bornées)
+# - l'éviction d'un abonné trop lent
+# - l'abonnement du flux pris à la première itération (pas d'abonné orphelin)
+# - la publication depuis les routes d'équipe et d'administration
+# - l'authentification du flux GET /events (tickets courts, jamais le token d'accès dans l'URL)
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.dependencies import get_db
+from app import auth, crud, events, models, schemas
+from app.routers.events import event_stream
+
+
+@pytest.fixture(scope="function")
+def client(override_db):
+    TestingSessionLocal = override_db
+
+    with TestingSessionLocal() as db:
+        crud.create_user(db, schemas.UserCreate(email="user@example.com", password="user123"))
+        admin = crud.create_user(db, schemas.UserCreate(email="admin@example.com", password="admin123"))
+        admin.is_admin = True
+        db.commit()
+        crud.create_player(db, schemas.PlayerCreate(name="P1", cost=1_000_000, position="FWD", club="Club"))
+
+    with TestClient(app) as c:
+        yield c
+
+
+def login(client, email, password):
+    res = client.post("/auth/login", data={"username": email, "password": password})
+    return {"Authorization": f"Bearer {res.json()['access_token']}"}
+
+
+def user_id(email):
+    db = next(app.dependency_overrides[get_db]())
+    return db.query(models.User).filter(models.User.email == email).one().id
+
+
+def test_hub_fan_out_and_eviction():
+    async def scenario():
+        hub = events.Hub(events.LocalBroker(), queue_size=2)
+        await hub.start()
+        fast = hub.subscribe([events.CATALOG])
+        slow = hub.subscribe([events.CATALOG])
+        other = hub.subscribe([events.team_channel(1)])
+
+        hub.publish(events.CATALOG, "catalog", {"version": 1})
+        assert b'"version":1' in await fast.get(1)
+        hub.publish(events.CATALOG, "catalog", {"version": 2})
+        assert b'"version":2' in await fast.get(1)
+        # ``slow`` n'a rien lu : sa file (2) déborde au troisième message
+        hub.publish(events.CATALOG, "catalog", {"version": 3})
+
+        assert slow.evicted and await slow.get(0.01) is None
+        assert not fast.evicted and not other.pending
+        assert hub.catalog_version == 3
+        assert hub.stats() == {"subscribers": 2, "channels": 2, "evictions": 1}
+        await hub.stop()
+        assert fast.evicted and hub.stats()["subscribers"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_stream_sends_hello_heartbeat_and_reset():
+    async def scenario():
+        hub = events.Hub(events.LocalBroker(), queue_size=1)
+        await hub.start()
+        stream = event_stream(hub, [events.CATALOG], heartbeat=0.01)
+        first = await stream.__anext__()
+        assert first.startswith(b"retry: ") and b"event: hello" in first
+        assert await stream.__anext__() == b": ping\n\n"
+        (subscriber,) = hub.channels[events.CATALOG]
+        subscriber.evict()
+        assert (await stream.__anext__()).startswith(b"event: reset")
+        with pytest.raises(StopAsyncIteration):
+            await stream.__anext__()
+        assert hub.stats()["subscribers"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_stream_subscribes_only_while_iterated():
+    async def scenario():
+        hub = events.Hub(events.LocalBroker())
+        await hub.start()
+        # Client parti avant le premier envoi : le flux n'est jamais démarré
+        stream = event_stream(hub, [events.CATALOG], heartbeat=0.01)
+        assert hub.stats()["subscribers"] == 0
+        await stream.aclose()
+        assert hub.stats()["subscribers"] == 0
+
+        # Client parti après le premier envoi : fermeture du générateur
+        stream = event_stream(hub, [events.CATALOG, events.team_channel(1)], heartbeat=0.01)
+        await stream.__anext__()
+        assert hub.stats()["subscribers"] == 1
+        await stream.aclose()
+        assert hub.stats() == {"subscribers": 0, "channels": 0, "evictions": 0}
+        await hub.stop()
+
+    asyncio.run(scenario())
+
+
+def test_team_and_catalog_writes_are_pushed(client):
+    headers = login(client, "user@example.com", "user123")
+    admin = login(client, "admin@example.com", "admin123")
+    channels = [events.CATALOG, events.team_channel(user_id("user@example.com"))]
+    # Abonnement dans la boucle du serveur de test
+    subscriber = client.portal.call(events.hub.subscribe, channels)
+    try:
+        assert client.post("/team/", json={"name": "Live FC"}, headers=headers).status_code == 201
+        assert client.post("/team/players", json=[1], headers=headers).status_code == 200
+        client.get("/team/", headers=headers)  # une lecture ne publie rien
+        assert client.put("/players/1", json={"cost": 2_000_000}, headers=admin).status_code == 200
+
+        messages = [client.portal.call(subscriber.get, 1) for _ in range(3)]
+        assert messages[0].startswith(b"event: team") and b'"name":"Live FC"' in messages[0]
+        assert b'"players":[{"id":1' in messages[1]
+        assert messages[2].startswith(b"event: catalog") and b'"action":"updated"' in messages[2]
+        assert client.portal.call(subscriber.get, 0.05) is None
+    finally:
+        client.portal.call(events.hub.unsubscribe, subscriber)
+
+
+def test_events_requires_token(client, override_db):
+    assert client.get("/events/").status_code == 401
+    assert client.get("/events/?ticket=garbage").status_code == 401
+    assert client.post("/events/ticket").status_code == 401
+
+    headers = login(client, "user@example.com", "user123")
+    res = client.post("/events/ticket", headers=headers)
+    assert res.status_code == 200 and res.json()["expires_in"] == auth.SSE_TICKET_EXPIRE_SECONDS
+    ticket = res.json()["ticket"]
+    access_token = headers["Authorization"].split()[1]
+
+    with override_db() as db:
+        assert auth.user_from_token(db, ticket, scope=auth.SSE_SCOPE).email == "user@example.com"
+        # Le token d'accès n'ouvre pas le flux par l'URL…
+        assert auth.user_from_token(db, access_token, scope=auth.SSE_SCOPE) is None
+    assert client.get(f"/events/?ticket={access_token}").status_code == 401
+    # … et le ticket ne donne accès à aucune autre route
+    assert client.get("/team/", headers={"Authorization": f"Bearer {ticket}"}).status_code == 401
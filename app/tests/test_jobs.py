@@ -0,0 +1,164 @@
+# app/tests/test_jobs.py
+
+#Ce fichier permet de tester :
+# - la soumission et le suivi des tâches d'administration (/admin/jobs)
+# - l'exécution par le runner (import de joueurs, changement de prix)
+# - l'annulation et la reprise d'une tâche orpheline
+# - l'annonce des prix déjà validés quand une tâche est annulée ou reprise
+
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app import crud, events, jobs, models, schemas
+
+
+@pytest.fixture(scope="function")
+def setup(monkeypatch, override_db):
+    TestingSessionLocal = override_db
+    monkeypatch.setattr(jobs, "runner", jobs.JobRunner(session_factory=TestingSessionLocal, poll_interval=0.05, stale_after=1))
+
+    with TestingSessionLocal() as db:
+        crud.create_user(db, schemas.UserCreate(email="admin@example.com", password="admin123"), is_admin=True)
+        crud.create_user(db, schemas.UserCreate(email="user@example.com", password="user123"))
+
+    with TestClient(app) as c:
+        yield c, TestingSessionLocal
+
+
+def login(client, email, password):
+    token = client.post("/auth/login", data={"username": email, "password": password}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def wait_for(client, job_id, headers, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f"/admin/jobs/{job_id}", headers=headers).json()
+        if job["status"] in jobs.FINISHED:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} still {job['status']}")
+
+
+def test_import_then_reprice(setup):
+    client, _ = setup
+    admin = login(client, "admin@example.com", "admin123")
+    players = [{"name": f"Joueur {i}", "cost": 1_000_000, "position": "MID", "club": "Club"} for i in range(5)]
+
+    response = client.post("/admin/jobs", json={"kind": "import_players", "params": {"players": players}}, headers=admin)
+    assert response.status_code == 202
+    job = wait_for(client, response.json()["id"], admin)
+    assert job["status"] == "succeeded"
+    assert job["progress"] == 1.0
+    assert job["result"] == {"created": 5, "skipped": 0}
+
+    # Le même import une seconde fois n'ajoute rien
+    job_id = client.post("/admin/jobs", json={"kind": "import_players", "params": {"players": players}}, headers=admin).json()["id"]
+    assert wait_for(client, job_id, admin)["result"] == {"created": 0, "skipped": 5}
+
+    job_id = client.post("/admin/jobs", json={"kind": "reprice", "params": {"factor": 1.5}}, headers=admin).json()["id"]
+    assert wait_for(client, job_id, admin)["result"] == {"repriced": 5}
+    assert {p["cost"] for p in client.get("/players/").json()} == {1_500_000}
+
+    player_id = client.get("/players/").json()[0]["id"]
+    stats = [{"player_id": player_id, "gameweek": 1, "goals": 2}]
+    job_id = client.post("/admin/jobs", json={"kind": "ingest_stats", "params": {"events": stats}}, headers=admin).json()["id"]
+    assert wait_for(client, job_id, admin)["result"] == {"ingested": 1}
+
+    listed = client.get("/admin/jobs?status=succeeded", headers=admin).json()
+    assert [j["kind"] for j in listed] == ["ingest_stats", "reprice", "import_players", "import_players"]
+
+
+def test_submit_validation_and_permissions(setup):
+    client, _ = setup
+    admin = login(client, "admin@example.com", "admin123")
+    user = login(client, "user@example.com", "user123")
+
+    assert client.post("/admin/jobs", json={"kind": "nope", "params": {}}, headers=admin).status_code == 400
+    assert client.post("/admin/jobs", json={"kind": "reprice", "params": {"factor": -1}}, headers=admin).status_code == 422
+    assert client.post("/admin/jobs", json={"kind": "reprice", "params": {"factor": 2}}, headers=user).status_code == 403
+    assert client.get("/admin/jobs/999", headers=admin).status_code == 404
+
+
+def test_cancel_queued_job(setup):
+    client, SessionLocal = setup
+    admin = login(client, "admin@example.com", "admin123")
+    # Le runner ne se réveille plus de lui-même : la ligne reste en file
+    jobs.runner.poll_interval = 60
+    time.sleep(0.2)
+    with SessionLocal() as db:
+        job = models.Job(kind="reprice", params={"factor": 2.0}, status=jobs.QUEUED, created_at=datetime.utcnow())
+        db.add(job)
+        db.commit()
+        job_id = job.id
+
+    response = client.post(f"/admin/jobs/{job_id}/cancel", headers=admin)
+    assert response.status_code == 200
+    assert response.json()["status"] == "cancelled"
+    assert client.post(f"/admin/jobs/{job_id}/cancel", headers=admin).status_code == 409
+
+
+def test_stale_job_is_resumed(setup):
+    client, SessionLocal = setup
+    admin = login(client, "admin@example.com", "admin123")
+    with SessionLocal() as db:
+        crud.create_player(db, schemas.PlayerCreate(name="A", cost=1_000_000, position="GK", club="C"))
+        crud.create_player(db, schemas.PlayerCreate(name="B", cost=1_000_000, position="GK", club="C"))
+        a_id = db.query(models.Player.id).filter(models.Player.name == "A").scalar()
+        # Worker disparu après avoir validé le premier joueur
+        crud.get_players_by_ids(db, [a_id])[a_id].cost = 2_000_000
+        old = datetime.utcnow() - timedelta(seconds=30)
+        job = models.Job(
+            kind="reprice", params={"factor": 2.0}, status=jobs.RUNNING, checkpoint={"last_id": a_id},
+            attempts=1, created_at=old, started_at=old, heartbeat_at=old,
+        )
+        db.add(job)
+        db.commit()
+        job_id = job.id
+
+    job = wait_for(client, job_id, admin)
+    assert job["status"] == "succeeded"
+    assert job["attempts"] == 2
+    # Le joueur déjà traité n'est pas doublé une seconde fois
+    assert sorted(p["cost"] for p in client.get("/players/").json()) == [2_000_000, 2_000_000]
+
+
+class StubContext:
+    """Contexte minimal : ``progress`` lève comme après une annulation."""
+
+    def __init__(self, db, checkpoint=None):
+        self.db = db
+        self.checkpoint = checkpoint
+        self.user_id = None
+
+    def save_checkpoint(self, value):
+        self.checkpoint = value
+
+    def progress(self, done, total=None, message=None):
+        raise jobs.JobCancelled()
+
+
+def test_cancelled_reprice_announces_committed_batches(monkeypatch, override_db):
+    announced = []
+    monkeypatch.setattr(events, "catalog_changed", lambda action, ids: announced.append((action, list(ids))))
+    monkeypatch.setattr(jobs, "BATCH_SIZE", 1)
+    with override_db() as db:
+        ids = crud.create_players(db, [
+            schemas.PlayerCreate(name=f"P{i}", cost=1_000_000, position="MID", club="C") for i in range(3)
+        ])
+        ctx = StubContext(db)
+        with pytest.raises(jobs.JobCancelled):
+            jobs.reprice_job(ctx, factor=2.0)
+        assert announced == [("updated", ids[:1])]
+        assert ctx.checkpoint == {"last_id": ids[0]}
+
+        # Reprise : les prix validés avant l'arrêt sont annoncés à nouveau
+        announced.clear()
+        with pytest.raises(jobs.JobCancelled):
+            jobs.reprice_job(StubContext(db, ctx.checkpoint), factor=2.0)
+        assert announced == [("updated", ids[:1]), ("updated", ids[1:2])]
+        assert [p.cost for p in crud.get_players_by_ids(db, ids).values()] == [2_000_000, 2_000_000, 1_000_000]
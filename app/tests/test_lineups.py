@@ -0,0 +1,168 @@
+# app/tests/test_lineups.py
+
+#Ce fichier permet de tester :
+# - le gel des compositions : partage par empreinte, copie seulement des équipes modifiées
+# - la lecture à une journée quelconque (dernier gel <= journée)
+# - le gel par lots : nombre de requêtes indépendant du nombre d'équipes
+# - une équipe créée pendant le gel (dans l'intervalle d'ids d'une tranche) est ignorée
+# - freeze_all relancé après l'échec d'un shard : les shards déjà gelés rendent leur bilan
+# - GET /team/lineups/{gameweek} et la tâche d'administration freeze_lineups
+
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.main import app
+from app import crud, jobs, lineups, models, schemas, shards
+from app.routers import team as team_router
+from app.tests.query_budget import QueryCounter
+
+
+@pytest.fixture(scope="function")
+def setup(monkeypatch, override_db):
+    TestingSessionLocal = override_db
+    monkeypatch.setattr(team_router, "BUDGET", 100_000_000)
+    monkeypatch.setattr(shards, "router", shards.ShardRouter([], primary_factory=TestingSessionLocal))
+    monkeypatch.setattr(jobs, "runner", jobs.JobRunner(session_factory=TestingSessionLocal, poll_interval=0.05))
+
+    with TestingSessionLocal() as db:
+        crud.create_user(db, schemas.UserCreate(email="admin@example.com", password="admin123"), is_admin=True)
+        for i in range(1, 4):
+            crud.create_user(db, schemas.UserCreate(email=f"user{i}@example.com", password="user123"))
+        for i, pos in enumerate(["GK", "DEF", "DEF", "MID", "FWD"], start=1):
+            crud.create_player(db, schemas.PlayerCreate(name=f"P{i}", cost=1_000_000, position=pos, club="Club"))
+
+    with TestClient(app) as c:
+        def login(email, password):
+            token = c.post("/auth/login", data={"username": email, "password": password}).json()["access_token"]
+            return {"Authorization": f"Bearer {token}"}
+
+        users = [login(f"user{i}@example.com", "user123") for i in range(1, 4)]
+        # Les équipes 1 et 2 ont la même composition
+        for headers, roster in zip(users, ([1, 2, 4], [4, 2, 1], [1, 3, 5])):
+            assert c.post("/team/", json={"name": "Team"}, headers=headers).status_code == 201
+            assert c.post("/team/players", json=roster, headers=headers).status_code == 200
+        yield c, TestingSessionLocal, users, login("admin@example.com", "admin123")
+
+
+def test_freeze_shares_lineups_and_copies_on_write(setup):
+    client, SessionLocal, users, _ = setup
+    with SessionLocal() as db:
+        assert lineups.freeze(db, 1) == {"gameweek": 1, "teams": 3, "changed": 3, "lineups_created": 2}
+        # Rien n'a changé : aucune ligne écrite
+        assert lineups.freeze(db, 2) == {"gameweek": 2, "teams": 3, "changed": 0, "lineups_created": 0}
+
+    assert client.delete("/team/players/4", headers=users[0]).status_code == 200
+    with SessionLocal() as db:
+        assert lineups.freeze(db, 4)["changed"] == 1
+        team_ids = list(db.scalars(select(models.Team.id).order_by(models.Team.id)))
+        assert db.scalar(select(func.count()).select_from(models.LineupSnapshot)) == 4
+        assert lineups.lineup_at(db, team_ids[0], 1) == [1, 2, 4]
+        assert lineups.lineup_at(db, team_ids[0], 3) == [1, 2, 4]
+        assert lineups.lineup_at(db, team_ids[0], 4) == [1, 2]
+        assert lineups.lineup_at(db, team_ids[1], 10) == [1, 2, 4]
+        assert lineups.lineup_at(db, team_ids[2], 0) is None
+
+        with pytest.raises(ValueError):
+            lineups.freeze(db, 3)
+        # Journée déjà gelée : bilan enregistré, rien n'est réécrit
+        assert lineups.freeze(db, 4) == {"gameweek": 4, "teams": 3, "changed": 1, "lineups_created": 1}
+        assert db.scalar(select(func.count()).select_from(models.LineupSnapshot)) == 4
+
+
+def test_team_created_during_freeze_is_skipped(setup):
+    _, SessionLocal, _, _ = setup
+    with SessionLocal() as db:
+        first, middle, last = db.scalars(select(models.Team.id).order_by(models.Team.id))
+        # ``middle`` n'était pas encore créée quand la liste des équipes a été lue
+        current = lineups._current_lineups(db, first, last, [first, last])
+    assert current == {first: [1, 2, 4], last: [1, 3, 5]}
+
+
+class FlakyShards:
+    """Deux shards ; le second échoue au premier gel (après le commit du premier)."""
+
+    def __init__(self, factories):
+        self.factories = factories
+        self.failures = 1
+
+    def scatter(self, fn):
+        results = []
+        for i, factory in enumerate(self.factories):
+            if i == 1 and self.failures:
+                self.failures -= 1
+                raise RuntimeError("shard unavailable")
+            with factory() as db:
+                results.append(fn(db))
+        return results
+
+
+def test_freeze_all_is_retried_after_a_partial_failure(setup, monkeypatch, tmp_path):
+    _, SessionLocal, _, _ = setup
+    engine = create_engine(f"sqlite:///{tmp_path / 'shard2.db'}")
+    models.Base.metadata.create_all(engine)
+    second = sessionmaker(bind=engine)
+    with second() as db:
+        db.execute(insert(models.Team), [{"id": 100, "name": "Shard 2", "owner_id": 100}])
+        db.execute(insert(models.team_players), [{"team_id": 100, "player_id": 5}])
+        db.commit()
+    monkeypatch.setattr(shards, "router", FlakyShards([SessionLocal, second]))
+
+    with pytest.raises(RuntimeError):
+        lineups.freeze_all(1)
+    with SessionLocal() as db:
+        assert lineups.last_frozen(db) == 1
+    # Le premier shard a déjà validé : le nouvel essai gèle le second sans erreur
+    assert lineups.freeze_all(1) == {"gameweek": 1, "teams": 4, "changed": 4, "lineups_created": 3}
+    with second() as db:
+        assert lineups.lineup_at(db, 100, 1) == [5]
+    engine.dispose()
+
+
+def test_freeze_query_count_does_not_grow_with_teams(setup):
+    _, SessionLocal, _, _ = setup
+    with SessionLocal() as db:
+        users = [{"email": f"bulk{i}@example.com", "hashed_password": "x"} for i in range(300)]
+        db.execute(insert(models.User), users)
+        owners = db.scalars(select(models.User.id).where(models.User.email.like("bulk%"))).all()
+        db.execute(insert(models.Team), [{"name": f"Bulk {o}", "owner_id": o} for o in owners])
+        teams = db.scalars(select(models.Team.id).where(models.Team.name.like("Bulk%"))).all()
+        db.execute(insert(models.team_players), [
+            {"team_id": t, "player_id": p} for t in teams for p in (1, 2, 3 + t % 3)
+        ])
+        db.commit()
+
+        counter = QueryCounter().start()
+        try:
+            result = lineups.freeze(db, 1, batch_size=1000)
+        finally:
+            counter.stop()
+    # {1,2,3}, {1,2,4} (partagée avec l'équipe 1), {1,2,5} et {1,3,5}
+    assert result["teams"] == 303 and result["lineups_created"] == 4
+    # 303 équipes en une tranche : quelques requêtes, pas une par équipe
+    # (sans celles du runner de tâches, qui tourne en arrière-plan)
+    statements = [s for s in counter.statements if "jobs" not in s]
+    assert len(statements) <= 9, counter.report()
+
+
+def test_lineup_route_and_freeze_job(setup):
+    client, _, users, admin = setup
+    assert client.get("/team/lineups/1", headers=users[0]).json()["detail"] == "Gameweek not frozen"
+
+    job_id = client.post("/admin/jobs", json={"kind": "freeze_lineups", "params": {"gameweek": 1}}, headers=admin).json()["id"]
+    deadline = time.monotonic() + 5
+    while (job := client.get(f"/admin/jobs/{job_id}", headers=admin).json())["status"] not in jobs.FINISHED:
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    assert job["result"] == {"gameweek": 1, "teams": 3, "changed": 3, "lineups_created": 2}
+
+    assert client.post("/team/players", json=[3], headers=users[0]).status_code == 200
+    res = client.get("/team/lineups/1", headers=users[0])
+    assert res.status_code == 200
+    assert res.json()["player_ids"] == [1, 2, 4]
+    assert [p["name"] for p in res.json()["players"]] == ["P1", "P2", "P4"]
+    # L'admin n'avait pas d'équipe au gel
+    assert client.get("/team/lineups/1", headers=admin).json()["detail"] == "No lineup for this gameweek"
@@ -0,0 +1,40 @@
+# app/tests/test_metrics.py
+
+#Ce fichier permet de tester :
+# - l'endpoint /metrics au format texte Prometheus
+# - le comptage des requêtes HTTP par route (gabarit) et code de statut
+# - le comptage des requêtes SQL par requête HTTP
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app import crud, metrics, schemas
+
+
+@pytest.fixture(scope="function")
+def client(override_db):
+    TestingSessionLocal = override_db
+
+    with TestingSessionLocal() as db:
+        crud.create_player(db, schemas.PlayerCreate(name="P1", cost=1000, position="MID", club="Club1"))
+
+    with TestClient(app) as c:
+        metrics.reset()
+        yield c
+
+
+def test_metrics_endpoint(client):
+    assert client.get("/players/1").status_code == 200
+    assert client.get("/players/999").status_code == 404
+
+    text = client.get("/metrics").text
+    assert "# TYPE http_request_duration_seconds histogram" in text
+    assert 'http_requests_total{route="/players/{player_id}",method="GET",status="200"} 1' in text
+    assert 'http_requests_total{route="/players/{player_id}",method="GET",status="404"} 1' in text
+    assert 'http_request_duration_seconds_count{route="/players/{player_id}",method="GET"} 2' in text
+
+    # Deux requêtes HTTP ayant chacune émis une requête SQL
+    assert 'db_queries_per_request_bucket{route="/players/{player_id}",method="GET",le="0"} 0' in text
+    assert 'db_queries_per_request_bucket{route="/players/{player_id}",method="GET",le="1"} 2' in text
+    assert 'db_queries_per_request_sum{route="/players/{player_id}",method="GET"} 2.000000' in text
@@ -0,0 +1,51 @@
+# app/tests/test_migrations.py
+
+#Ce fichier permet de tester :
+# - la mise à niveau d'une base créée avant l'ajout de colonnes (ALTER TABLE idempotent)
+# - la même mise à niveau sur les shards (ShardRouter.create_schema)
+
+from sqlalchemy import create_engine, inspect, select, text
+from sqlalchemy.orm import Session
+
+from app import crud, migrations, models, shards
+
+# Table ``players`` telle que créée par les premières versions de l'application
+OLD_PLAYERS = "CREATE TABLE players (id INTEGER PRIMARY KEY, name VARCHAR NOT NULL, cost INTEGER NOT NULL, position VARCHAR NOT NULL, club VARCHAR NOT NULL)"
+
+
+def old_database(path):
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        conn.execute(text(OLD_PLAYERS))
+        conn.execute(text("INSERT INTO players (name, cost, position, club) VALUES ('Old', 1000000, 'MID', 'Club')"))
+    return engine
+
+
+def columns(engine):
+    return {column["name"] for column in inspect(engine).get_columns("players")}
+
+
+def test_upgrade_adds_missing_columns(tmp_path):
+    engine = old_database(tmp_path / "old.db")
+    models.Base.metadata.create_all(bind=engine)  # ne touche pas à la table existante
+    assert "age" not in columns(engine)
+
+    added = migrations.upgrade(engine)
+    assert added == [f"{table}.{column}" for table, column in migrations.ADDED_COLUMNS]
+    assert {column for _, column in migrations.ADDED_COLUMNS} <= columns(engine)
+    # Idempotente
+    assert migrations.upgrade(engine) == []
+
+    with Session(engine) as db:
+        player = db.scalars(select(models.Player)).one()
+        assert (player.name, player.age, player.source_hash, player.deleted_at) == ("Old", None, None, None)
+        # Les lectures du catalogue filtrent les joueurs supprimés logiquement
+        assert [p.name for p in crud.get_players(db)] == ["Old"]
+
+
+def test_shard_schema_is_upgraded(tmp_path):
+    engine = old_database(tmp_path / "shard.db")
+    router = shards.ShardRouter([f"sqlite:///{tmp_path / 'shard.db'}"])
+    router.create_schema()
+    assert {column for _, column in migrations.ADDED_COLUMNS} <= columns(engine)
+    assert inspect(engine).has_table("teams")
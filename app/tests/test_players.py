@@ -5,39 +5,17 @@
 # - le CRUD complet
 # - les codes 201 / 200 / 204 / 404
 
-import os
-import tempfile
-
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 
 from app.main import app
-from app.database import Base
-from app.dependencies import get_db
 from app import crud, schemas
 
 
 @pytest.fixture(scope="function")
-def client_admin():
+def client_admin(override_db):
     """Configure un client avec un utilisateur admin pré‑créé."""
-    db_fd, db_path = tempfile.mkstemp()
-    SQLALCHEMY_DATABASE_URL = f"sqlite:///{db_path}"
-    engine = create_engine(
-        SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-    )
-    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    Base.metadata.create_all(bind=engine)
-
-    def override_get_db():
-        db = TestingSessionLocal()
-        try:
-            yield db
-        finally:
-            db.close()
-
-    app.dependency_overrides[get_db] = override_get_db
+    TestingSessionLocal = override_db
 
     # Créer un admin et un token
     with TestingSessionLocal() as db:
@@ -55,9 +33,6 @@ def client_admin():
         c.headers.update({"Authorization": f"Bearer {token}"})
         yield c
 
-    os.close(db_fd)
-    os.unlink(db_path)
-
 
 def test_create_read_update_delete_player(client_admin):
     # Créer un joueur
@@ -90,4 +65,78 @@ def test_create_read_update_delete_player(client_admin):
 
     # Vérifier qu'il n'existe plus
     response = client_admin.get(f"/players/{player_id}")
-    assert response.status_code == 404
\ No newline at end of file
+    assert response.status_code == 404
+
+def test_match_stats_rollup_and_form(client_admin):
+    response = client_admin.post(
+        "/players/",
+        json={"name": "Stat Player", "cost": 1000000, "position": "FWD", "club": "Test FC"},
+    )
+    player_id = response.json()["id"]
+
+    # Ingestion par lot de 7 journées (la journée 3 arrive en retard)
+    events = [
+        {"player_id": player_id, "gameweek": gw, "goals": gw % 2, "assists": 1 if gw == 7 else 0}
+        for gw in (1, 2, 4, 5, 6, 7, 3)
+    ]
+    response = client_admin.post("/players/stats", json=events)
+    assert response.status_code == 201
+    assert response.json()["ingested"] == 7
+
+    # Totaux de saison
+    response = client_admin.get(f"/players/{player_id}/stats")
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats["matches"] == 7
+    assert stats["goals"] == 4
+    assert stats["assists"] == 1
+    assert stats["last_gameweek"] == 7
+
+    # Forme sur les 5 derniers matchs
+    response = client_admin.get(f"/players/{player_id}/form?last=5")
+    assert response.status_code == 200
+    form = response.json()
+    assert [g["gameweek"] for g in form["games"]] == [3, 4, 5, 6, 7]
+    assert form["goals"] == 3
+    assert form["assists"] == 1
+
+    # Une journée déjà enregistrée est refusée (table en ajout seul)
+    response = client_admin.post("/players/stats", json=[{"player_id": player_id, "gameweek": 2}])
+    assert response.status_code == 409
+
+    # Joueur inexistant
+    response = client_admin.post("/players/stats", json=[{"player_id": 9999, "gameweek": 1}])
+    assert response.status_code == 404
+
+
+def test_list_players_serialization(client_admin):
+    client_admin.post(
+        "/players/",
+        json={"name": "List Player", "cost": 1500000, "position": "DEF", "club": "Test FC"},
+    )
+    response = client_admin.get("/players/?skip=0&limit=10")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    players = response.json()
+    assert players == [
+        {"id": players[0]["id"], "name": "List Player", "club": "Test FC", "position": "DEF", "cost": 1500000.0}
+    ]
+
+
+def test_sparse_fieldsets(client_admin):
+    client_admin.post(
+        "/players/",
+        json={"name": "Sparse Player", "cost": 2500000, "position": "MID", "club": "Test FC"},
+    )
+    response = client_admin.get("/players/?fields=name,cost")
+    assert response.status_code == 200
+    player_id = response.json()[0]["id"]
+    assert response.json() == [{"id": player_id, "name": "Sparse Player", "cost": 2500000.0}]
+
+    response = client_admin.get(f"/players/{player_id}?fields=position")
+    assert response.json() == {"id": player_id, "position": "MID"}
+
+    assert client_admin.get("/players/999?fields=name").status_code == 404
+    response = client_admin.get("/players/?fields=name,password")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Unknown field(s): password"
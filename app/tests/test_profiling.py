@@ -0,0 +1,120 @@
+# app/tests/test_profiling.py
+
+#Ce fichier permet de tester :
+# - le journal des requêtes lentes (SQL normalisé, forme des paramètres, route)
+# - les requêtes en échec (nom de l'exception, chronomètre de la connexion vidé)
+# - le profileur par échantillonnage (piles « collapsed » de tous les threads)
+# - l'accès admin uniquement à /admin/slow-queries et /admin/profile
+
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app.main import app
+from app import crud, profiling, schemas
+
+
+@pytest.fixture(scope="function")
+def setup(monkeypatch, override_db):
+    TestingSessionLocal = override_db
+    # Seuil nul : toutes les requêtes sont « lentes »
+    monkeypatch.setattr(profiling, "slow_queries", profiling.SlowQueryLog(threshold_ms=0, keep=50))
+    profiling.install_slow_query_hooks()
+
+    with TestingSessionLocal() as db:
+        crud.create_user(db, schemas.UserCreate(email="admin@example.com", password="admin123"), is_admin=True)
+        crud.create_user(db, schemas.UserCreate(email="user@example.com", password="user123"))
+        crud.create_player(db, schemas.PlayerCreate(name="P1", cost=1_000_000, position="FWD", club="Club"))
+
+    with TestClient(app) as c:
+        def login(email, password):
+            token = c.post("/auth/login", data={"username": email, "password": password}).json()["access_token"]
+            return {"Authorization": f"Bearer {token}"}
+
+        yield c, login("admin@example.com", "admin123"), login("user@example.com", "user123")
+
+
+def test_param_shape_hides_values():
+    assert profiling.param_shape((1, 2, 3, "x", None)) == ["int×3", "str", "null"]
+    assert profiling.param_shape({"email": "a@b.c", "id": 4}) == {"email": "str", "id": "int"}
+    assert profiling.param_shape([(1, "a"), (2, "b")], executemany=True) == {"rows": 2, "row": ["int", "str"]}
+
+
+def test_slow_queries_are_logged_with_route(setup, caplog):
+    client, admin, user = setup
+    profiling.slow_queries.clear()
+    with caplog.at_level("WARNING", logger="app.profiling"):
+        assert client.get("/players/1").status_code == 200
+
+    entry = next(e for e in profiling.slow_queries.recent() if "FROM players" in e["sql"])
+    assert entry["route"] == "GET /players/{player_id}"
+    assert "?" in entry["sql"] and "1" not in entry["params"]
+    assert entry["duration_ms"] >= 0
+    assert any("slow query" in r.getMessage() for r in caplog.records)
+
+    res = client.get("/admin/slow-queries?limit=5", headers=admin)
+    assert res.status_code == 200
+    assert 1 <= len(res.json()) <= 5
+    assert client.get("/admin/slow-queries", headers=user).status_code == 403
+
+
+def test_failed_query_is_recorded_with_error(setup):
+    profiling.slow_queries.clear()
+    engine = create_engine("sqlite://")
+    with engine.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.execute(text("SELECT * FROM missing_table WHERE id = :id"), {"id": 1})
+        # Le départ de la requête en échec ne reste pas sur la connexion
+        assert conn.info["slow_query_start"] == []
+        conn.execute(text("SELECT 1"))
+        assert conn.info["slow_query_start"] == []
+
+    entries = profiling.slow_queries.recent()
+    failed = next(e for e in entries if "missing_table" in e["sql"])
+    assert failed["error"] == "OperationalError"
+    assert failed["params"] == ["int"]
+    assert next(e for e in entries if e["sql"] == "SELECT ?")["error"] is None
+    engine.dispose()
+
+
+def spin_for_profiler(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sampling_profiler_collapsed_stacks(setup):
+    client, admin, user = setup
+    stop = threading.Event()
+    worker = threading.Thread(target=spin_for_profiler, args=(stop,), name="busy-worker")
+    worker.start()
+    try:
+        stacks, samples = profiling.sample_stacks(0.2, interval=0.005)
+        res = client.get("/admin/profile?seconds=0.2&interval=0.005", headers=admin)
+    finally:
+        stop.set()
+        worker.join()
+
+    assert samples >= 5
+    busy = [s for s in stacks if s.startswith("busy-worker;")]
+    assert busy and all("spin_for_profiler (app/tests/test_profiling.py:" in s for s in busy)
+
+    assert res.status_code == 200
+    assert int(res.headers["X-Profile-Samples"]) >= 5
+    lines = res.text.splitlines()
+    assert any(line.startswith("busy-worker;") for line in lines)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert client.get("/admin/profile?seconds=0.1", headers=user).status_code == 403
+
+
+def test_one_profile_at_a_time():
+    started = time.monotonic()
+    with profiling._profile_lock:
+        with pytest.raises(HTTPException) as excinfo:
+            profiling.profile(0.1)
+    assert excinfo.value.status_code == 409
+    assert time.monotonic() - started < 0.1
@@ -0,0 +1,84 @@
+# app/tests/test_query_budget.py
+
+#Ce fichier permet de tester :
+# - le nombre de requêtes SQL émises par les routes d'équipe (budgets)
+# - l'absence de boucle N+1 lors de l'ajout de plusieurs joueurs
+# - le rapport d'erreur quand un budget est dépassé
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app import crud, schemas
+from app.routers import team as team_router
+from app.tests.query_budget import query_budget
+
+
+# Une composition 1-4-3-3 complète
+LINEUP = ["GK"] + ["DEF"] * 4 + ["MID"] * 3 + ["FWD"] * 3
+
+
+@pytest.fixture(scope="function")
+def client_user(monkeypatch, override_db):
+    TestingSessionLocal = override_db
+    monkeypatch.setattr(team_router, "BUDGET", 100_000_000)
+
+    with TestingSessionLocal() as db:
+        crud.create_user(db, schemas.UserCreate(email="user@example.com", password="user123"))
+        for i, pos in enumerate(LINEUP, start=1):
+            crud.create_player(db, schemas.PlayerCreate(name=f"P{i}", cost=1_000_000, position=pos, club="Club"))
+
+    with TestClient(app) as c:
+        res = c.post("/auth/login", data={"username": "user@example.com", "password": "user123"})
+        c.headers.update({"Authorization": f"Bearer {res.json()['access_token']}"})
+        assert c.post("/team/", json={"name": "Budget FC"}).status_code == 201
+        yield c
+
+
+def test_add_eleven_players_within_budget(client_user):
+    with query_budget(5, "POST /team/players (11 ids)"):
+        r = client_user.post("/team/players", json=list(range(1, 12)))
+    assert r.status_code == 200
+    assert len(r.json()["players"]) == 11
+
+
+def test_read_team_within_budget(client_user):
+    client_user.post("/team/players", json=list(range(1, 12)))
+    with query_budget(3, "GET /team"):
+        r = client_user.get("/team/")
+    assert r.status_code == 200
+    assert len(r.json()["players"]) == 11
+
+
+def test_read_team_projection(client_user):
+    client_user.post("/team/players", json=list(range(1, 12)))
+    full = client_user.get("/team/").json()
+    with query_budget(3, "GET /team?fields=...") as counter:
+        r = client_user.get("/team/?fields=name,position")
+    team = r.json()
+    assert team["budget_left"] == full["budget_left"] == 89_000_000
+    assert sorted(team["players"], key=lambda p: p["id"]) == [
+        {"id": p["id"], "name": p["name"], "position": p["position"]}
+        for p in sorted(full["players"], key=lambda p: p["id"])
+    ]
+    # La projection ne lit ni ``club`` ni les objets ``Player`` complets
+    assert "players.club" not in counter.report()
+
+
+def test_remove_player_within_budget(client_user):
+    client_user.post("/team/players", json=[1, 2])
+    with query_budget(4, "DELETE /team/players/{id}"):
+        r = client_user.delete("/team/players/2")
+    assert r.status_code == 200
+    assert [p["id"] for p in r.json()["players"]] == [1]
+
+
+def test_budget_report_groups_statements(client_user, query_counter):
+    with pytest.raises(AssertionError) as excinfo:
+        with query_budget(1, "N+1"):
+            for pid in (1, 2, 3):
+                client_user.get(f"/players/{pid}")
+    message = str(excinfo.value)
+    assert "Query budget exceeded (N+1): 3 > 1" in message
+    assert "3 × SELECT" in message
+    assert query_counter.count >= 3
@@ -0,0 +1,150 @@
+# app/tests/test_shards.py
+
+#Ce fichier permet de tester :
+# - le routage des équipes vers leur shard (plusieurs fichiers SQLite)
+# - la copie du catalogue sur les shards après une écriture admin
+# - l'agrégat entre shards (nombre d'équipes par joueur)
+# - le rééquilibrage après l'ajout d'un shard (historique des compositions compris)
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.main import app
+from app import crud, lineups, models, schemas, shards
+from app.routers import team as team_router
+
+USERS = 8
+
+
+@pytest.fixture(scope="function")
+def setup(monkeypatch, tmp_path, override_db):
+    TestingSessionLocal = override_db
+    monkeypatch.setattr(team_router, "BUDGET", 100_000_000)
+
+    urls = [f"sqlite:///{tmp_path / f'shard{i}.db'}" for i in range(3)]
+    router = shards.ShardRouter(urls, primary_factory=TestingSessionLocal)
+    monkeypatch.setattr(shards, "router", router)
+
+    with TestingSessionLocal() as db:
+        crud.create_user(db, schemas.UserCreate(email="admin@example.com", password="admin123"), is_admin=True)
+        for i in range(1, USERS + 1):
+            crud.create_user(db, schemas.UserCreate(email=f"user{i}@example.com", password="user123"))
+        for name, pos in [("Gardien", "GK"), ("Def", "DEF"), ("Mil", "MID"), ("Att", "FWD")]:
+            crud.create_player(db, schemas.PlayerCreate(name=name, cost=1_000_000, position=pos, club="Club"))
+    router.create_schema()
+    router.replicate_players()
+
+    with TestClient(app) as c:
+        yield c, router, TestingSessionLocal, tmp_path
+
+
+def login(client, email, password):
+    token = client.post("/auth/login", data={"username": email, "password": password}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def build_teams(client):
+    """Une équipe par utilisateur ; l'utilisateur i possède les joueurs 1..(i % 4) + 1."""
+    owners = {}
+    for i in range(1, USERS + 1):
+        headers = login(client, f"user{i}@example.com", "user123")
+        team = client.post("/team/", json={"name": f"Team {i}"}, headers=headers).json()
+        r = client.post("/team/players", json=list(range(1, i % 4 + 2)), headers=headers)
+        assert r.status_code == 200, r.text
+        owners[team["owner_id"]] = headers
+    return owners
+
+
+def teams_on(router, index):
+    with router.factories[index]() as db:
+        return set(db.scalars(select(models.Team.owner_id)))
+
+
+def test_jump_hash_moves_few_keys():
+    before = [shards.jump_hash(k, 3) for k in range(10_000)]
+    after = [shards.jump_hash(k, 4) for k in range(10_000)]
+    moved = [(b, a) for b, a in zip(before, after) if b != a]
+    # Seules les clés attribuées au nouveau shard bougent (~1/4)
+    assert all(a == 3 for _, a in moved)
+    assert 2000 < len(moved) < 3000
+
+
+def test_teams_are_routed_to_their_shard(setup):
+    client, router, SessionLocal, _ = setup
+    owners = build_teams(client)
+
+    for index in range(len(router)):
+        assert teams_on(router, index) == {o for o in owners if router.shard_for(o) == index}
+    with SessionLocal() as db:
+        assert db.query(models.Team).count() == 0  # rien dans la base principale
+
+    some_owner, headers = next(iter(owners.items()))
+    team = client.get("/team/", headers=headers).json()
+    assert team["id"] == some_owner
+    assert client.get("/dashboard/", headers=headers).json()["team"]["players"] == team["players"]
+    assert client.delete("/team/players/1", headers=headers).status_code == 200
+
+    # Joueur 1 retiré d'une des 8 équipes
+    ownership = client.get("/players/ownership").json()
+    assert [(row["player_id"], row["teams"]) for row in ownership] == [(1, 7), (2, 6), (3, 4), (4, 2)]
+    assert ownership[0]["share"] == pytest.approx(7 / USERS)
+    assert len(client.get("/players/ownership?limit=2").json()) == 2
+
+
+def test_catalog_changes_are_replicated(setup):
+    client, router, _, _ = setup
+    owners = build_teams(client)
+    admin = login(client, "admin@example.com", "admin123")
+
+    assert client.put("/players/1", json={"cost": 3_000_000}, headers=admin).status_code == 200
+    for headers in owners.values():
+        team = client.get("/team/", headers=headers).json()
+        assert next(p for p in team["players"] if p["id"] == 1)["cost"] == 3_000_000
+
+    assert client.delete("/players/4", headers=admin).status_code == 204
+    for index in range(len(router)):
+        with router.factories[index]() as db:
+            assert db.get(models.Player, 4) is None
+            assert 4 not in crud.get_ownership_counts(db)
+
+
+def test_rebalance_after_adding_a_shard(setup, monkeypatch):
+    client, router, SessionLocal, tmp_path = setup
+    owners = build_teams(client)
+    rosters = {o: client.get("/team/", headers=h).json()["players"] for o, h in owners.items()}
+
+    grown = shards.ShardRouter(router.urls + [f"sqlite:///{tmp_path / 'shard3.db'}"], primary_factory=SessionLocal)
+    expected_moves = sum(router.shard_for(o) != grown.shard_for(o) for o in owners)
+    assert grown.rebalance(dry_run=True) == {"scanned": USERS, "moved": expected_moves}
+    assert grown.rebalance() == {"scanned": USERS, "moved": expected_moves}
+    assert grown.rebalance()["moved"] == 0
+
+    monkeypatch.setattr(shards, "router", grown)
+    for index in range(len(grown)):
+        assert teams_on(grown, index) == {o for o in owners if grown.shard_for(o) == index}
+    for owner, headers in owners.items():
+        assert client.get("/team/", headers=headers).json()["players"] == rosters[owner]
+
+
+def test_rebalance_migrates_teams_from_primary(setup, monkeypatch):
+    client, router, SessionLocal, _ = setup
+    # Équipes créées avant l'activation du sharding
+    monkeypatch.setattr(shards, "router", shards.ShardRouter([], primary_factory=SessionLocal))
+    owners = build_teams(client)
+    with SessionLocal() as db:
+        lineups.freeze(db, 1)
+
+    assert router.rebalance(from_primary=True)["moved"] == USERS
+    with SessionLocal() as db:
+        assert db.query(models.Team).count() == 0
+    monkeypatch.setattr(shards, "router", router)
+    for owner, headers in owners.items():
+        team = client.get("/team/", headers=headers).json()
+        assert team["id"] == owner
+        # L'utilisateur i (id i + 1) possède (i % 4) + 1 joueurs
+        assert len(team["players"]) == (owner - 1) % 4 + 1
+        # L'historique des compositions suit l'équipe (nouvel id compris)
+        lineup = client.get("/team/lineups/1", headers=headers).json()
+        assert lineup["team_id"] == owner
+        assert lineup["player_ids"] == [p["id"] for p in team["players"]]
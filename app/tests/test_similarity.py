@@ -0,0 +1,119 @@
+# app/tests/test_similarity.py
+
+#Ce fichier permet de tester :
+# - l'index des plus proches voisins (identique à un calcul exhaustif)
+# - GET /players/{id}/similar : même profil d'abord, filtre max_cost, 404
+# - max_cost sous le coût de tous les voisins précalculés (joueur cher) : calcul exact
+# - la reconstruction de l'index après une écriture admin
+
+import time
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app import crud, schemas, similarity
+
+
+PLAYERS = [
+    # nom, poste, coût, âge, (matchs, buts, passes, jaunes, rouges)
+    ("Buteur cher", "FWD", 150_000_000, 25, (20, 18, 4, 2, 0)),
+    ("Buteur moyen", "FWD", 40_000_000, 26, (20, 15, 3, 2, 0)),
+    ("Buteur modeste", "FWD", 8_000_000, 24, (18, 11, 2, 3, 0)),
+    ("Ailier passeur", "FWD", 30_000_000, 22, (20, 4, 12, 1, 0)),
+    ("Gardien", "GK", 20_000_000, 30, (20, 0, 0, 1, 0)),
+    ("Défenseur rugueux", "DEF", 15_000_000, 29, (19, 1, 1, 9, 2)),
+    ("Milieu", "MID", 35_000_000, 27, (20, 3, 6, 4, 0)),
+]
+
+
+@pytest.fixture(scope="function")
+def setup(monkeypatch, override_db):
+    TestingSessionLocal = override_db
+    builder = similarity.Builder(k=5, debounce=0, session_factory=TestingSessionLocal)
+    monkeypatch.setattr(similarity, "builder", builder)
+
+    with TestingSessionLocal() as db:
+        crud.create_user(db, schemas.UserCreate(email="admin@example.com", password="admin123"), is_admin=True)
+        stats = []
+        for name, pos, cost, age, (matches, goals, assists, yellow, red) in PLAYERS:
+            player = crud.create_player(db, schemas.PlayerCreate(name=name, cost=cost, position=pos, club="Club", age=age))
+            # Totaux de la saison concentrés sur la première journée
+            stats.append(schemas.MatchStatIn(player_id=player.id, gameweek=1, goals=goals, assists=assists,
+                                             yellow_cards=yellow, red_cards=red))
+            stats.extend(schemas.MatchStatIn(player_id=player.id, gameweek=g) for g in range(2, matches + 1))
+        crud.ingest_match_stats(db, stats)
+
+    with TestClient(app) as c:
+        yield c, builder
+
+
+def test_blocked_neighbours_match_brute_force():
+    rng = np.random.default_rng(0)
+    features = rng.normal(size=(300, 8))
+    indices, distances = similarity.nearest_neighbours(features, k=7, block_size=64)
+    full = np.linalg.norm(features[:, None, :] - features[None, :, :], axis=2)
+    np.fill_diagonal(full, np.inf)
+    expected = np.argsort(full, axis=1, kind="stable")[:, :7]
+    assert np.sort(full, axis=1)[:, :7] == pytest.approx(distances, abs=1e-4)
+    assert (indices == expected).mean() > 0.99  # ex aequo éventuels
+
+
+def test_max_cost_beyond_precomputed_neighbours():
+    rng = np.random.default_rng(1)
+    rows = [
+        (i, f"P{i}", "Club", rng.choice(similarity.POSITIONS), float(rng.integers(1, 200)) * 1e6, int(rng.integers(18, 36)),
+         int(rng.integers(0, 38)), int(rng.integers(0, 20)), int(rng.integers(0, 10)), int(rng.integers(0, 8)), 0)
+        for i in range(1, 201)
+    ]
+    index = similarity.SimilarityIndex(rows, k=5)
+    full = np.linalg.norm(index.features[:, None, :] - index.features[None, :, :], axis=2)
+    np.fill_diagonal(full, np.inf)
+
+    expensive = int(np.argmax(index.costs))
+    assert all(index.costs[j] > 20e6 for j in index.neighbours[expensive])
+    similar = index.similar(rows[expensive][0], max_cost=20e6, limit=8)
+    affordable = np.flatnonzero(index.costs <= 20e6)
+    expected = affordable[np.argsort(full[expensive, affordable], kind="stable")][:8]
+    assert [p["id"] for p in similar] == [rows[j][0] for j in expected]
+    assert [p["distance"] for p in similar] == pytest.approx(full[expensive, expected], abs=1e-3)
+    # Moins de joueurs abordables que demandé : tous, sans soi-même
+    cheapest = int(np.argmin(index.costs))
+    assert len(index.similar(rows[cheapest][0], max_cost=index.costs[cheapest], limit=8)) == (index.costs == index.costs[cheapest]).sum() - 1
+
+
+def test_similar_players(setup):
+    client, _ = setup
+    similar = client.get("/players/1/similar").json()
+    assert similar[0]["name"] == "Buteur moyen"
+    assert similar[0]["age"] == 26
+    # Les attaquants d'abord (poste fortement pondéré)
+    assert [p["position"] for p in similar[:3]] == ["FWD"] * 3
+    assert all(similar[i]["distance"] <= similar[i + 1]["distance"] for i in range(len(similar) - 1))
+
+    cheap = client.get("/players/1/similar?max_cost=10000000&limit=2").json()
+    assert [p["name"] for p in cheap] == ["Buteur modeste"]
+    # Le défenseur n'est pas parmi les 5 voisins précalculés du buteur cher
+    assert 6 not in [p["id"] for p in similar]
+    assert [p["name"] for p in client.get("/players/1/similar?max_cost=16000000").json()] == [
+        "Buteur modeste", "Défenseur rugueux",
+    ]
+    assert len(client.get("/players/1/similar?limit=2").json()) == 2
+    assert client.get("/players/999/similar").status_code == 404
+
+
+def test_index_rebuilt_after_catalog_change(setup):
+    client, builder = setup
+    before = builder.current()
+
+    token = client.post("/auth/login", data={"username": "admin@example.com", "password": "admin123"}).json()["access_token"]
+    r = client.put("/players/2", json={"cost": 9_000_000}, headers={"Authorization": f"Bearer {token}"})
+    assert r.status_code == 200
+    for _ in range(200):
+        if builder.index is not before:
+            break
+        time.sleep(0.01)
+    assert builder.index is not before
+    cheap = client.get("/players/1/similar?max_cost=10000000").json()
+    assert [p["name"] for p in cheap] == ["Buteur moyen", "Buteur modeste"]
@@ -0,0 +1,138 @@
+# app/tests/test_simulation.py
+
+#Ce fichier permet de tester :
+# - la loi de points d'un joueur (espérance du barème) et d'une équipe (convolution)
+# - les profils ajustés sur les statistiques de saison, rapprochés de la moyenne du poste
+# - la simulation : même seed, même résultat ; 100 000 journées en moins de 100 ms
+# - GET /team/matchup contre une autre équipe ou l'équipe moyenne
+
+import time
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app import crud, schemas, simulation
+from app.routers import team as team_router
+
+
+def expected_points(profile):
+    return profile.play * (
+        simulation.APPEARANCE_POINTS
+        + simulation.GOAL_POINTS[profile.position] * profile.goals
+        + simulation.ASSIST_POINTS * profile.assists
+        + simulation.YELLOW_CARD_POINTS * profile.yellow_cards
+        + simulation.RED_CARD_POINTS * profile.red_cards
+        + simulation.OWN_GOAL_POINTS * profile.own_goals
+    )
+
+
+def mean(distribution):
+    low, probs = distribution
+    return float((np.arange(low, low + len(probs)) * probs).sum())
+
+
+def test_points_distributions():
+    striker = simulation.Profile("FWD", 0.8, 0.5, 0.2, 0.1, 0.01, 0.0)
+    low, probs = simulation.points_distribution(striker)
+    assert probs.sum() == pytest.approx(1.0)
+    assert mean((low, probs)) == pytest.approx(expected_points(striker), rel=1e-4)
+    # Ne joue pas : 0 point
+    assert probs[-low] > 0.2 - 1e-9
+
+    team = simulation.average_team(simulation.DEFAULT_PROFILES)
+    assert [p.position for p in team].count("DEF") == 4 and len(team) == 11
+    total = simulation.team_distribution(team)
+    assert total[1].sum() == pytest.approx(1.0)
+    assert mean(total) == pytest.approx(sum(expected_points(p) for p in team), rel=1e-4)
+
+
+def test_simulation_is_seeded_and_fast():
+    average = simulation.average_team(simulation.DEFAULT_PROFILES)
+    strong = [p._replace(play=0.95, goals=p.goals * 2) for p in average]
+    simulation.simulate(strong, average, 1_000, seed=0)  # import de NumPy
+
+    start = time.perf_counter()
+    result = simulation.simulate(strong, average, 100_000, seed=42)
+    elapsed = time.perf_counter() - start
+    assert elapsed < 0.1, f"{elapsed * 1e3:.1f} ms"
+
+    assert result == simulation.simulate(strong, average, 100_000, seed=42)
+    assert result["win"] + result["draw"] + result["loss"] == pytest.approx(1.0)
+    assert result["win"] > 0.7
+    exact = sum(expected_points(p) for p in strong)
+    assert result["home"]["expected_points"] == pytest.approx(exact, rel=0.01)
+    assert result["home"]["p10"] < result["home"]["p50"] < result["home"]["p90"]
+    # Équipes identiques : symétrique
+    mirror = simulation.simulate(average, average, 100_000, seed=1)
+    assert mirror["win"] == pytest.approx(mirror["loss"], abs=0.01)
+
+
+@pytest.fixture(scope="function")
+def setup(monkeypatch, override_db):
+    TestingSessionLocal = override_db
+    monkeypatch.setattr(team_router, "BUDGET", 100_000_000)
+
+    with TestingSessionLocal() as db:
+        for i in range(1, 3):
+            crud.create_user(db, schemas.UserCreate(email=f"user{i}@example.com", password="user123"))
+        for i, pos in enumerate(["GK", "FWD", "FWD", "FWD", "FWD", "FWD", "FWD"], start=1):
+            crud.create_player(db, schemas.PlayerCreate(name=f"P{i}", cost=1_000_000, position=pos, club="Club"))
+        # Le 2 marque à chaque match, les 5 à 7 ne jouent jamais
+        crud.ingest_match_stats(db, [
+            schemas.MatchStatIn(player_id=pid, gameweek=gw, goals=2 if pid == 2 else 0)
+            for gw in range(1, 11) for pid in (1, 2, 3, 4)
+        ])
+        db.commit()
+
+    with TestClient(app) as c:
+        def login(email, password):
+            token = c.post("/auth/login", data={"username": email, "password": password}).json()["access_token"]
+            return {"Authorization": f"Bearer {token}"}
+
+        yield c, TestingSessionLocal, [login(f"user{i}@example.com", "user123") for i in range(1, 3)]
+
+
+def test_profiles_follow_season_stats(setup):
+    _, SessionLocal, _ = setup
+    with SessionLocal() as db:
+        priors, season = simulation.season_priors(db)
+        scorer, benched = simulation.player_profiles(db, [2, 5], priors, season)
+    assert season == 10
+    # 20 buts en 10 matchs, rapprochés de la moyenne des attaquants (20 buts / 30 matchs)
+    assert scorer.goals == pytest.approx((20 + 5 * priors["FWD"].goals) / 15)
+    assert 1.0 < scorer.goals < 2.0
+    assert scorer.play > 0.9
+    # Aucun match : rapproché de la moyenne du poste
+    assert benched.play == pytest.approx(5 * priors["FWD"].play / 15)
+
+
+def test_matchup_route(setup):
+    client, _, (user1, user2) = setup
+    assert client.get("/team/matchup", headers=user1).status_code == 404
+
+    assert client.post("/team/", json={"name": "Scorers"}, headers=user1).status_code == 201
+    assert client.post("/team/players", json=[1, 2, 3], headers=user1).status_code == 200
+    assert client.post("/team/", json={"name": "Bench"}, headers=user2).status_code == 201
+    assert client.post("/team/players", json=[5, 6, 7], headers=user2).status_code == 200
+    bench_id = client.get("/team/", headers=user2).json()["id"]
+
+    res = client.get(f"/team/matchup?opponent={bench_id}&seed=7&simulations=20000", headers=user1)
+    assert res.status_code == 200
+    body = res.json()
+    assert body["seed"] == 7 and body["simulations"] == 20000
+    assert body["win"] > 0.8
+    assert body["home"]["name"] == "Scorers" and body["home"]["players"] == 3
+    assert body["away"] == {**body["away"], "team_id": bench_id, "name": "Bench", "players": 3}
+    assert client.get(f"/team/matchup?opponent={bench_id}&seed=7&simulations=20000", headers=user1).json() == body
+
+    # Sans adversaire : l'équipe moyenne (11 joueurs) ; seed tiré et renvoyé
+    average = client.get("/team/matchup", headers=user1).json()
+    assert average["away"]["team_id"] is None and average["away"]["players"] == 11
+    assert average["simulations"] == simulation.SIMULATIONS
+    replay = client.get(f"/team/matchup?seed={average['seed']}", headers=user1).json()
+    assert replay == average
+
+    assert client.get("/team/matchup?opponent=999", headers=user1).json()["detail"] == "Opponent team not found"
+    assert client.get("/team/matchup?simulations=0", headers=user1).status_code == 422
@@ -0,0 +1,124 @@
+# app/tests/test_snapshot.py
+
+#Ce fichier permet de tester :
+# - le format de l'instantané du catalogue (pages, recherche par id)
+# - le service de GET /players et GET /players/{id} depuis l'instantané
+# - la reconstruction après une écriture admin et l'échange atomique
+# - la lecture SQL tant que l'instantané est en retard (écriture ou suppression visibles tout de suite)
+# - la reconstruction après une écriture annoncée par un autre worker
+# - un autre worker sans broker partagé : version commune, lecture SQL puis reconstruction
+
+import time
+
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app import crud, events, schemas, snapshot
+
+
+@pytest.fixture(scope="function")
+def setup(monkeypatch, tmp_path, override_db):
+    TestingSessionLocal = override_db
+
+    with TestingSessionLocal() as db:
+        crud.create_user(db, schemas.UserCreate(email="admin@example.com", password="admin123"), is_admin=True)
+        for i, pos in enumerate(["GK", "DEF", "MID", "FWD", "MID"], start=1):
+            crud.create_player(db, schemas.PlayerCreate(name=f"Joueur é{i}", cost=500_000 * i, position=pos, club="Club"))
+
+    path = str(tmp_path / "catalog.snap")
+    with TestingSessionLocal() as db:
+        snapshot.refresh(path, db)
+
+    with TestClient(app) as c:
+        # Lectures SQL d'abord (référence), puis activation de l'instantané
+        expected = c.get("/players/?limit=100").json()
+        monkeypatch.setattr(snapshot, "reader", snapshot.Reader(path))
+        monkeypatch.setattr(snapshot, "refresher", snapshot.Refresher(path, debounce=0, session_factory=TestingSessionLocal))
+        yield c, path, expected
+
+
+def test_snapshot_pages_and_lookup(setup):
+    _, path, expected = setup
+    snap = snapshot.Snapshot.open(path)
+    assert snap.count == 5
+    assert orjson.loads(snap.page(0, 100)) == expected
+    assert orjson.loads(snap.page(1, 2)) == expected[1:3]
+    assert snap.page(5, 10) == b"[]" and snap.page(-3, 1) == snap.page(0, 1)
+    assert orjson.loads(snap.get(expected[3]["id"])) == expected[3]
+    assert snap.get(999) is None
+
+
+def test_players_served_from_snapshot(setup):
+    client, _, expected = setup
+    assert client.get("/players/?limit=100").json() == expected
+    assert client.get("/players/?skip=2&limit=2").json() == expected[2:4]
+    assert client.get("/players/2").json() == expected[1]
+    assert client.get("/players/999").status_code == 404
+    # ``fields=`` reste servi par la projection SQL
+    assert client.get("/players/2?fields=name").json() == {"id": 2, "name": "Joueur é2"}
+
+
+def wait_for_snapshot():
+    deadline = time.monotonic() + 5
+    while snapshot.current() is None:
+        assert time.monotonic() < deadline, "snapshot not refreshed"
+        time.sleep(0.02)
+    return snapshot.current()
+
+
+def admin_headers(client):
+    token = client.post("/auth/login", data={"username": "admin@example.com", "password": "admin123"}).json()
+    return {"Authorization": f"Bearer {token['access_token']}"}
+
+
+def test_admin_write_swaps_snapshot(setup):
+    client, path, _ = setup
+    before = snapshot.Snapshot.open(path)
+    assert client.put("/players/2", json={"cost": 42_000_000}, headers=admin_headers(client)).status_code == 200
+
+    # Lecture de sa propre écriture : SQL tant que l'instantané est en retard
+    assert client.get("/players/2").json()["cost"] == 42_000_000.0
+    after = wait_for_snapshot()
+    assert after.version >= events.hub.catalog_version > before.version
+    assert orjson.loads(after.get(2))["cost"] == 42_000_000.0
+    assert client.get("/players/2").json()["cost"] == 42_000_000.0
+    # L'ancienne projection reste lisible par les requêtes en cours
+    assert before.get(2) is not None and b"1000000" in before.get(2)
+
+
+def test_deleted_player_is_gone_immediately(setup):
+    client, _, expected = setup
+    assert client.delete("/players/3", headers=admin_headers(client)).status_code == 204
+    assert client.get("/players/3").status_code == 404
+    assert [p["id"] for p in client.get("/players/?limit=100").json()] == [1, 2, 4, 5]
+
+    assert wait_for_snapshot().get(3) is None
+    assert client.get("/players/3").status_code == 404
+    assert client.get("/players/?limit=100").json() == expected[:2] + expected[3:]
+
+
+def test_remote_write_rebuilds_snapshot(setup, override_db):
+    client, _, _ = setup
+    with override_db() as db:
+        crud.update_player(db, crud.get_player(db, 4), schemas.PlayerUpdate(cost=7_000_000))
+    # Écriture d'un autre worker : seule l'annonce du hub arrive
+    events.hub._deliver(events.CATALOG, "catalog", {"version": time.time_ns(), "action": "updated", "player_ids": [4]})
+    assert client.get("/players/4").json()["cost"] == 7_000_000.0
+    assert orjson.loads(wait_for_snapshot().get(4))["cost"] == 7_000_000.0
+
+
+def test_write_from_another_worker_without_broker(setup, override_db):
+    client, path, _ = setup
+    version = events.hub.catalog_version
+    with override_db() as db:
+        crud.update_player(db, crud.get_player(db, 5), schemas.PlayerUpdate(cost=3_000_000))
+    # Autre worker (broker local) : seule la version partagée avance, et il
+    # s'arrête avant de reconstruire l'instantané
+    snapshot.SharedVersion(path + ".version").advance(time.time_ns())
+    assert events.hub.catalog_version == version
+
+    assert client.get("/players/5").json()["cost"] == 3_000_000.0
+    assert orjson.loads(wait_for_snapshot().get(5))["cost"] == 3_000_000.0
+    assert client.get("/players/5").json()["cost"] == 3_000_000.0
@@ -0,0 +1,46 @@
+# app/tests/test_startup.py
+
+#Ce fichier permet de tester :
+# - le budget de temps d'import de app.main (interpréteur neuf, sur demande : STARTUP_IMPORT_BUDGET)
+# - l'import différé des dépendances lourdes ou rarement utilisées
+# - la mesure du démarrage à froid jusqu'à la première requête
+
+import os
+
+import pytest
+
+from app import startup_profile
+
+
+# Budget en secondes, vérifié seulement s'il est demandé (ex. 1.5 ; ~0,7 s
+# mesurées en local) : une mesure de temps n'a pas sa place dans la suite
+# par défaut, qui tourne sur des machines chargées ou lentes
+IMPORT_BUDGET = float(os.getenv("STARTUP_IMPORT_BUDGET") or 0)
+
+# Importés à la première utilisation seulement
+LAZY_MODULES = ["app.seed", "app.jobs", "dotenv", "numpy", "jose.jwt", "passlib.context", "argon2"]
+
+
+@pytest.fixture(scope="module")
+def records():
+    return startup_profile.import_times("app.main", runs=2)
+
+
+@pytest.mark.skipif(not IMPORT_BUDGET, reason="STARTUP_IMPORT_BUDGET not set")
+def test_import_time_budget(records):
+    seconds = startup_profile.total_time(records)
+    assert 0 < seconds < IMPORT_BUDGET, f"import app.main: {seconds:.3f}s > {IMPORT_BUDGET}s\n" + "\n".join(
+        f"{r.cumulative * 1000:8.1f} ms  {r.module}"
+        for r in sorted(records, key=lambda r: r.cumulative, reverse=True)[:15]
+    )
+
+
+def test_heavy_modules_are_imported_lazily(records):
+    imported = {r.module for r in records}
+    assert [m for m in LAZY_MODULES if m in imported] == []
+
+
+def test_cold_start_reaches_first_request():
+    result = startup_profile.cold_start("/")
+    assert result["status"] == 200
+    assert result["total"] >= result["import"] + result["startup"] + result["first_request"]
@@ -6,41 +6,20 @@
 # - ajout d’un joueur à l’équipe et vérif que le joueur est bien dedans
 # - tester le dépassement de budget
 # - tester qu’on ne peut pas gérer une équipe sans être connecté
-
-import os
-import tempfile
+# - rejouer une écriture avec le même Idempotency-Key sans modifier l'équipe
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 
 from app.main import app
-from app.database import Base
-from app.dependencies import get_db
-from app import crud, schemas
+from app import crud, idempotency, schemas
 from app.routers import team as team_router
 
 
 @pytest.fixture(scope="function")
-def client_user():
+def client_user(override_db):
     """Configure un client avec un utilisateur standard et quelques joueurs."""
-    db_fd, db_path = tempfile.mkstemp()
-    SQLALCHEMY_DATABASE_URL = f"sqlite:///{db_path}"
-    engine = create_engine(
-        SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-    )
-    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    Base.metadata.create_all(bind=engine)
-
-    def override_get_db():
-        db = TestingSessionLocal()
-        try:
-            yield db
-        finally:
-            db.close()
-
-    app.dependency_overrides[get_db] = override_get_db
+    TestingSessionLocal = override_db
 
     # Limiter le budget pour le test
     team_router.BUDGET = 2000000  # 2 millions
@@ -58,9 +37,6 @@ def client_user():
         c.headers.update({"Authorization": f"Bearer {token}"})
         yield c
 
-    os.close(db_fd)
-    os.unlink(db_path)
-
 
 def test_create_team_and_budget(client_user):
     # Création d'une équipe (sans joueurs au début)
@@ -107,4 +83,67 @@ def test_budget_limit(client_user):
     r = client_user.post("/team/players", json=[2])
     assert r.status_code == 400
     data = r.json()
-    assert "budget" in data["detail"].lower() or "Budget" in data["detail"]
\ No newline at end of file
+    assert "budget" in data["detail"].lower() or "Budget" in data["detail"]
+
+# Répétitions d'un client avec Idempotency-Key
+def test_idempotency_key_replays_response(client_user):
+    idempotency.store.clear()
+    key = {"Idempotency-Key": "create-1"}
+    first = client_user.post("/team/", json={"name": "Team Retry"}, headers=key)
+    assert first.status_code == 201
+    client_user.post("/team/players", json=[1])
+
+    # La répétition ne vide pas l'équipe : première réponse rejouée
+    replay = client_user.post("/team/", json={"name": "Team Retry"}, headers=key)
+    assert replay.status_code == 201
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert replay.json() == first.json()
+    assert len(client_user.get("/team/").json()["players"]) == 1
+
+    # Même clé, autre contenu → refus
+    r = client_user.post("/team/", json={"name": "Autre"}, headers=key)
+    assert r.status_code == 422
+
+    key = {"Idempotency-Key": "add-2"}
+    r = client_user.post("/team/players", json=[2], headers=key)
+    assert r.status_code == 400  # budget dépassé
+    replay = client_user.post("/team/players", json=[2], headers=key)
+    assert (replay.status_code, replay.json()) == (400, r.json())
+    idempotency.store.clear()
+
+
+def test_idempotency_concurrent_duplicates_run_once():
+    import threading
+
+    store = idempotency.IdempotencyStore(ttl=60)
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def call():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return idempotency.Response(b'{"ok":true}', status_code=201, media_type="application/json")
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(store.run(("k",), [1], call))) for _ in range(4)]
+    threads[0].start()
+    started.wait(5)
+    for t in threads[1:]:
+        t.start()
+    release.set()
+    for t in threads:
+        t.join(5)
+
+    assert len(calls) == 1
+    assert sorted(r.status_code for r in results) == [201] * 4
+    assert sum(r.headers.get("Idempotent-Replayed") == "true" for r in results) == 3
+
+
+def test_idempotency_entries_expire():
+    store = idempotency.IdempotencyStore(ttl=0, max_entries=10)
+    ok = lambda: idempotency.Response(b"{}", status_code=200)
+    store.run(("a",), None, ok)
+    store.run(("b",), None, ok)
+    assert len(store) <= 1  # l'entrée expirée est retirée au passage suivant
@@ -0,0 +1,116 @@
+# app/tests/test_team_cache.py
+
+#Ce fichier permet de tester :
+# - GET /team relu depuis le cache (seule la requête d'authentification reste)
+# - la vue gardée après une écriture d'équipe et périmée par un changement de prix
+# - les versions : une lecture concurrente d'une écriture n'est pas gardée
+# - la borne du LRU et les événements reçus des autres workers
+# - le cache désactivé par défaut sans broker partagé (EVENTS_BROKER=local)
+
+import os
+import subprocess
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app import crud, schemas, team_cache
+from app.routers import team as team_router
+from app.tests.query_budget import query_budget
+
+
+@pytest.fixture(scope="function")
+def setup(monkeypatch, override_db):
+    TestingSessionLocal = override_db
+    monkeypatch.setattr(team_router, "BUDGET", 100_000_000)
+
+    with TestingSessionLocal() as db:
+        crud.create_user(db, schemas.UserCreate(email="admin@example.com", password="admin123"), is_admin=True)
+        crud.create_user(db, schemas.UserCreate(email="user@example.com", password="user123"))
+        for i, pos in enumerate(["GK", "DEF", "MID"], start=1):
+            crud.create_player(db, schemas.PlayerCreate(name=f"P{i}", cost=1_000_000 * i, position=pos, club="Club"))
+
+    with TestClient(app) as c:
+        def login(email, password):
+            token = c.post("/auth/login", data={"username": email, "password": password}).json()["access_token"]
+            return {"Authorization": f"Bearer {token}"}
+
+        user, admin = login("user@example.com", "user123"), login("admin@example.com", "admin123")
+        assert c.post("/team/", json={"name": "Cache FC"}, headers=user).status_code == 201
+        yield c, user, admin
+
+
+def test_repeat_reads_are_served_from_cache(setup):
+    client, user, _ = setup
+    first = client.get("/team/", headers=user)
+    # Une lecture après l'écriture : seul l'utilisateur du token est lu en base
+    with query_budget(1, "GET /team (cache)"):
+        second = client.get("/team/", headers=user)
+    assert second.content == first.content
+    assert second.headers["content-type"] == "application/json"
+
+
+def test_mutations_and_price_changes_refresh_the_view(setup):
+    client, user, admin = setup
+    added = client.post("/team/players", json=[1, 2], headers=user).json()
+    with query_budget(1, "GET /team après ajout"):
+        assert client.get("/team/", headers=user).json() == added
+
+    assert client.put("/players/2", json={"cost": 5_000_000}, headers=admin).status_code == 200
+    team = client.get("/team/", headers=user).json()
+    assert [p["cost"] for p in team["players"]] == [1_000_000, 5_000_000]
+    assert team["budget_left"] == 94_000_000
+
+    removed = client.delete("/team/players/1", headers=user).json()
+    assert removed["budget_left"] == 95_000_000
+    assert client.get("/team/", headers=user).json() == removed
+
+
+def test_reads_racing_a_write_are_not_stored():
+    cache = team_cache.TeamViewCache(max_entries=10)
+    _, before = cache.lookup(7)
+    cache.team_changed(7)  # écriture validée pendant la lecture
+    assert not cache.store(7, before, b"stale")
+    assert cache.lookup(7)[0] is None
+
+    _, current = cache.lookup(7)
+    assert cache.store(7, current, b"fresh")
+    cache.catalog_changed()
+    assert cache.lookup(7)[0] is None
+
+    # Deux écritures concurrentes : seule la vue de la dernière à valider pourrait être gardée
+    versions = cache.versions(7)
+    cache.team_changed(7, versions, b"first")
+    cache.team_changed(7, versions, b"second")
+    assert cache.lookup(7)[0] is None
+
+
+def test_lru_bound_and_remote_events():
+    cache = team_cache.TeamViewCache(max_entries=2)
+    stale = cache.versions(1)
+    cache.team_changed(1)
+    for owner in (2, 3):
+        cache.store(owner, cache.versions(owner), b"%d" % owner)
+    # Le propriétaire 1 est évincé avec sa version : une lecture antérieure à
+    # son écriture ne redevient pas valable
+    assert len(cache) == 2
+    assert not cache.store(1, stale, b"old")
+    assert cache.store(1, cache.versions(1), b"1")
+    assert len(cache) == 2 and cache.lookup(2)[0] is None
+
+    # Écho de la vue gardée : conservée ; vue différente d'un autre worker : périmée
+    cache.team_published(1, b"1")
+    assert cache.lookup(1)[0] == b"1"
+    cache.team_published(1, b"other")
+    assert cache.lookup(1)[0] is None
+
+
+@pytest.mark.parametrize("broker, size, expected", [("local", "", "0"), ("postgres", "", "10000"), ("local", "500", "500")])
+def test_cache_is_off_by_default_without_shared_broker(broker, size, expected):
+    env = {**os.environ, "EVENTS_BROKER": broker, "TEAM_CACHE_SIZE": size}
+    out = subprocess.run(
+        [sys.executable, "-c", "from app import team_cache; print(team_cache.cache.max_entries)"],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    assert out.stdout.strip() == expected
@@ -0,0 +1,135 @@
+# app/tests/test_trending.py
+
+#Ce fichier permet de tester :
+# - les compteurs à fenêtre glissante : expiration des seaux, top-k, horloge en retard
+# - GET /players/trending après des recrutements, libérations et une réinitialisation d'équipe
+# - les transferts reçus des autres workers (ceux publiés par ce processus ne sont pas recomptés)
+# - le temps de lecture du top avec beaucoup de joueurs actifs
+
+import random
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app import crud, schemas, trending
+from app.routers import team as team_router
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(scope="function")
+def setup(monkeypatch, override_db):
+    TestingSessionLocal = override_db
+    monkeypatch.setattr(team_router, "BUDGET", 100_000_000)
+    monkeypatch.setattr(trending, "tracker", trending.Trending())
+
+    with TestingSessionLocal() as db:
+        for i in range(1, 3):
+            crud.create_user(db, schemas.UserCreate(email=f"user{i}@example.com", password="user123"))
+        for i, pos in enumerate(["GK", "DEF", "DEF", "MID", "FWD"], start=1):
+            crud.create_player(db, schemas.PlayerCreate(name=f"P{i}", cost=1_000_000, position=pos, club="Club"))
+
+    with TestClient(app) as c:
+        def login(email, password):
+            token = c.post("/auth/login", data={"username": email, "password": password}).json()["access_token"]
+            return {"Authorization": f"Bearer {token}"}
+
+        yield c, [login(f"user{i}@example.com", "user123") for i in range(1, 3)]
+
+
+def test_sliding_window_expires_old_buckets():
+    clock = FakeClock()
+    tracker = trending.Trending(clock=clock)
+    tracker.record(added=[1, 1, 2])
+    clock.now += 30 * 60
+    tracker.record(added=[2, 2, 3], removed=[1])
+    assert tracker.top("1h", "in") == [(2, 3), (1, 2), (3, 1)]
+
+    # 45 min plus tard : les transferts du premier seau sont sortis de l'heure
+    clock.now += 45 * 60
+    tracker.record(added=[3])
+    assert tracker.top("1h", "in") == [(2, 2), (3, 2)]
+    assert tracker.top("24h", "in", k=1) == [(2, 3)]
+    assert tracker.top("1h", "out") == [(1, 1)]
+
+    # Un transfert daté dans le passé (autre worker) compte dans le seau courant
+    tracker.record(added=[1], at=clock.now - 3600)
+    assert tracker.top("1h", "in") == [(2, 2), (3, 2), (1, 1)]
+
+    # Plus d'une journée sans transfert : tout est expiré
+    clock.now += 2 * 86400
+    assert tracker.top("1h", "in") == tracker.top("24h", "out") == []
+
+
+def test_top_candidates_follow_increments():
+    clock = FakeClock()
+    counter = trending.SlidingCounter(60, 10, keep=2)
+    for pid in (1, 1, 1, 2, 2, 3):
+        counter.add(pid, clock())
+    assert counter.top(2, clock()) == [(1, 3), (2, 2)]
+    # Le 3 dépasse le dernier candidat entre deux lectures
+    counter.add(3, clock())
+    counter.add(3, clock())
+    counter.add(3, clock())
+    assert counter.top(2, clock()) == [(3, 4), (1, 3)]
+    clock.now += 60 * 10
+    assert counter.top(2, clock()) == []
+
+
+def test_trending_route(setup):
+    client, (user1, user2) = setup
+    assert client.post("/team/", json={"name": "Trend FC"}, headers=user1).status_code == 201
+    assert client.post("/team/", json={"name": "Trend United"}, headers=user2).status_code == 201
+    assert client.post("/team/players", json=[1, 2, 4], headers=user1).status_code == 200
+    assert client.post("/team/players", json=[4, 5], headers=user2).status_code == 200
+    assert client.delete("/team/players/2", headers=user1).status_code == 200
+
+    res = client.get("/players/trending?window=1h&limit=2")
+    assert res.status_code == 200
+    assert res.json() == [{"player_id": 4, "transfers": 2}, {"player_id": 1, "transfers": 1}]
+    assert client.get("/players/trending?direction=out").json() == [{"player_id": 2, "transfers": 1}]
+
+    # Réinitialiser l'équipe libère tous ses joueurs
+    assert client.post("/team/", json={"name": "Trend FC"}, headers=user1).status_code == 201
+    out = client.get("/players/trending?direction=out&window=24h").json()
+    assert out == [{"player_id": 1, "transfers": 1}, {"player_id": 2, "transfers": 1}, {"player_id": 4, "transfers": 1}]
+
+    assert client.get("/players/trending?window=7d").status_code == 422
+    assert client.get("/players/trending?limit=500").status_code == 422
+
+
+def test_remote_transfers_are_counted_once(setup):
+    client, (user1, _) = setup
+    # Un autre worker a recruté le joueur 5 deux fois
+    trending._on_event(trending.TRANSFERS, "transfers", {"origin": "other", "at": time.time(), "in": [5, 5], "out": []})
+    # Écho de nos propres événements (broker Postgres) : déjà comptés
+    trending._on_event(trending.TRANSFERS, "transfers", {"origin": trending.ORIGIN, "at": time.time(), "in": [1], "out": []})
+
+    assert client.post("/team/", json={"name": "Trend FC"}, headers=user1).status_code == 201
+    assert client.post("/team/players", json=[1], headers=user1).status_code == 200
+    assert client.get("/players/trending").json() == [
+        {"player_id": 5, "transfers": 2}, {"player_id": 1, "transfers": 1},
+    ]
+
+
+def test_top_query_is_fast_with_many_players():
+    tracker = trending.Trending()
+    rng = random.Random(7)
+    for _ in range(50):
+        tracker.record(added=[rng.randrange(20_000) for _ in range(2_000)])
+    tracker.top("24h", "in")
+
+    start = time.perf_counter()
+    for _ in range(1_000):
+        tracker.record(added=[rng.randrange(20_000)])
+        tracker.top("24h", "in")
+    per_query = (time.perf_counter() - start) / 1_000
+    assert per_query < 1e-3, f"{per_query * 1e3:.3f} ms"
@@ -0,0 +1,51 @@
+# app/tests/test_ui.py
+
+#Ce fichier permet de tester :
+# - la page /ui servie depuis la mémoire avec des URLs statiques empreintes
+# - les en-têtes de cache (immutable, ETag fort, 304)
+# - les variantes précompressées
+
+import re
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+def test_ui_and_fingerprinted_static():
+    with TestClient(app) as c:
+        r = c.get("/ui")
+        assert r.status_code == 200
+        assert r.headers["cache-control"] == "no-cache"
+        html = r.text
+
+        # La page est revalidée : 304 si rien n'a changé
+        r = c.get("/ui", headers={"If-None-Match": r.headers["etag"]})
+        assert r.status_code == 304
+
+        # L'URL du script contient le hash de son contenu
+        match = re.search(r'src="(/static/js/app\.[0-9a-f]{12}\.js)"', html)
+        assert match
+        url = match.group(1)
+
+        r = c.get(url, headers={"Accept-Encoding": "identity"})
+        assert r.status_code == 200
+        assert "immutable" in r.headers["cache-control"]
+        assert "javascript" in r.headers["content-type"]
+        assert "content-encoding" not in r.headers
+        js_etag = r.headers["etag"]
+        assert not js_etag.startswith("W/")
+
+        r = c.get(url, headers={"Accept-Encoding": "gzip"})
+        assert r.headers["content-encoding"] == "gzip"
+        assert r.headers["vary"] == "Accept-Encoding"
+
+        r = c.get(url, headers={"Accept-Encoding": "gzip", "If-None-Match": r.headers["etag"]})
+        assert r.status_code == 304
+
+        # Ancienne URL non empreinte : servie mais à revalider
+        r = c.get("/static/js/app.js")
+        assert r.status_code == 200
+        assert r.headers["cache-control"] == "no-cache"
+
+        assert c.get("/static/js/missing.js").status_code == 404
@@ -0,0 +1,165 @@
+"""Joueurs les plus recrutés / libérés sur la dernière heure et les dernières 24 h.
+
+Compter les transferts dans ``audit_events`` à chaque requête ne tient pas
+la charge.  Chaque worker tient plutôt, en mémoire, des compteurs par
+joueur sur des fenêtres glissantes :
+
+- une fenêtre est un tampon circulaire de seaux (``1h`` : 60 seaux d'une
+  minute, ``24h`` : 96 seaux de 15 minutes) plus le total par joueur des
+  seaux vivants ;
+- un transfert incrémente le seau courant et le total : O(1) ;
+- quand le temps avance, les seaux sortis de la fenêtre sont retranchés
+  des totaux (coût amorti O(1) par transfert enregistré) ;
+- le top-k vient d'un petit ensemble de candidats (les ``TRENDING_KEEP``
+  premiers, complété à chaque incrément qui dépasse le dernier d'entre
+  eux) : une lecture ne trie que ces candidats.  Le tas complet
+  (``heapq.nlargest``) n'est recalculé qu'après l'expiration d'un seau.
+
+Les transferts sont enregistrés par ``crud.add_players_to_team`` et
+``crud.remove_player_from_team``, puis publiés sur le canal ``transfers``
+du hub : avec plusieurs workers (``EVENTS_BROKER=postgres``), chacun
+additionne aussi ceux des autres.  Les compteurs repartent de zéro au
+redémarrage.
+"""
+
+import heapq
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from . import events
+
+
+TRANSFERS = "transfers"
+
+# Fenêtres : durée d'un seau (s) et nombre de seaux
+WINDOWS: Dict[str, Tuple[int, int]] = {"1h": (60, 60), "24h": (900, 96)}
+DIRECTIONS = ("in", "out")
+
+# Candidats gardés par fenêtre, et limite de GET /players/trending
+TRENDING_KEEP = 50
+
+# Identifie les événements publiés par ce processus (déjà comptés)
+ORIGIN = uuid.uuid4().hex
+
+
+def _rank(item: Tuple[int, int]) -> Tuple[int, int]:
+    # Plus de transferts d'abord, puis le plus petit id
+    return item[1], -item[0]
+
+
+class SlidingCounter:
+    """Compteurs par joueur sur une fenêtre glissante de ``buckets`` seaux de ``width`` secondes."""
+
+    def __init__(self, width: int, buckets: int, keep: int = TRENDING_KEEP):
+        self.width = width
+        self.size = buckets
+        self.keep = keep
+        self.slots: List[Dict[int, int]] = [{} for _ in range(buckets)]
+        self.totals: Dict[int, int] = {}
+        self.head: Optional[int] = None
+        # Candidats du top : tout joueur absent a au plus ``_floor`` transferts
+        self._top: Set[int] = set()
+        self._floor = 0
+        self._stale = True
+
+    def _advance(self, now: float) -> int:
+        current = int(now // self.width)
+        if self.head is None:
+            self.head = current
+        elif current > self.head:
+            # Vide les seaux réutilisés par les numéros head+1..current
+            for number in range(max(self.head + 1, current - self.size + 1), current + 1):
+                self._expire(number % self.size)
+            self.head = current
+        # Horloge en retard (autre worker) : compté dans le seau courant
+        return self.head
+
+    def _expire(self, index: int) -> None:
+        slot = self.slots[index]
+        if not slot:
+            return
+        totals = self.totals
+        for player_id, count in slot.items():
+            left = totals[player_id] - count
+            if left:
+                totals[player_id] = left
+            else:
+                del totals[player_id]
+        slot.clear()
+        self._stale = True
+
+    def add(self, player_id: int, now: float, count: int = 1) -> None:
+        slot = self.slots[self._advance(now) % self.size]
+        slot[player_id] = slot.get(player_id, 0) + count
+        total = self.totals[player_id] = self.totals.get(player_id, 0) + count
+        if not self._stale and total > self._floor:
+            self._top.add(player_id)
+
+    def count(self, player_id: int, now: float) -> int:
+        self._advance(now)
+        return self.totals.get(player_id, 0)
+
+    def top(self, k: int, now: float) -> List[Tuple[int, int]]:
+        """``[(player_id, transferts), ...]`` par nombre décroissant (``k <= keep``)."""
+        self._advance(now)
+        if self._stale:
+            best = heapq.nlargest(self.keep, self.totals.items(), key=_rank)
+            self._stale = False
+        else:
+            best = sorted(((pid, self.totals[pid]) for pid in self._top), key=_rank, reverse=True)[:self.keep]
+        self._top = {pid for pid, _ in best}
+        self._floor = best[-1][1] if len(best) >= self.keep else 0
+        return best[:k]
+
+
+class Trending:
+    """Transferts entrants et sortants, pour chaque fenêtre de ``WINDOWS``."""
+
+    def __init__(self, windows: Dict[str, Tuple[int, int]] = WINDOWS, clock: Callable[[], float] = time.time):
+        self.clock = clock
+        self.counters = {
+            (window, direction): SlidingCounter(width, buckets)
+            for window, (width, buckets) in windows.items()
+            for direction in DIRECTIONS
+        }
+        self._lock = threading.Lock()
+
+    def record(self, added: Iterable[int] = (), removed: Iterable[int] = (), at: Optional[float] = None) -> None:
+        now = self.clock() if at is None else at
+        with self._lock:
+            for (window, direction), counter in self.counters.items():
+                for player_id in added if direction == "in" else removed:
+                    counter.add(player_id, now)
+
+    def top(self, window: str, direction: str, k: int = 10) -> List[Tuple[int, int]]:
+        counter = self.counters[(window, direction)]
+        with self._lock:
+            return counter.top(k, self.clock())
+
+    def clear(self) -> None:
+        with self._lock:
+            for key, counter in self.counters.items():
+                self.counters[key] = SlidingCounter(counter.width, counter.size, counter.keep)
+
+
+tracker = Trending()
+
+
+def record(added: Iterable[int] = (), removed: Iterable[int] = ()) -> None:
+    """Compte des transferts localement et les annonce aux autres workers."""
+    added, removed = list(added), list(removed)
+    if not added and not removed:
+        return
+    at = time.time()
+    tracker.record(added, removed, at)
+    events.hub.publish(TRANSFERS, "transfers", {"origin": ORIGIN, "at": at, "in": added, "out": removed})
+
+
+def _on_event(channel: str, event: str, data: dict) -> None:
+    if channel == TRANSFERS and data.get("origin") != ORIGIN:
+        tracker.record(data.get("in", ()), data.get("out", ()), data.get("at"))
+
+
+events.hub.listen(_on_event)
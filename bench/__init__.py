@@ -0,0 +1,5 @@
+"""Benchmarks de MyFantasyLeague.
+
+Chaque module se lance avec ``python -m bench.<module>`` depuis la racine
+du projet.
+"""
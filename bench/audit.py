@@ -0,0 +1,99 @@
+"""Benchmark : coût du journal d'audit sur les routes de mutation.
+
+Les scénarios de mutation de ``bench.suite`` (ajout / retrait d'un joueur,
+modification d'un joueur) sont mesurés avec et sans ``app.audit``, en
+alternant les deux modes sur plusieurs tours pour lisser la dérive de la
+machine.  L'écart attendu est de quelques pourcents : la requête ne fait
+qu'ajouter l'événement au tampon, l'``INSERT`` par lots a lieu dans le
+thread d'écriture.
+
+Usage ::
+
+    python -m bench.audit --url sqlite:///bench.db --scale tiny --requests 300 --rounds 3
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from .suite import SCENARIOS, Scenario, make_context, run_scenario
+
+MUTATIONS = ("team_add_players", "team_remove_player")
+
+
+async def _update_free_player(c, ctx, w, i):
+    # Joueur hors des effectifs des workers : les tours suivants ne dépassent pas le budget
+    taken = {pid for roster in ctx.rosters.values() for pid in roster}
+    player_id = ctx.player_id()
+    while player_id in taken:
+        player_id = ctx.player_id()
+    return await c.put(f"/players/{player_id}", json={"cost": 1_000_000 + i}, headers=ctx.admin_headers)
+
+
+def record_cost_us(n: int = 20_000) -> float:
+    """Coût moyen (µs) d'un ``record`` sur le chemin de la requête, écriture exclue."""
+    from app import audit
+
+    log = audit.AuditLog(capacity=n + 1, batch_size=n + 1)
+    log._thread = object()  # pas de thread d'écriture : seul l'ajout au tampon est mesuré
+    start = time.perf_counter()
+    for i in range(n):
+        log.record(audit.TEAM_ADD, 1, team_id=1, player_id=i)
+    return (time.perf_counter() - start) / n * 1e6
+
+
+async def run(args) -> None:
+    ctx = make_context(args)
+
+    import httpx
+
+    from app import audit
+    from app.main import app
+
+    scenarios = [s for s in SCENARIOS if s.name in MUTATIONS] + [Scenario("player_update", _update_free_player)]
+    samples = {(s.name, mode): [] for s in scenarios for mode in ("off", "on")}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for scenario in scenarios:
+            await run_scenario(client, ctx, scenario, min(20, args.requests), args.concurrency)  # échauffement
+        for round_ in range(args.rounds):
+            # Ordre inversé un tour sur deux : aucun mode ne passe toujours en premier
+            for mode in ("off", "on") if round_ % 2 == 0 else ("on", "off"):
+                audit.log.enabled = mode == "on"
+                for scenario in scenarios:
+                    result = await run_scenario(client, ctx, scenario, args.requests, args.concurrency)
+                    samples[(scenario.name, mode)].append(result)
+    audit.log.enabled = True
+    audit.log.stop()
+
+    print(f"{'scenario':<20} {'p50 off':>9} {'p50 on':>9} {'p95 off':>9} {'p95 on':>9} {'delta p50':>10}")
+    for scenario in scenarios:
+        off = samples[(scenario.name, "off")]
+        on = samples[(scenario.name, "on")]
+        p50_off = statistics.median(r["p50_ms"] for r in off)
+        p50_on = statistics.median(r["p50_ms"] for r in on)
+        p95_off = statistics.median(r["p95_ms"] for r in off)
+        p95_on = statistics.median(r["p95_ms"] for r in on)
+        print(f"{scenario.name:<20} {p50_off:>9.2f} {p50_on:>9.2f} {p95_off:>9.2f} {p95_on:>9.2f} "
+              f"{100 * (p50_on / p50_off - 1):>+9.1f}%")
+    cost = record_cost_us()
+    print(f"record() on the request path: {cost:.1f} us per event "
+          f"({100 * cost / 1000 / p50_off:.2f}% of the last p50 without audit)")
+    print(f"audit events written: {audit.log.written}, blocked: {audit.log.blocked}, dropped: {audit.log.dropped}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite:///bench.db")
+    parser.add_argument("--scale", default="tiny")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--quiet", action="store_true")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""Générateur de données synthétiques reproductibles.
+
+Produit un catalogue de joueurs, des utilisateurs et des équipes valides
+(composition 1-4-3-3 dans le budget) à l'échelle voulue.  Un même couple
+``(scale, seed)`` produit toujours exactement les mêmes données.
+
+Usage ::
+
+    python -m bench.datagen --url sqlite:///bench.db --scale small --seed 42
+    python -m bench.datagen --url sqlite:///bench.db --players 100000 --teams 1000000
+"""
+
+import argparse
+import bisect
+import hashlib
+import json
+import math
+import random
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import Column, MetaData, String, Table, create_engine, insert, select
+from sqlalchemy.engine import Engine
+
+from app import models
+from app.database import Base
+from app.seed import split_season_totals
+
+# Mot de passe commun à tous les utilisateurs générés (un seul hachage argon2)
+BENCH_PASSWORD = "bench123"
+BENCH_BUDGET = 100_000_000
+
+LINEUP = {"GK": 1, "DEF": 4, "MID": 3, "FWD": 3}
+POSITION_WEIGHTS = {"GK": 0.10, "DEF": 0.33, "MID": 0.33, "FWD": 0.24}
+
+SCALES = {
+    "tiny": {"players": 1_000, "users": 200, "teams": 200},
+    "small": {"players": 10_000, "users": 10_000, "teams": 10_000},
+    "medium": {"players": 100_000, "users": 100_000, "teams": 100_000},
+    "large": {"players": 100_000, "users": 1_000_000, "teams": 1_000_000},
+}
+
+BATCH_SIZE = 5_000
+
+_FIRST = ("Leo", "Hugo", "Lucas", "Noah", "Adam", "Liam", "Jules", "Enzo", "Nino", "Rayan",
+          "Kylian", "Marco", "Jonas", "Mateo", "Ivan", "Luka", "Sami", "Theo", "Yanis", "Oscar")
+_LAST = ("Martin", "Bernard", "Dubois", "Silva", "Moreau", "Garcia", "Muller", "Rossi", "Kane",
+         "Costa", "Novak", "Jensen", "Dias", "Lopez", "Schmidt", "Bakker", "Ivanov", "Sato")
+
+# Métadonnées du jeu de données (hors du schéma applicatif)
+_meta = MetaData()
+bench_meta = Table("bench_meta", _meta, Column("key", String, primary_key=True), Column("value", String))
+
+
+@dataclass(frozen=True)
+class Spec:
+    players: int
+    users: int
+    teams: int
+    seed: int = 42
+    with_stats: bool = True
+
+    @classmethod
+    def from_scale(cls, scale: str, seed: int = 42, **overrides) -> "Spec":
+        values = dict(SCALES[scale])
+        values.update({k: v for k, v in overrides.items() if v is not None})
+        return cls(seed=seed, **values)
+
+    def fingerprint(self) -> str:
+        return json.dumps(asdict(self), sort_keys=True)
+
+
+def user_email(i: int) -> str:
+    return f"user{i}@bench.local"
+
+
+def _batched(rows: Iterator[dict], size: int = BATCH_SIZE) -> Iterator[List[dict]]:
+    batch: List[dict] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_players(spec: Spec) -> Iterator[dict]:
+    """Catalogue : postes pondérés, coûts log-normaux entre 0,5 M€ et 200 M€."""
+    rng = random.Random(f"players-{spec.seed}")
+    positions = list(POSITION_WEIGHTS)
+    weights = list(POSITION_WEIGHTS.values())
+    clubs = max(20, spec.players // 25)
+    for i in range(1, spec.players + 1):
+        cost = int(min(200_000_000, max(500_000, rng.lognormvariate(math.log(8_000_000), 1.0))))
+        yield {
+            "id": i,
+            "name": f"{rng.choice(_FIRST)} {rng.choice(_LAST)} {i}",
+            "club": f"Club {rng.randrange(clubs)}",
+            "position": rng.choices(positions, weights)[0],
+            "cost": cost // 100_000 * 100_000,
+        }
+
+
+def iter_match_stats(spec: Spec, players: List[dict]) -> Iterator[dict]:
+    rng = random.Random(f"stats-{spec.seed}")
+    scoring = {"GK": 0.0, "DEF": 0.05, "MID": 0.15, "FWD": 0.4}
+    for p in players:
+        matches = rng.randint(0, 20)
+        totals = {
+            "matches": matches,
+            "goals": sum(rng.random() < scoring[p["position"]] for _ in range(matches)),
+            "assists": sum(rng.random() < 0.1 for _ in range(matches)),
+            "yellow_cards": sum(rng.random() < 0.12 for _ in range(matches)),
+            "red_cards": int(rng.random() < 0.03),
+            "own_goals": 0,
+            "substituted_in": rng.randint(0, matches // 3) if matches else 0,
+            "substituted_out": rng.randint(0, matches // 3) if matches else 0,
+        }
+        for event in split_season_totals(p["id"], totals):
+            yield event.model_dump()
+
+
+def _build_pools(players: List[dict]) -> Dict[str, List[Tuple[int, int]]]:
+    pools: Dict[str, List[Tuple[int, int]]] = {pos: [] for pos in LINEUP}
+    for p in players:
+        pools[p["position"]].append((p["id"], p["cost"]))
+    for pool in pools.values():
+        pool.sort(key=lambda item: item[1])
+    return pools
+
+
+def _completion_cost(pools: Dict[str, List[Tuple[int, int]]], slots: List[str], chosen: set) -> int:
+    """Coût minimal pour pourvoir ``slots`` avec des joueurs non encore choisis."""
+    total = 0
+    for pos in LINEUP:
+        need = slots.count(pos)
+        if need:
+            available = (cost for pid, cost in pools[pos] if pid not in chosen)
+            total += sum(next(available) for _ in range(need))
+    return total
+
+
+def pick_roster(rng: random.Random, pools: Dict[str, List[Tuple[int, int]]], budget: int) -> List[int]:
+    """Tire une composition 1-4-3-3 dont le coût total tient dans le budget.
+
+    Chaque place est tirée parmi les joueurs abordables ; un tirage n'est
+    retenu que si les places restantes peuvent encore être pourvues avec
+    le budget restant (sinon on prend le moins cher disponible).
+    """
+    slots = [pos for pos, n in LINEUP.items() for _ in range(n)]
+    rng.shuffle(slots)
+    chosen: List[int] = []
+    taken: set = set()
+    remaining = budget
+    for k, pos in enumerate(slots):
+        pool = pools[pos]
+        rest = slots[k + 1:]
+        limit = remaining - _completion_cost(pools, rest, taken)
+        # Nombre de joueurs abordables (le pool est trié par coût)
+        affordable = bisect.bisect_right(pool, limit, key=lambda item: item[1])
+        pick = None
+        for _ in range(8):
+            pid, cost = pool[rng.randrange(max(1, affordable))]
+            if pid not in taken and cost + _completion_cost(pools, rest, taken | {pid}) <= remaining:
+                pick = (pid, cost)
+                break
+        if pick is None:
+            # Repli : le moins cher encore disponible
+            pick = next(item for item in pool if item[0] not in taken)
+        chosen.append(pick[0])
+        taken.add(pick[0])
+        remaining -= pick[1]
+    return chosen
+
+
+def iter_teams(spec: Spec, pools: Dict[str, List[Tuple[int, int]]], budget: int) -> Iterator[Tuple[dict, List[int]]]:
+    rng = random.Random(f"teams-{spec.seed}")
+    for i in range(1, spec.teams + 1):
+        yield {"id": i, "name": f"Team {i}", "owner_id": i}, pick_roster(rng, pools, budget)
+
+
+def read_meta(engine: Engine) -> Optional[str]:
+    _meta.create_all(engine)
+    with engine.connect() as conn:
+        return conn.execute(select(bench_meta.c.value).where(bench_meta.c.key == "spec")).scalar()
+
+
+def generate(engine: Engine, spec: Spec, budget: int = BENCH_BUDGET, force: bool = False, verbose: bool = True) -> bool:
+    """Remplit la base avec le jeu de données décrit par ``spec``.
+
+    Ne fait rien si la base contient déjà exactement ce jeu de données.
+
+    Returns:
+        ``True`` si des données ont été générées.
+    """
+    if spec.teams > spec.users:
+        raise ValueError("teams must be <= users (one team per user)")
+    if not force and read_meta(engine) == spec.fingerprint():
+        if verbose:
+            print("[datagen] dataset already present, skipping")
+        return False
+
+    from app.auth import get_password_hash
+
+    started = time.perf_counter()
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+    def log(msg: str) -> None:
+        if verbose:
+            print(f"[datagen] {time.perf_counter() - started:7.1f}s {msg}")
+
+    players = list(iter_players(spec))
+    hashed = get_password_hash(BENCH_PASSWORD)
+    with engine.begin() as conn:
+        for batch in _batched(iter(players)):
+            conn.execute(insert(models.Player), batch)
+        log(f"{len(players)} players")
+
+        if spec.with_stats:
+            count = 0
+            for batch in _batched(iter_match_stats(spec, players)):
+                conn.execute(insert(models.PlayerMatchStat), batch)
+                count += len(batch)
+            log(f"{count} match stats")
+
+        users = ({"id": i, "email": user_email(i), "hashed_password": hashed, "is_admin": i == 1}
+                 for i in range(1, spec.users + 1))
+        for batch in _batched(users):
+            conn.execute(insert(models.User), batch)
+        log(f"{spec.users} users")
+
+        pools = _build_pools(players)
+        teams, links = [], []
+        for team, roster in iter_teams(spec, pools, budget):
+            teams.append(team)
+            links.extend({"team_id": team["id"], "player_id": pid} for pid in roster)
+            if len(teams) >= BATCH_SIZE:
+                conn.execute(insert(models.Team), teams)
+                conn.execute(insert(models.team_players), links)
+                teams, links = [], []
+        if teams:
+            conn.execute(insert(models.Team), teams)
+            conn.execute(insert(models.team_players), links)
+        log(f"{spec.teams} teams")
+
+    if spec.with_stats:
+        _rebuild_rollups(engine)
+        log("stat rollups")
+
+    with engine.begin() as conn:
+        conn.execute(bench_meta.delete())
+        conn.execute(insert(bench_meta), [{"key": "spec", "value": spec.fingerprint()}])
+    return True
+
+
+def _rebuild_rollups(engine: Engine) -> None:
+    """Agrégats calculés en une passe sur les événements générés."""
+    from sqlalchemy.orm import Session
+
+    from app import crud
+
+    with Session(engine) as db:
+        rollups: Dict[int, models.PlayerStatRollup] = {}
+        rows = db.execute(select(models.PlayerMatchStat.__table__).order_by("player_id", "gameweek"))
+        for row in rows.mappings():
+            rollup = rollups.get(row["player_id"])
+            if rollup is None:
+                rollup = rollups[row["player_id"]] = crud._new_rollup(row["player_id"])
+            crud._apply_to_rollup(rollup, dict(row))
+        db.add_all(rollups.values())
+        db.commit()
+
+
+def checksum(engine: Engine) -> str:
+    """Empreinte du contenu (pour vérifier la reproductibilité)."""
+    digest = hashlib.sha256()
+    with engine.connect() as conn:
+        for table in (models.Player.__table__, models.Team.__table__, models.team_players):
+            for row in conn.execute(select(table).order_by(*table.primary_key.columns)):
+                digest.update(repr(tuple(row)).encode())
+    return digest.hexdigest()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite:///bench.db")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="tiny")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--players", type=int)
+    parser.add_argument("--users", type=int)
+    parser.add_argument("--teams", type=int)
+    parser.add_argument("--no-stats", action="store_true")
+    parser.add_argument("--force", action="store_true")
+    args = parser.parse_args()
+
+    spec = Spec.from_scale(
+        args.scale, seed=args.seed, players=args.players, users=args.users, teams=args.teams,
+        with_stats=not args.no_stats,
+    )
+    engine = create_engine(args.url)
+    generate(engine, spec, force=args.force)
+    print(f"[datagen] checksum {checksum(engine)}")
+
+
+if __name__ == "__main__":
+    main()
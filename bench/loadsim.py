@@ -0,0 +1,243 @@
+"""Simulation de charge « rush du mercato » contre une instance locale.
+
+Des sessions utilisateur arrivent selon un processus de Poisson (charge
+ouverte : les arrivées n'attendent pas la fin des sessions en cours).
+Chaque session se connecte puis enchaîne, entre des temps de réflexion
+exponentiels, des lectures de ``/team`` et des ajouts / retraits de
+joueurs.  On rapporte les percentiles de latence par fenêtre de temps,
+les taux d'erreur et, à la fin, les violations d'invariants (budget,
+tactique 1-4-3-3) constatées dans la base, ou dans chaque shard des
+équipes avec ``SHARD_URLS`` (``--shard-urls``).
+
+Les comptes utilisés sont ceux de ``bench.datagen`` (``userN@bench.local``).
+
+Usage ::
+
+    # instance déjà lancée
+    python -m bench.loadsim --base-url http://localhost:8000 --db-url sqlite:///bench.db
+
+    # lance uvicorn avec 4 workers sur la base de bench
+    python -m bench.loadsim --spawn --workers 4 --db-url sqlite:///bench.db --rate 50 --duration 60
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import httpx
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from .datagen import BENCH_BUDGET, BENCH_PASSWORD, LINEUP, user_email
+from .suite import percentile
+
+# Répartition des actions pendant une session
+ACTION_MIX = {"team_read": 0.5, "team_add": 0.3, "team_remove": 0.2}
+
+
+@dataclass
+class Recorder:
+    """Latences et erreurs par action et par fenêtre de temps."""
+
+    window: float
+    started: float = field(default_factory=time.perf_counter)
+    samples: Dict[Tuple[int, str], List[float]] = field(default_factory=lambda: defaultdict(list))
+    outcomes: Dict[Tuple[int, str], Dict[str, int]] = field(
+        default_factory=lambda: defaultdict(lambda: {"ok": 0, "rejected": 0, "error": 0})
+    )
+
+    def record(self, action: str, start: float, status: Optional[int]) -> None:
+        now = time.perf_counter()
+        key = (int((start - self.started) // self.window), action)
+        self.samples[key].append(now - start)
+        if status is None or status >= 500:
+            self.outcomes[key]["error"] += 1
+        elif status >= 400:
+            # Refus métier attendus (budget, tactique, déjà présent…)
+            self.outcomes[key]["rejected"] += 1
+        else:
+            self.outcomes[key]["ok"] += 1
+
+    def report(self) -> List[dict]:
+        rows = []
+        for (slot, action), values in sorted(self.samples.items()):
+            values.sort()
+            outcome = self.outcomes[(slot, action)]
+            total = sum(outcome.values())
+            rows.append({
+                "t": round(slot * self.window, 1),
+                "action": action,
+                "count": total,
+                "p50_ms": round(percentile(values, 0.50) * 1000, 1),
+                "p95_ms": round(percentile(values, 0.95) * 1000, 1),
+                "p99_ms": round(percentile(values, 0.99) * 1000, 1),
+                "rejected_pct": round(100 * outcome["rejected"] / total, 1),
+                "error_pct": round(100 * outcome["error"] / total, 1),
+            })
+        return rows
+
+
+async def timed(recorder: Recorder, action: str, coro) -> Optional[httpx.Response]:
+    start = time.perf_counter()
+    try:
+        response = await coro
+    except httpx.HTTPError:
+        recorder.record(action, start, None)
+        return None
+    recorder.record(action, start, response.status_code)
+    return response
+
+
+async def session(client: httpx.AsyncClient, recorder: Recorder, rng: random.Random, args) -> None:
+    """Une visite : connexion puis quelques actions séparées par des temps de réflexion."""
+    user = rng.randint(1, args.users)
+    r = await timed(recorder, "login", client.post(
+        "/auth/login", data={"username": user_email(user), "password": BENCH_PASSWORD}
+    ))
+    if r is None or r.status_code != 200:
+        return
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    roster: List[int] = []
+
+    actions, weights = list(ACTION_MIX), list(ACTION_MIX.values())
+    for _ in range(max(1, int(rng.expovariate(1 / args.actions)))):
+        await asyncio.sleep(rng.expovariate(1 / args.think))
+        action = rng.choices(actions, weights)[0]
+        if action == "team_remove" and roster:
+            r = await timed(recorder, action, client.delete(f"/team/players/{rng.choice(roster)}", headers=headers))
+        elif action == "team_add":
+            r = await timed(recorder, action, client.post(
+                "/team/players", json=[rng.randint(1, args.players)], headers=headers
+            ))
+        else:
+            r = await timed(recorder, "team_read", client.get("/team/", headers=headers))
+        if r is not None and r.status_code == 200:
+            roster = [p["id"] for p in r.json().get("players", [])]
+
+
+async def simulate(args) -> Recorder:
+    recorder = Recorder(window=args.window)
+    rng = random.Random(args.seed)
+    limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        tasks = set()
+        deadline = time.perf_counter() + args.duration
+        while time.perf_counter() < deadline:
+            task = asyncio.create_task(session(client, recorder, random.Random(rng.random()), args))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            # Arrivées de Poisson : intervalle exponentiel de moyenne 1/rate
+            await asyncio.sleep(rng.expovariate(args.rate))
+        if tasks:
+            await asyncio.wait(tasks, timeout=args.drain)
+            for task in tasks:
+                task.cancel()
+    return recorder
+
+
+def check_invariants(db_url: str, budget: int, shard_urls: Sequence[str] = ()) -> List[str]:
+    """Parcourt l'état final : budget et tactique de chaque équipe, sur chaque shard."""
+    from app import models
+    from app.shards import ShardRouter
+
+    players = models.Player.__table__
+    link = models.team_players
+    stmt = select(link.c.team_id, players.c.cost, players.c.position).join(players, players.c.id == link.c.player_id)
+    # Sans shard, ``scatter`` lit la base principale ; sinon chaque shard
+    # (l'id d'équipe est unique entre shards, sa copie du catalogue porte les coûts)
+    router = ShardRouter(shard_urls, primary_factory=sessionmaker(bind=create_engine(db_url)))
+    totals: Dict[int, int] = defaultdict(int)
+    counts: Dict[int, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    for rows in router.scatter(lambda db: db.execute(stmt).all()):
+        for team_id, cost, position in rows:
+            totals[team_id] += cost
+            counts[team_id][position if position in LINEUP else "MID"] += 1
+
+    violations = []
+    for team_id, total in totals.items():
+        if total > budget:
+            violations.append(f"team {team_id}: budget {total} > {budget}")
+        for position, count in counts[team_id].items():
+            if count > LINEUP[position]:
+                violations.append(f"team {team_id}: {count} {position} > {LINEUP[position]}")
+    return violations
+
+
+def spawn_server(args) -> subprocess.Popen:
+    env = dict(os.environ, DATABASE_URL=args.db_url, BUDGET=str(args.budget), METRICS_ENABLED="1",
+               SHARD_URLS=",".join(args.shard_urls))
+    cmd = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(args.port),
+           "--workers", str(args.workers), "--log-level", "warning"]
+    proc = subprocess.Popen(cmd, env=env)
+    for _ in range(100):
+        try:
+            if httpx.get(f"{args.base_url}/", timeout=0.5).status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise SystemExit("server did not start")
+
+
+def print_report(rows: List[dict]) -> None:
+    print(f"{'t(s)':>6} {'action':<12} {'count':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'rej%':>6} {'err%':>6}")
+    for r in rows:
+        print(f"{r['t']:>6} {r['action']:<12} {r['count']:>6} {r['p50_ms']:>7.1f}ms {r['p95_ms']:>7.1f}ms "
+              f"{r['p99_ms']:>7.1f}ms {r['rejected_pct']:>6.1f} {r['error_pct']:>6.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default=None)
+    parser.add_argument("--db-url", default="sqlite:///bench.db", help="base lue pour vérifier les invariants")
+    parser.add_argument("--shard-urls", type=lambda v: [u.strip() for u in v.split(",") if u.strip()],
+                        default=os.getenv("SHARD_URLS", ""), help="shards des équipes (défaut : SHARD_URLS)")
+    parser.add_argument("--spawn", action="store_true", help="lance uvicorn localement")
+    parser.add_argument("--workers", type=int, default=1, help="workers uvicorn (avec --spawn)")
+    parser.add_argument("--port", type=int, default=8077)
+    parser.add_argument("--rate", type=float, default=20.0, help="arrivées de sessions par seconde")
+    parser.add_argument("--duration", type=float, default=30.0, help="durée des arrivées (s)")
+    parser.add_argument("--think", type=float, default=1.0, help="temps de réflexion moyen (s)")
+    parser.add_argument("--actions", type=float, default=6.0, help="actions moyennes par session")
+    parser.add_argument("--users", type=int, default=200, help="comptes userN@bench.local disponibles")
+    parser.add_argument("--players", type=int, default=1000, help="taille du catalogue")
+    parser.add_argument("--budget", type=int, default=int(os.getenv("BUDGET", BENCH_BUDGET)))
+    parser.add_argument("--max-connections", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--window", type=float, default=5.0, help="fenêtre des percentiles (s)")
+    parser.add_argument("--drain", type=float, default=60.0, help="attente max des sessions en cours (s)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="écrit le rapport JSON dans ce fichier")
+    args = parser.parse_args()
+    args.base_url = args.base_url or f"http://127.0.0.1:{args.port}"
+
+    server = spawn_server(args) if args.spawn else None
+    try:
+        recorder = asyncio.run(simulate(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    rows = recorder.report()
+    print_report(rows)
+    violations = check_invariants(args.db_url, args.budget, args.shard_urls)
+    print(f"invariant violations: {len(violations)}")
+    for line in violations[:20]:
+        print(f"  {line}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"windows": rows, "violations": violations}, f, indent=2)
+    sys.exit(1 if violations else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Benchmark : vues complètes contre projections ``fields=``.
+
+Mesure, pour chaque route, la taille de la réponse et la latence
+(médiane et p95, application appelée en mémoire via ``TestClient``)
+avec et sans ``fields=id,name,position,cost`` — les champs utilisés par
+la liste de l'UI.  Les données viennent de ``bench.datagen``.
+
+Usage ::
+
+    python -m bench.projection --url sqlite:///bench.db --scale tiny --limit 500
+"""
+
+import argparse
+import statistics
+import time
+from typing import Callable, List
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from .datagen import BENCH_BUDGET, BENCH_PASSWORD, Spec, generate, user_email
+from .suite import percentile
+
+UI_FIELDS = "id,name,position,cost"
+
+
+def measure(call: Callable, repeat: int) -> dict:
+    call()  # échauffement
+    timings: List[float] = []
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = call()
+        timings.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.text
+        size = len(response.content)
+    timings.sort()
+    return {
+        "bytes": size,
+        "p50_ms": statistics.median(timings) * 1000,
+        "p95_ms": percentile(timings, 0.95) * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite:///bench.db")
+    parser.add_argument("--scale", default="tiny")
+    parser.add_argument("--limit", type=int, default=500, help="taille de page pour GET /players")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    engine = create_engine(args.url, connect_args={"check_same_thread": False} if args.url.startswith("sqlite") else {})
+    generate(engine, Spec.from_scale(args.scale), verbose=False)
+    Session = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+    from fastapi.testclient import TestClient
+
+    from app.dependencies import get_db
+    from app.main import app
+    from app.routers import team as team_router
+
+    def override_get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    team_router.BUDGET = BENCH_BUDGET
+
+    # Sans événement de démarrage : la base de bench est déjà remplie
+    client = TestClient(app)
+    token = client.post("/auth/login", data={"username": user_email(2), "password": BENCH_PASSWORD}).json()
+    headers = {"Authorization": f"Bearer {token['access_token']}"}
+
+    cases = [
+        (f"GET /players?limit={args.limit}", f"/players/?limit={args.limit}", {}),
+        ("GET /players/{id}", "/players/42", {}),
+        ("GET /team", "/team/", headers),
+    ]
+    print(f"{'route':<26} {'bytes':>16} {'p50 (ms)':>16} {'p95 (ms)':>16}")
+    for label, path, hdrs in cases:
+        sep = "&" if "?" in path else "?"
+        full = measure(lambda: client.get(path, headers=hdrs), args.repeat)
+        sparse = measure(lambda: client.get(f"{path}{sep}fields={UI_FIELDS}", headers=hdrs), args.repeat)
+        print(
+            f"{label:<26} {full['bytes']:>7} -> {sparse['bytes']:<6} "
+            f"{full['p50_ms']:>7.2f} -> {sparse['p50_ms']:<6.2f} {full['p95_ms']:>7.2f} -> {sparse['p95_ms']:<6.2f} "
+            f"(-{100 * (1 - sparse['bytes'] / full['bytes']):.0f}% bytes)"
+        )
+    app.dependency_overrides.clear()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Micro-benchmark : coût de sérialisation par joueur.
+
+Compare, pour une liste de joueurs ORM :
+
+- ``before`` : le chemin historique (``PlayerOut.from_orm`` par ligne,
+  revalidation de la liste par le ``response_model`` puis ``json.dumps``
+  comme le fait ``JSONResponse``) ;
+- ``after`` : ``app.serializers`` (dictionnaires construits directement et
+  encodés avec orjson).
+
+Usage : ``python -m bench.serialization --rows 5000 --repeat 20``
+"""
+
+import argparse
+import json
+import time
+from typing import Callable, List
+
+import orjson
+from pydantic import TypeAdapter
+
+from app import models, schemas, serializers
+
+
+def make_players(n: int) -> List[models.Player]:
+    positions = ("GK", "DEF", "MID", "FWD")
+    return [
+        models.Player(
+            id=i,
+            name=f"Player {i}",
+            club=f"Club {i % 20}",
+            position=positions[i % 4],
+            cost=1_000_000 + i * 1000,
+        )
+        for i in range(1, n + 1)
+    ]
+
+
+_list_adapter = TypeAdapter(List[schemas.PlayerOut])
+
+
+def encode_before(players: List[models.Player]) -> bytes:
+    objs = [schemas.PlayerOut.model_validate(p) for p in players]
+    value = _list_adapter.validate_python(objs, from_attributes=True)
+    content = _list_adapter.dump_python(value, mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def encode_after(players: List[models.Player]) -> bytes:
+    return orjson.dumps(serializers.players_to_list(players))
+
+
+def per_row_us(fn: Callable, players: List[models.Player], repeat: int) -> float:
+    fn(players)  # échauffement
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(players)
+        best = min(best, time.perf_counter() - start)
+    return best / len(players) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    players = make_players(args.rows)
+    assert json.loads(encode_before(players)) == json.loads(encode_after(players))
+
+    before = per_row_us(encode_before, players, args.repeat)
+    after = per_row_us(encode_after, players, args.repeat)
+    print(f"rows={args.rows}")
+    print(f"before: {before:.2f} µs/row")
+    print(f"after:  {after:.2f} µs/row  (x{before / after:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+"""Benchmarks de scénarios sur l'application ASGI, en processus.
+
+Chaque route des routers est exercée via ``httpx.AsyncClient`` branché
+directement sur l'application (pas de réseau).  Pour chaque scénario on
+mesure p50/p95/p99 et le débit, puis on compare à une référence JSON
+(``bench/baselines/<scale>.json``) : une dégradation au-delà de la
+tolérance fait échouer la commande (code de sortie 1).  Un scénario dont
+une réponse n'a pas le statut attendu échoue aussi (avec ou sans
+référence), et aucune référence n'est enregistrée dans ce cas.
+
+Usage ::
+
+    python -m bench.suite --scale tiny                    # mesure + comparaison
+    python -m bench.suite --scale tiny --save-baseline    # (re)crée la référence
+    python -m bench.suite --scale small --only team_read --requests 2000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import pathlib
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+
+BASELINE_DIR = pathlib.Path(__file__).resolve().parent / "baselines"
+
+
+@dataclass
+class Context:
+    """État partagé par les scénarios (jeu de données, tokens)."""
+
+    spec: "object"
+    rng: random.Random
+    user_tokens: Dict[int, str]
+    admin_token: str
+    rosters: Dict[int, List[int]]
+    run_id: int = 0
+    # Valeur de travail propre à chaque worker (id créé, joueur retiré…)
+    state: Dict[int, int] = field(default_factory=dict)
+
+    def user_headers(self, worker: int) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.user_tokens[worker]}"}
+
+    @property
+    def admin_headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.admin_token}"}
+
+    def player_id(self) -> int:
+        return self.rng.randint(1, self.spec.players)
+
+
+Request = Callable[["object", Context, int, int], Awaitable["object"]]
+
+
+@dataclass
+class Scenario:
+    """Une requête mesurée, précédée d'une préparation éventuelle non mesurée."""
+
+    name: str
+    request: Request
+    setup: Optional[Request] = None
+    prepare: Optional[Callable] = None  # une fois par worker avant la mesure
+    requests: Optional[int] = None  # plafond propre au scénario (ex: login argon2)
+    expect: int = 200
+
+
+# Les scénarios reçoivent (client, ctx, worker, iteration).  Chaque worker
+# agit sur son propre utilisateur/équipe : les mutations ne se gênent pas.
+
+async def _root(c, ctx, w, i):
+    return await c.get("/")
+
+
+async def _list_players(c, ctx, w, i):
+    return await c.get("/players/", params={"skip": ctx.rng.randrange(0, max(1, ctx.spec.players - 50)), "limit": 50})
+
+
+async def _list_players_large(c, ctx, w, i):
+    return await c.get("/players/", params={"skip": 0, "limit": 1000})
+
+
+async def _read_player(c, ctx, w, i):
+    return await c.get(f"/players/{ctx.player_id()}")
+
+
+async def _player_stats(c, ctx, w, i):
+    return await c.get(f"/players/{ctx.player_id()}/stats")
+
+
+async def _player_form(c, ctx, w, i):
+    return await c.get(f"/players/{ctx.player_id()}/form")
+
+
+async def _create_player(c, ctx, w, i):
+    return await c.post(
+        "/players/",
+        json={"name": f"Bench {w}-{i}", "cost": 1_000_000, "position": "MID", "club": "Bench FC"},
+        headers=ctx.admin_headers,
+    )
+
+
+async def _update_player(c, ctx, w, i):
+    return await c.put(f"/players/{ctx.player_id()}", json={"cost": 1_000_000 + i}, headers=ctx.admin_headers)
+
+
+async def _delete_player_setup(c, ctx, w, i):
+    r = await _create_player(c, ctx, w, i)
+    ctx.state[w] = r.json()["id"]
+
+
+async def _delete_player(c, ctx, w, i):
+    return await c.delete(f"/players/{ctx.state[w]}", headers=ctx.admin_headers)
+
+
+async def _ingest_stats(c, ctx, w, i):
+    # Journées propres à ce lancement : la table est en ajout seul
+    gameweek = 1000 + ctx.run_id * 1_000_000 + w * 10_000 + i
+    return await c.post("/players/stats", json=[{"player_id": ctx.player_id(), "gameweek": gameweek}], headers=ctx.admin_headers)
+
+
+async def _register(c, ctx, w, i):
+    # Domaine réservé mais accepté par EmailStr (``.local`` est refusé : 422)
+    email = f"new{ctx.run_id}-{w}-{i}-{time.perf_counter_ns()}@example.com"
+    return await c.post("/auth/register", json={"email": email, "password": "bench123"})
+
+
+async def _login(c, ctx, w, i):
+    from .datagen import BENCH_PASSWORD, user_email
+    return await c.post("/auth/login", data={"username": user_email(w + 1), "password": BENCH_PASSWORD})
+
+
+async def _read_team(c, ctx, w, i):
+    return await c.get("/team/", headers=ctx.user_headers(w))
+
+
+async def _reset_team(c, ctx, w, i):
+    return await c.post("/team/", json={"name": f"Team {w + 1}"}, headers=ctx.user_headers(w))
+
+
+async def _restore_roster(c, ctx, w):
+    """Remet l'équipe du worker dans l'état généré (11 joueurs)."""
+    await _reset_team(c, ctx, w, 0)
+    r = await c.post("/team/players", json=ctx.rosters[w], headers=ctx.user_headers(w))
+    assert r.status_code == 200, r.text
+    ctx.state[w] = ctx.rosters[w][-1]
+
+
+async def _swap_out(c, ctx, w, i):
+    # Retire un joueur (non mesuré) pour pouvoir le rajouter ensuite
+    await c.delete(f"/team/players/{ctx.state[w]}", headers=ctx.user_headers(w))
+
+
+async def _add_players(c, ctx, w, i):
+    return await c.post("/team/players", json=[ctx.state[w]], headers=ctx.user_headers(w))
+
+
+async def _swap_in(c, ctx, w, i):
+    await c.post("/team/players", json=[ctx.state[w]], headers=ctx.user_headers(w))
+
+
+async def _remove_player(c, ctx, w, i):
+    return await c.delete(f"/team/players/{ctx.state[w]}", headers=ctx.user_headers(w))
+
+
+async def _metrics(c, ctx, w, i):
+    return await c.get("/metrics")
+
+
+async def _ui(c, ctx, w, i):
+    return await c.get("/ui")
+
+
+SCENARIOS: List[Scenario] = [
+    Scenario("root", _root),
+    Scenario("ui", _ui),
+    Scenario("metrics", _metrics, requests=200),
+    Scenario("players_list", _list_players),
+    Scenario("players_list_1000", _list_players_large, requests=200),
+    Scenario("player_read", _read_player),
+    Scenario("player_stats", _player_stats),
+    Scenario("player_form", _player_form),
+    Scenario("player_create", _create_player, expect=201),
+    Scenario("player_update", _update_player),
+    Scenario("player_delete", _delete_player, setup=_delete_player_setup, expect=204),
+    Scenario("stats_ingest", _ingest_stats, expect=201),
+    Scenario("auth_register", _register, requests=40, expect=201),
+    Scenario("auth_login", _login, requests=40),
+    Scenario("team_read", _read_team, prepare=_restore_roster),
+    Scenario("team_add_players", _add_players, setup=_swap_out, prepare=_restore_roster),
+    Scenario("team_remove_player", _remove_player, setup=_swap_in, prepare=_restore_roster),
+    Scenario("team_reset", _reset_team, expect=201, requests=100),
+]
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * q
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+async def run_scenario(client, ctx: Context, scenario: Scenario, requests: int, concurrency: int) -> dict:
+    total = min(requests, scenario.requests or requests)
+    latencies: List[float] = []
+    errors = 0
+    first_error: Optional[str] = None
+    counter = iter(range(total))
+    ctx.state.clear()
+    if scenario.prepare is not None:
+        await asyncio.gather(*(scenario.prepare(client, ctx, w) for w in range(concurrency)))
+
+    async def worker(w: int) -> None:
+        nonlocal errors, first_error
+        for i in counter:
+            if scenario.setup is not None:
+                await scenario.setup(client, ctx, w, i)
+            start = time.perf_counter()
+            response = await scenario.request(client, ctx, w, i)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != scenario.expect:
+                errors += 1
+                if first_error is None:
+                    first_error = f"{response.status_code} {response.text[:200]}"
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(w) for w in range(concurrency)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    result = {
+        "requests": total,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        # Débit mesuré sur le temps mural (préparations comprises)
+        "rps": round(total / wall, 1) if wall else 0.0,
+    }
+    if first_error is not None:
+        # Statut inattendu : la latence mesurée n'est pas celle de la route
+        result["first_error"] = f"expected {scenario.expect}, got {first_error}"
+    return result
+
+
+def failures(results: Dict[str, dict]) -> List[str]:
+    """Scénarios dont au moins une réponse n'a pas le statut attendu."""
+    return [
+        f"{name}: {r['errors']}/{r['requests']} unexpected status ({r['first_error']})"
+        for name, r in results.items() if r["errors"]
+    ]
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    """Liste des régressions : p95 plus lent ou débit plus faible que la tolérance."""
+    regressions = []
+    for name, current in results.items():
+        ref = baseline.get(name)
+        if not ref:
+            continue
+        if current["p95_ms"] > ref["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {ref['p95_ms']}ms -> {current['p95_ms']}ms")
+        if current["rps"] < ref["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: rps {ref['rps']} -> {current['rps']}")
+        if current["errors"] > ref.get("errors", 0):
+            regressions.append(f"{name}: errors {ref.get('errors', 0)} -> {current['errors']}")
+    return regressions
+
+
+def make_context(args) -> Context:
+    """Génère le jeu de données et prépare tokens et effectifs des workers."""
+    # La base de bench doit être connue avant l'import de l'application
+    os.environ["DATABASE_URL"] = args.url
+
+    from sqlalchemy import create_engine
+
+    from app.auth import create_access_token
+    from app.routers import team as team_router
+
+    from .datagen import BENCH_BUDGET, Spec, _build_pools, generate, iter_players, iter_teams, user_email
+
+    spec = Spec.from_scale(args.scale, seed=args.seed)
+    generate(create_engine(args.url), spec, verbose=not args.quiet)
+    team_router.BUDGET = BENCH_BUDGET
+
+    if args.concurrency > spec.teams:
+        raise SystemExit("concurrency must not exceed the number of teams")
+    # Worker w -> utilisateur (et équipe) w+1 ; l'utilisateur 1 est aussi admin
+    teams = iter_teams(spec, _build_pools(list(iter_players(spec))), BENCH_BUDGET)
+    rosters = {w: roster for w, (_, roster) in zip(range(args.concurrency), teams)}
+    ctx = Context(
+        spec=spec,
+        rng=random.Random(args.seed),
+        user_tokens={w: create_access_token(user_email(w + 1)) for w in range(args.concurrency)},
+        admin_token=create_access_token(user_email(1)),
+        rosters=rosters,
+        run_id=time.time_ns() // 1_000_000 % 1_000_000,
+    )
+    return ctx
+
+
+async def run(args) -> int:
+    ctx = make_context(args)
+
+    import httpx
+
+    from app.main import app
+
+    selected = [s for s in SCENARIOS if not args.only or s.name in args.only]
+    results: Dict[str, dict] = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for scenario in selected:
+            await run_scenario(client, ctx, scenario, min(20, args.requests), args.concurrency)  # échauffement
+            results[scenario.name] = await run_scenario(client, ctx, scenario, args.requests, args.concurrency)
+            r = results[scenario.name]
+            print(f"{scenario.name:<20} p50={r['p50_ms']:>8.2f}ms p95={r['p95_ms']:>8.2f}ms "
+                  f"p99={r['p99_ms']:>8.2f}ms rps={r['rps']:>8.1f} errors={r['errors']}")
+
+    failed = failures(results)
+    for line in failed:
+        print(f"ERROR {line}")
+
+    baseline_path = BASELINE_DIR / f"{args.scale}.json"
+    if args.save_baseline:
+        if failed:
+            print("baseline not saved: some scenarios failed")
+            return 1
+        BASELINE_DIR.mkdir(exist_ok=True)
+        baseline_path.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+        print(f"baseline saved to {baseline_path}")
+        return 0
+    if args.output:
+        pathlib.Path(args.output).write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+    if baseline_path.exists():
+        regressions = compare(results, json.loads(baseline_path.read_text()), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions or failed else 0
+    print(f"no baseline at {baseline_path} (use --save-baseline)")
+    return 1 if failed else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite:///bench.db")
+    parser.add_argument("--scale", default="tiny")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="dégradation tolérée (0.25 = 25%%)")
+    parser.add_argument("--only", nargs="*")
+    parser.add_argument("--output", help="écrit aussi les résultats dans ce fichier JSON")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+"""Client Python de l'API MyFantasyLeague (voir ``mfl_client.client``)."""
+
+from .client import ApiError, AsyncClient, Client, RetryPolicy, TokenCache, tokens
+
+__all__ = ["ApiError", "AsyncClient", "Client", "RetryPolicy", "TokenCache", "tokens"]
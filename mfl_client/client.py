@@ -0,0 +1,479 @@
+"""Client Python de l'API MyFantasyLeague (synchrone et asynchrone).
+
+Pour les bots et scripts d'analyse qui appelaient l'API en boucle :
+
+- un seul pool de connexions ``httpx`` par client (keep-alive), partagé
+  entre threads (``Client``) ou tâches (``AsyncClient``) ;
+- tokens gardés dans un ``TokenCache`` partagé par les clients du
+  processus (une connexion par URL, email et mot de passe : un client au
+  mot de passe erroné ne réutilise pas le token d'un autre), renouvelés
+  avant leur expiration (champ ``exp`` du JWT) et après un ``401`` ;
+- ``iter_players`` lit plusieurs pages de ``/players`` en parallèle
+  (``prefetch`` pages d'avance) et les rend dans l'ordre ;
+- ``add_players`` envoie de grandes listes à ``POST /team/players`` par
+  lots, chacun avec sa propre ``Idempotency-Key`` ;
+- nouvelles tentatives avec attente exponentielle et gigue (« full
+  jitter ») sur les erreurs de connexion et les codes 429 / 502 / 503 /
+  504.  Une requête qui a pu atteindre le serveur n'est répétée que si
+  elle est idempotente (GET, PUT, DELETE, ou POST avec ``Idempotency-Key``).
+
+Exemple ::
+
+    from mfl_client import Client
+
+    with Client("http://localhost:8000", "user@example.com", "user123") as api:
+        cheap = [p for p in api.iter_players() if p["cost"] < 5_000_000]
+        api.create_team("Bot FC")
+        api.add_players([p["id"] for p in cheap[:11]])
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import httpx
+
+
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+IDEMPOTENT_METHODS = ("GET", "HEAD", "PUT", "DELETE")
+
+# Erreurs survenues avant l'envoi de la requête : toujours répétables
+_NOT_SENT = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class ApiError(Exception):
+    """Réponse d'erreur de l'API (``status_code`` et ``detail``)."""
+
+    def __init__(self, status_code: int, detail: Any, response: Optional[httpx.Response] = None):
+        super().__init__(f"{status_code}: {detail}")
+        self.status_code = status_code
+        self.detail = detail
+        self.response = response
+
+
+@dataclass
+class RetryPolicy:
+    """Nombre d'essais et attente ``uniform(0, min(max_backoff, backoff * 2**n))``."""
+
+    attempts: int = 4
+    backoff: float = 0.1
+    max_backoff: float = 2.0
+    statuses: Tuple[int, ...] = (429, 502, 503, 504)
+
+    def delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after:
+            try:
+                return min(float(retry_after), self.max_backoff * 4)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+
+def token_expiry(token: str) -> Optional[float]:
+    """Champ ``exp`` du JWT (lu sans vérifier la signature), ``None`` si absent."""
+    try:
+        payload = token.split(".")[1]
+        data = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return float(data["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+# (url, email, empreinte du mot de passe)
+TokenKey = Tuple[str, str, str]
+
+# Clé de l'empreinte des mots de passe, propre au processus
+_PASSWORD_KEY = os.urandom(16)
+
+
+def password_digest(password: Optional[str]) -> str:
+    """Empreinte du mot de passe pour la clé du cache (le mot de passe n'y est pas gardé)."""
+    if password is None:
+        return ""
+    return hashlib.blake2b(password.encode(), key=_PASSWORD_KEY, digest_size=16).hexdigest()
+
+
+class TokenCache:
+    """Tokens par ``(url, email, mot de passe)``, renouvelés ``margin`` secondes avant expiration."""
+
+    def __init__(self, margin: float = 30.0):
+        self.margin = margin
+        self._tokens: Dict[TokenKey, Tuple[str, Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: TokenKey) -> Optional[str]:
+        with self._lock:
+            entry = self._tokens.get(key)
+        if entry is None:
+            return None
+        token, expires = entry
+        if expires is not None and expires - self.margin <= time.time():
+            return None
+        return token
+
+    def put(self, key: TokenKey, token: str) -> None:
+        with self._lock:
+            self._tokens[key] = (token, token_expiry(token))
+
+    def discard(self, key: TokenKey, token: str) -> None:
+        """Oublie ``token`` (refusé par le serveur) s'il n'a pas déjà été remplacé."""
+        with self._lock:
+            entry = self._tokens.get(key)
+            if entry is not None and entry[0] == token:
+                del self._tokens[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tokens.clear()
+
+
+# Partagé par tous les clients du processus
+tokens = TokenCache()
+
+
+def chunks(items: Sequence[int], size: int) -> Iterator[List[int]]:
+    for start in range(0, len(items), size):
+        yield list(items[start:start + size])
+
+
+class _Routes:
+    """Routes de ``routers/auth.py``, ``routers/players.py`` et ``routers/team.py``.
+
+    ``_call`` renvoie le résultat (``Client``) ou une coroutine
+    (``AsyncClient``) : les mêmes méthodes servent aux deux clients.
+    """
+
+    # --- auth ---
+
+    def register(self, email: str, password: str):
+        return self._call("POST", "/auth/register", json={"email": email, "password": password}, auth=False)
+
+    # --- players ---
+
+    def list_players(self, skip: int = 0, limit: int = 100, fields: Optional[Iterable[str]] = None):
+        params: Dict[str, Any] = {"skip": skip, "limit": limit}
+        if fields:
+            params["fields"] = ",".join(fields)
+        return self._call("GET", "/players/", params=params, auth=False)
+
+    def get_player(self, player_id: int):
+        return self._call("GET", f"/players/{player_id}", auth=False)
+
+    def player_stats(self, player_id: int):
+        return self._call("GET", f"/players/{player_id}/stats", auth=False)
+
+    def player_form(self, player_id: int, last: Optional[int] = None):
+        params = {"last": last} if last is not None else None
+        return self._call("GET", f"/players/{player_id}/form", params=params, auth=False)
+
+    def similar_players(self, player_id: int, max_cost: Optional[float] = None, limit: int = 10):
+        params: Dict[str, Any] = {"limit": limit}
+        if max_cost is not None:
+            params["max_cost"] = max_cost
+        return self._call("GET", f"/players/{player_id}/similar", params=params, auth=False)
+
+    def ownership(self, limit: int = 20):
+        return self._call("GET", "/players/ownership", params={"limit": limit}, auth=False)
+
+    def create_player(self, player: Dict[str, Any]):
+        return self._call("POST", "/players/", json=player)
+
+    def update_player(self, player_id: int, changes: Dict[str, Any]):
+        return self._call("PUT", f"/players/{player_id}", json=changes)
+
+    def delete_player(self, player_id: int):
+        return self._call("DELETE", f"/players/{player_id}")
+
+    def ingest_stats(self, events: List[Dict[str, Any]]):
+        return self._call("POST", "/players/stats", json=events)
+
+    # --- team ---
+
+    def get_team(self, fields: Optional[Iterable[str]] = None):
+        params = {"fields": ",".join(fields)} if fields else None
+        return self._call("GET", "/team/", params=params)
+
+    def create_team(self, name: str):
+        """Crée ou réinitialise l'équipe (répétable sans risque : ``Idempotency-Key``)."""
+        return self._call("POST", "/team/", json={"name": name}, idempotency_key=str(uuid.uuid4()))
+
+    def remove_player(self, player_id: int):
+        return self._call("DELETE", f"/team/players/{player_id}")
+
+
+class _BaseClient(_Routes):
+    def __init__(
+        self,
+        base_url: str,
+        email: Optional[str],
+        password: Optional[str],
+        retry: Optional[RetryPolicy],
+        token_cache: Optional[TokenCache],
+        page_size: int,
+        prefetch: int,
+        batch_size: int,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.email = email
+        self.password = password
+        self.retry = retry or RetryPolicy()
+        self.tokens = token_cache if token_cache is not None else tokens
+        self.page_size = page_size
+        self.prefetch = max(prefetch, 1)
+        self.batch_size = max(batch_size, 1)
+
+    @property
+    def _token_key(self) -> TokenKey:
+        return (self.base_url, self.email or "", password_digest(self.password))
+
+    def _headers(self, token: Optional[str], idempotency_key: Optional[str]) -> Dict[str, str]:
+        headers = {}
+        if token is not None:
+            headers["Authorization"] = f"Bearer {token}"
+        if idempotency_key is not None:
+            headers[IDEMPOTENCY_HEADER] = idempotency_key
+        return headers
+
+    def _retry_delay(self, method: str, idempotency_key: Optional[str], attempt: int,
+                     response: Optional[httpx.Response] = None, error: Optional[Exception] = None) -> Optional[float]:
+        """Attente avant le prochain essai, ``None`` s'il ne faut pas réessayer."""
+        if attempt + 1 >= self.retry.attempts:
+            return None
+        repeatable = method in IDEMPOTENT_METHODS or idempotency_key is not None
+        if error is not None:
+            if isinstance(error, _NOT_SENT) or repeatable:
+                return self.retry.delay(attempt)
+            return None
+        if response is not None and response.status_code in self.retry.statuses and repeatable:
+            return self.retry.delay(attempt, response.headers.get("Retry-After"))
+        return None
+
+    @staticmethod
+    def _result(response: httpx.Response) -> Any:
+        if response.status_code >= 400:
+            try:
+                detail = response.json().get("detail")
+            except ValueError:
+                detail = response.text
+            raise ApiError(response.status_code, detail, response)
+        if response.status_code == 204 or not response.content:
+            return None
+        return response.json()
+
+    def _login_request(self) -> Dict[str, Any]:
+        if not self.email or not self.password:
+            raise ApiError(401, "email and password are required for this route")
+        return {"data": {"username": self.email, "password": self.password}}
+
+
+class Client(_BaseClient):
+    """Client synchrone ; utilisable depuis plusieurs threads."""
+
+    def __init__(
+        self,
+        base_url: str = "http://localhost:8000",
+        email: Optional[str] = None,
+        password: Optional[str] = None,
+        *,
+        retry: Optional[RetryPolicy] = None,
+        token_cache: Optional[TokenCache] = None,
+        page_size: int = 100,
+        prefetch: int = 4,
+        batch_size: int = 50,
+        timeout: float = DEFAULT_TIMEOUT,
+        http: Optional[httpx.Client] = None,
+    ):
+        super().__init__(base_url, email, password, retry, token_cache, page_size, prefetch, batch_size)
+        # ``http`` fourni par l'appelant (ex. client de test) : il le ferme lui-même
+        self._owns_http = http is None
+        self.http = http or httpx.Client(base_url=self.base_url, timeout=timeout, limits=DEFAULT_LIMITS)
+        self._login_lock = threading.Lock()
+        self._sleep = time.sleep
+
+    def __enter__(self) -> "Client":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._owns_http:
+            self.http.close()
+
+    def login(self) -> str:
+        """Token valide (en cache, ou nouvelle connexion)."""
+        token = self.tokens.get(self._token_key)
+        if token is not None:
+            return token
+        with self._login_lock:
+            # Un autre thread a pu se connecter pendant l'attente
+            token = self.tokens.get(self._token_key)
+            if token is None:
+                data = self._call("POST", "/auth/login", auth=False, **self._login_request())
+                token = data["access_token"]
+                self.tokens.put(self._token_key, token)
+        return token
+
+    def _call(self, method: str, path: str, *, auth: bool = True, idempotency_key: Optional[str] = None, **kwargs) -> Any:
+        relogged = False
+        attempt = 0
+        while True:
+            token = self.login() if auth else None
+            try:
+                response = self.http.request(method, path, headers=self._headers(token, idempotency_key), **kwargs)
+            except httpx.TransportError as exc:
+                delay = self._retry_delay(method, idempotency_key, attempt, error=exc)
+                if delay is None:
+                    raise
+                self._sleep(delay)
+                attempt += 1
+                continue
+            if response.status_code == 401 and auth and not relogged:
+                # Token expiré ou révoqué : nouvelle connexion, une seule fois
+                self.tokens.discard(self._token_key, token)
+                relogged = True
+                continue
+            delay = self._retry_delay(method, idempotency_key, attempt, response=response)
+            if delay is None:
+                return self._result(response)
+            self._sleep(delay)
+            attempt += 1
+
+    def iter_players(self, page_size: Optional[int] = None, prefetch: Optional[int] = None,
+                     fields: Optional[Iterable[str]] = None) -> Iterator[dict]:
+        """Tout le catalogue, page par page, ``prefetch`` pages lues d'avance en parallèle."""
+        size = page_size or self.page_size
+        window = prefetch or self.prefetch
+        fields = list(fields) if fields else None
+        with ThreadPoolExecutor(max_workers=window, thread_name_prefix="mfl-prefetch") as pool:
+            pending = deque(pool.submit(self.list_players, i * size, size, fields) for i in range(window))
+            next_page = window
+            try:
+                while pending:
+                    page = pending.popleft().result()
+                    yield from page
+                    if len(page) < size:
+                        return
+                    pending.append(pool.submit(self.list_players, next_page * size, size, fields))
+                    next_page += 1
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def add_players(self, player_ids: Sequence[int], batch_size: Optional[int] = None) -> Optional[dict]:
+        """Ajoute les joueurs par lots ; retourne la vue de l'équipe après le dernier lot."""
+        team = None
+        for batch in chunks(player_ids, batch_size or self.batch_size):
+            team = self._call("POST", "/team/players", json=batch, idempotency_key=str(uuid.uuid4()))
+        return team
+
+
+class AsyncClient(_BaseClient):
+    """Client asynchrone (``await api.get_team()``, ``async for p in api.iter_players()``)."""
+
+    def __init__(
+        self,
+        base_url: str = "http://localhost:8000",
+        email: Optional[str] = None,
+        password: Optional[str] = None,
+        *,
+        retry: Optional[RetryPolicy] = None,
+        token_cache: Optional[TokenCache] = None,
+        page_size: int = 100,
+        prefetch: int = 4,
+        batch_size: int = 50,
+        timeout: float = DEFAULT_TIMEOUT,
+        http: Optional[httpx.AsyncClient] = None,
+    ):
+        super().__init__(base_url, email, password, retry, token_cache, page_size, prefetch, batch_size)
+        self._owns_http = http is None
+        self.http = http or httpx.AsyncClient(base_url=self.base_url, timeout=timeout, limits=DEFAULT_LIMITS)
+        self._login_lock: Optional[asyncio.Lock] = None
+        self._sleep = asyncio.sleep
+
+    async def __aenter__(self) -> "AsyncClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        if self._owns_http:
+            await self.http.aclose()
+
+    async def login(self) -> str:
+        token = self.tokens.get(self._token_key)
+        if token is not None:
+            return token
+        if self._login_lock is None:
+            self._login_lock = asyncio.Lock()
+        async with self._login_lock:
+            token = self.tokens.get(self._token_key)
+            if token is None:
+                data = await self._call("POST", "/auth/login", auth=False, **self._login_request())
+                token = data["access_token"]
+                self.tokens.put(self._token_key, token)
+        return token
+
+    async def _call(self, method: str, path: str, *, auth: bool = True, idempotency_key: Optional[str] = None, **kwargs) -> Any:
+        relogged = False
+        attempt = 0
+        while True:
+            token = await self.login() if auth else None
+            try:
+                response = await self.http.request(method, path, headers=self._headers(token, idempotency_key), **kwargs)
+            except httpx.TransportError as exc:
+                delay = self._retry_delay(method, idempotency_key, attempt, error=exc)
+                if delay is None:
+                    raise
+                await self._sleep(delay)
+                attempt += 1
+                continue
+            if response.status_code == 401 and auth and not relogged:
+                self.tokens.discard(self._token_key, token)
+                relogged = True
+                continue
+            delay = self._retry_delay(method, idempotency_key, attempt, response=response)
+            if delay is None:
+                return self._result(response)
+            await self._sleep(delay)
+            attempt += 1
+
+    async def iter_players(self, page_size: Optional[int] = None, prefetch: Optional[int] = None,
+                           fields: Optional[Iterable[str]] = None) -> AsyncIterator[dict]:
+        size = page_size or self.page_size
+        window = prefetch or self.prefetch
+        fields = list(fields) if fields else None
+        pending = deque(asyncio.ensure_future(self.list_players(i * size, size, fields)) for i in range(window))
+        next_page = window
+        try:
+            while pending:
+                page = await pending.popleft()
+                for player in page:
+                    yield player
+                if len(page) < size:
+                    return
+                pending.append(asyncio.ensure_future(self.list_players(next_page * size, size, fields)))
+                next_page += 1
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def add_players(self, player_ids: Sequence[int], batch_size: Optional[int] = None) -> Optional[dict]:
+        team = None
+        for batch in chunks(player_ids, batch_size or self.batch_size):
+            team = await self._call("POST", "/team/players", json=batch, idempotency_key=str(uuid.uuid4()))
+        return team